@@ -1,106 +1,889 @@
-from flask import Flask, request, jsonify
-from pathlib import Path
-import tempfile
-import os
-from formats import extract_invoice_data
-
-app = Flask(__name__)
-
-# Configure max file size (16 MB)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-
-@app.route('/extract', methods=['POST'])
-def extract_invoice():
-    """
-    Extract invoice data from uploaded text file.
-    Expects a file upload with key 'file' in the request.
-    Returns JSON with extracted invoice data.
-    """
-    try:
-        # Check if file is present in request
-        if 'file' not in request.files:
-            return jsonify({
-                'error': 'No file provided',
-                'message': 'Please upload a file with key "file"'
-            }), 400
-        
-        file = request.files['file']
-        
-        # Check if file has a filename
-        if file.filename == '':
-            return jsonify({
-                'error': 'No file selected',
-                'message': 'Please select a file to upload'
-            }), 400
-        
-        # Check file extension
-        if not file.filename.endswith('.txt'):
-            return jsonify({
-                'error': 'Invalid file type',
-                'message': 'Only .txt files are allowed'
-            }), 400
-        
-        # Read file content
-        try:
-            text_content = file.read().decode('utf-8')
-        except UnicodeDecodeError:
-            return jsonify({
-                'error': 'File encoding error',
-                'message': 'File must be UTF-8 encoded text'
-            }), 400
-        
-        # Extract invoice data
-        extracted_data = extract_invoice_data(text_content)
-        
-        return jsonify({
-            'success': True,
-            'filename': file.filename,
-            'data': extracted_data
-        }), 200
-    
-    except Exception as e:
-        return jsonify({
-            'error': 'Extraction failed',
-            'message': str(e)
-        }), 500
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Invoice extraction API is running'
-    }), 200
-
-@app.route('/', methods=['GET'])
-def index():
-    """API documentation"""
-    return jsonify({
-        'name': 'Invoice Data Extraction API',
-        'version': '1.0',
-        'endpoints': {
-            'POST /extract': {
-                'description': 'Extract invoice data from text file',
-                'parameters': {
-                    'file': 'Text file (multipart/form-data)'
-                },
-                'response': 'JSON with extracted invoice data'
-            },
-            'GET /health': {
-                'description': 'Health check endpoint'
-            }
-        },
-        'example': {
-            'curl': 'curl -X POST -F "file=@invoice.txt" http://localhost:5000/extract'
-        }
-    }), 200
-
-@app.errorhandler(413)
-def file_too_large(e):
-    return jsonify({
-        'error': 'File too large',
-        'message': 'File size exceeds 16 MB limit'
-    }), 413
-
-if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+from flask import Flask, Request, Response, request, current_app
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from pathlib import Path
+import tempfile
+import os
+import io
+import codecs
+import json
+import mmap
+import shutil
+import sys
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import Future
+from formats import PATTERN_TIMEOUT, DOCUMENT_TIMEOUT, resolve_fields, select_fields, warm_up
+from executor import create_executor, ExecutorSaturated
+from jobs import JobQueueFull, create_job_queue
+from cache import create_cache, normalize_text
+from metrics import create_metrics
+from serializer import create_serializer
+from splitter import extract_invoices
+
+
+class ExtractionRequest(Request):
+    """Request with separate upload size and part limits for the batch route"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'extract_batch':
+            return current_app.config['BATCH_MAX_CONTENT_LENGTH']
+        return current_app.config['MAX_CONTENT_LENGTH']
+
+    @property
+    def max_form_parts(self):
+        if self.endpoint == 'extract_batch':
+            return current_app.config['BATCH_MAX_FORM_PARTS']
+        return current_app.config['MAX_FORM_PARTS']
+
+    def _load_form_data(self):
+        # Werkzeug raises the same bare 413 for every limit; say which one
+        try:
+            super()._load_form_data()
+        except RequestEntityTooLarge as e:
+            if e.description != RequestEntityTooLarge.description:
+                raise
+            limit = self.max_content_length
+            if self.content_length is not None and limit is not None and self.content_length > limit:
+                raise RequestEntityTooLarge(f'File size exceeds {format_size(limit)} limit') from e
+            raise RequestEntityTooLarge(
+                f'Too many form parts (at most {self.max_form_parts}) or a non-file field over '
+                f'{self.max_form_memory_size} bytes'
+            ) from e
+
+
+app = Flask(__name__)
+app.request_class = ExtractionRequest
+
+# Configure max file size (16 MB)
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+
+# Batch uploads: total request size (256 MB by default) and number of files
+app.config['BATCH_MAX_CONTENT_LENGTH'] = int(os.environ.get('BATCH_MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+app.config['BATCH_MAX_FILES'] = int(os.environ.get('BATCH_MAX_FILES', 10000))
+# Multipart parts of a batch: every file plus a few form fields (Werkzeug's
+# default of 1000 parts would cut batches far below BATCH_MAX_FILES)
+app.config['BATCH_MAX_FORM_PARTS'] = app.config['BATCH_MAX_FILES'] + 100
+
+# Time budgets (seconds) for a single pattern search and a whole document
+app.config['PATTERN_TIMEOUT'] = float(os.environ.get('PATTERN_TIMEOUT', PATTERN_TIMEOUT))
+app.config['DOCUMENT_TIMEOUT'] = float(os.environ.get('DOCUMENT_TIMEOUT', DOCUMENT_TIMEOUT))
+
+# How long a batch may wait for executor slots after its first document (seconds)
+app.config['BATCH_SUBMIT_TIMEOUT'] = float(os.environ.get('BATCH_SUBMIT_TIMEOUT', 30))
+
+# Document time budget of POST /jobs extractions, which no client waits on;
+# raise it to let slow documents finish instead of coming back partial
+app.config['JOBS_DOCUMENT_TIMEOUT'] = float(os.environ.get('JOBS_DOCUMENT_TIMEOUT', app.config['DOCUMENT_TIMEOUT']))
+
+# Per-process services, built by init_services() (after the fork under
+# gunicorn, see gunicorn.conf.py) or on the first request:
+# - executor: extraction on a process pool sized to the CPU count (see
+#   executor.py; EXTRACT_EXECUTOR=inline runs it in the request thread instead)
+# - cache: optional content-addressed result cache (RESULT_CACHE=1, see cache.py)
+# - metrics: optional per-alternative and per-section timings on GET /metrics
+#   (EXTRACT_METRICS=1, see metrics.py)
+# - serializer: response encoding, orjson when installed, else the json module
+#   (JSON_SERIALIZER=json|orjson, see serializer.py)
+# - jobs, job_executor: the POST /jobs queue (see jobs.py) and the executor
+#   its job threads extract on (JOBS_EXECUTOR, default a process pool with
+#   one process per job thread, so the pattern time budget stays enforced),
+#   built by the first job (job_pool()): workers that never run one never
+#   start its processes
+executor = None
+cache = None
+metrics = None
+serializer = None
+jobs = None
+job_executor = None
+job_executor_lock = threading.Lock()
+# Held while ensure_services() builds the services of a process
+services_lock = threading.Lock()
+
+# Readiness: set once warm_up_services() has run the self-test extraction
+# and started the executor's workers; GET /ready answers 503 until then
+ready = threading.Event()
+warm_up_seconds = None
+warm_up_error = None
+
+
+def init_services():
+    """
+    Build the executor, cache, metrics and serializer of this process from
+    the environment. Process pools and SQLite connections must not cross a
+    fork, so a preloading server calls this in every worker, not the master.
+    """
+    global executor, cache, metrics, serializer, jobs, job_executor
+    pool = create_executor()
+    cache = create_cache()
+    metrics = create_metrics()
+    serializer = create_serializer()
+    jobs = create_job_queue(run_job)
+    job_executor = None
+    # Last: ensure_services() takes a set executor for built services
+    executor = pool
+    # In the background, so /health and /ready answer while it runs
+    threading.Thread(target=warm_up_services, name='warm-up', daemon=True).start()
+
+
+def warm_up_services():
+    """
+    Run the extraction self-test (formats.warm_up()) and start the
+    executor's worker processes, then mark this process ready
+    """
+    global warm_up_seconds, warm_up_error
+    start = time.perf_counter()
+    try:
+        warm_up()
+        executor.warm()
+    except Exception as e:
+        warm_up_error = str(e) or type(e).__name__
+        app.logger.error('Warm-up failed: %s', warm_up_error)
+        return
+    warm_up_seconds = time.perf_counter() - start
+    ready.set()
+
+
+def shutdown_services(wait=True):
+    """
+    Stop this process's executors, finishing (wait) or dropping the
+    documents in flight; jobs still queued are marked failed
+    """
+    if jobs is not None:
+        jobs.shutdown()
+    for pool in (executor, job_executor):
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+@app.before_request
+def ensure_services():
+    """Build the services on the first request of a process that has none yet"""
+    if executor is None:
+        # Concurrent first requests (threaded servers) must not build two sets
+        with services_lock:
+            if executor is None:
+                init_services()
+
+
+def create_app():
+    """
+    WSGI application factory for production servers, e.g.
+    gunicorn -c gunicorn.conf.py "app:create_app()".
+    Importing this module compiles every extraction pattern, so with
+    preload the workers share them copy-on-write; the per-process services
+    are left to each worker (init_services()).
+    """
+    return app
+
+
+@app.route('/extract', methods=['POST'])
+def extract_invoice():
+    """
+    Extract invoice data from uploaded text file.
+    Expects a file upload with key 'file' in the request.
+    Returns JSON with extracted invoice data. If some fields ran out of
+    time the response is marked partial and lists them in timed_out_fields.
+    An optional ?fields=A,B query parameter limits extraction to those fields;
+    ?pretty=1 indents the response. With ?split=1 the file may hold several
+    invoices back to back: they are extracted in parallel and returned as
+    a list under 'invoices', each with its character offsets in the file.
+    """
+    try:
+        try:
+            fields = requested_fields()
+        except ValueError as e:
+            return invalid_fields(e)
+        
+        # Check if file is present in request
+        if 'file' not in request.files:
+            return json_response({
+                'error': 'No file provided',
+                'message': 'Please upload a file with key "file"'
+            }), 400
+        
+        file = request.files['file']
+        
+        # Check if file has a filename
+        if file.filename == '':
+            return json_response({
+                'error': 'No file selected',
+                'message': 'Please select a file to upload'
+            }), 400
+        
+        # Check file extension
+        if not file.filename.endswith('.txt'):
+            return json_response({
+                'error': 'Invalid file type',
+                'message': 'Only .txt files are allowed'
+            }), 400
+        
+        # Read file content
+        try:
+            text_content = read_upload(file.stream)
+        except UnicodeDecodeError:
+            return json_response({
+                'error': 'File encoding error',
+                'message': 'File must be UTF-8 encoded text'
+            }), 400
+        
+        if request.args.get('split', '').lower() in ('1', 'true', 'yes', 'on'):
+            try:
+                invoices = extract_split(text_content, fields)
+            except ExecutorSaturated:
+                return server_busy()
+            return json_response({
+                'success': True,
+                'filename': file.filename,
+                'invoices': [
+                    dict({'start': invoice['start'], 'end': invoice['end']}, **extraction_result(file.filename, invoice['data']))
+                    for invoice in invoices
+                ]
+            }), 200
+
+        # Extract invoice data
+        try:
+            submission = submit_extraction(text_content, fields=fields)
+        except ExecutorSaturated:
+            return server_busy()
+        extracted_data = collect_extraction(submission)
+        return json_response(extraction_result(file.filename, extracted_data, submission.cache_status)), 200
+    
+    except HTTPException:
+        # Upload limits (413) are answered by their error handlers
+        raise
+    except Exception as e:
+        return json_response({
+            'error': 'Extraction failed',
+            'message': str(e)
+        }), 500
+
+
+def json_response(payload):
+    """JSON response of payload; compact unless the request asks for ?pretty=1"""
+    pretty = request.args.get('pretty', '').lower() in ('1', 'true', 'yes', 'on')
+    return Response(serializer.dumps(payload, pretty=pretty), mimetype='application/json')
+
+
+def wants_ndjson():
+    """Whether the client prefers application/x-ndjson over application/json"""
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def requested_fields():
+    """
+    Field names of the ?fields=A,B query parameter, or None to extract
+    everything; raises ValueError for names extraction does not know
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    resolve_fields(fields)
+    return fields
+
+
+def invalid_fields(error):
+    """400 response for an unusable fields parameter"""
+    return json_response({
+        'error': 'Invalid fields',
+        'message': str(error)
+    }), 400
+
+
+# cache_status is "hit" or "miss", or None when the cache is off;
+# cache_key is None when the result must not be stored
+Submission = namedtuple('Submission', ['future', 'cache_status', 'cache_key'])
+
+
+def submit_extraction(text_content, block=False, timeout=None, fields=None, pool=None, document_timeout=None):
+    """
+    Hand one document to the executor (pool, the request executor by
+    default); raises ExecutorSaturated when it is full.
+    The text is normalized first (cache.normalize_text()); documents found
+    in the result cache are answered without the executor.
+    With fields only those fields are extracted; such partial results are
+    served from cached full results but never cached themselves.
+    """
+    pool = pool or executor
+    # Whether or not the cache is on, so both extract the same text
+    text_content = normalize_text(text_content)
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(text_content)
+        cached_data, _ = cache.get(cache_key)
+        if cached_data is not None:
+            if fields is not None:
+                cached_data = select_fields(cached_data, fields)
+            future = Future()
+            future.set_result(cached_data)
+            return Submission(future, 'hit', cache_key)
+        if fields is not None:
+            cache_key = None
+    future = pool.submit(
+        text_content,
+        block=block,
+        timeout=timeout,
+        pattern_timeout=app.config['PATTERN_TIMEOUT'],
+        document_timeout=document_timeout or app.config['DOCUMENT_TIMEOUT'],
+        profile=metrics is not None,
+        fields=fields
+    )
+    return Submission(future, 'miss' if cache is not None else None, cache_key)
+
+
+def collect_extraction(submission):
+    """Wait for a submitted document, record its profile and store fresh results in the cache"""
+    extracted_data = submission.future.result()
+    profile = extracted_data.pop('Profile', None)
+    if profile is not None:
+        metrics.observe(profile)
+    if submission.cache_status == 'miss' and submission.cache_key is not None:
+        cache.put(submission.cache_key, extracted_data)
+    return extracted_data
+
+
+def extract_split(text_content, fields=None):
+    """
+    Split a document holding several invoices (splitter.py) and extract
+    them in parallel, each as a document of its own (cached on its own);
+    raises ExecutorSaturated when not even the first one can be submitted.
+    """
+    def extract_all(texts, segment_fields):
+        submissions = []
+        for text in texts:
+            # Like a batch: only the first invoice may be turned away
+            submissions.append(submit_extraction(
+                text,
+                block=bool(submissions),
+                timeout=app.config['BATCH_SUBMIT_TIMEOUT'],
+                fields=segment_fields
+            ))
+        return [collect_extraction(submission) for submission in submissions]
+
+    return extract_invoices(text_content, extract_all, fields)
+
+
+def server_busy():
+    """429 response telling the client to retry shortly"""
+    return json_response({
+        'error': 'Server busy',
+        'message': 'Too many documents are being processed, retry shortly'
+    }), 429, {'Retry-After': '1'}
+
+
+def extraction_result(filename, extracted_data, cache_status=None):
+    """Build the response entry for one extracted document"""
+    timed_out_fields = extracted_data.pop('TimedOutFields', [])
+    
+    result = {
+        'success': True,
+        'filename': filename,
+        'data': extracted_data
+    }
+    if cache_status:
+        result['cache'] = cache_status
+    if timed_out_fields:
+        result['partial'] = True
+        result['timed_out_fields'] = timed_out_fields
+    return result
+
+
+def error_result(filename, error, message):
+    """Response entry for a batch document that could not be processed"""
+    return {
+        'success': False,
+        'filename': filename,
+        'error': error,
+        'message': message
+    }
+
+
+class BatchError(Exception):
+    """The batch as a whole is unusable (bad zip, too many files, ...)"""
+
+    def __init__(self, error, message, status=400):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+
+
+# ===== UPLOAD DECODING =====
+# Uploads are decoded without first reading them into a bytes object, so the
+# only full-size copy of a document is the str that extraction runs on (the
+# patterns are str patterns and cannot search a bytes buffer directly).
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Bodies below this stay in memory while a zip batch is spooled
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+def decode_stream(stream):
+    """Decode a binary stream as UTF-8 chunk by chunk"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pieces = []
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        pieces.append(decoder.decode(chunk))
+    pieces.append(decoder.decode(b'', final=True))
+    return ''.join(pieces)
+
+
+def read_upload(stream):
+    """
+    Decode an uploaded file as UTF-8; raises UnicodeDecodeError like bytes.decode().
+    Werkzeug spools uploads over 500 KB to a temporary file, which is
+    memory-mapped and decoded in place; smaller uploads are decoded straight
+    from their in-memory buffer. Any other stream is decoded chunk by chunk.
+    """
+    # Look at the spooled file itself: SpooledTemporaryFile.fileno() would
+    # force an in-memory upload out to disk
+    raw = stream._file if isinstance(stream, tempfile.SpooledTemporaryFile) else stream
+    if isinstance(raw, io.BytesIO):
+        with raw.getbuffer() as view:
+            return str(view, 'utf-8')
+    try:
+        fileno = raw.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fileno = None
+    if fileno is not None and os.fstat(fileno).st_size > 0:
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, 'utf-8')
+    return decode_stream(raw)
+
+
+def decode_document(filename, read_text):
+    """Return (text, None) for a UTF-8 .txt document, or (None, error entry)"""
+    if not filename:
+        return None, error_result(filename, 'No file selected', 'Every file needs a filename')
+    if not filename.endswith('.txt'):
+        return None, error_result(filename, 'Invalid file type', 'Only .txt files are allowed')
+    try:
+        return read_text(), None
+    except UnicodeDecodeError:
+        return None, error_result(filename, 'File encoding error', 'File must be UTF-8 encoded text')
+
+
+def multipart_documents():
+    """Yield (filename, text, error) for every uploaded file (key "files" or "file")"""
+    uploads = request.files.getlist('files') + request.files.getlist('file')
+    if not uploads:
+        raise BatchError('No file provided', 'Please upload files with key "files"')
+    for upload in uploads:
+        if upload.filename.endswith('.zip'):
+            yield from zip_documents(upload.stream)
+            continue
+        text, error = decode_document(upload.filename, lambda: read_upload(upload.stream))
+        yield upload.filename, text, error
+
+
+def spooled_body():
+    """Copy the request body to a seekable spooled file without buffering it as bytes"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    shutil.copyfileobj(request.stream, spooled, UPLOAD_CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def zip_documents(fileobj):
+    """Yield (filename, text, error) for every .txt member of a zip archive"""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise BatchError('Invalid zip file', 'The request body is not a readable zip archive')
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    # Refuse archives that would inflate past the batch size limit
+    if sum(info.file_size for info in members) > app.config['BATCH_MAX_CONTENT_LENGTH']:
+        raise BatchError('Batch too large', 'Uncompressed zip contents exceed the batch size limit', 413)
+    for info in members:
+        def read_member():
+            with archive.open(info) as member:
+                return decode_stream(member)
+        try:
+            text, error = decode_document(info.filename, read_member)
+        except (zipfile.BadZipFile, ValueError, RuntimeError) as e:
+            yield info.filename, None, error_result(info.filename, 'Invalid zip member', str(e))
+            continue
+        yield info.filename, text, error
+
+
+def ndjson_documents(lines):
+    """Yield (filename, text, error) for every {"filename": ..., "text": ...} line"""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        filename = f'line {line_number}'
+        try:
+            record = json.loads(line)
+            filename = record.get('filename') or filename
+            text = record['text']
+        except (ValueError, AttributeError, KeyError, TypeError):
+            yield filename, None, error_result(
+                filename, 'Invalid NDJSON record', 'Each line must be a JSON object with a "text" field')
+            continue
+        if not isinstance(text, str):
+            yield filename, None, error_result(filename, 'Invalid NDJSON record', '"text" must be a string')
+            continue
+        yield filename, text, None
+
+
+def batch_documents():
+    """Pick the batch reader from the request's content type"""
+    mimetype = request.mimetype
+    if mimetype == 'multipart/form-data':
+        return multipart_documents()
+    if mimetype in ('application/zip', 'application/x-zip-compressed'):
+        return zip_documents(spooled_body())
+    if mimetype in ('application/x-ndjson', 'application/jsonlines', 'application/jsonl'):
+        # One line at a time straight off the request stream
+        return ndjson_documents(request.stream)
+    raise BatchError(
+        'Unsupported content type',
+        'Send multipart/form-data files, an application/zip body or an application/x-ndjson body',
+        415
+    )
+
+
+@app.route('/extract/batch', methods=['POST'])
+def extract_batch():
+    """
+    Extract invoice data from many documents in one request.
+    Accepts multipart files (key "files"; .zip uploads are expanded), a zip
+    body or an NDJSON body of {"filename", "text"} records. Each document
+    gets its own result; a bad document is reported without failing the batch.
+    ?fields=A,B limits extraction of every document to those fields.
+    With "Accept: application/x-ndjson" the results are streamed one per
+    line, in upload order, as each document finishes.
+    """
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return invalid_fields(e)
+    
+    # Entries are error results or (filename, Submission) pairs, in upload order
+    entries = []
+    submitted = False
+    try:
+        for filename, text_content, error in batch_documents():
+            if len(entries) >= app.config['BATCH_MAX_FILES']:
+                raise BatchError(
+                    'Too many files',
+                    f'A batch may contain at most {app.config["BATCH_MAX_FILES"]} files',
+                    413
+                )
+            if error:
+                entries.append(error)
+                continue
+            # The first document needs a free slot right away; later ones
+            # wait for slots freed by the pool (this batch's own documents
+            # included), which keeps a large batch from flooding the queue
+            submission = submit_extraction(
+                text_content,
+                block=submitted,
+                timeout=app.config['BATCH_SUBMIT_TIMEOUT'],
+                fields=fields
+            )
+            submitted = True
+            entries.append((filename, submission))
+    except (BatchError, ExecutorSaturated) as e:
+        for entry in entries:
+            if isinstance(entry, tuple):
+                entry[1].future.cancel()
+        if isinstance(e, ExecutorSaturated):
+            return server_busy()
+        return json_response({
+            'error': e.error,
+            'message': e.message
+        }), e.status
+    
+    if wants_ndjson():
+        lines = map(serializer.ndjson_line, batch_results(entries))
+        return Response(lines, mimetype='application/x-ndjson'), 200
+    
+    results = list(batch_results(entries))
+    failed = sum(1 for result in results if not result['success'])
+    return json_response({
+        'success': True,
+        'count': len(results),
+        'failed': failed,
+        'results': results
+    }), 200
+
+def batch_results(entries):
+    """Yield the result of every batch entry in upload order, waiting for each extraction"""
+    for entry in entries:
+        if isinstance(entry, dict):
+            yield entry
+            continue
+        filename, submission = entry
+        try:
+            extracted_data = collect_extraction(submission)
+            yield extraction_result(filename, extracted_data, submission.cache_status)
+        except Exception as e:
+            yield error_result(filename, 'Extraction failed', str(e))
+
+# ===== JOBS =====
+# POST /jobs queues a document and answers at once; GET /jobs/<id> reports
+# it. The job threads wait for their own executor (job_executor), so slow
+# documents never hold a request thread.
+
+JobPayload = namedtuple('JobPayload', ['filename', 'text', 'fields'])
+
+
+def job_pool():
+    """The job threads' executor, built on first use"""
+    global job_executor
+    if job_executor is None:
+        with job_executor_lock:
+            if job_executor is None:
+                job_executor = create_executor(os.environ.get('JOBS_EXECUTOR', 'process'), workers=jobs.workers)
+    return job_executor
+
+
+def run_job(payload):
+    """Extract a queued document (on a job thread); returns its /extract response entry"""
+    submission = submit_extraction(
+        payload.text,
+        block=True,
+        fields=payload.fields,
+        pool=job_pool(),
+        document_timeout=app.config['JOBS_DOCUMENT_TIMEOUT']
+    )
+    extracted_data = collect_extraction(submission)
+    return extraction_result(payload.filename, extracted_data, submission.cache_status)
+
+
+def job_entry(job):
+    """Response body describing a job"""
+    entry = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'filename': job['filename'],
+        'submitted_at': job['submitted_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+    if job['started_at'] is not None:
+        entry['wait_seconds'] = job['started_at'] - job['submitted_at']
+    if job['finished_at'] is not None and job['started_at'] is not None:
+        entry['run_seconds'] = job['finished_at'] - job['started_at']
+    if job['status'] == 'done':
+        entry['result'] = job['result']
+    elif job['status'] == 'failed':
+        entry['error'] = 'Extraction failed'
+        entry['message'] = job['error']
+    return entry
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue an uploaded text file (key 'file', as for /extract) for extraction
+    and return its job id at once (202). ?fields=A,B as for /extract.
+    """
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return invalid_fields(e)
+    
+    upload = request.files.get('file')
+    if upload is None:
+        return json_response({
+            'error': 'No file provided',
+            'message': 'Please upload a file with key "file"'
+        }), 400
+    text_content, error = decode_document(upload.filename, lambda: read_upload(upload.stream))
+    if error:
+        return json_response({'error': error['error'], 'message': error['message']}), 400
+    
+    try:
+        job_id = jobs.submit(JobPayload(upload.filename, text_content, fields), upload.filename)
+    except JobQueueFull:
+        return server_busy()
+    location = f'/jobs/{job_id}'
+    return json_response({
+        'job_id': job_id,
+        'status': 'queued',
+        'location': location
+    }), 202, {'Location': location}
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Status of a job, with its result once done (200; 202 while queued or
+    running). ?wait=N long-polls: the answer is held until the job
+    finishes or N seconds (at most 30) pass.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = 0
+    job = jobs.get(job_id, wait=max(wait, 0))
+    if job is None:
+        return json_response({
+            'error': 'Unknown job',
+            'message': f'No job {job_id} (finished jobs are kept for JOBS_TTL seconds)'
+        }), 404
+    return json_response(job_entry(job)), 200 if job['status'] in ('done', 'failed') else 202
+
+
+@app.route('/jobs', methods=['GET'])
+def job_stats():
+    """Queue depth, running jobs and wait and run times of this server process"""
+    return json_response(jobs.stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Extraction timings and job queue figures in the Prometheus text format"""
+    if metrics is None:
+        return json_response({
+            'error': 'Metrics disabled',
+            'message': 'Start the server with EXTRACT_METRICS=1 to collect extraction metrics'
+        }), 404
+    lines = [metrics.render().rstrip('\n')]
+    jobs.render(lines)
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return json_response({
+        'status': 'healthy',
+        'message': 'Invoice extraction API is running'
+    }), 200
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once this process has warmed up, 503 while it warms up or if warm-up failed"""
+    if ready.is_set():
+        return json_response({
+            'status': 'ready',
+            'warm_up_seconds': warm_up_seconds
+        }), 200
+    if warm_up_error is not None:
+        return json_response({
+            'status': 'failed',
+            'message': f'Warm-up failed: {warm_up_error}'
+        }), 503
+    return json_response({
+        'status': 'warming up',
+        'message': 'Compiling patterns and running the self-test extraction'
+    }), 503, {'Retry-After': '1'}
+
+@app.route('/', methods=['GET'])
+def index():
+    """API documentation"""
+    return json_response({
+        'name': 'Invoice Data Extraction API',
+        'version': '1.0',
+        'endpoints': {
+            'POST /extract': {
+                'description': 'Extract invoice data from text file',
+                'parameters': {
+                    'file': 'Text file (multipart/form-data)',
+                    'fields': 'Optional query parameter: comma-separated HeaderItem fields and/or LineItems to extract '
+                              '(e.g. ?fields=InvoiceNumber,SupplierGstin); the rest are skipped and left out',
+                    'pretty': 'Optional query parameter: ?pretty=1 indents the JSON response (compact by default)',
+                    'split': 'Optional query parameter: ?split=1 for a file of several invoices back to back; '
+                             'they are extracted in parallel and listed under "invoices" with their "start" and "end" offsets'
+                },
+                'response': 'JSON with extracted invoice data; "partial" and "timed_out_fields" are set when fields hit the time budget, '
+                            '"cache" is "hit" or "miss" when the result cache is on'
+            },
+            'POST /extract/batch': {
+                'description': 'Extract invoice data from many text files in one request',
+                'parameters': {
+                    'files': 'Text or zip files (multipart/form-data), or an application/zip body, '
+                             'or an application/x-ndjson body of {"filename": ..., "text": ...} lines',
+                    'fields': 'Optional query parameter, as for POST /extract',
+                    'pretty': 'Optional query parameter, as for POST /extract'
+                },
+                'response': 'JSON with one result per file; failed files carry "error" and "message". '
+                            'With "Accept: application/x-ndjson" the results are streamed as one JSON line per file'
+            },
+            'POST /jobs': {
+                'description': 'Queue a text file for extraction and return a job id at once (202)',
+                'parameters': {
+                    'file': 'Text file (multipart/form-data)',
+                    'fields': 'Optional query parameter, as for POST /extract'
+                },
+                'response': 'JSON with "job_id" and "location" (GET it for the result)'
+            },
+            'GET /jobs/<job_id>': {
+                'description': 'Status of a job ("queued", "running", "done" or "failed") with its result once done',
+                'parameters': {
+                    'wait': 'Optional query parameter: seconds (at most 30) to hold the request until the job finishes'
+                },
+                'response': '202 while the job is queued or running, 200 once it is done or failed; '
+                            '"result" is what POST /extract would have returned'
+            },
+            'GET /jobs': {
+                'description': 'Job queue depth, running jobs, and wait and run times (per server process)'
+            },
+            'GET /metrics': {
+                'description': 'Per-alternative, per-parser and per-section extraction timings '
+                               '(Prometheus text format; needs EXTRACT_METRICS=1)'
+            },
+            'GET /health': {
+                'description': 'Health check endpoint (liveness: answers as soon as the process runs)'
+            },
+            'GET /ready': {
+                'description': 'Readiness probe: 200 once the process has run its warm-up self-test, 503 until then'
+            }
+        },
+        'example': {
+            'curl': 'curl -X POST -F "file=@invoice.txt" http://localhost:5000/extract',
+            'batch': 'curl -X POST -F "files=@a.txt" -F "files=@b.txt" http://localhost:5000/extract/batch'
+        }
+    }), 200
+
+def format_size(size):
+    """Byte count for messages: whole MB, else whole KB, else bytes"""
+    if size >= 1024 * 1024:
+        return f'{size // (1024 * 1024)} MB'
+    if size >= 1024:
+        return f'{size // 1024} KB'
+    return f'{size} bytes'
+
+
+@app.errorhandler(413)
+def file_too_large(e):
+    limit = request.max_content_length
+    if e.description.startswith('Too many form parts'):
+        return json_response({
+            'error': 'Too many parts',
+            'message': e.description
+        }), 413
+    if e.description != RequestEntityTooLarge.description:
+        message = e.description
+    elif limit is not None:
+        message = f'File size exceeds {format_size(limit)} limit'
+    else:
+        message = 'Request too large'
+    return json_response({
+        'error': 'File too large',
+        'message': message
+    }), 413
+
+def main():
+    """
+    python app.py serves the API with gunicorn and gunicorn.conf.py;
+    python app.py --dev runs Flask's single-process development server
+    with the debugger and reloader instead.
+    """
+    if '--dev' in sys.argv[1:]:
+        app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
+        return
+    config = str(Path(__file__).resolve().with_name('gunicorn.conf.py'))
+    os.chdir(Path(__file__).resolve().parent)
+    os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', config, 'app:create_app()'])
+
+
+if __name__ == '__main__':
+    main()
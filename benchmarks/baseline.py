@@ -0,0 +1,209 @@
+"""
+Performance baselines of extract_invoice_data over the synthetic corpus
+(Formats 1-10, see corpus.py), and a comparison run that fails when a
+change makes extraction much slower or hungrier.
+
+Usage:
+    python benchmarks/baseline.py record  [--output FILE] [--rounds N]
+    python benchmarks/baseline.py compare [--baseline FILE] [--rounds N]
+                                          [--threshold X] [--strict-output]
+                                          [--formats path/to/formats.py]
+
+Every scale in SCALES (line items per invoice, pages per invoice) is
+measured per format:
+
+    best us / median us   latency of one extraction over --rounds runs
+    peak KiB              tracemalloc peak of one extraction
+    output                digest of the extracted JSON
+
+plus the throughput of the scale's whole corpus (documents per second,
+extracted one after another). record writes them to FILE
+(benchmarks/baselines/extract.json by default, committed with the code).
+
+compare measures again and exits 1 when any best latency or peak memory
+is more than --threshold (default 2.0) times its baseline. Latencies are
+first scaled by the ratio of the machines' calibration times (a fixed
+regex and string workload timed with every run), so a baseline recorded
+on another machine still compares. Changed outputs are listed; with
+--strict-output they fail the run too. Re-record after an intended change.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus, build_long_corpus
+
+BASELINE = Path(__file__).resolve().parent / 'baselines' / 'extract.json'
+
+# name: (line items per invoice, pages per invoice)
+SCALES = {
+    'items10': (10, 1),
+    'items100': (100, 1),
+    'items1000': (1000, 1),
+    'pages20': (10, 20),
+}
+
+CALIBRATION_PATTERN = re.compile(r'(\d+(?:,\d{2,3})*\.\d{2})\s*\|')
+CALIBRATION_TEXT = "\n".join(f"| {n} | Item {n} | 8471 | {n * 1234.5:,.2f} | 18% | {n * 1456.71:,.2f} |"
+                             for n in range(1, 400))
+
+
+def load_extractor(formats_path=None):
+    """Return extract_invoice_data from formats.py or from the given file"""
+    if not formats_path:
+        from formats import extract_invoice_data
+        return extract_invoice_data
+    spec = importlib.util.spec_from_file_location("formats_under_test", formats_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.extract_invoice_data
+
+
+def calibrate(rounds=7):
+    """Best seconds of a fixed regex and string workload, the yardstick between machines"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(20):
+            amounts = CALIBRATION_PATTERN.findall(CALIBRATION_TEXT)
+            ' '.join(CALIBRATION_TEXT.split()).lower()
+            sorted(amount.replace(',', '') for amount in amounts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scale_corpus(items, pages):
+    return build_long_corpus(pages, items) if pages > 1 else build_corpus(items)
+
+
+def output_digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def peak_memory(extract, text):
+    """tracemalloc peak (bytes) of one extraction"""
+    tracemalloc.start()
+    try:
+        extract(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(extract, rounds):
+    """Figures of every scale and format (the "scales" entry of a baseline)"""
+    scales = {}
+    for name, (items, pages) in SCALES.items():
+        corpus = scale_corpus(items, pages)
+        # Warm up once so import-time work is not counted
+        outputs = {fmt: output_digest(extract(text)) for fmt, text in corpus.items()}
+        timings = {fmt: [] for fmt in corpus}
+        passes = []
+        for _ in range(rounds):
+            pass_start = time.perf_counter()
+            for fmt, text in corpus.items():
+                start = time.perf_counter()
+                extract(text)
+                timings[fmt].append(time.perf_counter() - start)
+            passes.append(time.perf_counter() - pass_start)
+        scales[name] = {
+            'items': items,
+            'pages': pages,
+            'docs_per_second': round(len(corpus) / min(passes), 1),
+            'formats': {
+                str(fmt): {
+                    'best_us': round(min(timings[fmt]) * 1e6, 1),
+                    'median_us': round(statistics.median(timings[fmt]) * 1e6, 1),
+                    'peak_kib': round(peak_memory(extract, text) / 1024, 1),
+                    'output': outputs[fmt],
+                }
+                for fmt, text in corpus.items()
+            },
+        }
+    return scales
+
+
+def run(extract, rounds):
+    return {
+        'python': platform.python_version(),
+        'rounds': rounds,
+        'calibration_seconds': calibrate(),
+        'scales': measure(extract, rounds),
+    }
+
+
+def record(args):
+    baseline = run(load_extractor(args.formats), args.rounds)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(baseline, indent=2) + "\n")
+    for name, scale in baseline['scales'].items():
+        print(f"{name:>10} {scale['docs_per_second']:>10.1f} docs/s")
+    print(f"baseline written to {output}")
+    return 0
+
+
+def compare(args):
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = run(load_extractor(args.formats), args.rounds)
+    speed = current['calibration_seconds'] / baseline['calibration_seconds']
+    print(f"calibration: this machine is {speed:.2f}x the baseline's time; latencies are scaled by it")
+    print(f"{'scale':>10} {'format':>6} {'base us':>9} {'now us':>9} {'ratio':>6} "
+          f"{'base KiB':>9} {'now KiB':>9} {'ratio':>6}  output")
+    failures = []
+    for name, scale in current['scales'].items():
+        base_scale = baseline['scales'].get(name)
+        if base_scale is None:
+            print(f"{name:>10} not in the baseline")
+            continue
+        for fmt, figures in scale['formats'].items():
+            base = base_scale['formats'][fmt]
+            time_ratio = figures['best_us'] / speed / base['best_us']
+            memory_ratio = figures['peak_kib'] / base['peak_kib']
+            same_output = figures['output'] == base['output']
+            print(f"{name:>10} {fmt:>6} {base['best_us']:>9.1f} {figures['best_us']:>9.1f} {time_ratio:>6.2f} "
+                  f"{base['peak_kib']:>9.1f} {figures['peak_kib']:>9.1f} {memory_ratio:>6.2f}  "
+                  f"{'same' if same_output else 'CHANGED'}")
+            if time_ratio > args.threshold:
+                failures.append(f"{name} format {fmt}: {time_ratio:.2f}x slower")
+            if memory_ratio > args.threshold:
+                failures.append(f"{name} format {fmt}: {memory_ratio:.2f}x the memory")
+            if args.strict_output and not same_output:
+                failures.append(f"{name} format {fmt}: output changed")
+        print(f"{name:>10} {'all':>6} {base_scale['docs_per_second']:>9.1f} "
+              f"{scale['docs_per_second']:>9.1f} docs/s")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or compare extraction performance baselines")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="measure and write a baseline")
+    record_parser.add_argument("--output", default=str(BASELINE), help="baseline file to write")
+    compare_parser = commands.add_parser("compare", help="measure and compare against a baseline")
+    compare_parser.add_argument("--baseline", default=str(BASELINE), help="baseline file to compare against")
+    compare_parser.add_argument("--threshold", type=float, default=2.0,
+                                help="fail when latency or memory exceeds this multiple of the baseline")
+    compare_parser.add_argument("--strict-output", action="store_true", help="fail when an output changed")
+    for command in (record_parser, compare_parser):
+        command.add_argument("--rounds", type=int, default=20, help="timed runs per invoice")
+        command.add_argument("--formats", help="path of the formats.py to measure")
+    args = parser.parse_args()
+    sys.exit(record(args) if args.command == "record" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Extraction with the cascades in a learned order (cascade_order.py)
+against their original order.
+
+Usage:
+    python benchmarks/bench_cascade_order.py [--items N ...] [--rounds N]
+
+A CascadeOrder samples the synthetic corpus (Formats 1-10) at 1, 3, 10,
+20 and 100 line items, as "python c.py order" would, and is then frozen;
+each invoice (--items line items) is extracted
+
+    original  extract_invoice_data(text)
+    ordered   extract_invoice_data(text, order=order)
+
+and the two outputs are compared. Reported: the best microseconds per
+document over --rounds interleaved samples, their ratio and the number of
+documents whose output differs (expected 0).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from cascade_order import CascadeOrder
+from corpus import build_corpus
+from formats import extract_invoice_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction with a learned cascade order")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000], help="line items per invoice")
+    parser.add_argument("--rounds", type=int, default=15, help="samples per measurement")
+    args = parser.parse_args()
+
+    order = CascadeOrder(sample_every=1, window=0)
+    for items in (1, 3, 10, 20, 100):
+        for text in build_corpus(items).values():
+            extract_invoice_data(text, order=order)
+    order.sample_every = 0
+
+    print(f"{'items':>6} {'original us':>12} {'ordered us':>11} {'ratio':>6} {'differ':>6}")
+    for items in args.items:
+        corpus = list(build_corpus(items).values())
+        differ = sum(1 for text in corpus if extract_invoice_data(text) != extract_invoice_data(text, order=order))
+        best = {'original': float('inf'), 'ordered': float('inf')}
+        for _ in range(args.rounds):
+            for name, kwargs in (('original', {}), ('ordered', {'order': order})):
+                start = time.perf_counter()
+                for text in corpus:
+                    extract_invoice_data(text, **kwargs)
+                best[name] = min(best[name], (time.perf_counter() - start) / len(corpus))
+        print(f"{items:>6} {best['original'] * 1e6:>12.1f} {best['ordered'] * 1e6:>11.1f} "
+              f"{best['ordered'] / best['original']:>6.2f} {differ:>6}")
+
+
+if __name__ == "__main__":
+    main()
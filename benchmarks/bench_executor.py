@@ -0,0 +1,68 @@
+"""
+Throughput of extract_invoice_data through executor.ProcessExecutor as the
+number of worker processes grows.
+
+Usage:
+    python benchmarks/bench_executor.py [--items N] [--documents N]
+                                        [--workers 1,2,4,...]
+
+Each run submits --documents corpus invoices (cycling through Formats
+1-10) with blocking submission, so the pool's bounded queue stays full,
+and reports documents per second and the speedup over the inline executor.
+On an idle box throughput should grow close to linearly up to the number
+of physical cores.
+"""
+import argparse
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus
+from executor import InlineExecutor, ProcessExecutor, cpu_count
+
+
+def throughput(executor, documents):
+    """Documents per second for extracting every document through executor"""
+    start = time.perf_counter()
+    futures = [executor.submit(text, block=True) for text in documents]
+    for future in futures:
+        future.result()
+    return len(documents) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction throughput per worker count")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--documents", type=int, default=2000, help="documents per run")
+    parser.add_argument("--workers", help="comma-separated worker counts (default: powers of two up to the CPU count)")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(count) for count in args.workers.split(",")]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpu_count():
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cpu_count():
+            worker_counts.append(cpu_count())
+
+    corpus = build_corpus(args.items)
+    documents = list(islice(cycle(corpus.values()), args.documents))
+
+    baseline = throughput(InlineExecutor(), documents)
+    print(f"{'executor':>12} {'docs/s':>10} {'speedup':>8}")
+    print(f"{'inline':>12} {baseline:>10.1f} {1.0:>8.2f}")
+    for workers in worker_counts:
+        executor = ProcessExecutor(workers)
+        executor.warm()
+        rate = throughput(executor, documents)
+        executor.shutdown()
+        print(f"{f'process x{workers}':>12} {rate:>10.1f} {rate / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
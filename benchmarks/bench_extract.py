@@ -0,0 +1,85 @@
+"""
+Micro-benchmark for extract_invoice_data: per-invoice latency over the
+synthetic Format 1-10 corpus.
+
+Usage:
+    python benchmarks/bench_extract.py [--items N] [--rounds N] [--purge]
+                                       [--pages N] [--cells N]
+                                       [--formats path/to/formats.py]
+
+--purge clears the re module cache before every invoice. That is what a worker
+sees once mixed traffic has overflowed re's internal cache, and it is the case
+the precompiled pattern registry is meant to remove.
+--pages spreads every invoice over N pages (letterhead and terms repeated
+after "---" page breaks), the shape of long multi-page invoices.
+--cells adds N numeric cells to every line item row, the shape of wide
+tables; the time should grow linearly with N.
+--formats benchmarks another copy of formats.py (e.g. one checked out from an
+older commit) so before/after numbers can be taken from the same corpus.
+"""
+import argparse
+import importlib.util
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus, build_long_corpus, widen
+
+
+def load_extractor(formats_path=None):
+    """Return extract_invoice_data from formats.py or from the given file"""
+    if not formats_path:
+        from formats import extract_invoice_data
+        return extract_invoice_data
+    spec = importlib.util.spec_from_file_location("formats_under_test", formats_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.extract_invoice_data
+
+
+def bench(extract, corpus, rounds, purge=False):
+    """Return {format_number: [seconds per call, ...]}"""
+    timings = {fmt: [] for fmt in corpus}
+    for _ in range(rounds):
+        for fmt, text in corpus.items():
+            if purge:
+                re.purge()
+            start = time.perf_counter()
+            extract(text)
+            timings[fmt].append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_invoice_data per invoice format")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--rounds", type=int, default=50, help="passes over the corpus")
+    parser.add_argument("--purge", action="store_true", help="clear the re cache before every invoice")
+    parser.add_argument("--pages", type=int, default=1, help="pages per invoice")
+    parser.add_argument("--cells", type=int, default=0, help="extra cells per line item row")
+    parser.add_argument("--formats", help="path of the formats.py to benchmark")
+    args = parser.parse_args()
+
+    extract = load_extractor(args.formats)
+    corpus = build_long_corpus(args.pages, args.items) if args.pages > 1 else build_corpus(args.items)
+    if args.cells:
+        corpus = {fmt: widen(text, args.cells) for fmt, text in corpus.items()}
+    # Warm up once so import-time work is not counted
+    bench(extract, corpus, 1)
+    timings = bench(extract, corpus, args.rounds, purge=args.purge)
+
+    print(f"{'format':>6} {'median us':>10} {'mean us':>10}")
+    all_times = []
+    for fmt, values in timings.items():
+        all_times.extend(values)
+        print(f"{fmt:>6} {statistics.median(values) * 1e6:>10.1f} {statistics.mean(values) * 1e6:>10.1f}")
+    print(f"{'all':>6} {statistics.median(all_times) * 1e6:>10.1f} {statistics.mean(all_times) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cost of the header-totals computation: exact Decimal sums (money.py) against
+the float sums they replaced.
+
+Usage:
+    python benchmarks/bench_money.py [--rows N ...] [--rounds N]
+
+Both paths take the same line items (amount strings as the parsers produce
+them): the float path as the dicts it was written for, half with the taxable
+value under TaxableAmount, and the Decimal path as formats.LineItem records.
+Both produce the seven header totals as strings. Reported per invoice size:
+the best time of each path over --rounds interleaved samples and their
+ratio. The float path is the old
+code, kept here only for the comparison.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from formats import LineItem
+from money import column_total, format_amount
+
+
+def line_items(rows):
+    """rows line-item dicts with realistic amount strings"""
+    items = []
+    for index in range(rows):
+        taxable = 1000 + index * 37.25
+        tax = round(taxable * 0.09, 2)
+        taxable_key = "TaxableValue" if index % 2 else "TaxableAmount"
+        items.append({
+            taxable_key: f"{taxable:.2f}",
+            "IgstAmount": "",
+            "CgstAmount": f"{tax:.2f}",
+            "SgstAmount": f"{tax:.2f}",
+            "CessAmount": "",
+        })
+    return items
+
+
+def line_item_records(items):
+    """The same line items as LineItem records"""
+    return [LineItem(TaxableValue=item.get("TaxableValue") or item.get("TaxableAmount"),
+                     IgstAmount=item["IgstAmount"], CgstAmount=item["CgstAmount"],
+                     SgstAmount=item["SgstAmount"], CessAmount=item["CessAmount"])
+            for item in items]
+
+
+def float_totals(items):
+    """The float computation money.py replaced"""
+    total_taxable = sum(float(item.get("TaxableValue") or item.get("TaxableAmount") or 0) for item in items)
+    total_igst = sum(float(item.get("IgstAmount", 0) or 0) for item in items)
+    total_cgst = sum(float(item.get("CgstAmount", 0) or 0) for item in items)
+    total_sgst = sum(float(item.get("SgstAmount", 0) or 0) for item in items)
+    total_cess = sum(float(item.get("CessAmount", 0) or 0) for item in items)
+    total_tax = total_igst + total_cgst + total_sgst + total_cess
+    total_amount = total_taxable + total_tax
+    return [str(total) if total > 0 else "" for total in
+            (total_igst, total_cgst, total_sgst, total_cess, total_tax, total_amount, total_amount)]
+
+
+def decimal_totals(items):
+    """The computation in formats._extract_invoice_data"""
+    total_taxable = column_total(items, "TaxableValue")
+    total_igst = column_total(items, "IgstAmount")
+    total_cgst = column_total(items, "CgstAmount")
+    total_sgst = column_total(items, "SgstAmount")
+    total_cess = column_total(items, "CessAmount")
+    total_tax = total_igst + total_cgst + total_sgst + total_cess
+    total_amount = total_taxable + total_tax
+    return [format_amount(total) if total > 0 else "" for total in
+            (total_igst, total_cgst, total_sgst, total_cess, total_tax, total_amount, total_amount)]
+
+
+def bench(computations, rounds):
+    """
+    Fastest seconds per call of each (computation, items) pair; the
+    computations take turns within every round so machine noise hits them
+    alike
+    """
+    # Enough calls per sample to rise well above the timer resolution
+    calls = max(1, 20000 // max(len(computations[0][1]), 1))
+    best = [float('inf')] * len(computations)
+    for _ in range(rounds):
+        for index, (compute, items) in enumerate(computations):
+            start = time.perf_counter()
+            for _ in range(calls):
+                compute(items)
+            best[index] = min(best[index], (time.perf_counter() - start) / calls)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Decimal against float header totals")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="line items per invoice")
+    parser.add_argument("--rounds", type=int, default=15, help="samples per measurement")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'float us':>10} {'decimal us':>11} {'ratio':>6}  total (float -> decimal)")
+    for rows in args.rows:
+        items = line_items(rows)
+        records = line_item_records(items)
+        float_seconds, decimal_seconds = bench(((float_totals, items), (decimal_totals, records)), args.rounds)
+        print(f"{rows:>7} {float_seconds * 1e6:>10.1f} {decimal_seconds * 1e6:>11.1f} "
+              f"{decimal_seconds / float_seconds:>6.2f}  "
+              f"{float_totals(items)[-1]} -> {decimal_totals(records)[-1]}")
+
+
+if __name__ == "__main__":
+    main()
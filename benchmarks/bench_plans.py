@@ -0,0 +1,59 @@
+"""
+Repeat-supplier extraction with supplier plans (plans.py) against the full
+cascades.
+
+Usage:
+    python benchmarks/bench_plans.py [--items N ...] [--rounds N]
+
+Every invoice of the synthetic corpus (Formats 1-10, --items line items
+each) comes from its own supplier. A PlanStore that never re-verifies
+learns the ten plans first; then each invoice is extracted
+
+    full      extract_invoice_data(text)
+    plan      extract_invoice_data(text, plans=store), replaying the plan
+
+and the two outputs are compared. Reported: the best microseconds per
+document over --rounds interleaved samples, their ratio and the number of
+documents whose output differs (expected 0).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus
+from formats import extract_invoice_data
+from plans import PlanStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction with learned supplier plans")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000], help="line items per invoice")
+    parser.add_argument("--rounds", type=int, default=15, help="samples per measurement")
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'full us':>10} {'plan us':>10} {'ratio':>6} {'differ':>6}")
+    for items in args.items:
+        corpus = list(build_corpus(items).values())
+        store = PlanStore(verify_every=0)
+        for _ in range(store.confirm):
+            for text in corpus:
+                extract_invoice_data(text, plans=store)
+        differ = sum(1 for text in corpus if extract_invoice_data(text) != extract_invoice_data(text, plans=store))
+
+        best = {'full': float('inf'), 'plan': float('inf')}
+        for _ in range(args.rounds):
+            for name, kwargs in (('full', {}), ('plan', {'plans': store})):
+                start = time.perf_counter()
+                for text in corpus:
+                    extract_invoice_data(text, **kwargs)
+                best[name] = min(best[name], (time.perf_counter() - start) / len(corpus))
+        print(f"{items:>6} {best['full'] * 1e6:>10.1f} {best['plan'] * 1e6:>10.1f} "
+              f"{best['plan'] / best['full']:>6.2f} {differ:>6}")
+
+
+if __name__ == "__main__":
+    main()
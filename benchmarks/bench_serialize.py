@@ -0,0 +1,108 @@
+"""
+Cost of encoding extraction results: the serializers in serializer.py
+against the encodings they replaced.
+
+Usage:
+    python benchmarks/bench_serialize.py [--items N ...] [--docs N] [--rounds N]
+
+The results of the synthetic corpus (Formats 1-10, --items line items each)
+are encoded as the API and the CLI do:
+
+    jsonify          Flask's jsonify (the old API responses; sorted keys, ASCII escapes)
+    json indent=2    json.dumps(indent=2) (the old CLI output)
+    json             serializer.JsonSerializer, compact
+    json pretty      serializer.JsonSerializer, indented
+    orjson           serializer.OrjsonSerializer, compact (skipped without orjson)
+    orjson pretty    serializer.OrjsonSerializer, indented
+
+and as a --docs document NDJSON stream (one ndjson_line per document).
+Reported: the best microseconds per document over --rounds interleaved samples.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus
+from formats import extract_invoice_data
+from serializer import JsonSerializer, OrjsonSerializer, orjson
+
+
+def encoders():
+    """(name, function of one result) for every encoding measured"""
+    from flask import Flask, jsonify
+    flask_app = Flask('bench_serialize')
+
+    def flask_jsonify(data):
+        with flask_app.app_context():
+            return jsonify(data).get_data()
+
+    json_serializer = JsonSerializer()
+    found = [
+        ('jsonify', flask_jsonify),
+        ('json indent=2', lambda data: json.dumps(data, indent=2, ensure_ascii=False)),
+        ('json', json_serializer.dumps),
+        ('json pretty', lambda data: json_serializer.dumps(data, pretty=True)),
+    ]
+    if orjson is not None:
+        orjson_serializer = OrjsonSerializer()
+        found += [
+            ('orjson', orjson_serializer.dumps),
+            ('orjson pretty', lambda data: orjson_serializer.dumps(data, pretty=True)),
+        ]
+    return found
+
+
+def streamers():
+    """(name, function writing a list of results as NDJSON) for every serializer"""
+    serializers = [JsonSerializer()] + ([OrjsonSerializer()] if orjson is not None else [])
+    return [(f'ndjson {serializer.name}', lambda results, line=serializer.ndjson_line: b''.join(map(line, results)))
+            for serializer in serializers]
+
+
+def bench(functions, argument, calls, rounds):
+    """
+    Fastest seconds per call of each function; the functions take turns
+    within every round so machine noise hits them alike
+    """
+    best = [float('inf')] * len(functions)
+    for _ in range(rounds):
+        for index, (_, function) in enumerate(functions):
+            start = time.perf_counter()
+            for _ in range(calls):
+                function(argument)
+            best[index] = min(best[index], (time.perf_counter() - start) / calls)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of extraction results")
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000], help="line items per invoice")
+    parser.add_argument("--docs", type=int, default=100, help="documents per NDJSON stream")
+    parser.add_argument("--rounds", type=int, default=15, help="samples per measurement")
+    args = parser.parse_args()
+
+    single = encoders()
+    stream = streamers()
+    names = [name for name, _ in single + stream]
+    print(f"{'items':>6} {'bytes':>9} " + " ".join(f"{name:>14}" for name in names) + "   (us per document)")
+    for items in args.items:
+        results = [extract_invoice_data(text) for text in build_corpus(items).values()]
+        calls = max(1, 2000 // items)
+        totals = [0.0] * len(single)
+        for result in results:
+            for index, seconds in enumerate(bench(single, result, calls, args.rounds)):
+                totals[index] += seconds / len(results)
+        batch = (results * (args.docs // len(results) + 1))[:args.docs]
+        per_document = [seconds / len(batch)
+                        for seconds in bench(stream, batch, max(1, calls // len(batch)), args.rounds)]
+        size = sum(len(JsonSerializer().dumps(result)) for result in results) // len(results)
+        print(f"{items:>6} {size:>9} " + " ".join(f"{seconds * 1e6:>14.1f}" for seconds in totals + per_document))
+
+
+if __name__ == "__main__":
+    main()
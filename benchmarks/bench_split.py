@@ -0,0 +1,96 @@
+"""
+Extraction of multi-invoice text files (splitter.py).
+
+Usage:
+    python benchmarks/bench_split.py [--invoices N] [--items N] [--workers N]
+
+For every layout of the synthetic corpus (Formats 1-10) a batch of
+--invoices invoices of it (one supplier, each with its own invoice number
+and IRN) is joined back to back, every third one paginated over two pages.
+The batch is split, and extracted
+
+    inline    splitter.extract_invoices() in this process
+    process   its invoices submitted to a ProcessExecutor of --workers
+
+Reported: the split time, the invoices found, the number whose offsets or
+data differ from extracting each invoice on its own (expected 0) and the
+milliseconds of both extractions.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus, paginate
+from executor import create_executor
+from formats import extract_invoice_data
+from splitter import extract_invoices, split_invoices
+
+
+def build_batch(text, count):
+    """[invoice text] of count distinct invoices like text"""
+    header = extract_invoice_data(text)["HeaderItem"]
+    batch = []
+    for n in range(count):
+        invoice = text
+        if header["InvoiceNumber"]:
+            invoice = invoice.replace(header["InvoiceNumber"], f'{header["InvoiceNumber"]}{n}')
+        if header["IrnNo"]:
+            invoice = invoice.replace(header["IrnNo"], f'{header["IrnNo"][:-6]}{n:06x}')
+        batch.append(paginate(invoice, 2) if n % 3 == 2 else invoice)
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark splitting and extraction of multi-invoice files")
+    parser.add_argument("--invoices", type=int, default=30, help="invoices per batch")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    executor = create_executor('process', workers=args.workers)
+    executor.warm()
+
+    def extract_all(texts, fields):
+        futures = [executor.submit(text, block=True, fields=fields) for text in texts]
+        return [future.result() for future in futures]
+
+    def extract_inline(texts, fields):
+        return [extract_invoice_data(text, fields=fields) for text in texts]
+
+    print(f"{'format':>6} {'split ms':>9} {'found':>6} {'differ':>6} {'inline ms':>10} {'process ms':>11}")
+    try:
+        for fmt, invoice in build_corpus(args.items).items():
+            batch = build_batch(invoice, args.invoices)
+            text = "\n".join(batch)
+            expected, offset = [], 0
+            for invoice in batch:
+                expected.append((offset, offset + len(invoice) + 1, extract_invoice_data(invoice)))
+                offset += len(invoice) + 1
+
+            start = time.perf_counter()
+            split_invoices(text)
+            split_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            invoices = extract_invoices(text, extract_inline)
+            inline_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            extract_invoices(text, extract_all)
+            process_seconds = time.perf_counter() - start
+
+            found = [(invoice["start"], invoice["end"], invoice["data"]) for invoice in invoices]
+            # The last invoice has no joining newline after it
+            expected[-1] = (expected[-1][0], len(text), expected[-1][2])
+            differ = sum(1 for got, want in zip(found, expected) if got != want) + abs(len(found) - len(expected))
+            print(f"{fmt:>6} {split_seconds * 1e3:>9.1f} {len(invoices):>6} {differ:>6} "
+                  f"{inline_seconds * 1e3:>10.1f} {process_seconds * 1e3:>11.1f}")
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Peak memory of one POST /extract for a large upload.
+
+Usage:
+    python benchmarks/bench_upload_memory.py [--mb N] [--legacy]
+
+Each measurement runs in a fresh interpreter (ru_maxrss never goes down) and
+feeds a multipart upload of a synthetic invoice of about --mb megabytes,
+read from disk, straight to the WSGI app with the inline executor, so
+extraction runs in the measured process.
+Reported per request:
+
+    rss delta   peak RSS during the request minus RSS just before it
+    py peak     tracemalloc peak of Python allocations during the request
+
+The streaming path decodes a spooled upload through a read-only mmap of its
+temporary file. Those pages are clean page cache (werkzeug has just written
+them) and count towards RSS while mapped, but they are shared and
+reclaimable; the private heap the request adds is the py peak column.
+
+--legacy swaps in the old whole-file read (file.read().decode()) so the two
+upload paths can be compared on the same machine; without it both are run.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def write_upload(path, megabytes):
+    """
+    Write a multipart/form-data body holding a corpus invoice padded with line
+    items to about megabytes; returns (content type, upload size in bytes).
+    Written in pieces so building it does not raise this process's peak RSS.
+    """
+    from corpus import build_corpus
+    boundary = 'bench-upload-boundary'
+    head = build_corpus(10)[1].encode('utf-8')
+    line = b"Item description with a few words | 998314 | 1 | 1,000.00 | 18% | 1,180.00\n"
+    block = line * 1000
+    blocks = megabytes * 1024 * 1024 // len(block)
+    with open(path, 'wb') as body:
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="invoice.txt"\r\n'
+                   'Content-Type: text/plain\r\n\r\n'.encode())
+        body.write(head)
+        for _ in range(blocks):
+            body.write(block)
+        body.write(f'\r\n--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', len(head) + blocks * len(block)
+
+
+def measure(megabytes, legacy):
+    """Run one request in this process and return its figures"""
+    os.environ['EXTRACT_EXECUTOR'] = 'inline'
+    import app as app_module
+    from werkzeug.test import EnvironBuilder
+    if legacy:
+        app_module.read_upload = lambda stream: stream.read().decode('utf-8')
+    app_module.app.config['MAX_CONTENT_LENGTH'] = None
+    statuses = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'body')
+        content_type, size = write_upload(path, megabytes)
+        with open(path, 'rb') as body:
+            environ = EnvironBuilder(path='/extract', method='POST', input_stream=body,
+                                     content_type=content_type,
+                                     content_length=os.path.getsize(path)).get_environ()
+            baseline = current_rss()
+            tracemalloc.start()
+            for _ in app_module.app.wsgi_app(environ, lambda status, headers: statuses.append(status)):
+                pass
+            _, py_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        'status': int(statuses[0].split()[0]),
+        'upload_mb': size / 2 ** 20,
+        'rss_delta_mb': max(0, peak - baseline) / 2 ** 20,
+        'py_peak_mb': py_peak / 2 ** 20,
+    }
+
+
+def run_isolated(megabytes, legacy):
+    """Measure in a fresh interpreter so earlier peaks do not hide this one"""
+    command = [sys.executable, __file__, '--mb', str(megabytes), '--child']
+    if legacy:
+        command.append('--legacy')
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of one /extract upload")
+    parser.add_argument("--mb", type=int, default=12, help="upload size in megabytes")
+    parser.add_argument("--legacy", action="store_true", help="only measure the old whole-file read")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.mb, args.legacy)))
+        return
+
+    modes = [True] if args.legacy else [True, False]
+    print(f"{'upload':>8} {'status':>6} {'upload MB':>10} {'rss delta MB':>13} {'py peak MB':>11}")
+    for legacy in modes:
+        result = run_isolated(args.mb, legacy)
+        name = 'legacy' if legacy else 'stream'
+        print(f"{name:>8} {result['status']:>6} {result['upload_mb']:>10.1f} "
+              f"{result['rss_delta_mb']:>13.1f} {result['py_peak_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
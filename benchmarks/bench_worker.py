@@ -0,0 +1,104 @@
+"""
+Per-document latency of one CLI process per document against a
+persistent worker (python c.py --worker, see worker.py).
+
+Usage:
+    python benchmarks/bench_worker.py [--items N] [--rounds N] [--framing ndjson|length]
+
+Every invoice of the synthetic corpus (Formats 1-10, --items line items
+each) is extracted
+
+    spawn     python formats.py FILE, a fresh interpreter per document
+    worker    one request to an already started worker, waiting for its
+              response before sending the next (no pipelining)
+
+and the outputs are compared. Reported: the median milliseconds per
+document of both, their ratio and the number of documents whose output
+differs (expected 0).
+"""
+import argparse
+import json
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+LENGTH_PREFIX = struct.Struct('>I')
+
+
+class WorkerClient:
+    """Synchronous client of one worker process"""
+
+    def __init__(self, framing):
+        self.framing = framing
+        self.process = subprocess.Popen(
+            [sys.executable, str(ROOT / 'formats.py'), '--worker', '--framing', framing],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self.ready = self.receive()
+
+    def send(self, message):
+        body = json.dumps(message).encode('utf-8')
+        if self.framing == 'length':
+            self.process.stdin.write(LENGTH_PREFIX.pack(len(body)) + body)
+        else:
+            self.process.stdin.write(body + b'\n')
+        self.process.stdin.flush()
+
+    def receive(self):
+        if self.framing == 'length':
+            size, = LENGTH_PREFIX.unpack(self.process.stdout.read(LENGTH_PREFIX.size))
+            return json.loads(self.process.stdout.read(size))
+        return json.loads(self.process.stdout.readline())
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the persistent worker against a process per document")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--rounds", type=int, default=5, help="samples per document")
+    parser.add_argument("--framing", choices=("ndjson", "length"), default="ndjson")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.items)
+    client = WorkerClient(args.framing)
+    spawn, worker, differ = [], [], 0
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt, text in corpus.items():
+                path = Path(directory) / f'format{fmt}.txt'
+                path.write_text(text, encoding='utf-8')
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    finished = subprocess.run([sys.executable, str(ROOT / 'formats.py'), str(path)],
+                                              capture_output=True, check=True)
+                    spawn.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    client.send({'id': fmt, 'text': text})
+                    response = client.receive()
+                    worker.append(time.perf_counter() - start)
+                differ += json.loads(finished.stdout) != response['data']
+    finally:
+        client.close()
+
+    spawn_ms, worker_ms = statistics.median(spawn) * 1e3, statistics.median(worker) * 1e3
+    print(f"worker ready, warm-up self-test {client.ready['warm_up_seconds'] * 1e3:.1f} ms")
+    print(f"{'spawn ms':>9} {'worker ms':>10} {'ratio':>6} {'differ':>6}")
+    print(f"{spawn_ms:>9.1f} {worker_ms:>10.2f} {worker_ms / spawn_ms:>6.3f} {differ:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Synthetic invoice corpus for benchmarking extract_invoice_data.
+One generator per invoice layout recognised by formats.py (Formats 1-10).
+Each generator takes the number of line items so documents can be scaled.
+"""
+import hashlib
+
+
+def _irn(seed):
+    """Deterministic 64 character hex IRN"""
+    return hashlib.sha256(seed.encode('utf-8')).hexdigest()
+
+
+def format1(n_items=3):
+    # Format 1: "# heading" supplier, 14 column S.No | ... | Total table
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(
+            f"| {i} | Widget type {i} | 8471301{i % 10} | B{i} | | {i * 2} NOS | 100.00 | 0 | | "
+            f"{i * 200}.00 | 0.00 | {i * 18}.00 | {i * 18}.00 | {i * 236}.00 |"
+        )
+    return "\n".join([
+        "# ACME TRADERS",
+        "Plot 12, Industrial Area, Pune",
+        "GSTIN: 27AABCA1234F1Z5",
+        "PAN No: AABCA1234F",
+        "---",
+        "# TAX INVOICE",
+        "Invoice No: INV/2023/001",
+        "Invoice Date: 12-04-2023",
+        "Bill To: Globex Retail, Mumbai",
+        "PO No: PO4455",
+        "E-Way Bill No: 331002345678",
+        "",
+        "| S.No | Description | HSN/SAC | Batch | Expiry | Quantity | Rate | Disc | Other | Taxable | IGST | CGST | SGST | Total |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+        *rows,
+        "",
+        "SubTotal",
+        "Narration: Goods sold as per PO",
+    ])
+
+
+def format2(n_items=3):
+    # Format 2: "## heading" supplier, No. Of Packages | Description | UOM | Quantity | Rate | Amount
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(f"| {i} | Steel Rod {i} | KGS | {i * 10} | 60.00 | {i * 600}.00 |")
+    return "\n".join([
+        "## RATHI STEEL TRADERS",
+        "Loha Mandi, Ghaziabad",
+        "GSTIN: 09AADFR6789J1Z4",
+        "---",
+        "# TAX INVOICE",
+        "Invoice No: RST/19",
+        "Invoice Date: 05-01-2023",
+        "| BILL TO | SHIP TO |",
+        "| Buyer | Stark Builders | Stark Site Office |",
+        "",
+        "| No. Of Packages | Description | UOM | Quantity | Rate | Amount |",
+        "|---|---|---|---|---|---|",
+        *rows,
+        "---",
+        "CGST @ 9 % | | 270.00",
+        "SGST @ 9 % | | 270.00",
+        "| Total | 3540.00 |",
+    ])
+
+
+def format3(n_items=3):
+    # Format 3: FACTORY address, Customer Name:, S.No | Description of Work | SAC | Amount
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(f"| {i} | Annual maintenance visit {i} |  | 998719 | {i * 5000}.00 |")
+    return "\n".join([
+        "# BRIGHT SERVICES",
+        "FACTORY : Survey No 45, Nashik Road, Nashik",
+        "GST IN : 27AAECB5678K1Z2",
+        "Customer Name: Initech Pvt Ltd",
+        "12 MG Road, Bengaluru",
+        "GST No: 29AAACI9012L1Z8",
+        "State Code: 29",
+        "Invoice No: BS-778",
+        "Invoice Date: 03/05/2023",
+        "",
+        "| S.No | Description of Work | SAC | Amount |",
+        "|---|---|---|---|",
+        *rows,
+        "Sub Total | | 30000.00",
+        "CGST @ 9 % | | 2700.00",
+        "SGST @ 9 % | | 2700.00",
+        "Total Value Including GST | | 35400.00",
+    ])
+
+
+def format4(n_items=3):
+    # Format 4: numbered statutory headings, Name and Address of Recipient / Shipped to
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(f"| Brass Fittings {i} | KGS | {i * 12} | 450.00 | {i * 5400}.00 |")
+    return "\n".join([
+        "SHREE BALAJI INDUSTRIES",
+        "Near Bus Stand, Rajkot",
+        "1. GSTIN",
+        "24AAHFS3456M1Z1",
+        "TAX INVOICE",
+        "4. Serial No. of invoice",
+        "SBI/045",
+        "5. Date of invoice",
+        "21-06-2023",
+        "Name and Address of Recipient:",
+        "Umbrella Corp",
+        "45 Ring Road, Ahmedabad",
+        "Mob. 9876543210",
+        "PAN. NO: AAACU7890P",
+        "GSTIN NO: 24AAACU7890P1Z3",
+        "Name and Address of Shipped to:",
+        "Umbrella Warehouse",
+        "Plot 9, GIDC, Vatva",
+        "Mob. 9876500000",
+        "GSTN NO: 24AAACU7890P2Z2",
+        "Whether tax has to be paid under reverse Charges Basis? No",
+        "",
+        "| Description of Goods | UOM | Quantity | Rate | Amount |",
+        "|---|---|---|---|---|",
+        *rows,
+        "**Amount of GST RS Nine Thousand Seven Hundred Twenty in words**",
+        "Total Value RS Sixty Three Thousand Seven Hundred Twenty in Words: 63720.00",
+    ])
+
+
+def format5(n_items=3):
+    # Format 5: "## Company's Name", Details of Receiver (Billed to), Site | Description | ... table
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(
+            f"| {i} | Paracetamol 500mg pack {i} | 30049099 | BT0{i % 10} | {i * 10} | NOS | 12.50 | "
+            f"{i * 125}.00 | 0 | {i * 125}.00 |"
+        )
+    return "\n".join([
+        "## Company's Name",
+        "KRISHNA ENTERPRISES",
+        "Shop 4, Market Yard, Indore",
+        "Email: accounts@krishna.example",
+        "GSTN No. :",
+        "23AAKFK1234L1Z9",
+        "### PAN",
+        "AAKFK1234L",
+        "### CIN",
+        "U12345MP2010PTC012345",
+        f"IRN NO: {_irn('format5')}",
+        "Tax is Payable on Reverse Charges",
+        "| Invoice No.: | KE2023045 |",
+        "| Invoice Date: | 15-Jul-2023 |",
+        "| P.O. No. | PO7788 |",
+        "| P.O. Date | 10-07-2023 |",
+        "Details of Receiver (Billed to)",
+        "Wayne Distributors",
+        "22 Park Street",
+        "Kolkata",
+        "State Name & code: West Bengal 19",
+        "| GSTIN / Unique ID: | 19AABCW4567Q1Z4 |",
+        "Details of Consignee (Shipped to)",
+        "Wayne Distributors Warehouse",
+        "7 Dock Road",
+        "Howrah",
+        "| GSTIN / Unique ID: | 19AABCW4567Q2Z3 |",
+        "Place of Supply",
+        "West Bengal",
+        "",
+        "| Site | Description | HSN CODE | Batch No | City | LOM | Rate | Total | Discount | Taxable Value | CGST | SGST | IGST |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+        *rows,
+        "Remark: Goods once sold will not be taken back",
+        "IGST @ 12 % | 90.00",
+        "| GRAND TOTAL | 840.00 |",
+    ])
+
+
+def format6(n_items=3):
+    # Format 6: Sr. No. | Description of Goods | HSN | COL | SIZE | Qty | Rate | Total (Taxable) | CGST | SGST | IGST
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(
+            f"| {i} | Sports Shoe model {i} | 64041190 | BLK | {6 + i % 5} | {i * 2} | 850.00 | "
+            f"{i * 1700}.00 | 6% | {i * 102}.00 | 6% | {i * 102}.00 | |"
+        )
+    return "\n".join([
+        "# SUPERSTEP FOOTWEAR PVT LTD",
+        "Regd. off: 14 Leather Complex, Agra",
+        "GSTIN: 09AAFCS2345N1Z6",
+        "CIN: U19201UP2012PTC054321",
+        "Invoice No: SF/882",
+        "Invoice Date: 02-08-2023",
+        "Bill To: Metro Shoes, Lucknow",
+        "E-Way Bill Date: 02-08-2023 10:15",
+        "",
+        "| Sr. No. | Description of Goods | HSN | COL | SIZE | Qty | Rate | Total (Taxable) | CGST | SGST | IGST |",
+        "|---|---|---|---|---|---|---|---|---|---|---|",
+        *rows,
+        "freight insurance 0.00",
+        "Total Invoice 11424.00",
+    ])
+
+
+def format7(n_items=3):
+    # Format 7: | No | Description of Goods | HSN Code | Units | Quantity | Rate | Total | and "| GST 18% |"
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(f"| {i} | LED Panel {i} | 940540 | Nos | {i * 4} | 1250.00 | {i * 5000}.00 |")
+    return "\n".join([
+        "# NOVA ELECTRICALS",
+        "Lamington Road, Mumbai",
+        "GSTIN: 27AAGFN4321C1Z7",
+        "Invoice No: NE/55",
+        "Invoice Date: 30-09-2023",
+        "Customer Reference",
+        "CR991",
+        "",
+        "| No | Description of Goods | HSN Code | Units | Quantity | Rate | Total |",
+        "|---|---|---|---|---|---|---|",
+        *rows,
+        "| TOTAL | | | | | | 30000.00 |",
+        "| GST 18% | 5400.00 |",
+        "Certified that the particulars given above are true",
+    ])
+
+
+def format8(n_items=3):
+    # Format 8: numbered non-table items under "### Sr. No.", "Our F.I. No." header
+    items = []
+    for i in range(1, n_items + 1):
+        items.extend([
+            f"{i}. FORGED FLANGE SIZE {i}",
+            " 73079190",
+            f" {i}",
+            " 25.0",
+            f" {i * 100}",
+            " 310.50",
+            f" {i * 31}.050,00",
+        ])
+    return "\n".join([
+        "## BHARAT FORGE WORKS",
+        "Our F.I. No. : BFW/2023/310",
+        "Date of Preparation: 14/09/2023",
+        "Your P.O. No. & Date: 4100020925-2708/2023",
+        "| Name & Address of Receiver (Billed To) : | Name & Address of Consignee (Shipped To) : |",
+        "|---|---|",
+        "| Tata Motors Ltd | Tata Motors Plant 2 |",
+        "| Pimpri, Pune | Chinchwad, Pune | State : Maharashtra |",
+        "## GSTIN : 27AAACT2727Q1ZW",
+        "PAIN No. : AAACT2727Q",
+        "### Sr. No. Description HSN Pkgs Contents Qty Rate Amount",
+        *items,
+        "### Total",
+        "COST Payable in words Rs. 2794.50 only",
+        "SOST Payable in words Rs. 2794.50 only",
+        "Total Invoice Value in words Rs. 36639.00 only",
+    ])
+
+
+def format9(n_items=3):
+    # Format 9: "**S.No. Item**" grid with period columns, "**Bill From**" at bottom
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(
+            f"| {i} | Conference hall booking {i} 2023-01-0{i % 9 + 1} 10:00 | 2023-01-0{i % 9 + 1} 18:00 | "
+            f"1 | {i * 10} | 1500.00 | {i * 1500}.00 |"
+        )
+    return "\n".join([
+        "**Bill To :** Hooli Technologies",
+        "**Address :** 5th Floor, Cyber City, Gurugram",
+        "**GSTIN/UIN of Customer :** 06AACCH1234R1Z2",
+        "**Customer PAN :** AACCH1234R",
+        "**Place Of Supply :** Haryana",
+        "**Invoice Date :** 09-Jan-2023",
+        f"**IRN :** {_irn('format9')}",
+        "",
+        "**S.No. Item** | **Start** | **End** | **Qty** | **Pax** | **Rate** | **Amount(INR)**",
+        *rows,
+        "",
+        "**Amount in words** Four Thousand Five Hundred only",
+        "| **Taxable Value** | 9000.00 | 810.00 | 810.00 | 1620.00 | 10620.00 |",
+        "SAC Code: 996334",
+        "---",
+        "**Bill From**",
+        "Grand Plaza Hotels",
+        "Address:- 1 Mall Road, Shimla Reg. office Delhi",
+        "GST Number: 02AAFCG5678H1Z9",
+        "PAN No: AAFCG5678H",
+        "CIN No - U55101HP2001PTC024680",
+    ])
+
+
+def format10(n_items=3):
+    # Format 10: "## ... PRIVATE LIMITED", "| GSTIN/UJN | : value |" header tables, S.No. | Description | HSN/SAC
+    rows = []
+    for i in range(1, n_items + 1):
+        rows.append(
+            f"| {i} | Mixer Grinder {i} | 850940 | {i} | 3,000.00 | {i * 3000}.00 | 0.00 | 0.00 | "
+            f"{i * 3000}.00 | 18% | 0% | 0% | {i * 540}.00 |"
+        )
+    return "\n".join([
+        "## PROTECH APPLIANCES PRIVATE LIMITED",
+        "",
+        "B-22, Okhla Phase II, New Delhi",
+        "",
+        "| GSTIN/UJN | : 07AAHCP1122D1Z3 |",
+        "| CIN No | : U29300DL2015PTC123456 |",
+        "| Invoice No | : PA2300912 |",
+        "| Date | : 11-10-2023 |",
+        "**IRN No**",
+        f": {_irn('format10')}",
+        "| Name of Purchaser | : Reliance Digital |",
+        "| Billing Address | : Andheri East, Mumbai |",
+        "| GSTIN/UJN | : 27AABCR3344E1Z8 |",
+        "| Name of Recipient | : Reliance Digital Store 12 |",
+        "| Ship to Address | : Vashi, Navi Mumbai |",
+        "| GSTIN/UJN | : 27AABCR3344E2Z7 |",
+        "",
+        "| S.No. | Description | HSN/SAC | Qty (Nos) | Rate | Value | Disc. | Handling Charge | Taxable Value | IGST % | CGST % | SGST % | GST Amount |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+        *rows,
+        "Invoice Amount in words Twenty One Thousand Two Hundred Forty only",
+        "Total IGST",
+        " 3240.00",
+        "**Total Invoice Value**",
+        " 21240.00",
+    ])
+
+
+GENERATORS = {
+    1: format1,
+    2: format2,
+    3: format3,
+    4: format4,
+    5: format5,
+    6: format6,
+    7: format7,
+    8: format8,
+    9: format9,
+    10: format10,
+}
+
+
+def build_corpus(n_items=3):
+    """Return {format_number: invoice_text} for every known layout"""
+    return {fmt: generate(n_items) for fmt, generate in GENERATORS.items()}
+
+
+def paginate(text, pages):
+    """
+    Multi-page version of an invoice: every further page repeats the
+    letterhead after a "---" rule (as PDF-to-markdown conversion emits page
+    breaks) and carries a page of terms and footer lines
+    """
+    letterhead = "\n".join(text.split("\n")[:3])
+    terms = "\n".join(
+        f"{n}. Goods once sold will not be taken back. Interest @ 18% p.a. on bills unpaid after {n * 5} days."
+        for n in range(1, 31)
+    )
+    extra = [
+        f"---\n{letterhead}\nPage {page} of {pages} (Customer copy)\n{terms}\nSubject to local jurisdiction"
+        for page in range(2, pages + 1)
+    ]
+    return "\n".join([text, *extra])
+
+
+def build_long_corpus(pages, n_items=3):
+    """Return {format_number: invoice_text} with every invoice spread over pages pages"""
+    return {fmt: paginate(text, pages) for fmt, text in build_corpus(n_items).items()}
+
+
+def widen(text, cells):
+    """
+    Version of an invoice whose line item rows carry cells extra numeric
+    cells before their closing "|", the shape of wide tables where PDF
+    conversion has split columns (only "|" tables after a "|---|" row change)
+    """
+    extra = " | ".join(["12345678"] * cells)
+    lines = text.split("\n")
+    in_rows = False
+    for index, line in enumerate(lines):
+        if line.startswith("|---"):
+            in_rows = True
+        elif in_rows and line.startswith("| ") and line.endswith(" |"):
+            lines[index] = f"{line} {extra} |"
+        else:
+            in_rows = False
+    return "\n".join(lines)
@@ -0,0 +1,95 @@
+"""
+Import-time budget of the command line and the API.
+
+Usage:
+    python benchmarks/import_budget.py [--rounds N] [--budget-ms MS] [--top N]
+
+Each entry point is imported --rounds times in a fresh interpreter with
+python -X importtime, and the fastest cumulative time of every module is
+kept:
+
+    cli     formats and executor, what "python c.py file.txt" imports
+    api     app, what a gunicorn worker imports (reported only)
+
+The run fails (exit 1) when the CLI takes longer than --budget-ms (default
+200) or imports any of SERVER_MODULES: the command line must not pay for
+the web stack or the optional stores. The slowest --top modules of each
+entry point are listed, as well as the time of formats.warm_up(), the
+self-test a server runs before /ready.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    'cli': 'import formats, executor',
+    'api': 'import app',
+}
+# Top-level packages only the server or the optional stores (cache, plans, jobs) need
+SERVER_MODULES = ('flask', 'werkzeug', 'jinja2', 'gunicorn', 'sqlite3')
+
+IMPORT_TIME_LINE = re.compile(r'import time:\s*(\d+) \|\s*(\d+) \|( *)(\S+)')
+
+
+def import_times(statement):
+    """{module: cumulative microseconds} of one fresh-interpreter import"""
+    finished = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                              cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in finished.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def best_import_times(statement, rounds):
+    """Fastest cumulative microseconds of every module over rounds imports"""
+    best = {}
+    for _ in range(rounds):
+        for module, micros in import_times(statement).items():
+            best[module] = min(micros, best.get(module, micros))
+    return best
+
+
+def warm_up_seconds():
+    finished = subprocess.run(
+        [sys.executable, '-c', 'import formats; print(formats.warm_up())'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(finished.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the CLI and the API")
+    parser.add_argument("--rounds", type=int, default=7, help="fresh interpreters per entry point")
+    parser.add_argument("--budget-ms", type=float, default=200, help="CLI import budget in milliseconds")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list per entry point")
+    args = parser.parse_args()
+
+    failures = []
+    for name, statement in ENTRY_POINTS.items():
+        times = best_import_times(statement, args.rounds)
+        roots = [module.strip() for module in statement[len('import '):].split(',')]
+        total = sum(times.get(module, 0) for module in roots)
+        print(f"{name}: {statement!r} {total / 1e3:.1f} ms")
+        for module, micros in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {micros / 1e3:>8.1f} ms  {module}")
+        if name == 'cli':
+            server = sorted({module.split('.')[0] for module in times} & set(SERVER_MODULES))
+            if server:
+                failures.append(f"the CLI imports {', '.join(server)}")
+            if total / 1e3 > args.budget_ms:
+                failures.append(f"the CLI imports in {total / 1e3:.1f} ms, over the {args.budget_ms:g} ms budget")
+    print(f"warm-up self-test: {warm_up_seconds() * 1e3:.1f} ms")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
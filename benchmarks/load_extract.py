@@ -0,0 +1,166 @@
+"""
+Load test of POST /extract served by gunicorn with gunicorn.conf.py.
+
+Usage:
+    python benchmarks/load_extract.py [--workers N] [--threads N] [--clients N]
+                                      [--seconds N] [--items N] [--url URL]
+
+Starts gunicorn (WEB_CONCURRENCY=--workers, GUNICORN_THREADS=--threads) on
+a free local port, or targets an already running server with --url, and
+runs --clients client processes that upload corpus invoices (Formats 1-10,
+--items line items) back to back for --seconds. Clients reuse their
+connection when the server keeps it alive (gthread workers) and reconnect
+otherwise (sync workers).
+
+Reported: requests per second overall and per server core (workers capped
+at the cores the server may use), median and 99th percentile latency, and
+the number of failed requests. Client processes compete with the server
+for CPU when both run on one box, so figures from a separate load
+generator machine are higher.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from itertools import cycle
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+from corpus import build_corpus
+from executor import cpu_count
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def multipart_bodies(items):
+    """(content type, body) of a single-file /extract upload for every corpus invoice"""
+    boundary = uuid.uuid4().hex
+    bodies = []
+    for fmt, text in build_corpus(items).items():
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="invoice{fmt}.txt"\r\n'
+            f'Content-Type: text/plain\r\n\r\n{text}\r\n--{boundary}--\r\n'
+        ).encode('utf-8')
+        bodies.append(body)
+    return f'multipart/form-data; boundary={boundary}', bodies
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(port, workers, threads):
+    """Start gunicorn in the background and wait until it answers /ready"""
+    environment = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers),
+                       GUNICORN_THREADS=str(threads))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', str(ROOT / 'gunicorn.conf.py'), 'app:create_app()'],
+        cwd=ROOT, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('gunicorn did not come up within 30 seconds')
+
+
+def client(host, port, content_type, bodies, seconds, results):
+    """Upload bodies round robin for seconds; put (latencies, failures) on results"""
+    latencies = []
+    failures = 0
+    connection = None
+    deadline = time.monotonic() + seconds
+    for body in cycle(bodies):
+        if time.monotonic() >= deadline:
+            break
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+            connection.request('POST', '/extract', body, {'Content-Type': content_type})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                failures += 1
+            if response.will_close:
+                connection.close()
+                connection = None
+        except OSError:
+            failures += 1
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /extract under gunicorn")
+    parser.add_argument("--workers", type=int, default=cpu_count(), help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="request threads per worker")
+    parser.add_argument("--clients", type=int, default=None, help="concurrent clients (default: 2 per worker)")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of the test")
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--url", help="test a running server (e.g. http://host:5000) instead of starting one")
+    args = parser.parse_args()
+
+    clients = args.clients or args.workers * 2
+    content_type, bodies = multipart_bodies(args.items)
+    server = None
+    if args.url:
+        location = urlsplit(args.url)
+        host, port = location.hostname, location.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = start_server(port, args.workers, args.threads)
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client, args=(host, port, content_type, bodies, args.seconds, results))
+            for _ in range(clients)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(latency for latency_list, _ in collected for latency in latency_list)
+    failures = sum(failed for _, failed in collected)
+    if not latencies:
+        print(f"no successful requests ({failures} failed)")
+        return
+    rate = len(latencies) / elapsed
+    cores = min(args.workers, cpu_count())
+    print(f"{'workers':>7} {'threads':>7} {'clients':>7} {'req/s':>8} {'req/s/core':>10} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'failed':>6}")
+    print(f"{args.workers:>7} {args.threads:>7} {clients:>7} {rate:>8.1f} {rate / cores:>10.1f} "
+          f"{statistics.median(latencies) * 1e3:>7.2f} {latencies[int(len(latencies) * 0.99)] * 1e3:>7.2f} "
+          f"{failures:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Worst-case timing of every pattern in formats.py on adversarial inputs.
+
+Usage:
+    python benchmarks/stress_patterns.py [--size CHARS] [--top N] [--cap S]
+                                         [--max-seconds S] [--seed N]
+
+Each pattern is searched against documents built to make it backtrack: the
+literal words of the pattern repeated as partial matches with no terminator,
+separated by spaces, newlines, table pipes or colons, plus randomly mutated
+corpus invoices (lines dropped, newlines and colons removed). The slowest
+input per pattern is reported together with the time at twice the size, so
+a ratio near 4 flags quadratic behaviour. Searches are cut off after --cap
+seconds with formats.TimeBudget (the same guard extraction uses); those
+rows are marked "capped".
+
+--max-seconds makes the script exit with status 1 when any pattern's worst
+case exceeds the limit, so it can pin regressions in CI.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(1, str(Path(__file__).resolve().parent.parent))
+
+import formats
+from corpus import build_corpus
+
+SEPARATORS = [" ", "\n", " | ", ": "]
+WORD_PATTERN = re.compile(r'(?<!\\)[A-Za-z]{3,}')
+
+
+def iter_patterns():
+    """Yield (name, compiled pattern) for every pattern formats.py defines"""
+    seen = set()
+    candidates = []
+    for field, alternatives in formats.FIELD_PATTERNS.items():
+        for index, alternative in enumerate(alternatives):
+            candidates.append((f"{field}[{index}]", alternative.pattern))
+    for fmt, pattern in formats.TABLE_PATTERNS.items():
+        candidates.append((f"TABLE_PATTERNS[{fmt}]", pattern))
+    for name, value in vars(formats).items():
+        if isinstance(value, re.Pattern):
+            candidates.append((name, value))
+    for name, pattern in candidates:
+        if id(pattern) not in seen:
+            seen.add(id(pattern))
+            yield name, pattern
+
+
+def repeat_to(chunk, size):
+    """Repeat chunk until the result is about size characters long"""
+    return chunk * max(1, size // max(len(chunk), 1))
+
+
+def adversarial_inputs(pattern, size):
+    """Yield (description, text) documents aimed at pattern"""
+    words = WORD_PATTERN.findall(pattern.pattern) or ["x"]
+    for count in range(1, min(len(words), 4) + 1):
+        partial = " ".join(words[:count])
+        for separator in SEPARATORS:
+            yield f"{count} word(s) + {separator!r}", repeat_to(partial + separator, size)
+    yield "long line", words[0] + repeat_to(" x", size)
+    yield "whitespace run", words[0] + " " * size
+    yield "digit run", words[0] + " " + repeat_to("1,", size)
+
+
+def mutated_corpus(size, rng, count=8):
+    """Yield (description, text) corpus invoices with structure broken at random"""
+    corpus = build_corpus(max(1, size // 600))
+    for _ in range(count):
+        fmt = rng.choice(list(corpus))
+        lines = corpus[fmt].split("\n")
+        lines = [line for line in lines if rng.random() > 0.2]
+        text = "\n".join(lines)
+        mutation = rng.choice(["drop newlines", "drop colons", "drop pipes", "drop lines"])
+        if mutation == "drop newlines":
+            text = text.replace("\n", " ")
+        elif mutation == "drop colons":
+            text = text.replace(":", "")
+        elif mutation == "drop pipes":
+            text = text.replace("|", " ")
+        yield f"format {fmt} corpus, {mutation}", text
+
+
+def time_search(pattern, text, cap):
+    """Seconds taken by one pattern.search(text), at most about cap"""
+    with formats.TimeBudget(pattern_timeout=cap, document_timeout=None) as budget:
+        start = time.perf_counter()
+        budget.run("search", pattern.search, text)
+        return time.perf_counter() - start
+
+
+def stress(size, seed, cap):
+    """Return [(worst seconds, name, description, seconds at twice the size)], slowest first"""
+    rng = random.Random(seed)
+    corpus_inputs = list(mutated_corpus(size, rng))
+    results = []
+    for name, pattern in iter_patterns():
+        worst = (0.0, "", "")
+        for description, text in list(adversarial_inputs(pattern, size)) + corpus_inputs:
+            elapsed = time_search(pattern, text, cap)
+            if elapsed > worst[0]:
+                worst = (elapsed, description, text)
+            if elapsed >= cap:
+                break
+        elapsed, description, text = worst
+        doubled = time_search(pattern, text + text, cap) if text else 0.0
+        results.append((elapsed, name, description, doubled))
+    results.sort(reverse=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worst-case time per pattern on adversarial inputs")
+    parser.add_argument("--size", type=int, default=10000, help="characters per adversarial document")
+    parser.add_argument("--top", type=int, default=25, help="number of slowest patterns to print")
+    parser.add_argument("--max-seconds", type=float, help="fail if any pattern's worst case exceeds this")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the corpus mutations")
+    parser.add_argument("--cap", type=float, default=2.0, help="seconds after which a search is cut off")
+    args = parser.parse_args()
+
+    results = stress(args.size, args.seed, args.cap)
+
+    print(f"{'worst ms':>10} {'2x size ms':>11} {'ratio':>6}  pattern / input")
+    for elapsed, name, description, doubled in results[:args.top]:
+        ratio = doubled / elapsed if elapsed else 0.0
+        capped = " (capped)" if elapsed >= args.cap else ""
+        print(f"{elapsed * 1e3:>10.2f} {doubled * 1e3:>11.2f} {ratio:>6.1f}  {name} / {description}{capped}")
+
+    if args.max_seconds is not None:
+        over = [name for elapsed, name, _, _ in results if elapsed > args.max_seconds]
+        if over:
+            print(f"\n{len(over)} pattern(s) over {args.max_seconds}s: {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Content-addressed cache of extraction results.
+
+Upstream systems resubmit the same invoice text (retries, re-OCR of the
+same PDF, duplicate emails). Results are keyed by a hash of the normalized
+text and EXTRACTOR_VERSION, a hash of the source of every module that
+decides a result (formats.py, money.py, plans.py, cascade_order.py and
+splitter.py), so editing any pattern, parsing or rounding rule, plan
+replay, cascade reordering or splitting rule invalidates every earlier
+entry without a manual flush.
+
+Two tiers: an in-memory LRU per process and an optional SQLite file that
+several worker processes can share. Both evict by entry count and,
+optionally, by age. Results that hit the time budget (partial results)
+are never cached.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import cascade_order
+import formats
+import money
+import plans
+import splitter
+
+
+# The modules whose source decides extraction results
+EXTRACTOR_MODULES = (formats, money, plans, cascade_order, splitter)
+
+
+def extractor_version():
+    """Short hash of the extraction modules' source; changes whenever a pattern or rule changes"""
+    digest = hashlib.sha256()
+    for module in EXTRACTOR_MODULES:
+        digest.update(Path(module.__file__).with_suffix('.py').read_bytes())
+    return digest.hexdigest()[:16]
+
+
+EXTRACTOR_VERSION = extractor_version()
+
+
+def normalize_text(text):
+    """Drop a byte-order mark and unify line endings so resubmissions hash alike"""
+    if text.startswith('\ufeff'):
+        text = text[1:]
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def cache_key(text):
+    """Key for already-normalized text under the current extractor version"""
+    digest = hashlib.sha256(EXTRACTOR_VERSION.encode())
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    """Thread-safe LRU of serialized results"""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """Serialized results in a SQLite file, evicted least-recently-used first"""
+
+    def __init__(self, path, max_entries=100000, ttl=None):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY, version TEXT NOT NULL,'
+                ' stored_at REAL NOT NULL, used_at REAL NOT NULL, value TEXT NOT NULL)'
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)')
+            # Entries of older extractor versions can never be hit again
+            self._connection.execute('DELETE FROM results WHERE version != ?', (EXTRACTOR_VERSION,))
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT stored_at, value FROM results WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            stored_at, value = row
+            if self.ttl and now - stored_at > self.ttl:
+                self._connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            self._connection.execute('UPDATE results SET used_at = ? WHERE key = ?', (now, key))
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results (key, version, stored_at, used_at, value) VALUES (?, ?, ?, ?, ?)',
+                (key, EXTRACTOR_VERSION, now, now, value)
+            )
+            count = self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if count > self.max_entries:
+                self._connection.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY used_at LIMIT ?)',
+                    (count - self.max_entries,)
+                )
+            if self.ttl:
+                self._connection.execute('DELETE FROM results WHERE stored_at < ?', (now - self.ttl,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class ResultCache:
+    """
+    Memory tier in front of an optional SQLite tier.
+    Look documents up by key(text); get() returns (data, tier) with tier
+    "memory" or "disk", or (None, None). Every get returns a fresh copy, so
+    callers may modify the result.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, path=None, disk_max_entries=100000):
+        self.memory = MemoryTier(max_entries, ttl)
+        self.disk = SQLiteTier(path, disk_max_entries, ttl) if path else None
+
+    def key(self, text):
+        """Cache key of a document already normalized with normalize_text()"""
+        return cache_key(text)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return json.loads(value), 'memory'
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                return json.loads(value), 'disk'
+        return None, None
+
+    def put(self, key, data):
+        """Store a complete result; partial (timed-out) results are skipped"""
+        if data.get('TimedOutFields'):
+            return
+        value = json.dumps(data, ensure_ascii=False)
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+
+def create_cache():
+    """
+    Build the cache from the environment, or return None when it is off.
+    RESULT_CACHE=1 turns it on; RESULT_CACHE_SIZE (entries, default 1024),
+    RESULT_CACHE_TTL (seconds, default none), RESULT_CACHE_PATH (SQLite file,
+    default memory only) and RESULT_CACHE_DISK_SIZE (default 100000) tune it.
+    """
+    if os.environ.get('RESULT_CACHE', '0').lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    ttl = float(os.environ.get('RESULT_CACHE_TTL', 0)) or None
+    return ResultCache(
+        max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 1024)),
+        ttl=ttl,
+        path=os.environ.get('RESULT_CACHE_PATH') or None,
+        disk_max_entries=int(os.environ.get('RESULT_CACHE_DISK_SIZE', 100000))
+    )
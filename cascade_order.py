@@ -0,0 +1,279 @@
+"""
+Adaptive order of the field cascades.
+
+FIELD_PATTERNS lists every field's alternatives in historical order, and
+a field lookup stops at the first alternative with a value, so documents
+whose layout matches a late alternative pay for every earlier miss. A
+CascadeOrder reorders each format's cascades (FORMAT_CASCADES, plus the
+full cascades of ambiguous documents) by how often each alternative
+matches, learned from sampled documents and/or loaded from a profile
+file generated offline:
+
+    python c.py order txt_files/ --output cascade_order.json
+
+Sampled documents are extracted with every alternative of every field
+tried, in the original order, so their result is the original one. For
+each field the sample records which alternatives matched, and every pair
+that matched the same document with different values: a conflict, where
+the original order decides the value. An alternative only moves ahead of
+an earlier one it has never conflicted with, and only once it has matched
+at least min_evidence sampled documents. Where two alternatives can both
+match, the historical priority is kept; the reordered cascades give every
+sampled document its original result.
+
+Match counts are rolling: once a format has seen window samples they are
+halved, so the order follows shifts in traffic. Conflicts are never
+forgotten. Alternatives are identified in profile files by a hash of
+their pattern, so a profile survives edits to other patterns; entries of
+patterns that no longer exist are dropped on load.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from formats import ALTERNATIVE_INDEX, FIELD_PATTERNS, FORMAT_CASCADES, extract_invoice_data
+
+
+def alternative_key(alternative):
+    """Stable name of an alternative: a hash of its pattern and flags"""
+    source = f'{alternative.pattern.flags}:{alternative.pattern.pattern}'
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+
+
+# Keys of every field's alternatives, by position in FIELD_PATTERNS
+ALTERNATIVE_KEYS = {field: [alternative_key(alt) for alt in alternatives] for field, alternatives in FIELD_PATTERNS.items()}
+
+
+def base_cascades(fmt):
+    """The cascades a document of format fmt (None: ambiguous) runs in original order"""
+    return FORMAT_CASCADES[fmt] if fmt else FIELD_PATTERNS
+
+
+class FieldStatistics:
+    """Matches and conflicts of one field's alternatives within one format"""
+
+    __slots__ = ('matches', 'conflicts')
+
+    def __init__(self):
+        # position in FIELD_PATTERNS[field]: sampled documents it matched (decayed)
+        self.matches = defaultdict(float)
+        # (earlier, later) positions that matched one document with different values
+        self.conflicts = set()
+
+
+class CascadeOrder:
+    """
+    Thread-safe match statistics and the cascades ordered by them.
+    sample_every: every n-th document is sampled (0 = never: a static order).
+    """
+
+    def __init__(self, sample_every=20, min_evidence=3, window=1000):
+        self.sample_every = sample_every
+        self.min_evidence = min_evidence
+        self.window = window
+        # (format, field): FieldStatistics
+        self._statistics = defaultdict(FieldStatistics)
+        # format: sampled documents (decayed with the matches)
+        self._samples = defaultdict(float)
+        # format: ordered cascades, rebuilt after the format's next sample
+        self._cascades = {}
+        self._documents = 0
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Whether the next document should be sampled"""
+        if not self.sample_every:
+            return False
+        with self._lock:
+            self._documents += 1
+            return (self._documents - 1) % self.sample_every == 0
+
+    def cascades(self, fmt):
+        """FIELD_PATTERNS-like dict of the cascades to run for format fmt"""
+        cascades = self._cascades.get(fmt)
+        if cascades is None:
+            with self._lock:
+                cascades = {field: self._order(fmt, field, alternatives)
+                            for field, alternatives in base_cascades(fmt).items()}
+                self._cascades[fmt] = cascades
+        return cascades
+
+    def _order(self, fmt, field, alternatives):
+        """alternatives reordered by matches, never swapping a conflicting pair"""
+        statistics = self._statistics.get((fmt, field))
+        if statistics is None or not statistics.matches:
+            return alternatives
+        matches, conflicts = statistics.matches, statistics.conflicts
+        indexed = [(ALTERNATIVE_INDEX[id(alternative)], alternative) for alternative in alternatives]
+        ordered = []
+        while indexed:
+            # The first remaining alternative may always go next; a later one
+            # only with enough evidence and no conflict with any it overtakes
+            best = 0
+            for position in range(1, len(indexed)):
+                index = indexed[position][0]
+                if matches.get(index, 0) < self.min_evidence or matches[index] <= matches.get(indexed[best][0], 0):
+                    continue
+                if all((earlier, index) not in conflicts for earlier, _ in indexed[:position]):
+                    best = position
+            ordered.append(indexed.pop(best)[1])
+        return ordered
+
+    def observe(self, fmt, matched):
+        """
+        Fold in a sampled document of format fmt; matched maps each field
+        looked up to {position in FIELD_PATTERNS[field]: value} of every
+        alternative that matched.
+        """
+        with self._lock:
+            for field, values in matched.items():
+                statistics = self._statistics[fmt, field]
+                for index in values:
+                    statistics.matches[index] += 1
+                indexes = sorted(values)
+                for position, earlier in enumerate(indexes):
+                    for later in indexes[position + 1:]:
+                        if values[earlier] != values[later]:
+                            statistics.conflicts.add((earlier, later))
+            self._samples[fmt] += 1
+            if self.window and self._samples[fmt] >= self.window:
+                self._samples[fmt] /= 2
+                for (statistics_format, _), statistics in self._statistics.items():
+                    if statistics_format == fmt:
+                        for index in statistics.matches:
+                            statistics.matches[index] /= 2
+            self._cascades.pop(fmt, None)
+
+    def as_dict(self):
+        """Profile file contents; alternatives are named by alternative_key()"""
+        with self._lock:
+            formats = defaultdict(dict)
+            for (fmt, field), statistics in sorted(self._statistics.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+                if not statistics.matches and not statistics.conflicts:
+                    continue
+                keys = ALTERNATIVE_KEYS[field]
+                formats[str(fmt)][field] = {
+                    'matches': {keys[index]: count for index, count in sorted(statistics.matches.items())},
+                    'conflicts': sorted([keys[earlier], keys[later]] for earlier, later in statistics.conflicts),
+                }
+            return {
+                'samples': {str(fmt): count for fmt, count in self._samples.items()},
+                'formats': formats,
+            }
+
+    def load(self, profile):
+        """Merge a profile (as_dict() contents) into the statistics"""
+        with self._lock:
+            for fmt_name, fields in profile.get('formats', {}).items():
+                fmt = None if fmt_name == 'None' else int(fmt_name)
+                for field, entry in fields.items():
+                    if field not in ALTERNATIVE_KEYS:
+                        continue
+                    positions = {key: index for index, key in enumerate(ALTERNATIVE_KEYS[field])}
+                    statistics = self._statistics[fmt, field]
+                    for key, count in entry.get('matches', {}).items():
+                        if key in positions:
+                            statistics.matches[positions[key]] += count
+                    for earlier, later in entry.get('conflicts', []):
+                        if earlier in positions and later in positions:
+                            statistics.conflicts.add(tuple(sorted((positions[earlier], positions[later]))))
+            for fmt_name, count in profile.get('samples', {}).items():
+                self._samples[None if fmt_name == 'None' else int(fmt_name)] += count
+            self._cascades.clear()
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.as_dict(), indent=2) + "\n")
+
+    def changed(self):
+        """[(format, field, original positions, ordered positions)] of the cascades the order changes"""
+        with self._lock:
+            formats = {fmt for fmt, _ in self._statistics}
+        changes = []
+        for fmt in sorted(formats, key=str):
+            cascades = self.cascades(fmt)
+            for field, alternatives in base_cascades(fmt).items():
+                original = [ALTERNATIVE_INDEX[id(alternative)] for alternative in alternatives]
+                ordered = [ALTERNATIVE_INDEX[id(alternative)] for alternative in cascades[field]]
+                if original != ordered:
+                    changes.append((fmt, field, original, ordered))
+        return changes
+
+
+def create_cascade_order():
+    """
+    Build the cascade order from the environment, or return None when it
+    is off. CASCADE_ORDER=adaptive learns from every
+    CASCADE_ORDER_SAMPLE_EVERY-th document (default 20); CASCADE_ORDER=static
+    only uses the profile in CASCADE_ORDER_PATH. CASCADE_ORDER_PATH (a file
+    written by "python c.py order") is the starting point of both;
+    CASCADE_ORDER_MIN_EVIDENCE (default 3) and CASCADE_ORDER_WINDOW (default
+    1000) tune it.
+    """
+    mode = os.environ.get('CASCADE_ORDER', 'off').lower()
+    if mode in ('', '0', 'false', 'no', 'off'):
+        return None
+    if mode not in ('adaptive', 'static'):
+        raise ValueError(f'Unknown CASCADE_ORDER {mode!r}; expected adaptive, static or off')
+    order = CascadeOrder(
+        sample_every=int(os.environ.get('CASCADE_ORDER_SAMPLE_EVERY', 20)) if mode == 'adaptive' else 0,
+        min_evidence=float(os.environ.get('CASCADE_ORDER_MIN_EVIDENCE', 3)),
+        window=float(os.environ.get('CASCADE_ORDER_WINDOW', 1000))
+    )
+    path = os.environ.get('CASCADE_ORDER_PATH')
+    if path:
+        order.load(json.loads(Path(path).read_text()))
+    return order
+
+
+_process_order = None
+_process_order_lock = threading.Lock()
+
+
+def process_cascade_order():
+    """This process's cascade order (create_cascade_order(), built on first use)"""
+    global _process_order
+    if _process_order is None:
+        with _process_order_lock:
+            if _process_order is None:
+                _process_order = create_cascade_order() or False
+    return _process_order or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python c.py order",
+        description="Sample invoices with every cascade alternative and write a cascade order profile."
+    )
+    parser.add_argument("input", help="directory or glob of .txt invoices")
+    parser.add_argument("--output", default="cascade_order.json", help="profile file to write")
+    parser.add_argument("--merge", help="existing profile to add these samples to")
+    parser.add_argument("--min-evidence", type=float, default=3,
+                        help="matches before an alternative may move up, for the report (default 3)")
+    parser.add_argument("--pattern", default="*.txt", help="files to pick up inside a directory (default: *.txt)")
+    parser.add_argument("--recursive", action="store_true", help="descend into subdirectories / allow ** in globs")
+    args = parser.parse_args(argv)
+
+    from formats import collect_inputs
+    _, files = collect_inputs(args.input, args.pattern, args.recursive)
+    if not files:
+        print(f"Error: No files match '{args.input}'.")
+        return 1
+    order = CascadeOrder(sample_every=1, min_evidence=args.min_evidence, window=0)
+    if args.merge:
+        order.load(json.loads(Path(args.merge).read_text()))
+    for path in files:
+        extract_invoice_data(path.read_text(encoding='utf-8'), order=order)
+    order.save(args.output)
+    for fmt, field, original, ordered in order.changed():
+        print(f"format {fmt}: {field} {original} -> {ordered}")
+    print(f"{len(files)} documents sampled; profile written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
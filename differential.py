@@ -0,0 +1,204 @@
+"""
+Differential harness: run two implementations of extract_invoice_data side
+by side over a corpus and report every field whose value differs, plus
+their latency ratio. A performance change to formats.py is safe to adopt
+when the harness finds no differences on production-like documents.
+
+    python c.py diff CANDIDATE INPUT [--baseline BASELINE] [--rounds N] ...
+
+CANDIDATE and BASELINE are a formats.py file (e.g. a copy under test) or
+git:<rev> for the formats.py of a commit; BASELINE defaults to the
+formats.py next to this file. Sibling modules (money.py, plans.py, ...,
+see SIBLING_MODULES) are taken from the same directory or revision when
+present there. INPUT is a directory or glob of .txt invoices, as for the
+batch CLI, or synthetic:N for the benchmark corpus with N line items per
+invoice.
+
+Differences are reported per document as paths such as
+HeaderItem.InvoiceNumber or LineItems[3].Quantity, then summed up per
+field. Each document is timed --rounds times per implementation, the two
+taking turns, and the best times are compared. Exit status 1 when any
+output differs or the total latency ratio exceeds --max-ratio.
+"""
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from cache import EXTRACTOR_MODULES
+
+ROOT = Path(__file__).resolve().parent
+
+# Modules loaded from formats.py's own directory: the rest of the extractor
+# (the modules the result cache is versioned by) and serializer.py, which
+# formats.py imports too
+SIBLING_MODULES = tuple(module.__name__ for module in EXTRACTOR_MODULES if module.__name__ != 'formats') + ('serializer',)
+
+
+def load_extractor(source, name):
+    """
+    extract_invoice_data of a formats.py file or of git:<rev>. The file's
+    sibling modules are loaded from its own directory while it is imported,
+    so both implementations can live in one process.
+    """
+    if source.startswith('git:'):
+        source = checkout(source[len('git:'):])
+    path = Path(source)
+    if path.is_dir():
+        path = path / 'formats.py'
+    saved = {module: sys.modules.pop(module) for module in SIBLING_MODULES if module in sys.modules}
+    sys.path.insert(0, str(path.parent))
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(path.parent))
+        for sibling in SIBLING_MODULES:
+            sys.modules.pop(sibling, None)
+        sys.modules.update(saved)
+    return module.extract_invoice_data
+
+
+def checkout(revision):
+    """Directory holding formats.py and its sibling modules as of a git revision"""
+    directory = Path(tempfile.mkdtemp(prefix='formats-diff-'))
+    for module in ('formats',) + SIBLING_MODULES:
+        shown = subprocess.run(['git', 'show', f'{revision}:{module}.py'], cwd=ROOT, capture_output=True)
+        if shown.returncode == 0:
+            (directory / f'{module}.py').write_bytes(shown.stdout)
+        elif module == 'formats':
+            raise ValueError(f'git show {revision}:formats.py failed: {shown.stderr.decode().strip()}')
+    return directory
+
+
+def load_corpus(source, pattern='*.txt', recursive=False):
+    """[(name, text)] of a directory or glob of invoices, or of synthetic:N"""
+    if source.startswith('synthetic:'):
+        sys.path.insert(0, str(ROOT / 'benchmarks'))
+        from corpus import build_corpus
+        items = int(source[len('synthetic:'):] or 10)
+        return [(f'format{fmt}', text) for fmt, text in build_corpus(items).items()]
+    from formats import collect_inputs
+    _, files = collect_inputs(source, pattern, recursive)
+    return [(str(path), path.read_text(encoding='utf-8')) for path in files]
+
+
+def diff_results(baseline, candidate):
+    """[(path, baseline value, candidate value)] of every field that differs"""
+    differences = []
+    for key in sorted(set(baseline) | set(candidate), key=str):
+        if key == 'HeaderItem':
+            header, other = baseline.get(key, {}), candidate.get(key, {})
+            for field in list(header) + [field for field in other if field not in header]:
+                if header.get(field) != other.get(field):
+                    differences.append((f'HeaderItem.{field}', header.get(field), other.get(field)))
+        elif key == 'LineItems':
+            items, other = baseline.get(key, []), candidate.get(key, [])
+            if len(items) != len(other):
+                differences.append(('LineItems', f'{len(items)} items', f'{len(other)} items'))
+            for index, (item, other_item) in enumerate(zip(items, other)):
+                for field in list(item) + [field for field in other_item if field not in item]:
+                    if item.get(field) != other_item.get(field):
+                        differences.append((f'LineItems[{index}].{field}', item.get(field), other_item.get(field)))
+        elif baseline.get(key) != candidate.get(key):
+            differences.append((key, baseline.get(key), candidate.get(key)))
+    return differences
+
+
+def field_of(path):
+    """Path with the line item index dropped, to count differences per field"""
+    if path.startswith('LineItems['):
+        return 'LineItems[*].' + path.split('.', 1)[1]
+    return path
+
+
+def timed(extract, text):
+    """(seconds, result) of one extraction"""
+    start = time.perf_counter()
+    data = extract(text)
+    return time.perf_counter() - start, data
+
+
+def compare(baseline, candidate, corpus, rounds=3, out=sys.stdout, limit=20):
+    """Run both over corpus and print the report; returns (differing documents, total latency ratio)"""
+    differing = 0
+    field_counts = Counter()
+    baseline_total = candidate_total = 0.0
+    ratios = []
+    # Warm both up so first-call work (lazy imports, caches) is not timed
+    for _, text in corpus[:1]:
+        baseline(text)
+        candidate(text)
+    for name, text in corpus:
+        baseline_best = candidate_best = float('inf')
+        for round_index in range(rounds):
+            # Alternate which runs first so caches and noise favour neither
+            if round_index % 2:
+                candidate_seconds, candidate_data = timed(candidate, text)
+                baseline_seconds, baseline_data = timed(baseline, text)
+            else:
+                baseline_seconds, baseline_data = timed(baseline, text)
+                candidate_seconds, candidate_data = timed(candidate, text)
+            baseline_best = min(baseline_best, baseline_seconds)
+            candidate_best = min(candidate_best, candidate_seconds)
+        baseline_total += baseline_best
+        candidate_total += candidate_best
+        ratios.append(candidate_best / baseline_best if baseline_best else 1.0)
+
+        differences = diff_results(baseline_data, candidate_data)
+        if differences:
+            differing += 1
+            field_counts.update(field_of(path) for path, _, _ in differences)
+            print(f"DIFF {name}", file=out)
+            for path, baseline_value, candidate_value in differences[:limit]:
+                print(f"  {path}: {baseline_value!r} -> {candidate_value!r}", file=out)
+            if len(differences) > limit:
+                print(f"  ... and {len(differences) - limit} more", file=out)
+
+    ratio = candidate_total / baseline_total if baseline_total else 1.0
+    print(f"{len(corpus)} documents, {len(corpus) - differing} identical, {differing} differing", file=out)
+    for field, count in field_counts.most_common():
+        print(f"  {field}: {count}", file=out)
+    if ratios:
+        print(f"latency: baseline {baseline_total * 1e3:.1f} ms, candidate {candidate_total * 1e3:.1f} ms, "
+              f"ratio {ratio:.3f} (per document median {statistics.median(ratios):.3f}, "
+              f"max {max(ratios):.3f})", file=out)
+    return differing, ratio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python c.py diff",
+        description="Compare a candidate formats.py against the current one, field by field."
+    )
+    parser.add_argument("candidate", help="candidate formats.py, or git:<rev>")
+    parser.add_argument("input", help="directory or glob of .txt invoices, or synthetic:N")
+    parser.add_argument("--baseline", default=str(ROOT / 'formats.py'),
+                        help="baseline formats.py or git:<rev> (default: the current formats.py)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed runs per document and implementation")
+    parser.add_argument("--max-ratio", type=float, help="also fail when candidate/baseline latency exceeds this")
+    parser.add_argument("--pattern", default="*.txt", help="files to pick up inside a directory (default: *.txt)")
+    parser.add_argument("--recursive", action="store_true", help="descend into subdirectories / allow ** in globs")
+    args = parser.parse_args(argv)
+
+    baseline = load_extractor(args.baseline, 'formats_baseline')
+    candidate = load_extractor(args.candidate, 'formats_candidate')
+    corpus = load_corpus(args.input, args.pattern, args.recursive)
+    if not corpus:
+        print(f"Error: No files match '{args.input}'.")
+        return 1
+    differing, ratio = compare(baseline, candidate, corpus, args.rounds)
+    too_slow = args.max_ratio is not None and ratio > args.max_ratio
+    if too_slow:
+        print(f"candidate is {ratio:.3f}x the baseline's latency (limit {args.max_ratio})")
+    return 1 if differing or too_slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
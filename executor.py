@@ -0,0 +1,189 @@
+"""
+Executors that run formats.extract_invoice_data.
+
+Extraction is pure-Python regex work and holds the GIL, so threads do not
+spread it across cores. ProcessExecutor runs it in a pool of worker
+processes (one per CPU by default) that compile every pattern when they
+start. InlineExecutor runs it in the calling thread, for the CLI and for
+debugging.
+
+Both extract with this process's supplier plan store (plans.py) when
+EXTRACT_PLANS is on, and its cascade order (cascade_order.py) when
+CASCADE_ORDER is; each worker process learns its own plans and order, or
+shares plans through PLANS_PATH.
+
+Both bound the number of documents in flight: submit() raises
+ExecutorSaturated instead of queueing without limit, which the app turns
+into a 429.
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+from cascade_order import process_cascade_order
+from formats import extract_invoice_data, warm_up
+from plans import process_plan_store
+from splitter import extract_invoices
+
+
+class ExecutorSaturated(Exception):
+    """Every slot is taken; the caller should back off and retry"""
+
+
+def cpu_count():
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _extract(text, split=False, **kwargs):
+    """
+    extract_invoice_data with the plan store and cascade order of the
+    process it runs in. split: text may hold several invoices; returns
+    splitter.extract_invoices() of it, its invoices extracted one after
+    the other in this process.
+    """
+    plans, order = process_plan_store(), process_cascade_order()
+    if split:
+        fields = kwargs.pop('fields', None)
+        return extract_invoices(text, lambda texts, segment_fields: [
+            extract_invoice_data(segment, plans=plans, order=order, fields=segment_fields, **kwargs) for segment in texts
+        ], fields)
+    return extract_invoice_data(text, plans=plans, order=order, **kwargs)
+
+
+class ExtractionExecutor:
+    """Base class: bounded submission of documents to extract_invoice_data"""
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, text, block=False, timeout=None, **kwargs):
+        """
+        Schedule extraction of text and return a Future of its data.
+        kwargs are passed to _extract(). Raises ExecutorSaturated
+        when max_pending documents are already in flight (after waiting up to
+        timeout seconds if block is set).
+        """
+        if block:
+            acquired = self._slots.acquire(timeout=timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise ExecutorSaturated(f'{self.max_pending} documents already in flight')
+        try:
+            future = self._submit(text, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def extract(self, text, **kwargs):
+        """Extract one document and wait for the result"""
+        return self.submit(text, **kwargs).result()
+
+    def _submit(self, text, kwargs):
+        raise NotImplementedError
+
+    def warm(self):
+        """Start workers ahead of the first document"""
+
+    def shutdown(self, wait=True):
+        """Release the executor's workers"""
+
+
+class InlineExecutor(ExtractionExecutor):
+    """Runs extraction in the calling thread"""
+
+    def __init__(self, max_pending=None):
+        super().__init__(max_pending or cpu_count() * 4)
+
+    def _submit(self, text, kwargs):
+        future = Future()
+        try:
+            future.set_result(_extract(text, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _warm_worker():
+    """Process pool initializer: importing formats compiled the patterns; the self-test warms the rest"""
+    warm_up()
+
+
+def _ping():
+    return os.getpid()
+
+
+class ProcessExecutor(ExtractionExecutor):
+    """
+    Runs extraction in a pool of worker processes.
+    Workers are spawned (not forked from a threaded server) and run the
+    extraction in their main thread, so the SIGALRM time budget applies.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or cpu_count()
+        super().__init__(max_pending or self.workers * 4)
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        # Imported here: the CLI's inline path never needs multiprocessing
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker
+        )
+
+    def _submit(self, text, kwargs):
+        from concurrent.futures.process import BrokenProcessPool
+        pool = self._pool
+        try:
+            return pool.submit(_extract, text, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool,
+            # unless a concurrent submit already replaced this one
+            with self._lock:
+                if pool is self._pool:
+                    pool.shutdown(wait=False)
+                    self._pool = self._new_pool()
+                pool = self._pool
+            return pool.submit(_extract, text, **kwargs)
+
+    def warm(self):
+        """Spawn every worker now instead of on the first documents"""
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+EXECUTORS = {
+    'inline': InlineExecutor,
+    'process': ProcessExecutor,
+}
+
+
+def create_executor(kind=None, workers=None, max_pending=None):
+    """
+    Build an executor. kind, workers and max_pending default to the
+    EXTRACT_EXECUTOR ("process" or "inline"), EXTRACT_WORKERS and
+    EXTRACT_MAX_PENDING environment variables.
+    """
+    kind = kind or os.environ.get('EXTRACT_EXECUTOR', 'process')
+    if kind not in EXECUTORS:
+        raise ValueError(f'Unknown executor {kind!r}; expected one of {", ".join(EXECUTORS)}')
+    max_pending = max_pending or int(os.environ.get('EXTRACT_MAX_PENDING', 0)) or None
+    if kind == 'inline':
+        return InlineExecutor(max_pending)
+    workers = workers or int(os.environ.get('EXTRACT_WORKERS', 0)) or None
+    return ProcessExecutor(workers, max_pending)
@@ -1,1217 +1,2478 @@
-import re
-import json
-import sys
-from pathlib import Path
-
-
-def extract_invoice_data(text):
-    """
-    Extracts invoice data from text file into the required JSON structure.
-    Uses pattern matching logic - no hardcoded values.
-    Handles multiple invoice formats dynamically.
-    """
-    data = {
-        "HeaderItem": {
-            "GrnDate": "",
-            "SupplierCIN": "",
-            "TotalInvoiceAmount": "",
-            "ShipToAddress": "",
-            "ShipFromAddres": "",
-            "IgstAmount": "",
-            "CgstAmount": "",
-            "TotalCess": "",
-            "CustomerGstin": "",
-            "EwayBillDate": "",
-            "EwayBillNo": "",
-            "SupplierPanNumber": "",
-            "IrnDate": "",
-            "ShipToGstin": "",
-            "ShipFromGSTIN": "",
-            "SupplierAddress": "",
-            "TotalTax": "",
-            "CustomerPanNumber": "",
-            "InvoiceNumber": "",
-            "InvoiceDate": "",
-            "CustomerName": "",
-            "IrnNo": "",
-            "DocType": "",
-            "PlaceOfSupply": "",
-            "PoNumber": "",
-            "ShipToName": "",
-            "ShipFromName": "",
-            "TotalAmount": "",
-            "PoDate": "",
-            "SupplierGstin": "",
-            "RCMApplicable": "",
-            "SupplierName": "",
-            "GrnNo": "",
-            "SgstAmount": "",
-            "CustomerAddress": ""
-        },
-        "LineItems": []
-    }
-
-    # Helper function to find pattern in text
-    def find_pattern(pattern, group_num=1, flags=re.IGNORECASE | re.DOTALL):
-        match = re.search(pattern, text, flags)
-        if not match:
-            return ""
-        # If group_num is 0 or pattern has no groups, return the whole match
-        try:
-            return match.group(group_num).strip()
-        except IndexError:
-            return match.group(0).strip() if group_num == 0 else ""
-    
-    def clean_value(value):
-        """Clean extracted value by removing extra whitespace and newlines"""
-        if not value:
-            return ""
-        return re.sub(r'\s+', ' ', value).strip()
-
-    # ===== SUPPLIER INFORMATION =====
-    
-    # Extract Supplier Name - multiple patterns for different formats
-    # Format 5: "## Company's Name" pattern
-    supplier_name = find_pattern(r'^([A-Z\s&]+(?:ENTERPRISES|INDUSTRIES|SOLUTIONS|PRODUCTS|SERVICES|CORPORATION|COMPANY)[^\n]*?)(?:\n|$)', flags=re.MULTILINE | re.IGNORECASE)
-    if not supplier_name:
-        supplier_name = find_pattern(r'^([A-Z\s&]+(?:PVT|PRIVATE|LTD|LIMITED|INDUSTRIES|FOOTWEAR)[A-Z\s.]*?)\.?\s*\n', flags=re.MULTILINE | re.IGNORECASE)
-    if not supplier_name:
-        supplier_name = find_pattern(r'##\s*Company[\'"]?s?\s+Name\s*\n\s*([^\n]+)', flags=re.IGNORECASE | re.MULTILINE)
-    if not supplier_name:
-        supplier_name = find_pattern(r'^##\s*(.+?)(?:\n|$)', flags=re.MULTILINE)  # Format 2: ## heading
-    if not supplier_name:
-        supplier_name = find_pattern(r'^#\s*(.+?)(?:\n|$)', flags=re.MULTILINE)  # Format 1 & 3: # heading
-    if not supplier_name:
-        supplier_name = find_pattern(r'\|\s*BILL FROM\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|')
-    if not supplier_name:
-        # Format 9: "**Bill From**" at bottom
-        supplier_name = find_pattern(r'\*\*Bill\s+From\*\*\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not supplier_name:
-    # Format 10: "## PROTECH APPLIANCES PRIVATE LIMITED" pattern
-        supplier_name = find_pattern(r'##\s*([A-Z\s]+(?:PRIVATE|PVT)?\s+LIMITED)', flags=re.IGNORECASE | re.MULTILINE)
-    data["HeaderItem"]["ShipFromName"] = clean_value(supplier_name)
-
-    # Supplier Address - Format 5: line after Company's Name
-    supplier_addr = find_pattern(r'^[A-Z\s&]+(?:ENTERPRISES|INDUSTRIES)[^\n]*\n(.+?)(?=Email|Phone|GSTN)', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_addr:
-        supplier_addr = find_pattern(r'^[A-Z\s&]+(?:PVT|PRIVATE|LTD|LIMITED)\.?\s*\n\s*(.+?)(?=\s+\d{3}\s+\d{8}|TAX\s+INVOICE)', flags=re.MULTILINE | re.IGNORECASE)
-    if not supplier_addr:
-        supplier_addr = find_pattern(r'##\s*Company[\'"]?s?\s+Name\s*\n\s*[^\n]+\n\s*([^\n]{5,200})', flags=re.IGNORECASE | re.MULTILINE)
-    if not supplier_addr:
-        # Format 3: FACTORY : address pattern
-        supplier_addr = find_pattern(r'FACTORY\s*:\s*(.+?)(?=\n##|\nGST|\n\|)', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_addr:
-        supplier_addr = find_pattern(r'##\s*.+?\n(.+?)(?=Phone|GSTN|GST|PAN|CIN|\n\*\*|\n---)', flags=re.DOTALL)
-    if not supplier_addr:
-        supplier_addr = find_pattern(r'BILL FROM.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_addr:
-        # Registered office fallback
-        supplier_addr = find_pattern(r'Regd\.?\s*off?\.?\s*:\s*(.+?)(?:\n---|$)', flags=re.IGNORECASE)
-    if not supplier_addr:
-        # Format 9: "Address:-" after Bill From
-        supplier_addr = find_pattern(r'\*\*Bill\s+From\*\*.*?Address\s*:-\s*(.+?)(?=Reg\.|CIN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_addr:
-    # Format 10: Address line after company name, before first table
-        supplier_addr = find_pattern(r'##\s*[A-Z\s]+LIMITED\s*\n+(.+?)(?=\n\s*\|)', flags=re.DOTALL | re.IGNORECASE)
-    data["HeaderItem"]["SupplierAddress"] = clean_value(supplier_addr)
-    
-    # Ship From Address - Format 5: "Ship From Address" section
-    ship_from_addr = find_pattern(r'Ship\s+From\s+Address\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not ship_from_addr:
-        ship_from_addr = data["HeaderItem"]["SupplierAddress"]
-    data["HeaderItem"]["ShipFromAddres"] = clean_value(ship_from_addr)
-
-    # Supplier GSTIN - Format 5: "### GSTIN/UIN" pattern
-    supplier_gstin = find_pattern(r'GSTN\s+No\.?\s*:\s*\n([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'1\.\s*GSTIN\s*\n([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'###\s*GSTIN\s*/\s*UIN\s*\n([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'##\s*GST\s*[-\s]+([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'GSTN?\s*:\s*([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'BILL FROM.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_gstin:
-        supplier_gstin = find_pattern(r'GST\s*IN\s*:\s*([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-        # Format 9: "GST Number:" at bottom
-        supplier_gstin = find_pattern(r'GST\s+Number\s*:\s*([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not supplier_gstin:
-    # Format 10: "| GSTIN/UJN | : value |" in header table
-        supplier_gstin = find_pattern(r'\|\s*GSTIN\s*/\s*UJN\s*\|\s*:\s*([0-9A-Z]{15})\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["SupplierGstin"] = supplier_gstin
-    
-
-    # Supplier PAN - Format 5: "### PAN" pattern
-    supplier_pan = find_pattern(r'###\s*PAN\s*\n([0-9A-Z]{10})', flags=re.IGNORECASE)
-    if not supplier_pan:
-        supplier_pan = find_pattern(r'PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', flags=re.IGNORECASE)
-    if not supplier_pan:
-        supplier_pan = find_pattern(r'BILL FROM.*?PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', flags=re.DOTALL | re.IGNORECASE)
-    if not supplier_pan:
-        # Format 9: "PAN No:" at bottom
-        supplier_pan = find_pattern(r'PAN\s+No\s*:\s*([0-9A-Z]{10})', flags=re.IGNORECASE)
-    data["HeaderItem"]["SupplierPanNumber"] = supplier_pan
-
-    # Supplier CIN - Format 5: "### CIN" pattern
-    supplier_cin = find_pattern(r'###\s*CIN\s*\n([A-Z0-9]{21})', flags=re.IGNORECASE)
-    if not supplier_cin:
-        supplier_cin = find_pattern(r'CIN[\s\-:]+([A-Z0-9]{21})', flags=re.IGNORECASE)
-    if not supplier_cin:
-        supplier_cin = find_pattern(r'CIN\s*NO\.?\s*[:\-]?\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not supplier_cin:
-        # Format 9: "CIN No -" pattern
-        supplier_cin = find_pattern(r'CIN\s+No\s*-\s*([A-Z0-9]{21})', flags=re.IGNORECASE)
-    if not supplier_cin:
-    # Format 10: "| CINNo | : value |" in header table
-        supplier_cin = find_pattern(r'\|\s*CIN\s*No\.?\s*\|\s*:\s*([A-Z0-9]{21})\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["SupplierCIN"] = supplier_cin
-
-    # ===== CUSTOMER INFORMATION =====
-    
-    # Customer Name - multiple patterns
-    # Format 5: "### Bill To" section
-    customer_name = find_pattern(r'Details\s+of\s+Receiver\s+\(Billed\s+to\)\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not customer_name:
-        customer_name = find_pattern(r'Details\s+of\s+Receiver\s+\(Billed\s+to\)\s*\n[^\n]*\n([^\n]+?)(?:\n|$)', flags=re.IGNORECASE)
-    if not customer_name:
-        customer_name = find_pattern(r'###\s*Bill\s+To\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not customer_name:
-        # Format 4: "Name and Address of Recipient:" followed by name on next line
-        customer_name = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\n([^\n(]+)', flags=re.IGNORECASE)
-    if not customer_name:
-        # Format 3: "Customer Name: value" pattern
-        customer_name = find_pattern(r'Customer\s+Name\s*:\s*([^\n]+)', flags=re.IGNORECASE)
-    if not customer_name:
-        customer_name = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\|?\s*[^\n]*\n\|?\s*([^|,]+?)(?:,|\|)', flags=re.IGNORECASE)
-    if not customer_name:
-        customer_name = find_pattern(r'\|\s*BILL TO\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not customer_name:
-        customer_name = find_pattern(r'Bill\s+To\s*:?\s*([^\n,]+?)(?:,|\n)', flags=re.IGNORECASE)
-    if not customer_name:
-    # Format 8: "Name & Address of Receiver (Billed To) :" in table
-        customer_name = find_pattern(r'Name\s+&\s+Address\s+of\s+Receiver\s+\(Billed\s+To\)\s*:?\s*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not customer_name:
-        # Format 9: "**Bill To :**" inline pattern
-        customer_name = find_pattern(r'\*\*Bill\s+To\s*:\*\*\s*([^\n]+)', flags=re.IGNORECASE)
-    if not customer_name:
-    # Format 10: "| Name of Purchaser | : value |" pattern
-        customer_name = find_pattern(r'\|\s*Name\s+of\s+Purchaser\s*\|\s*:\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["CustomerName"] = clean_value(customer_name)
-
-    # Customer Address - Format 5: "Address" line after Bill To
-    customer_addr = find_pattern(r'Details\s+of\s+Receiver.*?\n[^\n]+\n(.+?)(?=State\s+Name\s+&\s+code|GSTIN)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        customer_addr = find_pattern(r'Details\s+of\s+Receiver.*?\n[^\n]+\n([^\n]+\n[^\n]+?)(?=\n\|\s*GSTIN)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        customer_addr = find_pattern(r'###\s*Bill\s+To.*?Address\s*\n(.+?)(?=State\s+Code|GSTIN|PAN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        # Format 4: extract lines after customer name until Mob/PAN
-        customer_addr = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\n[^\n]+\n(.+?)(?=Mob\.|PAN\.|GST|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        # Format 3: extract lines after customer name until GST No
-        customer_addr = find_pattern(r'Customer\s+Name\s*:.*?\n(.+?)(?=GST\s*No|State\s*Code|\n\|)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        customer_addr = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\|?\s*[^\n]*\n\|?\s*[^,]+?,\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not customer_addr:
-        customer_addr = find_pattern(r'BILL TO.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-    # Format 8: Extract address from table row after customer name
-        customer_addr = find_pattern(r'Name\s+&\s+Address\s+of\s+Receiver.*?\n\|[^\n]*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|[^\n]*State\s*:', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_addr:
-        # Format 9: "**Address :**" inline pattern
-        customer_addr = find_pattern(r'\*\*Address\s*:\*\*\s*([^\n]+)', flags=re.IGNORECASE)
-    if not customer_addr:
-    # Format 10: "| Billing Address | : value |" pattern
-        customer_addr = find_pattern(r'\|\s*Billing\s+Address\s*\|\s*:\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["CustomerAddress"] = clean_value(customer_addr)
-
-    # Customer GSTIN - multiple patterns
-    # Format 5: "GSTIN / PAN" pattern under Bill To
-    customer_gstin = find_pattern(r'\|\s*GSTIN\s*/\s*Unique\s+ID\s*:\s*\|\s*([0-9A-Z]{15})\s*\|', flags=re.IGNORECASE)
-    if not customer_gstin:
-        customer_gstin = find_pattern(r'###\s*Bill\s+To.*?GSTIN\s*/\s*PAN\s*\n([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_gstin:
-        # Format 4: "GSTIN NO:" after customer section
-        customer_gstin = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient.*?GSTIN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_gstin:
-        # Format 3: "GST No: value" pattern
-        customer_gstin = find_pattern(r'Customer.*?GST\s*No\.?\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_gstin:
-        customer_gstin = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient.*?GSTN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_gstin:
-        customer_gstin = find_pattern(r'BILL TO.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_gstin:
-    # Format 8: "## GSTIN :" after customer table
-        customer_gstin = find_pattern(r'##\s*GSTIN\s*:\s*([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not customer_gstin:
-        # Format 9: "**GSTIN/UIN of Customer :**" pattern
-        customer_gstin = find_pattern(r'\*\*GSTIN/UIN\s+of\s+Customer\s*:\*\*\s*([0-9A-Z]{15})', flags=re.IGNORECASE)
-    if not customer_gstin:
-        # Format 10: Second "| GSTIN/UJN | : value |" in customer section
-        gstin_matches = re.findall(r'\|\s*GSTIN\s*/\s*UJN\s*\|\s*:\s*([0-9A-Z]{15})\s*\|', text, re.IGNORECASE)
-        if len(gstin_matches) >= 2:
-            customer_gstin = gstin_matches[1]  # Second occurrence is customer
-    data["HeaderItem"]["CustomerGstin"] = customer_gstin
-
-    # Customer PAN - Format 5: extract from "GSTIN / PAN" line
-    customer_pan = find_pattern(r'###\s*Bill\s+To.*?GSTIN\s*/\s*PAN\s*\n[0-9A-Z]{15}\s*/\s*([0-9A-Z]{10})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_pan:
-        # Format 4: "PAN. NO:" pattern
-        customer_pan = find_pattern(r'Name\s+and\s+Address\s+of\s+Recipient.*?PAN\.?\s*NO\.?\s*:\s*([0-9A-Z]{10})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_pan:
-        customer_pan = find_pattern(r'BILL TO.*?PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', flags=re.DOTALL | re.IGNORECASE)
-    if not customer_pan:
-    # Format 8: "PAIN No. :" pattern
-        customer_pan = find_pattern(r'PAIN\s+No\.\s*:\s*([0-9A-Z]{10})', flags=re.IGNORECASE)
-    #if not customer_pan:
-        # Format 9: "**Customer PAN :**" pattern
-        #customer_pan = find_pattern(r'\*\*Customer\s+PAN\s*:\*\*\s*([0-9A-Z]{10})', flags=re.IGNORECASE)
-    data["HeaderItem"]["CustomerPanNumber"] = customer_pan
-
-    # ===== SHIP TO INFORMATION =====
-    
-    # Ship To Name - Format 5: "### Ship To" section
-    ship_to_name = find_pattern(r'Details\s+of\s+Consignee\s+\(Shipped\s+to\)\s*\n[^\n]*\n([^\n]+?)(?:\n|$)', flags=re.IGNORECASE)
-    if not ship_to_name:
-        ship_to_name = find_pattern(r'###\s*Ship\s+To\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not ship_to_name:
-        # Format 4: "Name and Address of Shipped to:" pattern
-        ship_to_name = find_pattern(r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\n([^\n(]+)', flags=re.IGNORECASE)
-    if not ship_to_name:
-        ship_to_name = find_pattern(r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\|?\s*[^\n]*\n\|?\s*([^|,]+?)(?:,|\|)', flags=re.IGNORECASE)
-    if not ship_to_name:
-        ship_to_name = find_pattern(r'\|\s*SHIP TO\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not ship_to_name:
-    # Format 8: "Name & Address of Consignee (Shipped To) :" in table
-        ship_to_name = find_pattern(r'Name\s+&\s+Address\s+of\s+Consignee\s+\(Shipped\s+To\)\s*:?\s*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not ship_to_name:
-    # Format 10: "| Name of Recipient | : value |" pattern
-        ship_to_name = find_pattern(r'\|\s*Name\s+of\s+Recipient\s*\|\s*:\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["ShipToName"] = clean_value(ship_to_name)
-
-    # Ship To Address - Format 5: "Address" line after Ship To
-    ship_to_addr = find_pattern(r'Details\s+of\s+Consignee.*?\n[^\n]+\n([^\n]+\n[^\n]+?)(?=\n\|\s*GSTIN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_addr:
-        ship_to_addr = find_pattern(r'###\s*Ship\s+To.*?Address\s*\n(.+?)(?=State\s+Code|GSTIN|PAN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_addr:
-        # Format 4: extract lines after ship to name until Mob/PAN
-        ship_to_addr = find_pattern(r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\n[^\n]+\n(.+?)(?=Mob\.|PAN\.|\n\|)', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_addr:
-        ship_to_addr = find_pattern(r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\|?\s*[^\n]*\n\|?\s*[^,]+?,\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    if not ship_to_addr:
-        ship_to_addr = find_pattern(r'SHIP TO.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_addr:
-    # Format 8: Extract address from consignee table row
-        ship_to_addr = find_pattern(r'Name\s+&\s+Address\s+of\s+Consignee.*?\n\|[^\n]*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|[^\n]*State\s*:', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_addr:
-    # Format 10: "| Ship to Address | : value |" pattern
-        ship_to_addr = find_pattern(r'\|\s*Ship\s+to\s+Address\s*\|\s*:\s*([^|]+?)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["ShipToAddress"] = clean_value(ship_to_addr)
-
-    # Ship To GSTIN - Format 5: "GSTIN / PAN" pattern under Ship To
-    ship_to_gstin = find_pattern(r'###\s*Ship\s+To.*?GSTIN\s*/\s*PAN\s*\n([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_gstin:
-        ship_to_gstin = find_pattern(r'Name\s+and\s+Address\s+of\s+Shipped\s+to.*?GSTN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_gstin:
-        ship_to_gstin = find_pattern(r'SHIP TO.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', flags=re.DOTALL | re.IGNORECASE)
-    if not ship_to_gstin:
-        # Format 10: Third "| GSTIN/UJN | : value |" in ship-to section
-        gstin_matches = re.findall(r'\|\s*GSTIN\s*/\s*UJN\s*\|\s*:\s*([0-9A-Z]{15})\s*\|', text, re.IGNORECASE)
-        if len(gstin_matches) >= 3:
-            ship_to_gstin = gstin_matches[2]  # Third occurrence is ship-to
-    data["HeaderItem"]["ShipToGstin"] = ship_to_gstin
-
-    # ===== INVOICE DETAILS =====
-    
-    # Invoice Number - Format 5: "Invoice No." line after "Tax is Payable on Reverse Charges"
-    invoice_no = find_pattern(r'\|\s*Invoice\s+No\.?\s*:\s*\|\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'4\.\s*Serial\s+No\.?\s+of\s+invoice\s*\n([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'Invoice\s+No\.?\s*\n([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'Invoice\s+No\s*:\s*Date\s*:\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'Invoice\s+No\.?\s*:\s*([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'Invoice\s+No\.?\s*:?\s*Date\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)\s+', flags=re.IGNORECASE)
-    if not invoice_no:
-        invoice_no = find_pattern(r'INVOICE\s*No\.?\s*\|?\s*([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    if not invoice_no:
-    # Format 8: "Our F.I. No. :" pattern
-        invoice_no = find_pattern(r'Our\s+F\.I\.\s+No\.\s*:\s*([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    if not customer_pan:
-        # Format 9: "**Customer PAN :**" pattern
-        customer_pan = find_pattern(r'\*\*Customer\s+PAN\s*:\*\*\s*([0-9A-Z]{10})', flags=re.IGNORECASE)
-    if not invoice_no:
-    # Format 10: "| Invoice No | : value |" in header table
-        invoice_no = find_pattern(r'\|\s*Invoice\s+No\.?\s*\|\s*:\s*([A-Z0-9]+)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["InvoiceNumber"] = invoice_no
-
-    # Invoice Date - Format 5: "### Invoice Date" pattern
-    invoice_date = find_pattern(r'\|\s*Invoice\s+Date\s*:\s*\|\s*([\d\-A-Za-z]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'5\.\s*Date\s+of\s+invoice\s*\n([\d\-/.]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'F0\s+NO\s+&\s+DATE:.*?(\d{1,2}/\d{4})', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'###\s*Invoice\s+Date\s*\n([\d\-/.]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'Invoice\s+No\s*:\s*Date\s*:\s*\|?\s*[^\n]*\n\|?\s*[A-Z0-9]+\s+([\d\-/.]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'Invoice\s+Date\s*:\s*([\d\-/.]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'Invoice\s+No\.?\s*:?\s*Date\s*:?\s*\|?\s*[^\n]*\n\|?\s*[A-Z0-9]+\s+([\d\-/]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'Invoice\s*Date\s*\|?\s*:?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        invoice_date = find_pattern(r'Date\s+Of\s+Issue\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-    # Format 8: "Date of Preparation:" pattern
-        invoice_date = find_pattern(r'Date\s+of\s+Preparation\s*:\s*([\d/]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-        # Format 9: "**Invoice Date :**" inline pattern
-        invoice_date = find_pattern(r'\*\*Invoice\s+Date\s*:\*\*\s*([\d\-A-Za-z\s]+)', flags=re.IGNORECASE)
-    if not invoice_date:
-    # Format 10: "| Date | : value |" in header table
-        invoice_date = find_pattern(r'\|\s*Date\s*\|\s*:\s*([\d\-/]+)\s*\|', flags=re.IGNORECASE)
-    data["HeaderItem"]["InvoiceDate"] = invoice_date
-
-    # Document Type
-    doc_type = find_pattern(r'\|\s*(Tax\s*Invoice)\s*\|', flags=re.IGNORECASE)
-    if not doc_type:
-        doc_type = find_pattern(r'^#\s*(TAX\s*INVOICE|INVOICE|CREDIT\s*NOTE|DEBIT\s*NOTE)', flags=re.MULTILINE | re.IGNORECASE)
-    if not doc_type:
-        doc_type = find_pattern(r'(TAX\s*INVOICE|INVOICE|CREDIT\s*NOTE|DEBIT\s*NOTE)', flags=re.IGNORECASE)
-    data["HeaderItem"]["DocType"] = doc_type.upper() if doc_type else ""
-
-    # IRN/INN Number - Format 5: "IRN NO:" at top
-    irn_no = find_pattern(r'IRN\s+NO\s*:\s*([a-f0-9A-F]{64})', flags=re.IGNORECASE)
-    if not irn_no:
-        irn_no = find_pattern(r'INN\s*:?\s*([a-f0-9A-F]{64})', flags=re.IGNORECASE)
-    if not irn_no:
-        irn_no = find_pattern(r'IRN\s*:?\s*([a-f0-9]{64})', flags=re.IGNORECASE)
-    if not irn_no:
-        irn_no = find_pattern(r'IRN\s*No\.?\s*:?\s*([a-f0-9]{64})', flags=re.IGNORECASE)
-    if not irn_no:
-        # Format 9: "**IRN :**" inline pattern (shorter IRN)
-        irn_no = find_pattern(r'\*\*IRN\s*:\*\*\s*([a-f0-9A-F]{58,64})', flags=re.IGNORECASE)
-    if not irn_no:
-    # Format 10: "**IRN No**" bold field followed by ": value" on next line
-        irn_no = find_pattern(r'\*\*IRN\s+No\*\*\s*\n\s*:\s*([a-f0-9A-F]{64})', flags=re.IGNORECASE)
-    data["HeaderItem"]["IrnNo"] = irn_no
-
-    # IRN/INN Date
-    irn_date = find_pattern(r'INN\s*DT\.?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not irn_date:
-        irn_date = find_pattern(r'IRN\s*DT\.?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not irn_date:
-        irn_date = find_pattern(r'IRN.*?Date\s*:?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    data["HeaderItem"]["IrnDate"] = irn_date
-
-    # E-way Bill Number
-    eway_no = find_pattern(r'E-?WAY\s+BILL\s+NO\.?\s*:?\s*([A-Z0-9\-]+)', flags=re.IGNORECASE)
-    if not eway_no:
-        eway_no = find_pattern(r'E-?WAY\s+BILL\s+NO\.?\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9\-]+)', flags=re.IGNORECASE)
-    if not eway_no:
-        eway_no = find_pattern(r'E-?way\s*Bill\s*No\.?\s*\|?\s*:?\s*(\d+)', flags=re.IGNORECASE)
-    data["HeaderItem"]["EwayBillNo"] = eway_no
-
-    # E-way Bill Date
-    eway_date = find_pattern(r'E-?WAY\s+BILL\s+DATE\s*:?\s*([^\n]+?)(?:\n|$)', flags=re.IGNORECASE)
-    if not eway_date:
-        eway_date = find_pattern(r'E-?WAY\s+BILL\s+DATE\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/\s:]+?)(?:\n|$)', flags=re.IGNORECASE)
-    if not eway_date:
-        eway_date = find_pattern(r'E-?way\s*Bill\s*Date\s*\|?\s*:?\s*([\d\-/\s:]+)', flags=re.IGNORECASE)
-    data["HeaderItem"]["EwayBillDate"] = clean_value(eway_date)
-
-    # PO Number - Format 5: "Client PO No & Date" pattern
-    po_no = find_pattern(r'\|\s*P\.?O\.?\s*No\.?\s*\|\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not po_no:
-        po_no = find_pattern(r'Client\s+PO\s+No\s+&\s+Date\s*\n([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not po_no:
-        po_no = find_pattern(r'Customer\s+Reference\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    if not po_no:
-        po_no = find_pattern(r'P\.?O\.?\s*No\.?\s*[:|]?\s*([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    if not po_no:
-    # Format 8: "Your P.O. No. & Date:" pattern
-        po_no = find_pattern(r'Your\s+P\.O\.\s+No\.\s+&\s+Date\s*:\s*([A-Z0-9]+)', flags=re.IGNORECASE)
-    data["HeaderItem"]["PoNumber"] = po_no
-
-    # PO Date - Format 5: part of "Client PO No & Date" line
-    po_date = find_pattern(r'\|\s*P\.?O\.?\s*Date\s*\|\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not po_date:
-        po_date = find_pattern(r'Client\s+PO\s+No\s+&\s+Date\s*\n[A-Z0-9]+\s*-\s*([\d\-/.]+)', flags=re.IGNORECASE)
-    if not po_date:
-        po_date = find_pattern(r'Our\s+Reference\s+No.*?DATE\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/]+)', flags=re.DOTALL | re.IGNORECASE)
-    if not po_date:
-        po_date = find_pattern(r'P\.?O\.?\s*Date\s*[:|]?\s*([\d\-/]+)', flags=re.IGNORECASE)
-    if not po_date:
-    # Format 8: Extract date from "Your P.O. No. & Date: 4100020925-2708/2022"
-        po_date = find_pattern(r'Your\s+P\.O\.\s+No\.\s+&\s+Date\s*:.*?(\d{2,4}/\d{4})', flags=re.IGNORECASE)
-    data["HeaderItem"]["PoDate"] = po_date
-
-    # GRN details
-    data["HeaderItem"]["GrnNo"] = find_pattern(r'GRN\s*No\.?\s*[:|]?\s*([A-Z0-9/\-]+)', flags=re.IGNORECASE)
-    data["HeaderItem"]["GrnDate"] = find_pattern(r'GRN\s*Date\s*[:|]?\s*([\d\-/]+)', flags=re.IGNORECASE)
-
-    # Place of Supply - Format 5: "Place of Supply" line
-    
-    place_of_supply = find_pattern(r'Place\s+of\s+Supply\s*\n([^\n]+)', flags=re.IGNORECASE)
-    if not place_of_supply:
-        # Format 9: "**Place Of Supply :**" inline pattern
-        place_of_supply = find_pattern(r'\*\*Place\s+Of\s+Supply\s*:\*\*\s*([^\n]+)', flags=re.IGNORECASE)
-    if place_of_supply:
-        data["HeaderItem"]["PlaceOfSupply"] = clean_value(place_of_supply)
-    elif data["HeaderItem"]["CustomerGstin"] and len(data["HeaderItem"]["CustomerGstin"]) >= 2:
-        data["HeaderItem"]["PlaceOfSupply"] = data["HeaderItem"]["CustomerGstin"][:2]
-    elif data["HeaderItem"]["ShipToGstin"] and len(data["HeaderItem"]["ShipToGstin"]) >= 2:
-        data["HeaderItem"]["PlaceOfSupply"] = data["HeaderItem"]["ShipToGstin"][:2]
-
-    # RCM Applicable - Format 5: "Tax is Payable on Reverse Charges"
-    # Check if pattern exists (no capture group)
-    rcm_match = re.search(r'Tax\s+is\s+Payable\s+on\s+Reverse\s+Charges', text, re.IGNORECASE)
-    if rcm_match:
-        data["HeaderItem"]["RCMApplicable"] = "YES"
-    else:
-        rcm = find_pattern(r'(?:Whether\s+tax\s+has\s+to\s+be\s+paid\s+under\s+)?re[vw]e[rs]se\s+Charges?\s+Basis\??\s*(Yes|No|Y|N)', flags=re.IGNORECASE)
-        if not rcm:
-            rcm = find_pattern(r'RCM\s*Applicable\s*[:|]?\s*(Yes|No|Y|N)', flags=re.IGNORECASE)
-        data["HeaderItem"]["RCMApplicable"] = rcm.upper() if rcm else ""
-
-        # ===== LINE ITEMS EXTRACTION =====
-
-        # Format 9: Complex table with merged cells - Item description spans columns
-    # Pattern: | S.No | Item (multi-column) | ... | Amount |
-    format9_table = re.search(
-        r'\*\*S\.No\.\s+Item\*\*.*?\*\*Amount\(INR\)\*\*\s*\n(.*?)(?=\n\s*\*\*Amount\s+in\s+words|---)',
-        text, re.DOTALL | re.IGNORECASE
-    )
-    
-    if format9_table:
-        table_body = format9_table.group(1)
-        # Extract data rows: | number | description with dates | qty | pax | rate | amount |
-        format9_rows = re.finditer(
-            r'\|\s*(\d+)\s*\|\s*(.+?)\s+(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})\s*\|\s*(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})\s*\|\s*(\d+)\s*\|\s*(\d+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|',
-            table_body, re.IGNORECASE
-        )
-        
-        for row in format9_rows:
-            sr_no = row.group(1).strip()
-            description = clean_value(row.group(2))
-            start_date = row.group(3).strip()
-            end_date = row.group(4).strip()
-            qty = row.group(5).strip()
-            pax = row.group(6).strip()
-            unit_price = row.group(7).strip()
-            amount = row.group(8).strip()
-            
-            # Combine description with period
-            full_description = f"{description} (Period: {start_date} to {end_date})"
-            
-            line_item = {
-                "IgstRate": "",
-                "Description": full_description,
-                "UnitOfMeasurement": "NOS",
-                "IgstAmount": "",
-                "CgstAmount": "",
-                "TaxableValue": amount,
-                "Quantity": qty,
-                "TotalItemAmount": "",
-                "CessAmount": "",
-                "UnitPrice": unit_price,
-                "CgstRate": "",
-                "HsnCode": "",
-                "SgstAmount": "",
-                "CessRate": "",
-                "SgstRate": ""
-            }
-            
-            data["LineItems"].append(line_item)
-
-    if not data["LineItems"]:
-
-            # Format 8: Non-table format - numbered list with values on separate lines
-        # Pattern: "1. Description\n HSN\n Qty\n Rate\n ..."
-        format8_pattern = re.search(
-            r'###\s*Sr\.\s*No\..*?\n(.*?)(?=###\s*Total|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if format8_pattern:
-            items_section = format8_pattern.group(1)
-            # Match numbered items: "1. DESCRIPTION\n HSN\n numbers..."
-            format8_items = re.finditer(
-                r'(\d+)\.\s+([^\n]+?)\s*\n\s*(\d{8})\s*\n\s*(\d+)\s*\n\s*([\d.]+)\s*\n\s*([\d,.]+)\s*\n\s*([\d.]+)\s*\n\s*([\d,.]+)',
-                items_section, re.IGNORECASE
-            )
-            
-            for item in format8_items:
-                sr_no = item.group(1).strip()
-                description = clean_value(item.group(2))
-                hsn_code = item.group(3).strip()
-                no_of_pkgs = item.group(4).strip()
-                contents_per_pack = item.group(5).strip()
-                quantity = item.group(6).strip()
-                unit_price = item.group(7).strip()
-                amount = item.group(8).strip().replace('.', '').replace(',', '.')
-                
-                line_item = {"IgstRate": "", "Description": description, "UnitOfMeasurement": "NOS", "IgstAmount": "", "CgstAmount": "", "TaxableValue": amount, "Quantity": quantity, "TotalItemAmount": "", "CessAmount": "", "UnitPrice": unit_price, "CgstRate": "", "HsnCode": hsn_code, "SgstAmount": "", "CessRate": "", "SgstRate": ""}
-                
-                data["LineItems"].append(line_item)
-
-    if not data["LineItems"]:
-        # Format 10: Table with | S.No. | Description | HSN/SAC | Qty (Nos) | Rate | Value | Disc. | Handling Charge | Taxable Value | IGST % | CGST % | SGST % | GST Amount |
-        format10_table = re.search(
-            r'\|\s*S\.No\.\s*\|\s*Description\s*\|\s*HSN/SAC.*?\|\s*GST\s+Amount\s*\|[^\n]*\n(.*?)(?=\n\s*Invoice\s+Amount\s+in\s+words|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if format10_table:
-            table_body = format10_table.group(1)
-            # Extract data rows: | num | desc | hsn | qty | rate | value | disc | handling | taxable | igst% | cgst% | sgst% | gst_amt |
-            format10_rows = re.finditer(
-                r'\|\s*(\d+)\s*\|\s*([^|]+?)\s*\|\s*(\d+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d.]+)%\s*\|\s*([\d.]+)%\s*\|\s*([\d.]+)%\s*\|\s*([\d,.]+)\s*\|',
-                table_body, re.IGNORECASE
-            )
-            
-            for row in format10_rows:
-                desc = clean_value(row.group(2))
-                hsn = row.group(3).strip()
-                qty = row.group(4).replace(',', '')
-                rate = row.group(5).replace(',', '')
-                value = row.group(6).replace(',', '')
-                discount = row.group(7).replace(',', '')
-                handling = row.group(8).replace(',', '')
-                taxable = row.group(9).replace(',', '')
-                igst_pct = row.group(10).strip()
-                cgst_pct = row.group(11).strip()
-                sgst_pct = row.group(12).strip()
-                gst_amt = row.group(13).replace(',', '')
-                
-                # Calculate individual tax amounts
-                igst_amt = ""
-                cgst_amt = ""
-                sgst_amt = ""
-                
-                try:
-                    if float(igst_pct) > 0:
-                        igst_amt = str(round(float(taxable) * float(igst_pct) / 100, 2))
-                    if float(cgst_pct) > 0:
-                        cgst_amt = str(round(float(taxable) * float(cgst_pct) / 100, 2))
-                    if float(sgst_pct) > 0:
-                        sgst_amt = str(round(float(taxable) * float(sgst_pct) / 100, 2))
-                except (ValueError, ZeroDivisionError):
-                    pass
-                
-                data["LineItems"].append({
-                    "ItemDescription": desc,
-                    "HsnCode": hsn,
-                    "Quantity": qty,
-                    "Unit": "Nos",
-                    "Rate": rate,
-                    "ItemAmount": value,
-                    "DiscountAmount": discount,
-                    "TaxableAmount": taxable,
-                    "IgstRate": igst_pct,
-                    "CgstRate": cgst_pct,
-                    "SgstRate": sgst_pct,
-                    "IgstAmount": igst_amt,
-                    "CgstAmount": cgst_amt,
-                    "SgstAmount": sgst_amt,
-                    "TotalAmount": str(float(taxable) + float(gst_amt))
-                })
-
-    if not data["LineItems"]:
-
-        # Format 7: Table with | number | Description | HSN | Units | Quantity | Rate | Total |
-        format7_table = re.search(
-            r'\|\s*Description\s+of\s+Goods\s*\|\s*HSN\s+Code\s*\|\s*Units\s*\|\s*Quantity\s*\|\s*Rate\s*\|\s*Total\s*\|[^\n]*\n(.*?)(?=\n\s*\|\s*TOTAL|\n\s*Certified|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-
-        if format7_table:
-            table_body = format7_table.group(1)
-            # Extract data rows: | number | description | hsn | units | qty | rate | total |
-            format7_rows = re.finditer(
-                r'\|\s*(\d+)\s*\|\s*([^|]+?)\s*\|\s*(\d{6})?\s*\|\s*([A-Za-z]+)\s*\|\s*([\d.-]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|',
-                table_body, re.IGNORECASE
-            )
-            
-            for row in format7_rows:
-                line_no = row.group(1).strip()
-                description = clean_value(row.group(2))
-                hsn_code = row.group(3).strip() if row.group(3) else ""
-                uom = row.group(4).strip().upper()
-                quantity = row.group(5).strip()
-                unit_price = row.group(6).strip()
-                total = row.group(7).strip()
-                
-                line_item = {"IgstRate": "", "Description": description, "UnitOfMeasurement": uom, "IgstAmount": "", "CgstAmount": "", "TaxableValue": total, "Quantity": quantity, "TotalItemAmount": "", "CessAmount": "", "UnitPrice": unit_price, "CgstRate": "", "HsnCode": hsn_code, "SgstAmount": "", "CessRate": "", "SgstRate": ""}
-                
-                data["LineItems"].append(line_item)
-
-    if not data["LineItems"]:
-
-        # Format 6: Table with Sr. No. | Description | HSN | COL | SIZE | Qty | Rate | Total (Taxable) | CGST | SGST | IGST
-        # Note: This format has misaligned columns where data spans multiple pipe separators
-        format6_table = re.search(
-            r'\|\s*Sr\.\s*No\.\s*\|\s*Description.*?Goods\s*\|.*?HSN.*?\|.*?(?:COL|COLOR).*?\|.*?SIZE.*?\|.*?Qty.*?\|.*?Rate.*?\|.*?Total.*?\(Taxable\).*?\|.*?CGST.*?\|.*?SGST.*?\|.*?IGST.*?\|[^\n]*\n(.*?)(?=\n\s*freight\s+insurance|\n\s*Total\s+Invoice|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-
-        if format6_table:
-            table_body = format6_table.group(1)
-            # Extract data rows - flexible pattern to handle misaligned columns
-            # Pattern: | number | text | 8-digit-HSN | ... numbers scattered across pipes
-            format6_rows = re.finditer(
-                r'\|\s*(\d+)\s*\|\s*([^|]+?)\s*\|\s*(\d{8})\s*\|.*?\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d.]+)%\s*\|\s*([\d,.]+)\s*\|\s*([\d.]+)%\s*\|\s*([\d,.]+)',
-                table_body, re.IGNORECASE
-            )
-            
-            for row in format6_rows:
-                sr_no = row.group(1).strip()
-                description = clean_value(row.group(2))
-                hsn_code = row.group(3).strip()
-                quantity = row.group(4).strip()
-                unit_price = row.group(5).strip()
-                taxable_value = row.group(6).strip().replace(',', '')
-                cgst_rate = row.group(7).strip()
-                cgst_amount = row.group(8).strip().replace(',', '')
-                sgst_rate = row.group(9).strip()
-                sgst_amount = row.group(10).strip().replace(',', '')
-                
-                line_item = {"IgstRate": "", "Description": description, "UnitOfMeasurement": "NOS", "IgstAmount": "", "CgstAmount": cgst_amount, "TaxableValue": taxable_value, "Quantity": quantity, "TotalItemAmount": "", "CessAmount": "", "UnitPrice": unit_price, "CgstRate": cgst_rate, "HsnCode": hsn_code, "SgstAmount": sgst_amount, "CessRate": "", "SgstRate": sgst_rate}
-                
-                data["LineItems"].append(line_item)
-    
-    # Format 5: Complex table with Site | Description | HSNBAC CODE | Batch No | Qty | UOM | Rate | Total | Discount | Taxable Value | CGST | SGST | IGST
-    if not data["LineItems"]:
-        format5_table = re.search(
-            r'\|\s*Site\s*\|\s*Description\s*\|.*?HSN.*?CODE.*?\|.*?(?:Batch|City).*?\|.*?(?:City|LOM).*?\|.*?LOM.*?\|.*?Rate.*?\|.*?Total.*?\|.*?Discount.*?\|.*?Taxable\s+Value.*?\|.*?CGST.*?\|.*?SGST.*?\|.*?IGST.*?\|[^\n]*\n(.*?)(?=\n\s*Remark|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if format5_table:
-            table_body = format5_table.group(1)
-            # Extract data rows - look for numeric site/line numbers
-            format5_rows = re.finditer(
-                r'\|\s*(\d+)\s*\|\s*([^|]+?)\s*\|\s*(\d{4,8})\s*\|\s*([^|]*?)\s*\|\s*([\d.]+)\s*\|\s*([A-Z]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d,.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d,.]+)\s*\|',
-                table_body, re.IGNORECASE
-            )
-            
-            for row in format5_rows:
-                site = row.group(1).strip()
-                description = clean_value(row.group(2))
-                hsn_code = row.group(3).strip()
-                batch_no = clean_value(row.group(4))
-                quantity = row.group(5).strip()
-                uom = row.group(6).strip().upper()
-                unit_price = row.group(7).strip().replace(',', '')
-                total = row.group(8).strip().replace(',', '')
-                discount = row.group(9).strip()
-                taxable_value = row.group(10).strip().replace(',', '')
-                
-                # Skip rows with "Total:" or summary text
-                if any(keyword in description.lower() for keyword in ['total', 'grand total', 'details of tax']):
-                    continue
-                
-                line_item = {
-                    "IgstRate": "",
-                    "Description": description,
-                    "UnitOfMeasurement": uom,
-                    "IgstAmount": "",
-                    "CgstAmount": "",
-                    "TaxableValue": taxable_value,
-                    "Quantity": quantity,
-                    "TotalItemAmount": total,
-                    "CessAmount": "",
-                    "UnitPrice": unit_price,
-                    "CgstRate": "",
-                    "HsnCode": hsn_code,
-                    "SgstAmount": "",
-                    "CessRate": "",
-                    "SgstRate": ""
-                }
-                
-                data["LineItems"].append(line_item)
-    
-    # Try Format 1: Complex table with multiple columns (S.No | Description | HSN | ... | IGST | CGST | SGST | Total)
-    if not data["LineItems"]:
-        table_match = re.search(
-            r'\|\s*S\.?No\.?.*?(?:HSN|SAC).*?(?:Quantity|Qty).*?(?:Price|Rate).*?(?:Total|Amount).*?\|.*?\n(.*?)(?=\n\s*---|\n\s*###|\n\s*\*\*|SubTotal|Total Amount|Narration|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if table_match:
-            table_body = table_match.group(1)
-            # Format 1: Full table with tax columns
-            row_pattern = r'\|\s*(\d+)\s*\|([^|]+)\|([^|]+)\|([^|]*)\|([^|]*)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]*)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|'
-            rows = re.finditer(row_pattern, table_body, re.MULTILINE)
-            
-            for row in rows:
-                groups = row.groups()
-                if len(groups) >= 10:
-                    line_item = {
-                        "IgstRate": "",
-                        "Description": clean_value(groups[1]),
-                        "UnitOfMeasurement": "",
-                        "IgstAmount": "",
-                        "CgstAmount": "",
-                        "TaxableValue": "",
-                        "Quantity": "",
-                        "TotalItemAmount": "",
-                        "CessAmount": "",
-                        "UnitPrice": "",
-                        "CgstRate": "",
-                        "HsnCode": "",
-                        "SgstAmount": "",
-                        "CessRate": "",
-                        "SgstRate": ""
-                    }
-                    
-                    # Extract HSN
-                    hsn_match = re.search(r'\d{4,8}', groups[2] if len(groups) > 2 else "")
-                    if hsn_match:
-                        line_item["HsnCode"] = hsn_match.group(0)
-                    
-                    # Extract quantity and UOM
-                    if len(groups) > 5:
-                        qty_text = groups[5].strip()
-                        qty_match = re.search(r'([\d.]+)\s*([A-Z]+)', qty_text, re.IGNORECASE)
-                        if qty_match:
-                            line_item["Quantity"] = qty_match.group(1)
-                            line_item["UnitOfMeasurement"] = qty_match.group(2).upper()
-                        else:
-                            line_item["Quantity"] = re.sub(r'[^0-9.]', '', qty_text)
-                    
-                    # Extract prices and amounts
-                    if len(groups) > 6:
-                        line_item["UnitPrice"] = re.sub(r'[^0-9.]', '', groups[6])
-                    if len(groups) > 9:
-                        line_item["TaxableValue"] = re.sub(r'[^0-9.]', '', groups[9])
-                    if len(groups) > 10:
-                        line_item["IgstAmount"] = re.sub(r'[^0-9.]', '', groups[10])
-                    if len(groups) > 11:
-                        line_item["CgstAmount"] = re.sub(r'[^0-9.]', '', groups[11])
-                    if len(groups) > 12:
-                        line_item["SgstAmount"] = re.sub(r'[^0-9.]', '', groups[12])
-                    if len(groups) > 13:
-                        line_item["TotalItemAmount"] = re.sub(r'[^0-9.]', '', groups[13])
-                    
-                    # Calculate tax rates
-                    try:
-                        if line_item["TaxableValue"] and float(line_item["TaxableValue"]) > 0:
-                            taxable = float(line_item["TaxableValue"])
-                            if line_item["IgstAmount"] and float(line_item["IgstAmount"]) > 0:
-                                line_item["IgstRate"] = str(round((float(line_item["IgstAmount"]) / taxable) * 100, 2))
-                            if line_item["CgstAmount"] and float(line_item["CgstAmount"]) > 0:
-                                line_item["CgstRate"] = str(round((float(line_item["CgstAmount"]) / taxable) * 100, 2))
-                            if line_item["SgstAmount"] and float(line_item["SgstAmount"]) > 0:
-                                line_item["SgstRate"] = str(round((float(line_item["SgstAmount"]) / taxable) * 100, 2))
-                    except (ValueError, ZeroDivisionError):
-                        pass
-                    
-                    data["LineItems"].append(line_item)
-    
-    # Try Format 2 & 4: Table without "No. Of Packages" column (Description | UOM | Quantity | Rate | Amount)
-    if not data["LineItems"]:
-        # Format 4 specific: table starts with "Description of Goods"
-        simple_table = re.search(
-            r'\|\s*Description\s+of\s+Goods\s*\|.*?UOM.*?\|.*?Quantity.*?\|.*?Rate.*?\|.*?Amount.*?\|[^\n]*\n(.*?)(?=\n\s*\*\*|\n\s*Narration|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if not simple_table:
-            simple_table = re.search(
-                r'\|\s*No\.?\s*Of\s*Packages\s*\|.*?Description.*?\|.*?UOM.*?\|.*?Quantity.*?\|.*?Rate.*?\|.*?Amount.*?\|[^\n]*\n(.*?)(?=\n\s*---|\n\s*###|Narration|$)',
-                text, re.DOTALL | re.IGNORECASE
-            )
-        
-        if simple_table:
-            table_body = simple_table.group(1)
-            
-            # Format 4 special handling: Description might span multiple rows, quantity/rate/amount on separate row
-            # Look for rows with numeric data at the end
-            data_rows = re.finditer(
-                r'\|\s*([^|]*?)\s*\|\s*([^|]*?)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|',
-                table_body, re.IGNORECASE
-            )
-            
-            current_description = None
-            current_uom = None
-            
-            for row in data_rows:
-                col1 = clean_value(row.group(1))
-                col2 = clean_value(row.group(2))
-                quantity = row.group(3).strip()
-                unit_price = row.group(4).strip()
-                amount = row.group(5).strip()
-                
-                # Check if this is a description row (has text in first column)
-                if col1 and not quantity:
-                    current_description = col1
-                    current_uom = col2 if col2 else None
-                    continue
-                
-                # If we have quantity/rate/amount, create line item
-                if quantity and unit_price and amount:
-                    description = current_description if current_description else col1
-                    uom = current_uom if current_uom else col2
-                    
-                    line_item = {
-                        "IgstRate": "",
-                        "Description": description,
-                        "UnitOfMeasurement": uom.upper() if uom else "",
-                        "IgstAmount": "",
-                        "CgstAmount": "",
-                        "TaxableValue": amount,
-                        "Quantity": quantity,
-                        "TotalItemAmount": "",
-                        "CessAmount": "",
-                        "UnitPrice": unit_price,
-                        "CgstRate": "",
-                        "HsnCode": "",
-                        "SgstAmount": "",
-                        "CessRate": "",
-                        "SgstRate": ""
-                    }
-                    
-                    data["LineItems"].append(line_item)
-                    current_description = None
-                    current_uom = None
-    
-    # Try Format 3: Simplified table (S.No | Description of Work | SAC | Amount)
-    if not data["LineItems"]:
-        format3_table = re.search(
-            r'\|\s*S\.?No\.?\s*\|\s*Description\s+of\s+Work\s*\|\s*(?:SAC|HSN)\s*\|\s*Amount\s*\|[^\n]*\n(.*?)(?=\n\s*Sub\s*Total|\n\s*Amount\s+Chargeable|$)',
-            text, re.DOTALL | re.IGNORECASE
-        )
-        
-        if format3_table:
-            table_body = format3_table.group(1)
-            # Extract rows - can be with or without S.No column
-            format3_rows = re.finditer(
-                r'\|\s*(?:\d+\s*\|)?\s*([^|]+?)\s*\|\s*(?:\d*)\s*\|\s*(\d{4,8})\s*\|\s*([\d.]+)\s*\|',
-                table_body, re.IGNORECASE
-            )
-            
-            for row in format3_rows:
-                description = clean_value(row.group(1))
-                hsn_sac = row.group(2).strip()
-                amount = row.group(3).strip()
-                
-                # Skip summary rows
-                if any(keyword in description.lower() for keyword in ['cgst', 'sgst', 'igst', 'total', 'sub total', 'charges @']):
-                    continue
-                
-                line_item = {
-                    "IgstRate": "",
-                    "Description": description,
-                    "UnitOfMeasurement": "",
-                    "IgstAmount": "",
-                    "CgstAmount": "",
-                    "TaxableValue": amount,
-                    "Quantity": "",
-                    "TotalItemAmount": "",
-                    "CessAmount": "",
-                    "UnitPrice": "",
-                    "CgstRate": "",
-                    "HsnCode": hsn_sac,
-                    "SgstAmount": "",
-                    "CessRate": "",
-                    "SgstRate": ""
-                }
-                
-                data["LineItems"].append(line_item)
-    
-    # Extract HSN Code from separate section if not in line items
-    if data["LineItems"] and not data["LineItems"][0]["HsnCode"]:
-        hsn_code = find_pattern(r'HSN\s+Code\s*:?\s*\|?\s*[^\n]*\n\|?\s*(\d{4,8})', flags=re.IGNORECASE)
-        if not hsn_code:
-            # Format 3: HSN in tax table
-            hsn_code = find_pattern(r'\|\s*HSN\s*\|.*?\n\|[^\n]*\n\|\s*(\d+)', flags=re.IGNORECASE)
-        if hsn_code:
-            for item in data["LineItems"]:
-                if not item["HsnCode"]:
-                    item["HsnCode"] = hsn_code
-
-    # Format 9: "SAC Code:" at bottom
-    if data["LineItems"] and not data["LineItems"][0]["HsnCode"]:
-        sac_code = find_pattern(r'SAC\s+Code\s*:\s*(\d{6})', flags=re.IGNORECASE)
-        if sac_code:
-            for item in data["LineItems"]:
-                if not item["HsnCode"]:
-                    item["HsnCode"] = sac_code
-
-    # ===== TAX TOTALS EXTRACTION =====
-    
-    # Extract tax amounts from text patterns
-    # Format 4: "Amount of GST RS ... in words" pattern for GST amount
-    gst_amount_text = find_pattern(r'Amount\s+of\s+GST\s+RS\s+(.+?)\s+in\s+words', flags=re.IGNORECASE)
-    
-    # Extract tax amounts from tax summary section
-    # Format 3: "CGST @ 9 %" format
-    cgst_amount = find_pattern(r'CGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not cgst_amount:
-        cgst_amount = find_pattern(r'CGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', flags=re.IGNORECASE)
-    if not cgst_amount:
-        cgst_amount = find_pattern(r'CGST.*?[\d.]+%.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-    if not cgst_amount:
-    # Format 8: "COST Payable in words Rs. ..." pattern
-        cgst_text = find_pattern(r'COST\s+Payable\s+in\s+words\s+Rs\.\s+(.+?)\s+only', flags=re.IGNORECASE)
-        if cgst_text:
-            # Try to extract numeric value from text
-            cgst_numeric = re.search(r'([\d,]+\.?\d*)', cgst_text)
-            if cgst_numeric:
-                cgst_amount = cgst_numeric.group(1)
-    if not cgst_amount:
-        # Format 9: Extract from "**Taxable Value**" summary row
-        # Pattern: | **Taxable Value** | taxable | cgst | sgst | total_tax | grand_total |
-        format9_tax = re.search(r'\|\s*\*\*Taxable\s+Value\*\*\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|', text, re.IGNORECASE)
-        if format9_tax:
-            cgst_amount = format9_tax.group(2).strip()
-            sgst_amount = format9_tax.group(3).strip()
-    
-    sgst_amount = find_pattern(r'SGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not sgst_amount:
-        sgst_amount = find_pattern(r'SGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', flags=re.IGNORECASE)
-    if not sgst_amount:
-        sgst_amount = find_pattern(r'SGST.*?[\d.]+%.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-    if not sgst_amount:
-    # Format 8: "SOST Payable in words Rs. ..." pattern (SOST = SGST typo)
-        sgst_text = find_pattern(r'(?:SOST|SGST)\s+Payable\s+in\s+words\s+Rs\.\s+(.+?)\s+only', flags=re.IGNORECASE)
-        if sgst_text:
-            # Try to extract numeric value from text
-            sgst_numeric = re.search(r'([\d,]+\.?\d*)', sgst_text)
-            if sgst_numeric:
-                sgst_amount = sgst_numeric.group(1)
-    if not sgst_amount:
-    # Format 10: "Total SGST" followed by value on next line
-        sgst_amount = find_pattern(r'Total\s+SGST\s*\n\s*([\d,.]+)', flags=re.IGNORECASE)
-    
-    igst_amount = find_pattern(r'IGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not igst_amount:
-        igst_amount = find_pattern(r'IGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', flags=re.IGNORECASE)
-    if not igst_amount:
-        igst_amount = find_pattern(r'IGST.*?[\d.]+%.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-    if not igst_amount:
-    # Format 10: "Total IGST" followed by value on next line
-        igst_amount = find_pattern(r'Total\s+IGST\s*\n\s*([\d,.]+)', flags=re.IGNORECASE)
-
-    # Format 7: "GST 18% | 103507.82" pattern - split into CGST and SGST
-    if not cgst_amount:
-    # Format 10: "Total CGST" followed by value on next line
-        cgst_amount = find_pattern(r'Total\s+CGST\s*\n\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not cgst_amount and not sgst_amount and not igst_amount:
-        gst_match = re.search(r'\|\s*GST\s+([\d.]+)%\s*\|\s*([\d,.]+)', text, re.IGNORECASE)
-        if gst_match:
-            gst_rate = gst_match.group(1)
-            tax_amount = gst_match.group(2).replace(',', '')
-            try:
-                half_tax = float(tax_amount) / 2
-                cgst_amount = str(half_tax)
-                sgst_amount = str(half_tax)
-                cgst_rate = str(float(gst_rate) / 2)
-                sgst_rate = str(float(gst_rate) / 2)
-            except ValueError:
-                pass
-    
-    # Extract tax rates
-    cgst_rate = find_pattern(r'CGST\s*@\s*([\d.]+)\s*%', flags=re.IGNORECASE)
-    if not cgst_rate:
-        cgst_rate = find_pattern(r'CGST\s*\|\s*([\d.]+)%', flags=re.IGNORECASE)
-    
-    sgst_rate = find_pattern(r'SGST\s*@\s*([\d.]+)\s*%', flags=re.IGNORECASE)
-    if not sgst_rate:
-        sgst_rate = find_pattern(r'SGST\s*\|\s*([\d.]+)%', flags=re.IGNORECASE)
-    
-    igst_rate = find_pattern(r'IGST\s*@\s*([\d.]+)\s*%', flags=re.IGNORECASE)
-    if not igst_rate:
-        igst_rate = find_pattern(r'IGST\s*\|\s*([\d.]+)%', flags=re.IGNORECASE)
-    
-    # Extract Sub Total (Taxable Value)
-    sub_total = find_pattern(r'Sub\s+Total\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not sub_total:
-        sub_total = find_pattern(r'\|\s*\*?\*?Total\*?\*?\s*\|\s*\*?\*?([\d,.]+)\*?\*?\s*\|', flags=re.IGNORECASE)
-    
-    # Apply tax amounts and rates to line items if extracted from summary
-    if data["LineItems"]:
-        # For Format 3, distribute taxable value if we have sub total
-        if sub_total and not data["LineItems"][0]["TaxableValue"]:
-            sub_total_val = sub_total.replace(',', '')
-            # If single line item, assign full taxable value
-            if len(data["LineItems"]) == 1:
-                data["LineItems"][0]["TaxableValue"] = sub_total_val
-        
-        if igst_amount and igst_amount != "0.00" and igst_amount != "0":
-            data["LineItems"][0]["IgstAmount"] = igst_amount.replace(',', '')
-            if igst_rate:
-                data["LineItems"][0]["IgstRate"] = igst_rate
-        
-        if cgst_amount and cgst_amount != "0.00" and cgst_amount != "0":
-            data["LineItems"][0]["CgstAmount"] = cgst_amount.replace(',', '')
-            if cgst_rate:
-                data["LineItems"][0]["CgstRate"] = cgst_rate
-        
-        if sgst_amount and sgst_amount != "0.00" and sgst_amount != "0":
-            data["LineItems"][0]["SgstAmount"] = sgst_amount.replace(',', '')
-            if sgst_rate:
-                data["LineItems"][0]["SgstRate"] = sgst_rate
-
-    # Extract Taxable Value and Total Value
-    taxable_value = find_pattern(r'Taxable\s+Value\s*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not taxable_value and sub_total:
-        taxable_value = sub_total
-    
-    # Format 5: "Grand Total value (in figures)" or word format
-    total_value = find_pattern(r'\|\s*GRAND\s+TOTAL\s*\|\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not total_value:
-        total_value = find_pattern(r'Total\s+Invoice\s+Value\s*:\s*\n[^\n]+\n([\d,.]+)', flags=re.IGNORECASE)
-    if not total_value:
-        total_value = find_pattern(r'Grand\s+Total\s+[Vv]alue.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-    if not total_value:
-        # Format 4: "Total Value RS ... in Words:" pattern
-        total_value = find_pattern(r'Total\s+Value\s+RS\s+(.+?)\s+in\s+Words', flags=re.IGNORECASE)
-    if not total_value:
-        # Format 3: "Total Value Including GST"
-        total_value = find_pattern(r'Total\s+Value\s+Including\s+GST\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-    if not total_value:
-        total_value = find_pattern(r'Total\s+Value\s*\|\s*([\d,.]+)', flags=re.IGNORECASE)
-    # Parse total value from words if needed
-    if total_value and not re.match(r'^\d', total_value):
-        # Extract numeric value if available in text
-        total_numeric = find_pattern(r'Total\s+Value.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-        if total_numeric:
-            total_value = total_numeric
-    if not total_value:
-    # Format 8: "Total Invoice Value in words Rs. ..." pattern
-        total_text = find_pattern(r'Total\s+Invoice\s+Value\s+in\s+words\s+Rs\.\s+(.+?)\s+only', flags=re.IGNORECASE)
-        if total_text:
-            # Extract numeric value from text
-            total_numeric = re.search(r'([\d,]+\.?\d*)', total_text)
-            if total_numeric:
-                total_value = total_numeric.group(1)
-    if not total_value:
-        # Format 9: Extract from "**Taxable Value**" summary row (last column)
-        format9_total = re.search(r'\|\s*\*\*Taxable\s+Value\*\*\s*\|.*?\|\s*([\d.]+)\s*\|[^\|]*$', text, re.IGNORECASE | re.MULTILINE)
-        if format9_total:
-            total_value = format9_total.group(1).strip()
-    if not total_value:
-    # Format 10: "**Total Invoice Value**" followed by value on next line
-        total_value = find_pattern(r'\*\*Total\s+Invoice\s+Value\*\*\s*\n\s*([\d,.]+)', flags=re.IGNORECASE)
-    
-    if taxable_value:
-        taxable_value = taxable_value.replace(',', '')
-        if data["LineItems"] and not data["LineItems"][0]["TaxableValue"]:
-            data["LineItems"][0]["TaxableValue"] = taxable_value
-    
-    if total_value and data["LineItems"]:
-        # Handle both field naming conventions
-        if "TotalItemAmount" in data["LineItems"][0] and not data["LineItems"][0]["TotalItemAmount"]:
-            data["LineItems"][0]["TotalItemAmount"] = total_value
-        elif "TotalAmount" in data["LineItems"][0] and not data["LineItems"][0]["TotalAmount"]:
-            data["LineItems"][0]["TotalAmount"] = total_value
-
-    # ===== CALCULATE HEADER TOTALS =====
-    
-    
-    if data["LineItems"]:
-        # Handle both field naming conventions (TaxableValue vs TaxableAmount, etc.)
-        total_taxable = sum(float(item.get("TaxableValue") or item.get("TaxableAmount") or 0) for item in data["LineItems"])
-        total_igst = sum(float(item.get("IgstAmount", 0) or 0) for item in data["LineItems"])
-        total_cgst = sum(float(item.get("CgstAmount", 0) or 0) for item in data["LineItems"])
-        total_sgst = sum(float(item.get("SgstAmount", 0) or 0) for item in data["LineItems"])
-        total_cess = sum(float(item.get("CessAmount", 0) or 0) for item in data["LineItems"])
-        total_tax = total_igst + total_cgst + total_sgst + total_cess
-        total_amount = total_taxable + total_tax
-        
-        data["HeaderItem"]["IgstAmount"] = str(total_igst) if total_igst > 0 else ""
-        data["HeaderItem"]["CgstAmount"] = str(total_cgst) if total_cgst > 0 else ""
-        data["HeaderItem"]["SgstAmount"] = str(total_sgst) if total_sgst > 0 else ""
-        data["HeaderItem"]["TotalCess"] = str(total_cess) if total_cess > 0 else ""
-        data["HeaderItem"]["TotalTax"] = str(total_tax) if total_tax > 0 else ""
-        data["HeaderItem"]["TotalAmount"] = str(total_amount) if total_amount > 0 else ""
-        data["HeaderItem"]["TotalInvoiceAmount"] = str(total_amount) if total_amount > 0 else ""
-
-
-    # Fallback: Extract totals from text if not calculated
-    if not data["HeaderItem"]["TotalAmount"] or data["HeaderItem"]["TotalAmount"] == "0":
-        total_match = find_pattern(r'Grand\s+Total.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-        if not total_match:
-            total_match = find_pattern(r'Total\s+Value\s+RS.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-        if not total_match:
-            total_match = find_pattern(r'Total\s+Value\s+Including\s+GST\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', flags=re.IGNORECASE)
-        if not total_match:
-            total_match = find_pattern(r'Total\s+Value\s*\|?\s*([\d,]+\.?\d*)', flags=re.IGNORECASE)
-        if total_match:
-            data["HeaderItem"]["TotalAmount"] = total_match.replace(',', '')
-            data["HeaderItem"]["TotalInvoiceAmount"] = total_match.replace(',', '')
-    
-    if not data["HeaderItem"]["IgstAmount"]:
-        data["HeaderItem"]["IgstAmount"] = igst_amount.replace(',', '') if igst_amount and igst_amount not in ["0.00", "0"] else ""
-    if not data["HeaderItem"]["CgstAmount"]:
-        data["HeaderItem"]["CgstAmount"] = cgst_amount.replace(',', '') if cgst_amount and cgst_amount not in ["0.00", "0"] else ""
-    if not data["HeaderItem"]["SgstAmount"]:
-        data["HeaderItem"]["SgstAmount"] = sgst_amount.replace(',', '') if sgst_amount and sgst_amount not in ["0.00", "0"] else ""
-    
-    # Extract total tax amount separately if present
-    if not data["HeaderItem"]["TotalTax"]:
-        tax_amount = find_pattern(r'Tax\s+Amount\s*:\s*([\d,.]+)', flags=re.IGNORECASE)
-        if not tax_amount:
-            # Format 4: extract from "Amount of GST RS ... in words"
-            tax_amount = find_pattern(r'Amount\s+of\s+GST\s+RS.*?([\d,]+\.?\d*)', flags=re.IGNORECASE)
-        if tax_amount:
-            data["HeaderItem"]["TotalTax"] = tax_amount.replace(',', '')
-
-    return data
-
-
-def main():
-    """Main function to handle file input and output"""
-    if len(sys.argv) < 2:
-        print("Usage: python c.py <input_txt_file> [output_json_file]")
-        print("Example: python c.py txt_files/5108975.txt output.json")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    # Check if input file exists
-    if not Path(input_file).exists():
-        print(f"Error: File '{input_file}' not found.")
-        sys.exit(1)
-    
-    # Read the text file
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            text_content = f.read()
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        sys.exit(1)
-    
-    # Extract data
-    extracted_data = extract_invoice_data(text_content)
-    
-    # Output JSON
-    json_output = json.dumps(extracted_data, indent=2, ensure_ascii=False)
-    
-    if output_file:
-        # Save to file
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(json_output)
-            print(f"Data extracted and saved to '{output_file}'")
-        except Exception as e:
-            print(f"Error writing file: {e}")
-            sys.exit(1)
-    else:
-        # Print to console
-        print(json_output)
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import argparse
+import bisect
+import functools
+import glob
+import re
+import os
+import signal
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from pathlib import Path
+
+from money import (
+    column_total, format_amount, format_rate, parse_amount, rate_of, split_gst, tax_on
+)
+from serializer import create_serializer
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+# ===== PATTERN REGISTRY =====
+# Every pattern is compiled once at import time so extraction never goes
+# through the re module cache (which only holds a few hundred entries and is
+# shared with the rest of the process). FIELD_PATTERNS maps a field to its
+# fallback cascade in priority order; each alternative records the invoice
+# formats it was written for (empty when it is shared between formats).
+# Sectioned alternatives (DOTALL ones with a repeated "." that can run across
+# lines) are searched one block of the document at a time, see SectionIndex.
+
+Alternative = namedtuple('Alternative', ['formats', 'pattern', 'anchor', 'anchored', 'sectioned'])
+
+# Shorter literals occur almost everywhere in an invoice and do not prune anything
+MIN_ANCHOR_LENGTH = 3
+
+
+def _required_sequence(items):
+    """Flatten parsed regex items into literal characters, with None for anything else"""
+    sequence = []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            sequence.append(chr(av))
+        elif op is sre_parse.SUBPATTERN:
+            # A group is matched exactly once, so its contents stay in sequence
+            sequence.extend(_required_sequence(av[-1]))
+        else:
+            sequence.append(None)
+    return sequence
+
+
+def _literal_anchor(compiled):
+    """
+    Return (anchor, anchored) for a compiled pattern: the longest literal every
+    match must contain (lower-cased, "" if none is long enough) and whether
+    every match starts with it.
+    """
+    sequence = _required_sequence(sre_parse.parse(compiled.pattern, compiled.flags))
+    runs = ''.join(char or '\0' for char in sequence).lower().split('\0')
+    anchor = max(runs, key=len)
+    if len(anchor) < MIN_ANCHOR_LENGTH:
+        return "", False
+    return anchor, anchor == runs[0]
+
+
+def _spans_lines(items):
+    """Whether parsed regex items repeat "." (which DOTALL lets cross newlines)"""
+    for op, av in items:
+        if op in (sre_parse.MIN_REPEAT, sre_parse.MAX_REPEAT):
+            if any(sub_op is sre_parse.ANY for sub_op, _ in av[2]) or _spans_lines(av[2]):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _spans_lines(av[-1]):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_spans_lines(branch) for branch in av[1]):
+                return True
+    return False
+
+
+def _alt(formats, pattern, flags=re.IGNORECASE | re.DOTALL):
+    """Compile one cascade alternative"""
+    if formats is None:
+        formats = ()
+    elif isinstance(formats, int):
+        formats = (formats,)
+    compiled = re.compile(pattern, flags)
+    anchor, anchored = _literal_anchor(compiled)
+    # Only an anchor tells which blocks can hold a match
+    sectioned = bool(anchor and flags & re.DOTALL and _spans_lines(sre_parse.parse(pattern, flags)))
+    return Alternative(formats, compiled, anchor, anchored, sectioned)
+
+
+FIELD_PATTERNS = {
+    "ShipFromName": [
+        # Formats 4 & 5: upper-case company name line
+        _alt((4, 5), r'^([A-Z\s&]+(?:ENTERPRISES|INDUSTRIES|SOLUTIONS|PRODUCTS|SERVICES|CORPORATION|COMPANY)[^\n]*?)(?:\n|$)', re.MULTILINE | re.IGNORECASE),
+        _alt(None, r'^([A-Z\s&]+(?:PVT|PRIVATE|LTD|LIMITED|INDUSTRIES|FOOTWEAR)[A-Z\s.]*?)\.?\s*\n', re.MULTILINE | re.IGNORECASE),
+        _alt(5, r'##\s*Company[\'"]?s?\s+Name\s*\n\s*([^\n]+)', re.IGNORECASE | re.MULTILINE),
+        # Markdown ## heading (Format 2 and most table layouts)
+        _alt(None, r'^##\s*(.+?)(?:\n|$)', re.MULTILINE),
+        # Markdown # heading (Formats 1, 3, 6 & 7)
+        _alt(None, r'^#\s*(.+?)(?:\n|$)', re.MULTILINE),
+        _alt(None, r'\|\s*BILL FROM\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|', re.IGNORECASE | re.DOTALL),
+        # Format 9: "**Bill From**" at bottom
+        _alt(9, r'\*\*Bill\s+From\*\*\s*\n([^\n]+)', re.IGNORECASE),
+        # Format 10: "## PROTECH APPLIANCES PRIVATE LIMITED" pattern
+        _alt(10, r'##\s*([A-Z\s]+(?:PRIVATE|PVT)?\s+LIMITED)', re.IGNORECASE | re.MULTILINE),
+    ],
+    "SupplierAddress": [
+        # Supplier Address - Formats 4 & 5: lines after the company name
+        _alt((4, 5), r'^[A-Z\s&]+(?:ENTERPRISES|INDUSTRIES)[^\n]*\n(.+?)(?=Email|Phone|GSTN)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'^[A-Z\s&]+(?:PVT|PRIVATE|LTD|LIMITED)\.?\s*\n\s*(.+?)(?=\s+\d{3}\s+\d{8}|TAX\s+INVOICE)', re.MULTILINE | re.IGNORECASE),
+        _alt(5, r'##\s*Company[\'"]?s?\s+Name\s*\n\s*[^\n]+\n\s*([^\n]{5,200})', re.IGNORECASE | re.MULTILINE),
+        # Format 3: FACTORY : address pattern
+        _alt(3, r'FACTORY\s*:\s*(.+?)(?=\n##|\nGST|\n\|)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'##\s*.+?\n(.+?)(?=Phone|GSTN|GST|PAN|CIN|\n\*\*|\n---)', re.DOTALL),
+        _alt(None, r'BILL FROM.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', re.DOTALL | re.IGNORECASE),
+        # Registered office fallback
+        _alt(None, r'Regd\.?\s*off?\.?\s*:\s*(.+?)(?:\n---|$)', re.IGNORECASE),
+        # Format 9: "Address:-" after Bill From
+        _alt(9, r'\*\*Bill\s+From\*\*.*?Address\s*:-\s*(.+?)(?=Reg\.|CIN|$)', re.DOTALL | re.IGNORECASE),
+        # Format 10: Address line after company name, before first table
+        _alt(10, r'##\s*[A-Z\s]+LIMITED\s*\n+(.+?)(?=\n\s*\|)', re.DOTALL | re.IGNORECASE),
+    ],
+    "ShipFromAddres": [
+        # Ship From Address - Format 5: "Ship From Address" section
+        _alt(5, r'Ship\s+From\s+Address\s*\n([^\n]+)', re.IGNORECASE),
+    ],
+    "SupplierGstin": [
+        # Supplier GSTIN - Format 5: "### GSTIN/UIN" pattern
+        _alt(5, r'GSTN\s+No\.?\s*:\s*\n([0-9A-Z]{15})', re.IGNORECASE),
+        _alt(None, r'1\.\s*GSTIN\s*\n([0-9A-Z]{15})', re.IGNORECASE),
+        _alt(None, r'###\s*GSTIN\s*/\s*UIN\s*\n([0-9A-Z]{15})', re.IGNORECASE),
+        _alt(None, r'##\s*GST\s*[-\s]+([0-9A-Z]{15})', re.IGNORECASE),
+        _alt(None, r'GSTN?\s*:\s*([0-9A-Z]{15})', re.IGNORECASE),
+        _alt(None, r'BILL FROM.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'GST\s*IN\s*:\s*([0-9A-Z]{15})', re.IGNORECASE),
+        # Format 9: "GST Number:" at bottom
+        _alt(9, r'GST\s+Number\s*:\s*([0-9A-Z]{15})', re.IGNORECASE),
+        # Format 10: "| GSTIN/UJN | : value |" in header table
+        _alt(10, r'\|\s*GSTIN\s*/\s*UJN\s*\|\s*:\s*([0-9A-Z]{15})\s*\|', re.IGNORECASE),
+    ],
+    "SupplierPanNumber": [
+        # Supplier PAN - Format 5: "### PAN" pattern
+        _alt(5, r'###\s*PAN\s*\n([0-9A-Z]{10})', re.IGNORECASE),
+        _alt(None, r'PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', re.IGNORECASE),
+        _alt(None, r'BILL FROM.*?PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', re.DOTALL | re.IGNORECASE),
+        # Format 9: "PAN No:" at bottom
+        _alt(9, r'PAN\s+No\s*:\s*([0-9A-Z]{10})', re.IGNORECASE),
+    ],
+    "SupplierCIN": [
+        # Supplier CIN - Format 5: "### CIN" pattern
+        _alt(5, r'###\s*CIN\s*\n([A-Z0-9]{21})', re.IGNORECASE),
+        _alt(None, r'CIN[\s\-:]+([A-Z0-9]{21})', re.IGNORECASE),
+        _alt(None, r'CIN\s*NO\.?\s*[:\-]?\s*([A-Z0-9]+)', re.IGNORECASE),
+        # Format 9: "CIN No -" pattern
+        _alt(9, r'CIN\s+No\s*-\s*([A-Z0-9]{21})', re.IGNORECASE),
+        # Format 10: "| CINNo | : value |" in header table
+        _alt(10, r'\|\s*CIN\s*No\.?\s*\|\s*:\s*([A-Z0-9]{21})\s*\|', re.IGNORECASE),
+    ],
+    "CustomerName": [
+        # Format 5: "### Bill To" section
+        _alt(5, r'Details\s+of\s+Receiver\s+\(Billed\s+to\)\s*\n([^\n]+)', re.IGNORECASE),
+        _alt(5, r'Details\s+of\s+Receiver\s+\(Billed\s+to\)\s*\n[^\n]*\n([^\n]+?)(?:\n|$)', re.IGNORECASE),
+        _alt(None, r'###\s*Bill\s+To\s*\n([^\n]+)', re.IGNORECASE),
+        # Format 4: "Name and Address of Recipient:" followed by name on next line
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\n([^\n(]+)', re.IGNORECASE),
+        # Format 3: "Customer Name: value" pattern
+        _alt(3, r'Customer\s+Name\s*:\s*([^\n]+)', re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\|?\s*[^\n]*\n\|?\s*([^|,]+?)(?:,|\|)', re.IGNORECASE),
+        _alt(None, r'\|\s*BILL TO\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|', re.IGNORECASE),
+        _alt(None, r'Bill\s+To\s*:?\s*([^\n,]+?)(?:,|\n)', re.IGNORECASE),
+        # Format 8: "Name & Address of Receiver (Billed To) :" in table
+        _alt(8, r'Name\s+&\s+Address\s+of\s+Receiver\s+\(Billed\s+To\)\s*:?\s*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|', re.IGNORECASE),
+        # Format 9: "**Bill To :**" inline pattern
+        _alt(9, r'\*\*Bill\s+To\s*:\*\*\s*([^\n]+)', re.IGNORECASE),
+        # Format 10: "| Name of Purchaser | : value |" pattern
+        _alt(10, r'\|\s*Name\s+of\s+Purchaser\s*\|\s*:\s*([^|]+?)\s*\|', re.IGNORECASE),
+    ],
+    "CustomerAddress": [
+        # Customer Address - Format 5: "Address" line after Bill To
+        _alt(5, r'Details\s+of\s+Receiver.*?\n[^\n]+\n(.+?)(?=State\s+Name\s+&\s+code|GSTIN)', re.DOTALL | re.IGNORECASE),
+        _alt(5, r'Details\s+of\s+Receiver.*?\n[^\n]+\n([^\n]+\n[^\n]+?)(?=\n\|\s*GSTIN)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'###\s*Bill\s+To.*?Address\s*\n(.+?)(?=State\s+Code|GSTIN|PAN|$)', re.DOTALL | re.IGNORECASE),
+        # Format 4: extract lines after customer name until Mob/PAN
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\n[^\n]+\n(.+?)(?=Mob\.|PAN\.|GST|$)', re.DOTALL | re.IGNORECASE),
+        # Format 3: extract lines after customer name until GST No
+        _alt(3, r'Customer\s+Name\s*:.*?\n(.+?)(?=GST\s*No|State\s*Code|\n\|)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Recipient\s*:?\s*\|?\s*[^\n]*\n\|?\s*[^,]+?,\s*([^|]+?)\s*\|', re.IGNORECASE),
+        _alt(None, r'BILL TO.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', re.DOTALL | re.IGNORECASE),
+        # Format 8: Extract address from table row after customer name
+        _alt(8, r'Name\s+&\s+Address\s+of\s+Receiver.*?\n\|[^\n]*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|[^\n]*State\s*:', re.DOTALL | re.IGNORECASE),
+        # Format 9: "**Address :**" inline pattern
+        _alt(9, r'\*\*Address\s*:\*\*\s*([^\n]+)', re.IGNORECASE),
+        # Format 10: "| Billing Address | : value |" pattern
+        _alt(10, r'\|\s*Billing\s+Address\s*\|\s*:\s*([^|]+?)\s*\|', re.IGNORECASE),
+    ],
+    "CustomerGstin": [
+        # Format 5: "GSTIN / PAN" pattern under Bill To
+        _alt(5, r'\|\s*GSTIN\s*/\s*Unique\s+ID\s*:\s*\|\s*([0-9A-Z]{15})\s*\|', re.IGNORECASE),
+        _alt(None, r'###\s*Bill\s+To.*?GSTIN\s*/\s*PAN\s*\n([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        # Format 4: "GSTIN NO:" after customer section
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Recipient.*?GSTIN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        # Format 3: "GST No: value" pattern
+        _alt(3, r'Customer.*?GST\s*No\.?\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Recipient.*?GSTN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'BILL TO.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        # Format 8: "## GSTIN :" after customer table
+        _alt(8, r'##\s*GSTIN\s*:\s*([0-9A-Z]{15})', re.IGNORECASE),
+        # Format 9: "**GSTIN/UIN of Customer :**" pattern
+        _alt(9, r'\*\*GSTIN/UIN\s+of\s+Customer\s*:\*\*\s*([0-9A-Z]{15})', re.IGNORECASE),
+    ],
+    "CustomerPanNumber": [
+        # Customer PAN - Format 5: extract from "GSTIN / PAN" line
+        _alt(5, r'###\s*Bill\s+To.*?GSTIN\s*/\s*PAN\s*\n[0-9A-Z]{15}\s*/\s*([0-9A-Z]{10})', re.DOTALL | re.IGNORECASE),
+        # Format 4: "PAN. NO:" pattern
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Recipient.*?PAN\.?\s*NO\.?\s*:\s*([0-9A-Z]{10})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'BILL TO.*?PAN\s*No\.?\s*:\s*([0-9A-Z]{10})', re.DOTALL | re.IGNORECASE),
+        # Format 8: "PAIN No. :" pattern
+        _alt(8, r'PAIN\s+No\.\s*:\s*([0-9A-Z]{10})', re.IGNORECASE),
+    ],
+    "ShipToName": [
+        # Ship To Name - Format 5: "### Ship To" section
+        _alt(5, r'Details\s+of\s+Consignee\s+\(Shipped\s+to\)\s*\n[^\n]*\n([^\n]+?)(?:\n|$)', re.IGNORECASE),
+        _alt(None, r'###\s*Ship\s+To\s*\n([^\n]+)', re.IGNORECASE),
+        # Format 4: "Name and Address of Shipped to:" pattern
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\n([^\n(]+)', re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\|?\s*[^\n]*\n\|?\s*([^|,]+?)(?:,|\|)', re.IGNORECASE),
+        _alt(None, r'\|\s*SHIP TO\s*\|[^\n]*\n\|[^|]*\|\s*([^|]+?)\s*\|', re.IGNORECASE),
+        # Format 8: "Name & Address of Consignee (Shipped To) :" in table
+        _alt(8, r'Name\s+&\s+Address\s+of\s+Consignee\s+\(Shipped\s+To\)\s*:?\s*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|', re.IGNORECASE),
+        # Format 10: "| Name of Recipient | : value |" pattern
+        _alt(10, r'\|\s*Name\s+of\s+Recipient\s*\|\s*:\s*([^|]+?)\s*\|', re.IGNORECASE),
+    ],
+    "ShipToAddress": [
+        # Ship To Address - Format 5: "Address" line after Ship To
+        _alt(5, r'Details\s+of\s+Consignee.*?\n[^\n]+\n([^\n]+\n[^\n]+?)(?=\n\|\s*GSTIN|$)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'###\s*Ship\s+To.*?Address\s*\n(.+?)(?=State\s+Code|GSTIN|PAN|$)', re.DOTALL | re.IGNORECASE),
+        # Format 4: extract lines after ship to name until Mob/PAN
+        _alt(4, r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\n[^\n]+\n(.+?)(?=Mob\.|PAN\.|\n\|)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Shipped\s+to\s*:?\s*\|?\s*[^\n]*\n\|?\s*[^,]+?,\s*([^|]+?)\s*\|', re.IGNORECASE),
+        _alt(None, r'SHIP TO.*?Address\s*:\s*([^|]+?)(?:GST IN|PAN|$)', re.DOTALL | re.IGNORECASE),
+        # Format 8: Extract address from consignee table row
+        _alt(8, r'Name\s+&\s+Address\s+of\s+Consignee.*?\n\|[^\n]*\|[^\n]*\n\|[^\n]*\|\s*([^|]+?)\s*\|[^\n]*State\s*:', re.DOTALL | re.IGNORECASE),
+        # Format 10: "| Ship to Address | : value |" pattern
+        _alt(10, r'\|\s*Ship\s+to\s+Address\s*\|\s*:\s*([^|]+?)\s*\|', re.IGNORECASE),
+    ],
+    "ShipToGstin": [
+        # Ship To GSTIN - Format 5: "GSTIN / PAN" pattern under Ship To
+        _alt(5, r'###\s*Ship\s+To.*?GSTIN\s*/\s*PAN\s*\n([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'Name\s+and\s+Address\s+of\s+Shipped\s+to.*?GSTN?\s*NO\.?\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'SHIP TO.*?GST\s*IN\s*:\s*([0-9A-Z]{15})', re.DOTALL | re.IGNORECASE),
+    ],
+    "InvoiceNumber": [
+        # Invoice Number - Format 5: "Invoice No." line after "Tax is Payable on Reverse Charges"
+        _alt(5, r'\|\s*Invoice\s+No\.?\s*:\s*\|\s*([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'4\.\s*Serial\s+No\.?\s+of\s+invoice\s*\n([A-Z0-9/\-]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\.?\s*\n([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\s*:\s*Date\s*:\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\.?\s*:\s*([A-Z0-9/\-]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\.?\s*:?\s*Date\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)\s+', re.IGNORECASE),
+        _alt(None, r'INVOICE\s*No\.?\s*\|?\s*([A-Z0-9/\-]+)', re.IGNORECASE),
+        # Format 8: "Our F.I. No. :" pattern
+        _alt(8, r'Our\s+F\.I\.\s+No\.\s*:\s*([A-Z0-9/\-]+)', re.IGNORECASE),
+        # Format 10: "| Invoice No | : value |" in header table
+        _alt(10, r'\|\s*Invoice\s+No\.?\s*\|\s*:\s*([A-Z0-9]+)\s*\|', re.IGNORECASE),
+    ],
+    "InvoiceDate": [
+        # Invoice Date - Format 5: "### Invoice Date" pattern
+        _alt(5, r'\|\s*Invoice\s+Date\s*:\s*\|\s*([\d\-A-Za-z]+)', re.IGNORECASE),
+        _alt(None, r'5\.\s*Date\s+of\s+invoice\s*\n([\d\-/.]+)', re.IGNORECASE),
+        _alt(None, r'F0\s+NO\s+&\s+DATE:.*?(\d{1,2}/\d{4})', re.IGNORECASE),
+        _alt(None, r'###\s*Invoice\s+Date\s*\n([\d\-/.]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\s*:\s*Date\s*:\s*\|?\s*[^\n]*\n\|?\s*[A-Z0-9]+\s+([\d\-/.]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+Date\s*:\s*([\d\-/.]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s+No\.?\s*:?\s*Date\s*:?\s*\|?\s*[^\n]*\n\|?\s*[A-Z0-9]+\s+([\d\-/]+)', re.IGNORECASE),
+        _alt(None, r'Invoice\s*Date\s*\|?\s*:?\s*([\d\-/]+)', re.IGNORECASE),
+        _alt(None, r'Date\s+Of\s+Issue\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/]+)', re.IGNORECASE),
+        # Format 8: "Date of Preparation:" pattern
+        _alt(8, r'Date\s+of\s+Preparation\s*:\s*([\d/]+)', re.IGNORECASE),
+        # Format 9: "**Invoice Date :**" inline pattern
+        _alt(9, r'\*\*Invoice\s+Date\s*:\*\*\s*([\d\-A-Za-z\s]+)', re.IGNORECASE),
+        # Format 10: "| Date | : value |" in header table
+        _alt(10, r'\|\s*Date\s*\|\s*:\s*([\d\-/]+)\s*\|', re.IGNORECASE),
+    ],
+    "DocType": [
+        # Document Type
+        _alt(None, r'\|\s*(Tax\s*Invoice)\s*\|', re.IGNORECASE),
+        _alt(None, r'^#\s*(TAX\s*INVOICE|INVOICE|CREDIT\s*NOTE|DEBIT\s*NOTE)', re.MULTILINE | re.IGNORECASE),
+        _alt(None, r'(TAX\s*INVOICE|INVOICE|CREDIT\s*NOTE|DEBIT\s*NOTE)', re.IGNORECASE),
+    ],
+    "IrnNo": [
+        # IRN/INN Number - Format 5: "IRN NO:" at top
+        _alt(5, r'IRN\s+NO\s*:\s*([a-f0-9A-F]{64})', re.IGNORECASE),
+        _alt(None, r'INN\s*:?\s*([a-f0-9A-F]{64})', re.IGNORECASE),
+        _alt(None, r'IRN\s*:?\s*([a-f0-9]{64})', re.IGNORECASE),
+        _alt(None, r'IRN\s*No\.?\s*:?\s*([a-f0-9]{64})', re.IGNORECASE),
+        # Format 9: "**IRN :**" inline pattern (shorter IRN)
+        _alt(9, r'\*\*IRN\s*:\*\*\s*([a-f0-9A-F]{58,64})', re.IGNORECASE),
+        # Format 10: "**IRN No**" bold field followed by ": value" on next line
+        _alt(10, r'\*\*IRN\s+No\*\*\s*\n\s*:\s*([a-f0-9A-F]{64})', re.IGNORECASE),
+    ],
+    "IrnDate": [
+        # IRN/INN Date
+        _alt(None, r'INN\s*DT\.?\s*([\d\-/]+)', re.IGNORECASE),
+        _alt(None, r'IRN\s*DT\.?\s*([\d\-/]+)', re.IGNORECASE),
+        _alt(None, r'IRN.*?Date\s*:?\s*([\d\-/]+)', re.IGNORECASE),
+    ],
+    "EwayBillNo": [
+        # E-way Bill Number
+        _alt(None, r'E-?WAY\s+BILL\s+NO\.?\s*:?\s*([A-Z0-9\-]+)', re.IGNORECASE),
+        _alt(None, r'E-?WAY\s+BILL\s+NO\.?\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9\-]+)', re.IGNORECASE),
+        _alt(None, r'E-?way\s*Bill\s*No\.?\s*\|?\s*:?\s*(\d+)', re.IGNORECASE),
+    ],
+    "EwayBillDate": [
+        # E-way Bill Date
+        _alt(None, r'E-?WAY\s+BILL\s+DATE\s*:?\s*([^\n]+?)(?:\n|$)', re.IGNORECASE),
+        _alt(None, r'E-?WAY\s+BILL\s+DATE\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/\s:]+?)(?:\n|$)', re.IGNORECASE),
+        _alt(None, r'E-?way\s*Bill\s*Date\s*\|?\s*:?\s*([\d\-/\s:]+)', re.IGNORECASE),
+    ],
+    "PoNumber": [
+        # PO Number - Format 5: "Client PO No & Date" pattern
+        _alt(5, r'\|\s*P\.?O\.?\s*No\.?\s*\|\s*([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'Client\s+PO\s+No\s+&\s+Date\s*\n([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'Customer\s+Reference\s*:?\s*\|?\s*[^\n]*\n\|?\s*([A-Z0-9]+)', re.IGNORECASE),
+        _alt(None, r'P\.?O\.?\s*No\.?\s*[:|]?\s*([A-Z0-9/\-]+)', re.IGNORECASE),
+        # Format 8: "Your P.O. No. & Date:" pattern
+        _alt(8, r'Your\s+P\.O\.\s+No\.\s+&\s+Date\s*:\s*([A-Z0-9]+)', re.IGNORECASE),
+    ],
+    "PoDate": [
+        # PO Date - Format 5: part of "Client PO No & Date" line
+        _alt(5, r'\|\s*P\.?O\.?\s*Date\s*\|\s*([\d\-/]+)', re.IGNORECASE),
+        _alt(None, r'Client\s+PO\s+No\s+&\s+Date\s*\n[A-Z0-9]+\s*-\s*([\d\-/.]+)', re.IGNORECASE),
+        _alt(None, r'Our\s+Reference\s+No.*?DATE\s*:?\s*\|?\s*[^\n]*\n\|?\s*([\d\-/]+)', re.DOTALL | re.IGNORECASE),
+        _alt(None, r'P\.?O\.?\s*Date\s*[:|]?\s*([\d\-/]+)', re.IGNORECASE),
+        # Format 8: Extract date from "Your P.O. No. & Date: 4100020925-2708/2022"
+        _alt(8, r'Your\s+P\.O\.\s+No\.\s+&\s+Date\s*:.*?(\d{2,4}/\d{4})', re.IGNORECASE),
+    ],
+    "GrnNo": [
+        # GRN details
+        _alt(None, r'GRN\s*No\.?\s*[:|]?\s*([A-Z0-9/\-]+)', re.IGNORECASE),
+    ],
+    "GrnDate": [
+        _alt(None, r'GRN\s*Date\s*[:|]?\s*([\d\-/]+)', re.IGNORECASE),
+    ],
+    "PlaceOfSupply": [
+        # Place of Supply - Format 5: "Place of Supply" line
+        _alt(5, r'Place\s+of\s+Supply\s*\n([^\n]+)', re.IGNORECASE),
+        # Format 9: "**Place Of Supply :**" inline pattern
+        _alt(9, r'\*\*Place\s+Of\s+Supply\s*:\*\*\s*([^\n]+)', re.IGNORECASE),
+    ],
+    "RCMApplicable": [
+        # RCM Applicable - Format 4: "Whether tax has to be paid under reverse Charges Basis?"
+        _alt(None, r'(?:Whether\s+tax\s+has\s+to\s+be\s+paid\s+under\s+)?re[vw]e[rs]se\s+Charges?\s+Basis\??\s*(Yes|No|Y|N)', re.IGNORECASE),
+        _alt(None, r'RCM\s*Applicable\s*[:|]?\s*(Yes|No|Y|N)', re.IGNORECASE),
+    ],
+    "HsnCode": [
+        _alt(None, r'HSN\s+Code\s*:?\s*\|?\s*[^\n]*\n\|?\s*(\d{4,8})', re.IGNORECASE),
+        # Formats 3 & 6: HSN in tax table
+        _alt((3, 6), r'\|\s*HSN\s*\|.*?\n\|[^\n]*\n\|\s*(\d+)', re.IGNORECASE),
+    ],
+    "SacCode": [
+        _alt(None, r'SAC\s+Code\s*:\s*(\d{6})', re.IGNORECASE),
+    ],
+    "CgstAmount": [
+        # Formats 2 & 3: "CGST @ 9 %" format
+        _alt((2, 3), r'CGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'CGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', re.IGNORECASE),
+        _alt(None, r'CGST.*?[\d.]+%.*?([\d,]+\.?\d*)', re.IGNORECASE),
+    ],
+    "CgstAmountWords": [
+        # Format 8: "COST Payable in words Rs. ..." pattern
+        _alt(8, r'COST\s+Payable\s+in\s+words\s+Rs\.\s+(.+?)\s+only', re.IGNORECASE),
+    ],
+    "SgstAmount": [
+        _alt(None, r'SGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'SGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', re.IGNORECASE),
+        _alt(None, r'SGST.*?[\d.]+%.*?([\d,]+\.?\d*)', re.IGNORECASE),
+    ],
+    "SgstAmountWords": [
+        # Format 8: "SOST Payable in words Rs. ..." pattern (SOST = SGST typo)
+        _alt(8, r'(?:SOST|SGST)\s+Payable\s+in\s+words\s+Rs\.\s+(.+?)\s+only', re.IGNORECASE),
+    ],
+    "SgstTotal": [
+        # Format 10: "Total SGST" followed by value on next line
+        _alt(10, r'Total\s+SGST\s*\n\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "IgstAmount": [
+        _alt(None, r'IGST\s*@\s*[\d.]+\s*%\s*\|?\s*[^\n]*\n?[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'IGST\s*\|\s*[\d.]+%\s*\|\s*([\d.]+)', re.IGNORECASE),
+        _alt(None, r'IGST.*?[\d.]+%.*?([\d,]+\.?\d*)', re.IGNORECASE),
+        # Format 10: "Total IGST" followed by value on next line
+        _alt(10, r'Total\s+IGST\s*\n\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "CgstTotal": [
+        # Format 10: "Total CGST" followed by value on next line
+        _alt(10, r'Total\s+CGST\s*\n\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "CgstRate": [
+        # Extract tax rates
+        _alt(None, r'CGST\s*@\s*([\d.]+)\s*%', re.IGNORECASE),
+        _alt(None, r'CGST\s*\|\s*([\d.]+)%', re.IGNORECASE),
+    ],
+    "SgstRate": [
+        _alt(None, r'SGST\s*@\s*([\d.]+)\s*%', re.IGNORECASE),
+        _alt(None, r'SGST\s*\|\s*([\d.]+)%', re.IGNORECASE),
+    ],
+    "IgstRate": [
+        _alt(None, r'IGST\s*@\s*([\d.]+)\s*%', re.IGNORECASE),
+        _alt(None, r'IGST\s*\|\s*([\d.]+)%', re.IGNORECASE),
+    ],
+    "SubTotal": [
+        # Extract Sub Total (Taxable Value)
+        _alt(None, r'Sub\s+Total\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'\|\s*\*?\*?Total\*?\*?\s*\|\s*\*?\*?([\d,.]+)\*?\*?\s*\|', re.IGNORECASE),
+    ],
+    "TaxableValue": [
+        # Extract Taxable Value and Total Value
+        _alt(None, r'Taxable\s+Value\s*\|?\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "TotalValue": [
+        # Format 5: "Grand Total value (in figures)" or word format
+        _alt(5, r'\|\s*GRAND\s+TOTAL\s*\|\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'Total\s+Invoice\s+Value\s*:\s*\n[^\n]+\n([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'Grand\s+Total\s+[Vv]alue.*?([\d,]+\.?\d*)', re.IGNORECASE),
+        # Format 4: "Total Value RS ... in Words:" pattern
+        _alt(4, r'Total\s+Value\s+RS\s+(.+?)\s+in\s+Words', re.IGNORECASE),
+        # Format 3: "Total Value Including GST"
+        _alt(3, r'Total\s+Value\s+Including\s+GST\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'Total\s+Value\s*\|\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "TotalValueNumeric": [
+        # Extract numeric value if available in text
+        _alt(None, r'Total\s+Value.*?([\d,]+\.?\d*)', re.IGNORECASE),
+    ],
+    "TotalValueWords": [
+        # Format 8: "Total Invoice Value in words Rs. ..." pattern
+        _alt(8, r'Total\s+Invoice\s+Value\s+in\s+words\s+Rs\.\s+(.+?)\s+only', re.IGNORECASE),
+    ],
+    "TotalValueSummary": [
+        # Format 9: Extract from "**Taxable Value**" summary row (last column)
+        _alt(9, r'\|\s*\*\*Taxable\s+Value\*\*\s*\|.*?\|\s*([\d.]+)\s*\|[^\|]*$', re.IGNORECASE | re.MULTILINE),
+        # Format 10: "**Total Invoice Value**" followed by value on next line
+        _alt(10, r'\*\*Total\s+Invoice\s+Value\*\*\s*\n\s*([\d,.]+)', re.IGNORECASE),
+    ],
+    "TotalAmountFallback": [
+        _alt(None, r'Grand\s+Total.*?([\d,]+\.?\d*)', re.IGNORECASE),
+        _alt(None, r'Total\s+Value\s+RS.*?([\d,]+\.?\d*)', re.IGNORECASE),
+        _alt(None, r'Total\s+Value\s+Including\s+GST\s*\|?\s*[^\d]*\|?\s*[^\d]*\|?\s*([\d,.]+)', re.IGNORECASE),
+        _alt(None, r'Total\s+Value\s*\|?\s*([\d,]+\.?\d*)', re.IGNORECASE),
+    ],
+    "TotalTaxFallback": [
+        _alt(None, r'Tax\s+Amount\s*:\s*([\d,.]+)', re.IGNORECASE),
+        # Format 4: extract from "Amount of GST RS ... in words"
+        _alt(4, r'Amount\s+of\s+GST\s+RS.*?([\d,]+\.?\d*)', re.IGNORECASE),
+    ],
+}
+
+# Line item tables in the order they are tried; TABLE_PATTERNS locates the
+# header and body, which parse_table() splits into rows and cells
+TABLE_PATTERNS = {
+    # Format 9: | S.No | Item (multi-column) | ... | Amount |
+    9: re.compile(
+        r'\*\*S\.No\.\s+Item\*\*.*?\*\*Amount\(INR\)\*\*\s*\n(.*?)(?=\n\s*\*\*Amount\s+in\s+words|---)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 8: numbered list with values on separate lines
+    8: re.compile(
+        r'###\s*Sr\.\s*No\..*?\n(.*?)(?=###\s*Total|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 10: | S.No. | Description | HSN/SAC | ... | GST Amount |
+    10: re.compile(
+        r'\|\s*S\.No\.\s*\|\s*Description\s*\|\s*HSN/SAC.*?\|\s*GST\s+Amount\s*\|[^\n]*\n(.*?)(?=\n\s*Invoice\s+Amount\s+in\s+words|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 7: | number | Description | HSN | Units | Quantity | Rate | Total |
+    7: re.compile(
+        r'\|\s*Description\s+of\s+Goods\s*\|\s*HSN\s+Code\s*\|\s*Units\s*\|\s*Quantity\s*\|\s*Rate\s*\|\s*Total\s*\|[^\n]*\n(.*?)(?=\n\s*\|\s*TOTAL|\n\s*Certified|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 6: Sr. No. | Description | HSN | COL | SIZE | Qty | Rate | Total (Taxable) | CGST | SGST | IGST
+    6: re.compile(
+        r'\|\s*Sr\.\s*No\.\s*\|\s*Description.*?Goods\s*\|.*?HSN.*?\|.*?(?:COL|COLOR).*?\|.*?SIZE.*?\|.*?Qty.*?\|.*?Rate.*?\|.*?Total.*?\(Taxable\).*?\|.*?CGST.*?\|.*?SGST.*?\|.*?IGST.*?\|[^\n]*\n(.*?)(?=\n\s*freight\s+insurance|\n\s*Total\s+Invoice|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 5: Site | Description | HSNBAC CODE | Batch No | Qty | UOM | Rate | Total | ...
+    5: re.compile(
+        r'\|\s*Site\s*\|\s*Description\s*\|.*?HSN.*?CODE.*?\|.*?(?:Batch|City).*?\|.*?(?:City|LOM).*?\|.*?LOM.*?\|.*?Rate.*?\|.*?Total.*?\|.*?Discount.*?\|.*?Taxable\s+Value.*?\|.*?CGST.*?\|.*?SGST.*?\|.*?IGST.*?\|[^\n]*\n(.*?)(?=\n\s*Remark|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 1: S.No | Description | HSN | ... | IGST | CGST | SGST | Total
+    1: re.compile(
+        r'\|\s*S\.?No\.?.*?(?:HSN|SAC).*?(?:Quantity|Qty).*?(?:Price|Rate).*?(?:Total|Amount).*?\|.*?\n(.*?)(?=\n\s*---|\n\s*###|\n\s*\*\*|SubTotal|Total Amount|Narration|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 4: table starts with "Description of Goods"
+    4: re.compile(
+        r'\|\s*Description\s+of\s+Goods\s*\|.*?UOM.*?\|.*?Quantity.*?\|.*?Rate.*?\|.*?Amount.*?\|[^\n]*\n(.*?)(?=\n\s*\*\*|\n\s*Narration|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 2: table starts with "No. Of Packages"
+    2: re.compile(
+        r'\|\s*No\.?\s*Of\s*Packages\s*\|.*?Description.*?\|.*?UOM.*?\|.*?Quantity.*?\|.*?Rate.*?\|.*?Amount.*?\|[^\n]*\n(.*?)(?=\n\s*---|\n\s*###|Narration|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+    # Format 3: S.No | Description of Work | SAC | Amount
+    3: re.compile(
+        r'\|\s*S\.?No\.?\s*\|\s*Description\s+of\s+Work\s*\|\s*(?:SAC|HSN)\s*\|\s*Amount\s*\|[^\n]*\n(.*?)(?=\n\s*Sub\s*Total|\n\s*Amount\s+Chargeable|$)',
+        re.DOTALL | re.IGNORECASE
+    ),
+}
+
+# Format 8: numbered list with values on separate lines (not a table)
+NUMBERED_ITEM_PATTERN = re.compile(
+    r'(\d+)\.\s+([^\n]+?)\s*\n\s*(\d{8})\s*\n\s*(\d+)\s*\n\s*([\d.]+)\s*\n\s*([\d,.]+)\s*\n\s*([\d.]+)\s*\n\s*([\d,.]+)',
+    re.IGNORECASE
+)
+
+# Header cells of line item tables, normalized by normalize_header(), mapped
+# to canonical columns. Unlisted headers (COL, SIZE, Expiry, ...) still take
+# up their position in the row.
+COLUMN_SYNONYMS = {
+    # Format 9 merges "S.No." and "Item" into the first header cell
+    'sr_no': ('s no', 'sno', 'sr no', 'no', 'site', 's no item'),
+    'description': ('description', 'description of goods', 'description of work', 'item', 'particulars'),
+    'hsn': ('hsn', 'sac', 'hsn sac', 'hsn code', 'sac code', 'hsnbac code'),
+    'batch': ('batch', 'batch no'),
+    # OCR reads Format 5's "Qty" and "UOM" as "City" and "LOM"
+    'quantity': ('qty', 'quantity', 'qty nos', 'city'),
+    'uom': ('uom', 'unit', 'units', 'lom'),
+    'rate': ('rate', 'price', 'unit price'),
+    'value': ('value',),
+    'discount': ('disc', 'discount'),
+    'handling': ('handling charge',),
+    'taxable': ('taxable', 'taxable value', 'total taxable'),
+    'igst': ('igst', 'igst amount'),
+    'cgst': ('cgst', 'cgst amount'),
+    'sgst': ('sgst', 'sgst amount'),
+    'igst_rate': ('igst rate',),
+    'cgst_rate': ('cgst rate',),
+    'sgst_rate': ('sgst rate',),
+    'tax': ('gst amount',),
+    'amount': ('amount', 'amount inr', 'total'),
+    'start': ('start',),
+    'end': ('end',),
+    'pax': ('pax',),
+}
+HEADER_COLUMNS = {synonym: column for column, synonyms in COLUMN_SYNONYMS.items() for synonym in synonyms}
+HEADER_NOISE_PATTERN = re.compile(r'[^a-z]+')
+# A tax amount column may arrive split into "9% | amount" cells
+TAX_RATE_COLUMNS = {'igst': 'igst_rate', 'cgst': 'cgst_rate', 'sgst': 'sgst_rate'}
+
+# Shapes (matched against the whole stripped cell) a data row must have in
+# the columns listed; rows that do not fit are not line items. No shape
+# matches "|", so a row is checked in one go against the shapes joined by "|"
+# (ROW_CHECKS), and none starts or ends with whitespace, so the "\s*" around
+# them in a row pattern (table_layout) leaves one way to match each cell.
+CELL_INTEGER = re.compile(r'\d+')
+CELL_DECIMAL = re.compile(r'[\d.]+')
+CELL_AMOUNT = re.compile(r'[\d,.]+')
+CELL_PERCENT = re.compile(r'[\d.]+%')
+CELL_TEXT = re.compile(r'[^|\s](?:[^|]*[^|\s])?')
+CELL_WORD = re.compile(r'[A-Za-z]+')
+CELL_HSN = re.compile(r'\d{4,8}')
+# Any stripped cell, empty included
+CELL_ANY = re.compile(r'(?:[^|\s](?:[^|]*[^|\s])?)?')
+CELL_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}')
+# Format 9: description and start of the period share a cell
+CELL_TEXT_DATETIME = re.compile(r'([^|\s][^|]*?)\s+(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})')
+
+ROW_CELLS = {
+    9: {'sr_no': CELL_INTEGER, 'start': CELL_TEXT_DATETIME, 'end': CELL_DATETIME, 'quantity': CELL_INTEGER,
+        'pax': CELL_INTEGER, 'rate': CELL_DECIMAL, 'amount': CELL_DECIMAL},
+    10: {'sr_no': CELL_INTEGER, 'description': CELL_TEXT, 'hsn': CELL_INTEGER, 'quantity': CELL_AMOUNT,
+         'rate': CELL_AMOUNT, 'value': CELL_AMOUNT, 'discount': CELL_AMOUNT, 'handling': CELL_AMOUNT,
+         'taxable': CELL_AMOUNT, 'igst_rate': CELL_PERCENT, 'cgst_rate': CELL_PERCENT,
+         'sgst_rate': CELL_PERCENT, 'tax': CELL_AMOUNT},
+    7: {'sr_no': CELL_INTEGER, 'description': CELL_TEXT, 'hsn': re.compile(r'(?:\d{6})?'), 'uom': CELL_WORD,
+        'quantity': re.compile(r'[\d.-]+'), 'rate': CELL_DECIMAL, 'amount': CELL_DECIMAL},
+    6: {'sr_no': CELL_INTEGER, 'description': CELL_TEXT, 'hsn': re.compile(r'\d{8}'), 'quantity': CELL_DECIMAL,
+        'rate': CELL_DECIMAL, 'taxable': CELL_AMOUNT, 'cgst_rate': CELL_PERCENT, 'cgst': CELL_AMOUNT,
+        'sgst_rate': CELL_PERCENT, 'sgst': CELL_AMOUNT},
+    5: {'sr_no': CELL_INTEGER, 'description': CELL_TEXT, 'hsn': CELL_HSN, 'quantity': CELL_DECIMAL,
+        'uom': CELL_WORD, 'rate': CELL_AMOUNT, 'amount': CELL_AMOUNT, 'discount': CELL_DECIMAL,
+        'taxable': CELL_AMOUNT},
+    # A blank S.No cell is kept; _line_items_format1 drops blank-numbered total rows
+    1: {'sr_no': re.compile(r'\d*'), 'description': CELL_TEXT},
+    4: {'quantity': CELL_DECIMAL, 'rate': CELL_DECIMAL, 'amount': CELL_DECIMAL},
+    3: {'description': CELL_TEXT, 'hsn': CELL_HSN, 'amount': CELL_DECIMAL},
+}
+# Formats 2 and 4 share the same row layout
+ROW_CELLS[2] = ROW_CELLS[4]
+ROW_CHECKS = {
+    fmt: (tuple(cells), re.compile(r'\|'.join(f'(?:{check.pattern})' for check in cells.values())))
+    for fmt, cells in ROW_CELLS.items()
+}
+CELL_SEPARATOR_PATTERN = re.compile(r'\s*\|\s*')
+# Layouts whose table header is a "|" row (Formats 8 and 9 use a heading / bold line)
+PIPE_TABLE_FORMATS = frozenset(fmt for fmt, pattern in TABLE_PATTERNS.items() if pattern.pattern.startswith(r'\|'))
+
+# Format 10: "| GSTIN/UJN | : value |" rows, in supplier / customer / ship-to order
+GSTIN_UJN_PATTERN = re.compile(r'\|\s*GSTIN\s*/\s*UJN\s*\|\s*:\s*([0-9A-Z]{15})\s*\|', re.IGNORECASE)
+RCM_PAYABLE_PATTERN = re.compile(r'Tax\s+is\s+Payable\s+on\s+Reverse\s+Charges', re.IGNORECASE)
+# Format 9: | **Taxable Value** | taxable | cgst | sgst | total_tax | grand_total |
+TAX_SUMMARY_ROW_PATTERN = re.compile(r'\|\s*\*\*Taxable\s+Value\*\*\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|', re.IGNORECASE)
+# Format 7: "| GST 18% | 103507.82 |"
+GST_SPLIT_PATTERN = re.compile(r'\|\s*GST\s+([\d.]+)%\s*\|\s*([\d,.]+)', re.IGNORECASE)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+NUMBER_IN_TEXT_PATTERN = re.compile(r'([\d,]+\.?\d*)')
+LEADING_DIGIT_PATTERN = re.compile(r'^\d')
+HSN_DIGITS_PATTERN = re.compile(r'\d{4,8}')
+QUANTITY_UOM_PATTERN = re.compile(r'([\d.]+)\s*([A-Z]+)', re.IGNORECASE)
+NON_NUMERIC_PATTERN = re.compile(r'[^0-9.]')
+
+
+# ===== FORMAT FINGERPRINTING =====
+# Anchor markers that identify an invoice layout. A document is assigned the
+# format with the most distinct markers present; ties and documents without
+# markers are ambiguous and run the full cascades.
+
+FORMAT_MARKERS = {
+    1: [r'\|\s*S\.?No\s*\|\s*Description\s*\|\s*HSN/SAC\s*\|'],
+    2: [r'\|\s*No\.?\s*Of\s*Packages\s*\|'],
+    3: [r'FACTORY\s*:', r'\|\s*Description\s+of\s+Work\s*\|'],
+    4: [r'Name\s+and\s+Address\s+of\s+Recipient', r'Serial\s+No\.?\s+of\s+invoice'],
+    5: [r'##\s*Company[\'"]?s?\s+Name', r'Details\s+of\s+Receiver\s+\(Billed\s+to\)', r'\|\s*Site\s*\|\s*Description\s*\|'],
+    6: [r'\|\s*Sr\.\s*No\.\s*\|\s*Description\s+of\s+Goods\s*\|', r'Total\s*\(Taxable\)'],
+    7: [r'\|\s*Description\s+of\s+Goods\s*\|\s*HSN\s+Code\s*\|\s*Units\s*\|', r'\|\s*GST\s+[\d.]+%\s*\|'],
+    8: [r'Our\s+F\.I\.\s+No\.', r'###\s*Sr\.\s*No\.', r'Name\s+&\s+Address\s+of\s+Receiver'],
+    9: [r'\*\*S\.No\.\s+Item\*\*', r'\*\*Bill\s+From\*\*', r'\*\*Bill\s+To\s*:\*\*'],
+    10: [r'\|\s*GSTIN\s*/\s*UJN\s*\|', r'\|\s*Name\s+of\s+Purchaser\s*\|', r'\*\*IRN\s+No\*\*'],
+}
+
+# Each marker is compiled on its own: a single alternation of all of them loses
+# the literal-prefix scan and ends up several times slower than these searches.
+FORMAT_MARKER_PATTERNS = {
+    fmt: [re.compile(marker, re.IGNORECASE) for marker in markers]
+    for fmt, markers in FORMAT_MARKERS.items()
+}
+
+
+def detect_format(text):
+    """
+    Fingerprint the invoice layout from its anchor markers.
+    Returns the format number, or None when no format clearly wins.
+    """
+    scores = {}
+    for fmt, patterns in FORMAT_MARKER_PATTERNS.items():
+        score = sum(1 for pattern in patterns if pattern.search(text))
+        if score:
+            scores[fmt] = score
+    if not scores:
+        return None
+    ranked = sorted(scores.values(), reverse=True)
+    if len(ranked) > 1 and ranked[0] == ranked[1]:
+        return None
+    return max(scores, key=scores.get)
+
+
+def _format_cascades(fmt):
+    """FIELD_PATTERNS restricted to the alternatives of one format plus the shared ones"""
+    return {
+        field: [alt for alt in alternatives if not alt.formats or fmt in alt.formats]
+        for field, alternatives in FIELD_PATTERNS.items()
+    }
+
+
+FORMAT_CASCADES = {fmt: _format_cascades(fmt) for fmt in FORMAT_MARKERS}
+
+
+# ===== ANCHOR SCANNER =====
+# Every cascade alternative records the literal its matches must contain.
+# scan_anchors() finds all of those literals in one pass over the document, so
+# a field lookup skips alternatives whose anchor never occurs and tries the
+# ones that start with their anchor only at the offsets where it was seen.
+
+ANCHORS = sorted(
+    {alt.anchor for alternatives in FIELD_PATTERNS.values() for alt in alternatives if alt.anchor},
+    key=len, reverse=True
+)
+# Longest anchors first, so each match is the longest anchor at its offset ...
+ANCHOR_SCAN_PATTERN = re.compile('|'.join(re.escape(anchor) for anchor in ANCHORS))
+# ... and the shorter anchors starting at the same offset are its prefixes
+ANCHOR_PREFIXES = {anchor: [other for other in ANCHORS if anchor.startswith(other)] for anchor in ANCHORS}
+# Characters that re.IGNORECASE matches against ASCII letters but str.lower()
+# leaves alone (or turns into two characters)
+ANCHOR_CASE_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's'})
+# Large documents are folded this many characters at a time, so scanning
+# never holds a second full-size copy of the text
+ANCHOR_SCAN_CHUNK = 1024 * 1024
+ANCHOR_SCAN_OVERLAP = max((len(anchor) for anchor in ANCHORS), default=1) - 1
+
+
+def scan_anchors(text):
+    """
+    Map every anchor to the offsets where it occurs in text, ignoring case.
+    Returns None if the folded text does not line up with the original.
+    """
+    offsets = {anchor: [] for anchor in ANCHORS}
+    for base in range(0, len(text), ANCHOR_SCAN_CHUNK):
+        # The overlap catches anchors that start in this chunk and end in the next
+        chunk = text[base:base + ANCHOR_SCAN_CHUNK + ANCHOR_SCAN_OVERLAP]
+        folded = chunk if chunk.isascii() else chunk.translate(ANCHOR_CASE_FOLD)
+        folded = folded.lower()
+        if len(folded) != len(chunk):
+            return None
+        match = ANCHOR_SCAN_PATTERN.search(folded)
+        while match and match.start() < ANCHOR_SCAN_CHUNK:
+            start = match.start()
+            for anchor in ANCHOR_PREFIXES[match.group()]:
+                offsets[anchor].append(base + start)
+            # Resume one character later so overlapping anchors are not missed
+            match = ANCHOR_SCAN_PATTERN.search(folded, start + 1)
+    return offsets
+
+
+def search_alternative(alternative, text, anchor_offsets=None, sections=None):
+    """
+    Equivalent of alternative.pattern.search(text) that only looks where the
+    alternative's anchor occurs (see scan_anchors). With a SectionIndex a
+    sectioned alternative only matches within one block of the document.
+    """
+    if anchor_offsets is None or not alternative.anchor:
+        return alternative.pattern.search(text)
+    offsets = anchor_offsets[alternative.anchor]
+    if alternative.sectioned and sections is not None and sections.block_starts:
+        return sections.search(alternative.pattern, text, offsets, alternative.anchored)
+    if not alternative.anchored:
+        return alternative.pattern.search(text) if offsets else None
+    for offset in offsets:
+        match = alternative.pattern.match(text, offset)
+        if match:
+            return match
+    return None
+
+
+# ===== SECTION INDEX =====
+# One pass over the document records its structure: markdown headings, "|"
+# tables (titled by their header row), bold labels and horizontal rules, with
+# character offsets. Rules and level-1 headings split the document into
+# blocks (the supplier header, the invoice body, a page): sectioned field
+# alternatives are searched only inside the blocks holding their anchor, and
+# line-item table headers only inside tables, so a search that fails costs
+# the size of a block rather than of the whole document.
+
+# header_end (tables only) is where the header rows end: after the "|---|"
+# separator row, or after the first row's newline when there is none
+Section = namedtuple('Section', ['kind', 'start', 'end', 'level', 'title', 'header_end'], defaults=(None,))
+
+# Structural lines are found by patterns starting with the newline before
+# them (a literal prefix the regex engine can skip to quickly); the first
+# line of the document is checked with the same pattern minus the newline
+TABLE_RUN = r'[ \t]*(\|[^\n]*)(?:\n[ \t]*\|[^\n]*)*'
+MARKUP_LINE = r'[ \t]*[#*_-][^\n]*'
+TABLE_RUN_PATTERN = re.compile('\n' + TABLE_RUN)
+TABLE_RUN_AT_START = re.compile(TABLE_RUN)
+MARKUP_LINE_PATTERN = re.compile('\n' + MARKUP_LINE)
+MARKUP_LINE_AT_START = re.compile(MARKUP_LINE)
+TABLE_SEPARATOR_PATTERN = re.compile(r'\n[ \t]*\|[ \t:|-]*-{3}[ \t:|-]*$', re.MULTILINE)
+# Lines that close a block: a rule or a level-1 heading
+BLOCK_BOUNDARY = r'[ \t]*(?:(?:-{3,}|\*{3,}|_{3,})[ \t]*(?=\n|\Z)|#[ \t][^\n]*)'
+BLOCK_BOUNDARY_PATTERN = re.compile('\n' + BLOCK_BOUNDARY)
+BLOCK_BOUNDARY_AT_START = re.compile(BLOCK_BOUNDARY)
+
+HEADING_LINE_PATTERN = re.compile(r'[ \t]*(#{1,6})[ \t]+([^\n]*)')
+RULE_LINE_PATTERN = re.compile(r'[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*$')
+LABEL_LINE_PATTERN = re.compile(r'[ \t]*\*\*([^\n]+?)\*\*')
+
+
+def _line_runs(text, at_start, pattern):
+    """Yield (start, match) for every run of lines matched, the first line of text included"""
+    match = at_start.match(text)
+    if match:
+        yield 0, match
+    for match in pattern.finditer(text, match.end() if match else 0):
+        yield match.start() + 1, match
+
+
+class SectionIndex:
+    """
+    Headings, tables, bold labels and rules of one document. Extraction only
+    needs the tables and the block boundaries; headings, labels and rules are
+    indexed the first time they are asked for.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self.tables = []
+        for start, run in _line_runs(text, TABLE_RUN_AT_START, TABLE_RUN_PATTERN):
+            end = run.end()
+            # The header rows end at the "|---|" separator row, or with the
+            # first row (and its newline) when there is none
+            separator = TABLE_SEPARATOR_PATTERN.search(text, start, end)
+            header_end = separator.end() if separator else min(run.end(1) + 1, self.length)
+            self.tables.append(Section('table', start, end, 0, run.group(1).strip(), header_end))
+        # A block runs from one rule or level-1 heading to the next; its end
+        # takes in that closing line so lookaheads such as "(?=\n---)" still see it
+        self.block_starts = []
+        self.block_ends = []
+        for start, line in _line_runs(text, BLOCK_BOUNDARY_AT_START, BLOCK_BOUNDARY_PATTERN):
+            self.block_starts.append(start)
+            self.block_ends.append(line.end())
+        self._markup = None
+
+    def _index_markup(self):
+        """(headings, rules, labels) of the document"""
+        if self._markup is None:
+            headings, rules, labels = [], [], []
+            text = self.text
+            for start, line in _line_runs(text, MARKUP_LINE_AT_START, MARKUP_LINE_PATTERN):
+                end = line.end()
+                match = HEADING_LINE_PATTERN.match(text, start, end)
+                if match:
+                    headings.append(Section('heading', start, end, len(match.group(1)), match.group(2).strip()))
+                elif RULE_LINE_PATTERN.match(text, start, end):
+                    rules.append(Section('rule', start, end, 0, ''))
+                else:
+                    match = LABEL_LINE_PATTERN.match(text, start, end)
+                    if match:
+                        labels.append(Section('label', start, end, 0, match.group(1).strip()))
+            self._markup = headings, rules, labels
+        return self._markup
+
+    @property
+    def headings(self):
+        return self._index_markup()[0]
+
+    @property
+    def rules(self):
+        return self._index_markup()[1]
+
+    @property
+    def labels(self):
+        return self._index_markup()[2]
+
+    def sections(self):
+        """Every indexed section in document order"""
+        return sorted(self.headings + self.tables + self.labels + self.rules, key=lambda section: section.start)
+
+    def search(self, pattern, text, offsets, anchored=False):
+        """
+        First match of pattern lying within one block, looking only in the
+        blocks that contain one of offsets (ascending). anchored: the match
+        must start at one of the offsets.
+        """
+        starts = self.block_starts
+        next_block = -1
+        for offset in offsets:
+            if offset < next_block:
+                continue  # this block was already searched
+            index = bisect.bisect_right(starts, offset)
+            end = self.block_ends[index] if index < len(starts) else self.length
+            if anchored:
+                match = pattern.match(text, offset, end)
+            else:
+                match = pattern.search(text, starts[index - 1] if index else 0, end)
+                next_block = starts[index] if index < len(starts) else self.length
+            if match:
+                return match
+        return None
+
+    def find_table(self, pattern, text):
+        """
+        pattern.search(text) for a line-item table pattern whose header is a
+        "|" row. The header is looked for in each table's header rows only
+        (the body is then empty up to the bound, which "$" accepts); the
+        table found is matched again without the bound so its body still
+        runs on to the pattern's own terminator (tables continue across page
+        breaks).
+        """
+        for table in self.tables:
+            match = pattern.search(text, table.start, table.header_end)
+            if match:
+                return pattern.match(text, match.start())
+        return None
+
+
+# ===== TIME BUDGETS =====
+# Several cascade patterns span the whole document with DOTALL .*? and a
+# lookahead; on malformed uploads those can backtrack for seconds. Every
+# pattern search gets PATTERN_TIMEOUT seconds and the whole extraction
+# DOCUMENT_TIMEOUT seconds; fields that run out are left empty and listed in
+# the result's "TimedOutFields".
+
+PATTERN_TIMEOUT = 0.25
+DOCUMENT_TIMEOUT = 2.0
+
+
+class PatternTimeout(Exception):
+    """Raised inside a pattern search when its time budget runs out"""
+
+
+class TimeBudget:
+    """
+    Per-pattern and per-document time limits for one extraction.
+
+    Where SIGALRM is available (Unix, main thread - e.g. a gunicorn sync
+    worker or the CLI) a timer ticks every ALARM_TICK of the pattern budget
+    and interrupts a search that has overrun. Elsewhere the limits are only
+    checked between searches: a runaway pattern completes, but nothing else
+    runs once the document budget is spent.
+    """
+
+    # Fraction of the pattern budget between timer ticks; one timer per
+    # document is much cheaper than re-arming it for every search
+    ALARM_TICK = 0.2
+
+    def __init__(self, pattern_timeout=PATTERN_TIMEOUT, document_timeout=DOCUMENT_TIMEOUT):
+        self.pattern_timeout = pattern_timeout
+        self.deadline = time.monotonic() + document_timeout if document_timeout else None
+        self.timed_out = []
+        self.use_alarm = (
+            bool(pattern_timeout or document_timeout)
+            and hasattr(signal, 'setitimer')
+            and threading.current_thread() is threading.main_thread()
+        )
+        self._tick = (pattern_timeout or document_timeout or 0) * self.ALARM_TICK
+        self._search_deadline = None
+        self._previous_handler = None
+        self._previous_timer = None
+
+    def __enter__(self):
+        if self.use_alarm:
+            self._previous_handler = signal.signal(signal.SIGALRM, self._on_alarm)
+            self._previous_timer = (time.monotonic(), signal.setitimer(signal.ITIMER_REAL, self._tick, self._tick))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+            # Re-arm a timer the caller had running, less the time spent here
+            started, (delay, interval) = self._previous_timer
+            if delay:
+                signal.setitimer(signal.ITIMER_REAL, max(delay - (time.monotonic() - started), 1e-6), interval)
+        return False
+
+    def _on_alarm(self, signum, frame):
+        # Ticks between searches, or before the running one overran, are ignored
+        if self._search_deadline is not None and time.monotonic() >= self._search_deadline:
+            raise PatternTimeout()
+
+    def expire(self, field):
+        """Record that field ran out of time"""
+        if field not in self.timed_out:
+            self.timed_out.append(field)
+
+    def run(self, field, search, *args):
+        """Call search(*args) within the budget; returns None (and records field) on timeout"""
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.expire(field)
+            return None
+        search_deadline = now + self.pattern_timeout if self.pattern_timeout else self.deadline
+        if self.deadline is not None:
+            search_deadline = min(search_deadline, self.deadline)
+        self._search_deadline = search_deadline
+        try:
+            return search(*args)
+        except PatternTimeout:
+            self.expire(field)
+            return None
+        finally:
+            self._search_deadline = None
+
+
+# ===== PROFILING =====
+# Optional instrumentation (extract_invoice_data(..., profile=True)): the
+# wall time and outcome of every cascade alternative tried, every line-item
+# parser run and every section of the extraction. Without it the extraction
+# runs exactly the uninstrumented code.
+
+# Position of every alternative in its field's full cascade, used as its
+# label; keyed by id() because hashing an Alternative hashes its pattern
+ALTERNATIVE_INDEX = {
+    id(alternative): index
+    for alternatives in FIELD_PATTERNS.values()
+    for index, alternative in enumerate(alternatives)
+}
+
+
+class ExtractionProfile:
+    """
+    Timings of one extraction. as_dict() is what extract_invoice_data
+    attaches under "Profile": plain lists and dicts, so it can be returned
+    from a worker process.
+    """
+
+    def __init__(self):
+        self.format = None
+        # (field, alternative index, outcome, seconds); outcome is "hit",
+        # "miss", "skipped" (anchor absent, not searched) or "timeout"
+        self.alternatives = []
+        # (parser name, outcome, seconds); outcome is "hit" (found items),
+        # "miss" or "timeout"
+        self.parsers = []
+        self.sections = {}
+        self._section = None
+        self._section_start = None
+
+    def section(self, name):
+        """Close the running section (if any) and start timing name"""
+        now = time.perf_counter()
+        if self._section is not None:
+            self.sections[self._section] = self.sections.get(self._section, 0.0) + now - self._section_start
+        self._section = name
+        self._section_start = now
+
+    def parser(self, name, outcome, seconds):
+        self.parsers.append((name, outcome, seconds))
+
+    def as_dict(self):
+        self.section(None)
+        return {
+            'format': self.format,
+            'sections': self.sections,
+            'alternatives': self.alternatives,
+            'parsers': self.parsers,
+        }
+
+
+def clean_value(value):
+    """Clean extracted value by removing extra whitespace and newlines"""
+    if not value:
+        return ""
+    return WHITESPACE_PATTERN.sub(' ', value).strip()
+
+
+# ===== RECORDS =====
+# Header and line items are built as __slots__ records with one canonical
+# field naming; as_dict() writes them in the JSON shape of the result.
+# extract_invoice_data() converts them on the way out (invoice_as_dict), so
+# callers and cached results still see plain dicts.
+
+# HeaderItem keys in output order
+HEADER_FIELDS = (
+    "GrnDate", "SupplierCIN", "TotalInvoiceAmount", "ShipToAddress", "ShipFromAddres",
+    "IgstAmount", "CgstAmount", "TotalCess", "CustomerGstin", "EwayBillDate", "EwayBillNo",
+    "SupplierPanNumber", "IrnDate", "ShipToGstin", "ShipFromGSTIN", "SupplierAddress", "TotalTax",
+    "CustomerPanNumber", "InvoiceNumber", "InvoiceDate", "CustomerName", "IrnNo", "DocType",
+    "PlaceOfSupply", "PoNumber", "ShipToName", "ShipFromName", "TotalAmount", "PoDate",
+    "SupplierGstin", "RCMApplicable", "SupplierName", "GrnNo", "SgstAmount", "CustomerAddress",
+)
+
+
+class HeaderItem:
+    """Invoice header; every field starts out empty"""
+
+    __slots__ = HEADER_FIELDS
+
+    def __init__(self):
+        for field in HEADER_FIELDS:
+            setattr(self, field, "")
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in HEADER_FIELDS}
+
+
+class LineItem:
+    """One invoice line; fields not given are empty"""
+
+    __slots__ = (
+        "Description", "HsnCode", "Quantity", "UnitOfMeasurement", "UnitPrice", "ItemAmount",
+        "DiscountAmount", "TaxableValue", "IgstRate", "IgstAmount", "CgstRate", "CgstAmount",
+        "SgstRate", "SgstAmount", "CessRate", "CessAmount", "TotalItemAmount",
+    )
+
+    def __init__(self, Description="", HsnCode="", Quantity="", UnitOfMeasurement="", UnitPrice="",
+                 ItemAmount="", DiscountAmount="", TaxableValue="", IgstRate="", IgstAmount="",
+                 CgstRate="", CgstAmount="", SgstRate="", SgstAmount="", CessRate="", CessAmount="",
+                 TotalItemAmount=""):
+        self.Description = Description
+        self.HsnCode = HsnCode
+        self.Quantity = Quantity
+        self.UnitOfMeasurement = UnitOfMeasurement
+        self.UnitPrice = UnitPrice
+        self.ItemAmount = ItemAmount
+        self.DiscountAmount = DiscountAmount
+        self.TaxableValue = TaxableValue
+        self.IgstRate = IgstRate
+        self.IgstAmount = IgstAmount
+        self.CgstRate = CgstRate
+        self.CgstAmount = CgstAmount
+        self.SgstRate = SgstRate
+        self.SgstAmount = SgstAmount
+        self.CessRate = CessRate
+        self.CessAmount = CessAmount
+        self.TotalItemAmount = TotalItemAmount
+
+    def as_dict(self):
+        """The standard line item (ItemAmount and DiscountAmount are not part of it)"""
+        return {
+            "IgstRate": self.IgstRate,
+            "Description": self.Description,
+            "UnitOfMeasurement": self.UnitOfMeasurement,
+            "IgstAmount": self.IgstAmount,
+            "CgstAmount": self.CgstAmount,
+            "TaxableValue": self.TaxableValue,
+            "Quantity": self.Quantity,
+            "TotalItemAmount": self.TotalItemAmount,
+            "CessAmount": self.CessAmount,
+            "UnitPrice": self.UnitPrice,
+            "CgstRate": self.CgstRate,
+            "HsnCode": self.HsnCode,
+            "SgstAmount": self.SgstAmount,
+            "CessRate": self.CessRate,
+            "SgstRate": self.SgstRate,
+        }
+
+
+class ItemizedLineItem(LineItem):
+    """Format 10 line: written with that layout's own names, value and discount included"""
+
+    __slots__ = ()
+
+    def as_dict(self):
+        return {
+            "ItemDescription": self.Description,
+            "HsnCode": self.HsnCode,
+            "Quantity": self.Quantity,
+            "Unit": self.UnitOfMeasurement,
+            "Rate": self.UnitPrice,
+            "ItemAmount": self.ItemAmount,
+            "DiscountAmount": self.DiscountAmount,
+            "TaxableAmount": self.TaxableValue,
+            "IgstRate": self.IgstRate,
+            "CgstRate": self.CgstRate,
+            "SgstRate": self.SgstRate,
+            "IgstAmount": self.IgstAmount,
+            "CgstAmount": self.CgstAmount,
+            "SgstAmount": self.SgstAmount,
+            "TotalAmount": self.TotalItemAmount,
+        }
+
+
+def invoice_as_dict(data):
+    """An extraction with its HeaderItem and LineItems records written out as dicts"""
+    data = dict(data)
+    data["HeaderItem"] = data["HeaderItem"].as_dict()
+    data["LineItems"] = [item.as_dict() for item in data["LineItems"]]
+    return data
+
+
+# ===== LINE ITEM PARSERS =====
+# Each parser returns the line items of its layout (empty list when the table
+# is not found). LINE_ITEM_PARSERS lists them in the order they are tried.
+
+def find_table(fmt, text, sections=None):
+    """TABLE_PATTERNS[fmt].search(text), looking only in the indexed tables where that applies"""
+    if sections is None or fmt not in PIPE_TABLE_FORMATS:
+        return TABLE_PATTERNS[fmt].search(text)
+    return sections.find_table(TABLE_PATTERNS[fmt], text)
+
+
+def split_cells(line):
+    """Stripped cells of one table row; outer pipes are optional"""
+    cells = CELL_SEPARATOR_PATTERN.split(line.strip())
+    # A leading or trailing "|" leaves an empty string at that end
+    if len(cells) > 1:
+        if not cells[-1]:
+            del cells[-1]
+        if not cells[0]:
+            del cells[0]
+    return cells
+
+
+def normalize_header(cell):
+    """'Qty (Nos)' -> 'qty nos', 'IGST %' -> 'igst rate'"""
+    return HEADER_NOISE_PATTERN.sub(' ', cell.lower().replace('%', ' rate ')).strip()
+
+
+def header_columns(header):
+    """
+    Canonical column (None when unknown) at each position of a table's
+    header rows. A position takes the first row that names it and a column
+    the first position it is named at.
+    """
+    columns = []
+    for line in header.split('\n'):
+        if '|' not in line:
+            continue
+        for position, cell in enumerate(split_cells(line)):
+            column = HEADER_COLUMNS.get(normalize_header(cell))
+            if column in columns:
+                column = None
+            if position == len(columns):
+                columns.append(column)
+            elif columns[position] is None:
+                columns[position] = column
+    return columns
+
+
+@functools.lru_cache(maxsize=256)
+def table_layout(fmt, header):
+    """
+    (columns, row pattern, missing columns) of a format fmt table with
+    header rows header. The row pattern matches a whole stripped row with
+    one cell per column and the shapes ROW_CELLS[fmt] requires, capturing
+    the named columns; it is None when a checked column missing from the
+    header needs a value (Format 6's tax rates, which only a re-aligned row
+    has). Missing columns are the checked ones the header does not name.
+    """
+    columns = header_columns(header)
+    checks = ROW_CELLS[fmt]
+    missing = tuple(column for column in checks if column not in columns)
+    if any(not checks[column].fullmatch('') for column in missing):
+        return columns, None, missing
+    cells = []
+    for column in columns:
+        if column is None:
+            cells.append('[^|]*')
+        else:
+            shape = (checks[column] if column in checks else CELL_ANY).pattern
+            cells.append(rf'\s*(?P<{column}>{shape})\s*')
+    return columns, re.compile(r'\|' + r'\|'.join(cells) + r'\|?'), missing
+
+
+def align_row(cells, columns, checks):
+    """
+    {canonical column: cell} of a data row that does not line up with its
+    header. Cells are taken in header order, with two repairs for
+    PDF-to-markdown artefacts: a tax column whose cell is a "9%" rate takes
+    the next cell as its amount, and an empty cell is passed over when its
+    column needs a value (checks) and the next cell has it.
+    """
+    row = {}
+    count = len(cells)
+    index = 0
+    for column in columns:
+        cell = cells[index] if index < count else ''
+        index += 1
+        if column is None:
+            continue
+        check = checks.get(column)
+        if not cell and check is not None and index < count and not check.fullmatch(cell) and check.fullmatch(cells[index]):
+            cell = cells[index]
+            index += 1
+        if column in TAX_RATE_COLUMNS and cell.endswith('%') and index < count:
+            row[TAX_RATE_COLUMNS[column]] = cell
+            cell = cells[index]
+            index += 1
+        row[column] = cell
+    return row
+
+
+def parse_table(fmt, text, sections=None):
+    """
+    Rows ({canonical column: cell}) of format fmt's line item table that fit
+    ROW_CELLS[fmt], or None when the table is not found. The body is split
+    into lines once; lines without a "|" (and the "|---|" separator, which
+    fits no row) are skipped, and outer pipes are optional. A row with one cell per header column
+    is read in a single match and only split into cells and re-aligned if
+    it does not fit.
+    """
+    table = find_table(fmt, text, sections)
+    if not table:
+        return None
+    # The header pattern may start part-way along its row (Format 7 skips the "No" cell)
+    header_start = text.rfind('\n', 0, table.start()) + 1
+    columns, aligned_pattern, missing = table_layout(fmt, text[header_start:table.start(1)])
+    width = len(columns)
+    checks = ROW_CELLS[fmt]
+    checked, row_pattern = ROW_CHECKS[fmt]
+    rows = []
+    for line in table.group(1).split('\n'):
+        line = line.strip()
+        if '|' not in line:
+            continue
+        # A row has one "|" per cell, plus the closing one if present
+        aligned = aligned_pattern.fullmatch(line) if aligned_pattern and 0 <= line.count('|') - width <= 1 else None
+        if aligned:
+            row = aligned.groupdict()
+            for column in missing:
+                row[column] = ''
+            rows.append(row)
+            continue
+        row = align_row(split_cells(line), columns, checks)
+        if row_pattern.fullmatch('|'.join([row.setdefault(column, '') for column in checked])):
+            rows.append(row)
+    return rows
+
+
+def _line_items_format9(text, sections=None):
+    """Format 9: "**S.No. Item**" grid with merged description cells"""
+    line_items = []
+
+    # Format 9: Complex table with merged cells - Item description spans columns
+    # Row: | number | description with start date | end date | qty | pax | rate | amount |
+    for row in parse_table(9, text, sections) or ():
+        description, start_date = CELL_TEXT_DATETIME.fullmatch(row['start']).groups()
+        description = clean_value(description)
+        end_date = row['end']
+        
+        # Combine description with period
+        full_description = f"{description} (Period: {start_date} to {end_date})"
+        
+        line_item = LineItem(
+            Description=full_description,
+            UnitOfMeasurement="NOS",
+            TaxableValue=row['amount'],
+            Quantity=row['quantity'],
+            UnitPrice=row['rate']
+        )
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format8(text, sections=None):
+    """Format 8: numbered non-table list under a "### Sr. No." heading"""
+    line_items = []
+
+    # Format 8: Non-table format - numbered list with values on separate lines
+    # Pattern: "1. Description\n HSN\n Qty\n Rate\n ..."
+    format8_pattern = find_table(8, text, sections)
+    
+    if format8_pattern:
+        items_section = format8_pattern.group(1)
+        # Match numbered items: "1. DESCRIPTION\n HSN\n numbers..."
+        format8_items = NUMBERED_ITEM_PATTERN.finditer(items_section)
+        
+        for item in format8_items:
+            sr_no = item.group(1).strip()
+            description = clean_value(item.group(2))
+            hsn_code = item.group(3).strip()
+            no_of_pkgs = item.group(4).strip()
+            contents_per_pack = item.group(5).strip()
+            quantity = item.group(6).strip()
+            unit_price = item.group(7).strip()
+            amount = item.group(8).strip().replace('.', '').replace(',', '.')
+            
+            line_item = LineItem(Description=description, UnitOfMeasurement="NOS", TaxableValue=amount,
+                                 Quantity=quantity, UnitPrice=unit_price, HsnCode=hsn_code)
+            
+            line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format10(text, sections=None):
+    """Format 10: S.No. | Description | HSN/SAC | ... | GST Amount table"""
+    line_items = []
+
+    # Format 10: Table with | S.No. | Description | HSN/SAC | Qty (Nos) | Rate | Value | Disc. | Handling Charge | Taxable Value | IGST % | CGST % | SGST % | GST Amount |
+    for row in parse_table(10, text, sections) or ():
+        desc = clean_value(row['description'])
+        taxable = row['taxable'].replace(',', '')
+        igst_pct = row['igst_rate'][:-1]
+        cgst_pct = row['cgst_rate'][:-1]
+        sgst_pct = row['sgst_rate'][:-1]
+        taxable_value = parse_amount(taxable)
+        gst_value = parse_amount(row['tax'])
+        
+        # Calculate individual tax amounts
+        igst_amt = ""
+        cgst_amt = ""
+        sgst_amt = ""
+        
+        if taxable_value is not None:
+            igst_value = parse_amount(igst_pct)
+            if igst_value and igst_value > 0:
+                igst_amt = format_amount(tax_on(taxable_value, igst_value))
+            cgst_value = parse_amount(cgst_pct)
+            if cgst_value and cgst_value > 0:
+                cgst_amt = format_amount(tax_on(taxable_value, cgst_value))
+            sgst_value = parse_amount(sgst_pct)
+            if sgst_value and sgst_value > 0:
+                sgst_amt = format_amount(tax_on(taxable_value, sgst_value))
+        
+        line_items.append(ItemizedLineItem(
+            Description=desc,
+            HsnCode=row['hsn'],
+            Quantity=row['quantity'].replace(',', ''),
+            UnitOfMeasurement="Nos",
+            UnitPrice=row['rate'].replace(',', ''),
+            ItemAmount=row['value'].replace(',', ''),
+            DiscountAmount=row['discount'].replace(',', ''),
+            TaxableValue=taxable,
+            IgstRate=igst_pct,
+            CgstRate=cgst_pct,
+            SgstRate=sgst_pct,
+            IgstAmount=igst_amt,
+            CgstAmount=cgst_amt,
+            SgstAmount=sgst_amt,
+            TotalItemAmount=(format_amount(taxable_value + gst_value)
+                             if taxable_value is not None and gst_value is not None else "")
+        ))
+
+    return line_items
+
+
+def _line_items_format7(text, sections=None):
+    """Format 7: Description of Goods | HSN Code | Units | Quantity | Rate | Total table"""
+    line_items = []
+
+    # Format 7: Table with | number | Description | HSN | Units | Quantity | Rate | Total |
+    for row in parse_table(7, text, sections) or ():
+        description = clean_value(row['description'])
+        uom = row['uom'].upper()
+        
+        line_item = LineItem(Description=description, UnitOfMeasurement=uom, TaxableValue=row['amount'],
+                             Quantity=row['quantity'], UnitPrice=row['rate'], HsnCode=row['hsn'])
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format6(text, sections=None):
+    """Format 6: Sr. No. | Description | HSN | COL | SIZE | ... table"""
+    line_items = []
+
+    # Format 6: Table with Sr. No. | Description | HSN | COL | SIZE | Qty | Rate | Total (Taxable) | CGST | SGST | IGST
+    # Note: the CGST and SGST columns arrive split into "rate% | amount" cells
+    for row in parse_table(6, text, sections) or ():
+        description = clean_value(row['description'])
+        taxable_value = row['taxable'].replace(',', '')
+        cgst_rate = row['cgst_rate'][:-1]
+        cgst_amount = row['cgst'].replace(',', '')
+        sgst_rate = row['sgst_rate'][:-1]
+        sgst_amount = row['sgst'].replace(',', '')
+        
+        line_item = LineItem(Description=description, UnitOfMeasurement="NOS", CgstAmount=cgst_amount,
+                             TaxableValue=taxable_value, Quantity=row['quantity'], UnitPrice=row['rate'],
+                             CgstRate=cgst_rate, HsnCode=row['hsn'], SgstAmount=sgst_amount, SgstRate=sgst_rate)
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format5(text, sections=None):
+    """Format 5: Site | Description | HSN CODE | ... table"""
+    line_items = []
+
+    # Format 5: Complex table with Site | Description | HSNBAC CODE | Batch No | Qty | UOM | Rate | Total | Discount | Taxable Value | CGST | SGST | IGST
+    for row in parse_table(5, text, sections) or ():
+        description = clean_value(row['description'])
+        
+        # Skip rows with "Total:" or summary text
+        if any(keyword in description.lower() for keyword in ['total', 'grand total', 'details of tax']):
+            continue
+        
+        line_item = LineItem(
+            Description=description,
+            UnitOfMeasurement=row['uom'].upper(),
+            TaxableValue=row['taxable'].replace(',', ''),
+            Quantity=row['quantity'],
+            TotalItemAmount=row['amount'].replace(',', ''),
+            UnitPrice=row['rate'].replace(',', ''),
+            HsnCode=row['hsn']
+        )
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format1(text, sections=None):
+    """Format 1: full S.No | Description | HSN | ... | Total table with tax columns"""
+    line_items = []
+
+    # Format 1: Complex table with multiple columns (S.No | Description | HSN | ... | IGST | CGST | SGST | Total)
+    for row in parse_table(1, text, sections) or ():
+        description = clean_value(row['description'])
+        
+        # Skip "| | Total | ... |" summary rows
+        if not row['sr_no'] and any(keyword in description.lower() for keyword in ['total', 'sub total', 'grand total']):
+            continue
+        
+        line_item = LineItem(
+            Description=description,
+            IgstAmount=NON_NUMERIC_PATTERN.sub('', row.get('igst', '')),
+            CgstAmount=NON_NUMERIC_PATTERN.sub('', row.get('cgst', '')),
+            TaxableValue=NON_NUMERIC_PATTERN.sub('', row.get('taxable', '')),
+            TotalItemAmount=NON_NUMERIC_PATTERN.sub('', row.get('amount', '')),
+            UnitPrice=NON_NUMERIC_PATTERN.sub('', row.get('rate', '')),
+            SgstAmount=NON_NUMERIC_PATTERN.sub('', row.get('sgst', ''))
+        )
+        
+        # Extract HSN
+        hsn_match = HSN_DIGITS_PATTERN.search(row.get('hsn', ''))
+        if hsn_match:
+            line_item.HsnCode = hsn_match.group(0)
+        
+        # Extract quantity and UOM
+        qty_text = row.get('quantity', '')
+        qty_match = QUANTITY_UOM_PATTERN.search(qty_text)
+        if qty_match:
+            line_item.Quantity = qty_match.group(1)
+            line_item.UnitOfMeasurement = qty_match.group(2).upper()
+        else:
+            line_item.Quantity = NON_NUMERIC_PATTERN.sub('', qty_text)
+        
+        # Calculate tax rates
+        taxable = parse_amount(line_item.TaxableValue)
+        if taxable and taxable > 0:
+            igst = parse_amount(line_item.IgstAmount)
+            if igst and igst > 0:
+                line_item.IgstRate = format_rate(rate_of(igst, taxable))
+            cgst = parse_amount(line_item.CgstAmount)
+            if cgst and cgst > 0:
+                line_item.CgstRate = format_rate(rate_of(cgst, taxable))
+            sgst = parse_amount(line_item.SgstAmount)
+            if sgst and sgst > 0:
+                line_item.SgstRate = format_rate(rate_of(sgst, taxable))
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format2_4(text, sections=None):
+    """Formats 2 & 4: Description | UOM | Quantity | Rate | Amount table"""
+    line_items = []
+
+    # Try Format 2 & 4: Table without "No. Of Packages" column (Description | UOM | Quantity | Rate | Amount)
+    # Format 4 specific: table starts with "Description of Goods"
+    rows = parse_table(4, text, sections)
+    
+    if rows is None:
+        rows = parse_table(2, text, sections) or ()
+    
+    for row in rows:
+        description = clean_value(row.get('description', ''))
+        uom = clean_value(row.get('uom', ''))
+        
+        line_item = LineItem(
+            Description=description,
+            UnitOfMeasurement=uom.upper(),
+            TaxableValue=row['amount'],
+            Quantity=row['quantity'],
+            UnitPrice=row['rate']
+        )
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+def _line_items_format3(text, sections=None):
+    """Format 3: S.No | Description of Work | SAC | Amount table"""
+    line_items = []
+
+    # Format 3: Simplified table (S.No | Description of Work | SAC | Amount)
+    for row in parse_table(3, text, sections) or ():
+        description = clean_value(row['description'])
+        
+        # Skip summary rows
+        if any(keyword in description.lower() for keyword in ['cgst', 'sgst', 'igst', 'total', 'sub total', 'charges @']):
+            continue
+        
+        line_item = LineItem(
+            Description=description,
+            TaxableValue=row['amount'],
+            HsnCode=row['hsn']
+        )
+        
+        line_items.append(line_item)
+
+    return line_items
+
+
+LINE_ITEM_PARSERS = [
+    ((9,), _line_items_format9),
+    ((8,), _line_items_format8),
+    ((10,), _line_items_format10),
+    ((7,), _line_items_format7),
+    ((6,), _line_items_format6),
+    ((5,), _line_items_format5),
+    ((1,), _line_items_format1),
+    ((2, 4), _line_items_format2_4),
+    ((3,), _line_items_format3),
+]
+LINE_ITEM_PARSERS_BY_NAME = {parse_line_items.__name__: parse_line_items for _, parse_line_items in LINE_ITEM_PARSERS}
+
+
+# ===== FIELD SELECTION =====
+# extract_invoice_data(text, fields=[...]) runs only the lookups the
+# requested fields need, plus those of the fields they fall back on.
+
+# Header fields summed from the line items (after the tax totals are applied to them)
+TOTAL_FIELDS = frozenset({
+    "IgstAmount", "CgstAmount", "SgstAmount", "TotalCess", "TotalTax", "TotalAmount", "TotalInvoiceAmount",
+})
+# Fields whose extraction reads the result of other fields
+FIELD_DEPENDENCIES = {
+    "ShipFromAddres": ("SupplierAddress",),
+    "PlaceOfSupply": ("CustomerGstin", "ShipToGstin"),
+    **{field: ("LineItems",) for field in TOTAL_FIELDS},
+}
+EXTRACTABLE_FIELDS = frozenset(HEADER_FIELDS) | {"LineItems"}
+
+
+def resolve_fields(fields):
+    """
+    Requested field names plus every field they depend on. Raises
+    ValueError for a name that is neither a HeaderItem key nor "LineItems".
+    """
+    unknown = sorted(set(fields) - EXTRACTABLE_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+    needed = set()
+    pending = list(fields)
+    while pending:
+        field = pending.pop()
+        if field not in needed:
+            needed.add(field)
+            pending.extend(FIELD_DEPENDENCIES.get(field, ()))
+    return needed
+
+
+def select_fields(data, fields):
+    """
+    Cut an extraction result down to fields (HeaderItem keys and/or
+    "LineItems"); other top-level entries such as "TimedOutFields" are kept
+    """
+    fields = set(fields)
+    selected = {key: value for key, value in data.items() if key not in ("HeaderItem", "LineItems")}
+    selected["HeaderItem"] = {key: value for key, value in data["HeaderItem"].items() if key in fields}
+    if "LineItems" in fields:
+        selected["LineItems"] = data["LineItems"]
+    return selected
+
+
+def extract_invoice_data(text, pattern_timeout=PATTERN_TIMEOUT, document_timeout=DOCUMENT_TIMEOUT,
+                         profile=False, fields=None, plans=None, order=None):
+    """
+    Extracts invoice data from text file into the required JSON structure.
+    Uses pattern matching logic - no hardcoded values.
+    Handles multiple invoice formats dynamically.
+
+    If a pattern or the whole document runs past its time budget the affected
+    fields are left empty and listed under "TimedOutFields". Pass 0/None to
+    disable a limit. With profile=True the timings of the extraction are
+    added under "Profile" (see ExtractionProfile).
+
+    fields (HeaderItem keys and/or "LineItems") limits the extraction to
+    those fields and the ones they depend on (see FIELD_DEPENDENCIES); the
+    result then holds only the fields asked for. Unknown names raise
+    ValueError.
+
+    plans (a plans.PlanStore) replays the plan learned for the document's
+    supplier GSTIN instead of running the full cascades, and learns or
+    confirms plans from full extractions. order (a
+    cascade_order.CascadeOrder) runs the cascades in its learned order, or
+    samples the document for it.
+    """
+    needed = resolve_fields(fields) if fields is not None else None
+    extraction_profile = ExtractionProfile() if profile else None
+    with TimeBudget(pattern_timeout, document_timeout) as budget:
+        data = invoice_as_dict(_extract_invoice_data(text, budget, extraction_profile, needed, plans, order))
+    if fields is not None:
+        data = select_fields(data, fields)
+    if budget.timed_out:
+        data["TimedOutFields"] = budget.timed_out
+    if extraction_profile is not None:
+        data["Profile"] = extraction_profile.as_dict()
+    return data
+
+
+def _extract_invoice_data(text, budget, profile=None, needed=None, plans=None, order=None):
+    """
+    extract_invoice_data() body; every pattern search goes through budget.
+    needed: the fields to extract (resolve_fields()), None for all of them.
+    plans: a plans.PlanStore, or None to always run the full cascades.
+    order: a cascade_order.CascadeOrder, or None for the original order.
+    """
+    data = {
+        "HeaderItem": HeaderItem(),
+        "LineItems": []
+    }
+    header = data["HeaderItem"]
+
+    if profile:
+        profile.section("FINGERPRINT")
+
+    # Headings, tables and rules; spanning lookups stay inside one block
+    sections = SectionIndex(text)
+
+    # Set by scan_anchors() below unless a plan is replayed
+    anchor_offsets = None
+
+    def wanted(*fields):
+        """Whether any of fields is needed"""
+        return needed is None or not needed.isdisjoint(fields)
+
+    # Helper function to read a group from a match
+    def match_value(match, group_num=1):
+        if not match:
+            return ""
+        # If group_num is 0 or pattern has no groups, return the whole match
+        try:
+            return match.group(group_num).strip()
+        except IndexError:
+            return match.group(0).strip() if group_num == 0 else ""
+
+    # The alternative each field's value came from
+    hits = {}
+
+    def find_first(field, alternatives=None):
+        """Try a field's alternatives (its cascade by default) in order and return the first match"""
+        for alternative in alternatives or cascades[field]:
+            if anchor_offsets and alternative.anchor and not anchor_offsets[alternative.anchor]:
+                continue  # its literal never occurs, so it cannot match
+            match = budget.run(field, search_alternative, alternative, text, anchor_offsets, sections)
+            if field in budget.timed_out:
+                return ""
+            value = match_value(match)
+            if value:
+                hits[field] = alternative
+                return value
+        return ""
+
+    def parse_items(parse_line_items):
+        """Run one line-item parser within the budget"""
+        return budget.run("LineItems", parse_line_items, text, sections) or []
+
+    if profile:
+        # Bound once: this runs for every alternative tried
+        record = profile.alternatives.append
+        perf_counter = time.perf_counter
+
+        def find_first(field, alternatives=None):
+            """find_first() that records every alternative it tries"""
+            for alternative in alternatives or cascades[field]:
+                index = ALTERNATIVE_INDEX[id(alternative)]
+                if anchor_offsets and alternative.anchor and not anchor_offsets[alternative.anchor]:
+                    record((field, index, "skipped", 0.0))
+                    continue
+                start = perf_counter()
+                match = budget.run(field, search_alternative, alternative, text, anchor_offsets, sections)
+                elapsed = perf_counter() - start
+                if field in budget.timed_out:
+                    record((field, index, "timeout", elapsed))
+                    return ""
+                value = match_value(match)
+                record((field, index, "hit" if value else "miss", elapsed))
+                if value:
+                    hits[field] = alternative
+                    return value
+            return ""
+
+        def parse_items(parse_line_items):
+            """parse_items() that records the parser's time and outcome"""
+            start = time.perf_counter()
+            line_items = budget.run("LineItems", parse_line_items, text, sections) or []
+            elapsed = time.perf_counter() - start
+            if line_items:
+                outcome = "hit"
+            elif "LineItems" in budget.timed_out:
+                outcome = "timeout"
+            else:
+                outcome = "miss"
+            profile.parser(parse_line_items.__name__, outcome, elapsed)
+            return line_items
+
+    # ===== SUPPLIER PLAN =====
+    # With a plan store the supplier GSTIN is looked up first, with the
+    # alternatives stored plans found it with; a trusted plan for it then
+    # stands in for format detection and the cascades (see plans.py)
+    plan = None
+    if plans is not None:
+        for index in plans.gstin_alternatives():
+            supplier_gstin = find_first("SupplierGstin", (FIELD_PATTERNS["SupplierGstin"][index],))
+            if supplier_gstin:
+                candidate = plans.get(supplier_gstin)
+                if candidate is not None and candidate["fields"].get("SupplierGstin") == index:
+                    plan = candidate
+                    break
+
+    if plan is None:
+        # Fingerprint the layout once; an ambiguous document runs every cascade
+        invoice_format = detect_format(text)
+        # Find every anchor literal once; field lookups only visit those offsets
+        anchor_offsets = scan_anchors(text)
+    else:
+        # A replay searches alternatives known to match, which needs no anchor scan
+        invoice_format = plan["format"]
+    cascades = FORMAT_CASCADES[invoice_format] if invoice_format else FIELD_PATTERNS
+    if profile:
+        profile.format = invoice_format
+
+    # ===== CASCADE ORDER =====
+    # Run the cascades in their learned order, or sample this document for
+    # it: every alternative is tried in the original order (see cascade_order.py)
+    sampled = order is not None and order.sample()
+    if order is not None and not sampled:
+        cascades = order.cascades(invoice_format)
+    if sampled:
+        # Values of every alternative that matched, per field
+        matched = {}
+        search_alternatives = find_first
+
+        def find_first(field, alternatives=None):
+            """find_first() that tries every alternative of the cascade and records the matches"""
+            if alternatives is not None:
+                return search_alternatives(field, alternatives)
+            values = {}
+            first = None
+            for alternative in cascades[field]:
+                value = search_alternatives(field, (alternative,))
+                if field in budget.timed_out:
+                    return ""
+                if value:
+                    values[ALTERNATIVE_INDEX[id(alternative)]] = value
+                    if first is None:
+                        first = alternative
+            matched[field] = values
+            if first is None:
+                return ""
+            hits[field] = first
+            return values[ALTERNATIVE_INDEX[id(first)]]
+
+    if plans is not None:
+        # Position of the alternative each field hit with, None when it stayed empty
+        learned = {}
+        recorded = plan["fields"] if plan is not None else {}
+        search_cascade = find_first
+
+        def find_first(field):
+            """find_first() that tries the plan's alternative first and records the one that hit"""
+            nonlocal anchor_offsets, invoice_format, cascades
+            if field in recorded:
+                index = recorded[field]
+                if index is None:
+                    learned[field] = None
+                    return ""
+                value = search_cascade(field, (FIELD_PATTERNS[field][index],))
+                if value:
+                    learned[field] = index
+                    return value
+            # Not in the plan, or its alternative missed: run the whole cascade
+            if anchor_offsets is None:
+                anchor_offsets = scan_anchors(text)
+                if plan is not None:
+                    # The supplier may have changed layout: fingerprint the
+                    # document and run the cascades a full extraction would
+                    invoice_format = detect_format(text)
+                    cascades = FORMAT_CASCADES[invoice_format] if invoice_format else FIELD_PATTERNS
+                    if order is not None and not sampled:
+                        cascades = order.cascades(invoice_format)
+                    if profile:
+                        profile.format = invoice_format
+            value = search_cascade(field)
+            learned[field] = ALTERNATIVE_INDEX[id(hits[field])] if value else None
+            return value
+
+    # ===== SUPPLIER INFORMATION =====
+    if profile:
+        profile.section("SUPPLIER")
+
+    # Extract Supplier Name - multiple patterns for different formats
+    if wanted("ShipFromName"):
+        supplier_name = find_first("ShipFromName")
+        header.ShipFromName = clean_value(supplier_name)
+
+    if wanted("SupplierAddress"):
+        supplier_addr = find_first("SupplierAddress")
+        header.SupplierAddress = clean_value(supplier_addr)
+    
+    # Ship From Address - falls back to the supplier address
+    if wanted("ShipFromAddres"):
+        ship_from_addr = find_first("ShipFromAddres")
+        if not ship_from_addr:
+            ship_from_addr = header.SupplierAddress
+        header.ShipFromAddres = clean_value(ship_from_addr)
+
+    if wanted("SupplierGstin"):
+        header.SupplierGstin = find_first("SupplierGstin")
+    if wanted("SupplierPanNumber"):
+        header.SupplierPanNumber = find_first("SupplierPanNumber")
+    if wanted("SupplierCIN"):
+        header.SupplierCIN = find_first("SupplierCIN")
+
+    # ===== CUSTOMER INFORMATION =====
+    if profile:
+        profile.section("CUSTOMER")
+    
+    if wanted("CustomerName"):
+        customer_name = find_first("CustomerName")
+        header.CustomerName = clean_value(customer_name)
+
+    if wanted("CustomerAddress"):
+        customer_addr = find_first("CustomerAddress")
+        header.CustomerAddress = clean_value(customer_addr)
+
+    if wanted("CustomerGstin"):
+        customer_gstin = find_first("CustomerGstin")
+        if not customer_gstin:
+            # Format 10: Second "| GSTIN/UJN | : value |" in customer section
+            gstin_matches = GSTIN_UJN_PATTERN.findall(text)
+            if len(gstin_matches) >= 2:
+                customer_gstin = gstin_matches[1]  # Second occurrence is customer
+        header.CustomerGstin = customer_gstin
+
+    if wanted("CustomerPanNumber"):
+        header.CustomerPanNumber = find_first("CustomerPanNumber")
+
+    # ===== SHIP TO INFORMATION =====
+    if profile:
+        profile.section("SHIP TO")
+    
+    if wanted("ShipToName"):
+        ship_to_name = find_first("ShipToName")
+        header.ShipToName = clean_value(ship_to_name)
+
+    if wanted("ShipToAddress"):
+        ship_to_addr = find_first("ShipToAddress")
+        header.ShipToAddress = clean_value(ship_to_addr)
+
+    if wanted("ShipToGstin"):
+        ship_to_gstin = find_first("ShipToGstin")
+        if not ship_to_gstin:
+            # Format 10: Third "| GSTIN/UJN | : value |" in ship-to section
+            gstin_matches = GSTIN_UJN_PATTERN.findall(text)
+            if len(gstin_matches) >= 3:
+                ship_to_gstin = gstin_matches[2]  # Third occurrence is ship-to
+        header.ShipToGstin = ship_to_gstin
+
+    # ===== INVOICE DETAILS =====
+    if profile:
+        profile.section("INVOICE DETAILS")
+    
+    if wanted("InvoiceNumber"):
+        header.InvoiceNumber = find_first("InvoiceNumber")
+    if wanted("InvoiceDate"):
+        header.InvoiceDate = find_first("InvoiceDate")
+
+    # Document Type
+    if wanted("DocType"):
+        doc_type = find_first("DocType")
+        header.DocType = doc_type.upper() if doc_type else ""
+
+    if wanted("IrnNo"):
+        header.IrnNo = find_first("IrnNo")
+    if wanted("IrnDate"):
+        header.IrnDate = find_first("IrnDate")
+    if wanted("EwayBillNo"):
+        header.EwayBillNo = find_first("EwayBillNo")
+    if wanted("EwayBillDate"):
+        header.EwayBillDate = clean_value(find_first("EwayBillDate"))
+    if wanted("PoNumber"):
+        header.PoNumber = find_first("PoNumber")
+    if wanted("PoDate"):
+        header.PoDate = find_first("PoDate")
+
+    # GRN details
+    if wanted("GrnNo"):
+        header.GrnNo = find_first("GrnNo")
+    if wanted("GrnDate"):
+        header.GrnDate = find_first("GrnDate")
+
+    # Place of Supply - falls back to the state code of the customer / ship-to GSTIN
+    if wanted("PlaceOfSupply"):
+        place_of_supply = find_first("PlaceOfSupply")
+        if place_of_supply:
+            header.PlaceOfSupply = clean_value(place_of_supply)
+        elif header.CustomerGstin and len(header.CustomerGstin) >= 2:
+            header.PlaceOfSupply = header.CustomerGstin[:2]
+        elif header.ShipToGstin and len(header.ShipToGstin) >= 2:
+            header.PlaceOfSupply = header.ShipToGstin[:2]
+
+    # RCM Applicable - Format 5: "Tax is Payable on Reverse Charges"
+    # Check if pattern exists (no capture group)
+    if wanted("RCMApplicable"):
+        rcm_match = RCM_PAYABLE_PATTERN.search(text)
+        if rcm_match:
+            header.RCMApplicable = "YES"
+        else:
+            rcm = find_first("RCMApplicable")
+            header.RCMApplicable = rcm.upper() if rcm else ""
+
+    # Everything below works on the line items; the header totals are summed from them
+    if not wanted("LineItems"):
+        return data
+
+    # ===== LINE ITEMS EXTRACTION =====
+    if profile:
+        profile.section("LINE ITEMS")
+
+    # A plan's parser runs first. Otherwise run only the fingerprinted
+    # layout's parser; if it finds nothing the document is treated as
+    # ambiguous and the remaining parsers are tried in their usual order
+    if plan is not None and plan["parser"] is not None:
+        parse_line_items = LINE_ITEM_PARSERS_BY_NAME[plan["parser"]]
+        data["LineItems"] = parse_items(parse_line_items)
+    if not data["LineItems"]:
+        for formats, parse_line_items in LINE_ITEM_PARSERS:
+            if invoice_format is None or invoice_format in formats:
+                data["LineItems"] = parse_items(parse_line_items)
+                if data["LineItems"]:
+                    break
+    if not data["LineItems"] and invoice_format is not None:
+        for formats, parse_line_items in LINE_ITEM_PARSERS:
+            if invoice_format not in formats:
+                data["LineItems"] = parse_items(parse_line_items)
+                if data["LineItems"]:
+                    break
+
+    # Extract HSN Code from separate section if not in line items
+    if data["LineItems"] and not data["LineItems"][0].HsnCode:
+        hsn_code = find_first("HsnCode")
+        if hsn_code:
+            for item in data["LineItems"]:
+                if not item.HsnCode:
+                    item.HsnCode = hsn_code
+
+    # Format 9: "SAC Code:" at bottom
+    if data["LineItems"] and not data["LineItems"][0].HsnCode:
+        sac_code = find_first("SacCode")
+        if sac_code:
+            for item in data["LineItems"]:
+                if not item.HsnCode:
+                    item.HsnCode = sac_code
+
+    # ===== TAX TOTALS EXTRACTION =====
+    if profile:
+        profile.section("TAX TOTALS")
+    
+    # Extract tax amounts from tax summary section
+    cgst_amount = find_first("CgstAmount")
+    if not cgst_amount:
+    # Format 8: "COST Payable in words Rs. ..." pattern
+        cgst_text = find_first("CgstAmountWords")
+        if cgst_text:
+            # Try to extract numeric value from text
+            cgst_numeric = NUMBER_IN_TEXT_PATTERN.search(cgst_text)
+            if cgst_numeric:
+                cgst_amount = cgst_numeric.group(1)
+    if not cgst_amount:
+        # Format 9: Extract from "**Taxable Value**" summary row
+        format9_tax = TAX_SUMMARY_ROW_PATTERN.search(text)
+        if format9_tax:
+            cgst_amount = format9_tax.group(2).strip()
+    
+    sgst_amount = find_first("SgstAmount")
+    if not sgst_amount:
+    # Format 8: "SOST Payable in words Rs. ..." pattern (SOST = SGST typo)
+        sgst_text = find_first("SgstAmountWords")
+        if sgst_text:
+            # Try to extract numeric value from text
+            sgst_numeric = NUMBER_IN_TEXT_PATTERN.search(sgst_text)
+            if sgst_numeric:
+                sgst_amount = sgst_numeric.group(1)
+    if not sgst_amount:
+        sgst_amount = find_first("SgstTotal")
+    
+    igst_amount = find_first("IgstAmount")
+
+    if not cgst_amount:
+        cgst_amount = find_first("CgstTotal")
+    
+    # Extract tax rates
+    cgst_rate = find_first("CgstRate")
+    sgst_rate = find_first("SgstRate")
+    igst_rate = find_first("IgstRate")
+    
+    # Format 7: "GST 18% | 103507.82" pattern - split into CGST and SGST
+    if not cgst_amount and not sgst_amount and not igst_amount:
+        gst_match = GST_SPLIT_PATTERN.search(text)
+        if gst_match:
+            tax_amount = parse_amount(gst_match.group(2))
+            if tax_amount is not None:
+                cgst_half, sgst_half = split_gst(tax_amount)
+                cgst_amount = format_amount(cgst_half)
+                sgst_amount = format_amount(sgst_half)
+                gst_rate = parse_amount(gst_match.group(1))
+                if gst_rate is not None:
+                    cgst_rate = cgst_rate or format_rate(gst_rate / 2)
+                    sgst_rate = sgst_rate or format_rate(gst_rate / 2)
+    
+    # Extract Sub Total (Taxable Value)
+    sub_total = find_first("SubTotal")
+    
+    # Apply tax amounts and rates to line items if extracted from summary
+    if data["LineItems"]:
+        # For Format 3, distribute taxable value if we have sub total
+        if sub_total and not data["LineItems"][0].TaxableValue:
+            sub_total_val = sub_total.replace(',', '')
+            # If single line item, assign full taxable value
+            if len(data["LineItems"]) == 1:
+                data["LineItems"][0].TaxableValue = sub_total_val
+        
+        if igst_amount and igst_amount != "0.00" and igst_amount != "0":
+            data["LineItems"][0].IgstAmount = igst_amount.replace(',', '')
+            if igst_rate:
+                data["LineItems"][0].IgstRate = igst_rate
+        
+        if cgst_amount and cgst_amount != "0.00" and cgst_amount != "0":
+            data["LineItems"][0].CgstAmount = cgst_amount.replace(',', '')
+            if cgst_rate:
+                data["LineItems"][0].CgstRate = cgst_rate
+        
+        if sgst_amount and sgst_amount != "0.00" and sgst_amount != "0":
+            data["LineItems"][0].SgstAmount = sgst_amount.replace(',', '')
+            if sgst_rate:
+                data["LineItems"][0].SgstRate = sgst_rate
+
+    # Extract Taxable Value and Total Value
+    taxable_value = find_first("TaxableValue")
+    if not taxable_value and sub_total:
+        taxable_value = sub_total
+    
+    total_value = find_first("TotalValue")
+    # Parse total value from words if needed
+    if total_value and not LEADING_DIGIT_PATTERN.match(total_value):
+        # Extract numeric value if available in text
+        total_numeric = find_first("TotalValueNumeric")
+        if total_numeric:
+            total_value = total_numeric
+    if not total_value:
+    # Format 8: "Total Invoice Value in words Rs. ..." pattern
+        total_text = find_first("TotalValueWords")
+        if total_text:
+            # Extract numeric value from text
+            total_numeric = NUMBER_IN_TEXT_PATTERN.search(total_text)
+            if total_numeric:
+                total_value = total_numeric.group(1)
+    if not total_value:
+        total_value = find_first("TotalValueSummary")
+    
+    if taxable_value:
+        taxable_value = taxable_value.replace(',', '')
+        if data["LineItems"] and not data["LineItems"][0].TaxableValue:
+            data["LineItems"][0].TaxableValue = taxable_value
+    
+    if total_value and data["LineItems"]:
+        if not data["LineItems"][0].TotalItemAmount:
+            data["LineItems"][0].TotalItemAmount = total_value
+
+    if not wanted(*TOTAL_FIELDS):
+        return data
+
+    # ===== CALCULATE HEADER TOTALS =====
+    if profile:
+        profile.section("HEADER TOTALS")
+    
+    
+    if data["LineItems"]:
+        # Exact sums (see money.py)
+        line_items = data["LineItems"]
+        total_taxable = column_total(line_items, "TaxableValue")
+        total_igst = column_total(line_items, "IgstAmount")
+        total_cgst = column_total(line_items, "CgstAmount")
+        total_sgst = column_total(line_items, "SgstAmount")
+        total_cess = column_total(line_items, "CessAmount")
+        total_tax = total_igst + total_cgst + total_sgst + total_cess
+        total_amount = total_taxable + total_tax
+        
+        header.IgstAmount = format_amount(total_igst) if total_igst > 0 else ""
+        header.CgstAmount = format_amount(total_cgst) if total_cgst > 0 else ""
+        header.SgstAmount = format_amount(total_sgst) if total_sgst > 0 else ""
+        header.TotalCess = format_amount(total_cess) if total_cess > 0 else ""
+        header.TotalTax = format_amount(total_tax) if total_tax > 0 else ""
+        header.TotalAmount = format_amount(total_amount) if total_amount > 0 else ""
+        header.TotalInvoiceAmount = format_amount(total_amount) if total_amount > 0 else ""
+
+
+    # Fallback: Extract totals from text if not calculated
+    if not header.TotalAmount or header.TotalAmount == "0":
+        total_match = find_first("TotalAmountFallback")
+        if total_match:
+            header.TotalAmount = total_match.replace(',', '')
+            header.TotalInvoiceAmount = total_match.replace(',', '')
+    
+    if not header.IgstAmount:
+        header.IgstAmount = igst_amount.replace(',', '') if igst_amount and igst_amount not in ["0.00", "0"] else ""
+    if not header.CgstAmount:
+        header.CgstAmount = cgst_amount.replace(',', '') if cgst_amount and cgst_amount not in ["0.00", "0"] else ""
+    if not header.SgstAmount:
+        header.SgstAmount = sgst_amount.replace(',', '') if sgst_amount and sgst_amount not in ["0.00", "0"] else ""
+    
+    # Extract total tax amount separately if present
+    if not header.TotalTax:
+        tax_amount = find_first("TotalTaxFallback")
+        if tax_amount:
+            header.TotalTax = tax_amount.replace(',', '')
+
+    if sampled and not budget.timed_out:
+        order.observe(invoice_format, matched)
+
+    # Learn only from complete extractions; the loops above stop at the parser that found the items
+    if plans is not None and needed is None and header.SupplierGstin and not budget.timed_out:
+        plans.learn(header.SupplierGstin, {
+            "format": invoice_format,
+            "fields": learned,
+            "parser": parse_line_items.__name__ if data["LineItems"] else None,
+        }, replayed=plan is not None)
+
+    return data
+
+
+# ===== WARM-UP =====
+# Every pattern is compiled when this module is imported. warm_up() also
+# runs a self-test extraction, so a new server process has run the whole
+# extraction path once and proven it works before it reports ready.
+
+SELF_TEST_INVOICE = """# ACME TRADERS
+Plot 12, Industrial Area, Pune
+GSTIN: 27AABCA1234F1Z5
+PAN No: AABCA1234F
+---
+# TAX INVOICE
+Invoice No: INV/2023/001
+Invoice Date: 12-04-2023
+Bill To: Globex Retail, Mumbai
+
+| S.No | Description | HSN/SAC | Batch | Expiry | Quantity | Rate | Disc | Other | Taxable | IGST | CGST | SGST | Total |
+|---|---|---|---|---|---|---|---|---|---|---|---|---|---|
+| 1 | Widget | 84713011 | B1 | | 2 NOS | 100.00 | 0 | | 200.00 | 0.00 | 18.00 | 18.00 | 236.00 |
+"""
+SELF_TEST_EXPECTED = {
+    "SupplierGstin": "27AABCA1234F1Z5",
+    "InvoiceNumber": "INV/2023/001",
+    "TotalTax": "36.00",
+    "TotalInvoiceAmount": "236.00",
+}
+
+
+def warm_up():
+    """
+    Run the self-test extraction; returns its seconds. Raises RuntimeError
+    when the result is not the expected one.
+    """
+    start = time.perf_counter()
+    # Without time budgets: a slow first run must not fail the self-test
+    data = extract_invoice_data(SELF_TEST_INVOICE, pattern_timeout=None, document_timeout=None)
+    header = data["HeaderItem"]
+    wrong = {field: header[field] for field, value in SELF_TEST_EXPECTED.items() if header[field] != value}
+    if wrong or len(data["LineItems"]) != 1:
+        raise RuntimeError(f'Self-test extraction failed: {wrong or data["LineItems"]}')
+    return time.perf_counter() - start
+
+
+# ===== COMMAND LINE =====
+
+def collect_inputs(source, pattern="*.txt", recursive=False):
+    """
+    Resolve a directory or glob to (base directory, sorted input files).
+    Outputs are laid out relative to the base directory.
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        files = source_path.rglob(pattern) if recursive else source_path.glob(pattern)
+        base = source_path
+    else:
+        files = (Path(name) for name in glob.glob(source, recursive=recursive))
+        base = None
+    files = sorted(path for path in files if path.is_file())
+    if base is None:
+        if files:
+            base = Path(os.path.commonpath([str(path.parent) for path in files]))
+        else:
+            base = Path('.')
+    return base, files
+
+
+def output_path_for(input_path, base, output_dir):
+    """JSON output file for input_path inside output_dir, mirroring its place under base"""
+    return Path(output_dir) / input_path.relative_to(base).with_suffix('.json')
+
+
+def is_up_to_date(input_path, output_path):
+    """True when output_path exists and is at least as new as input_path"""
+    try:
+        return output_path.stat().st_mtime >= input_path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def process_many(files, base, output_dir=None, workers=None, force=False, stream=None, pretty=False, split=False):
+    """
+    Extract every file on parallel workers (with split, every invoice of
+    every file: the data of a file is a list, see splitter.py). With output_dir each result is
+    written to its own JSON file (up-to-date outputs are skipped unless
+    force; indented when pretty); otherwise results are streamed to stream
+    (binary, stdout by default) as NDJSON lines of {"file": ..., "data": ...}
+    or {"file": ..., "error": ...}. Returns a summary dict.
+    """
+    from executor import create_executor, cpu_count
+
+    serializer = create_serializer()
+    if stream is None:
+        stream = sys.stdout.buffer
+    workers = workers or cpu_count()
+    executor = create_executor('inline' if workers == 1 else 'process', workers=workers)
+    summary = {"files": len(files), "processed": 0, "skipped": 0, "failed": [], "bytes": 0}
+    start = time.monotonic()
+
+    def finish(path, future):
+        try:
+            extracted_data = future.result()
+        except Exception as e:
+            summary["failed"].append((str(path), str(e)))
+            if output_dir is None:
+                stream.write(serializer.ndjson_line({"file": str(path), "error": str(e)}))
+            return
+        if output_dir is None:
+            stream.write(serializer.ndjson_line({"file": str(path), "data": extracted_data}))
+        else:
+            output_path = output_path_for(path, base, output_dir)
+            try:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                output_path.write_bytes(serializer.dumps(extracted_data, pretty=pretty))
+            except OSError as e:
+                summary["failed"].append((str(path), f"Error writing file: {e}"))
+                return
+        summary["processed"] += 1
+
+    pending = {}
+    try:
+        for path in files:
+            if output_dir is not None and not force and is_up_to_date(path, output_path_for(path, base, output_dir)):
+                summary["skipped"] += 1
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text_content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                summary["failed"].append((str(path), f"Error reading file: {e}"))
+                continue
+            summary["bytes"] += len(text_content)
+            # Keep at most max_pending documents in memory at once
+            while len(pending) >= executor.max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(pending.pop(future), future)
+            pending[executor.submit(text_content, block=True, split=split)] = path
+        for future in as_completed(pending):
+            finish(pending[future], future)
+    finally:
+        executor.shutdown()
+
+    summary["seconds"] = time.monotonic() - start
+    return summary
+
+
+def print_summary(summary, out=sys.stderr):
+    """Human-readable end-of-run report"""
+    seconds = max(summary["seconds"], 1e-9)
+    print(
+        f"{summary['processed']} processed, {summary['skipped']} up to date, "
+        f"{len(summary['failed'])} failed out of {summary['files']} files in {seconds:.2f}s "
+        f"({summary['processed'] / seconds:.1f} files/s, {summary['bytes'] / seconds / 1e6:.2f} MB/s)",
+        file=out
+    )
+    for path, error in summary["failed"][:20]:
+        print(f"  FAILED {path}: {error}", file=out)
+    if len(summary["failed"]) > 20:
+        print(f"  ... and {len(summary['failed']) - 20} more", file=out)
+
+
+def main():
+    """Main function to handle file input and output"""
+    # "diff" compares two implementations (see differential.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "diff":
+        from differential import main as diff_main
+        sys.exit(diff_main(sys.argv[2:]))
+    # "order" writes a cascade order profile (see cascade_order.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "order":
+        from cascade_order import main as order_main
+        sys.exit(order_main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        prog="python c.py",
+        description="Extract invoice data from text files.",
+        epilog=(
+            "Examples:\n"
+            "  python c.py txt_files/5108975.txt output.json\n"
+            "  python c.py txt_files/ --output-dir json_files/\n"
+            "  python c.py 'txt_files/2023-*.txt' > results.ndjson\n"
+            "  python c.py batch.txt --split   (a file of several invoices: a list of them with their offsets)\n"
+            "  python c.py --worker --framing ndjson   (long-lived: requests on stdin, responses on stdout, see worker.py)\n"
+            "  python c.py diff candidate_formats.py txt_files/   (field-level diff against this formats.py)\n"
+            "  python c.py order txt_files/ --output cascade_order.json   (cascade order profile)"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", nargs="?", help="text file, directory or glob pattern")
+    parser.add_argument("output", nargs="?", help="output JSON file (single file only)")
+    parser.add_argument("--output-dir", help="write one JSON per input here instead of NDJSON on stdout")
+    parser.add_argument("--workers", type=int, help="worker processes for directories (default: CPU count)")
+    parser.add_argument("--pattern", default="*.txt", help="files to pick up inside a directory (default: *.txt)")
+    parser.add_argument("--recursive", action="store_true", help="descend into subdirectories / allow ** in globs")
+    parser.add_argument("--force", action="store_true", help="reprocess files whose output is already up to date")
+    parser.add_argument("--pretty", action="store_true", help="indent JSON output (compact by default)")
+    parser.add_argument("--split", action="store_true",
+                        help="inputs may hold several invoices: output a list of {start, end, data} per input")
+    parser.add_argument("--worker", action="store_true",
+                        help="serve extraction requests from stdin until it closes (--workers: processes, default 1)")
+    parser.add_argument("--framing", choices=("ndjson", "length"), default="ndjson",
+                        help="--worker message framing: JSON lines or 4-byte big-endian length prefixes")
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.input or args.output:
+            parser.error("--worker takes its documents from stdin")
+        from worker import serve
+        sys.exit(serve(sys.stdin.buffer, sys.stdout.buffer, args.framing, args.workers or 1))
+    if args.input is None:
+        parser.error("the following arguments are required: input")
+
+    input_file = args.input
+    output_file = args.output
+
+    # Directory / glob mode
+    if Path(input_file).is_dir() or glob.has_magic(input_file):
+        if output_file:
+            parser.error("use --output-dir with a directory or glob input")
+        base, files = collect_inputs(input_file, args.pattern, args.recursive)
+        if not files:
+            print(f"Error: No files match '{input_file}'.")
+            sys.exit(1)
+        summary = process_many(files, base, args.output_dir, args.workers, args.force, pretty=args.pretty, split=args.split)
+        print_summary(summary)
+        sys.exit(1 if summary["failed"] else 0)
+    
+    # Check if input file exists
+    if not Path(input_file).exists():
+        print(f"Error: File '{input_file}' not found.")
+        sys.exit(1)
+    
+    # Read the text file
+    try:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            text_content = f.read()
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        sys.exit(1)
+    
+    # Extract data through the configured executor (in-process unless
+    # EXTRACT_EXECUTOR says otherwise); imported here because executor
+    # itself imports this module
+    from executor import create_executor
+    executor = create_executor(os.environ.get('EXTRACT_EXECUTOR', 'inline'))
+    try:
+        if args.split:
+            # Every invoice is a document of its own for the executor
+            from splitter import extract_invoices
+
+            def extract_all(texts, fields):
+                futures = [executor.submit(text, block=True, fields=fields) for text in texts]
+                return [future.result() for future in futures]
+
+            extracted_data = extract_invoices(text_content, extract_all)
+        else:
+            extracted_data = executor.extract(text_content)
+    finally:
+        executor.shutdown()
+    
+    # Output JSON
+    json_output = create_serializer().dumps(extracted_data, pretty=args.pretty)
+    
+    if output_file:
+        # Save to file
+        try:
+            with open(output_file, 'wb') as f:
+                f.write(json_output)
+            print(f"Data extracted and saved to '{output_file}'")
+        except Exception as e:
+            print(f"Error writing file: {e}")
+            sys.exit(1)
+    else:
+        # Print to console
+        sys.stdout.buffer.write(json_output + b"\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+gunicorn settings for serving app.py in production:
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"      (or: python app.py)
+
+Every setting can be overridden from the environment:
+
+    GUNICORN_BIND           address to listen on (default 0.0.0.0:$PORT, PORT defaults to 5000)
+    WEB_CONCURRENCY         worker processes (default: one per CPU)
+    GUNICORN_THREADS        request threads per worker (default 1)
+    GUNICORN_PRELOAD        import the app in the master before forking (default 1)
+    GUNICORN_KEEPALIVE      seconds an idle keep-alive connection stays open (default 5)
+    GUNICORN_TIMEOUT        seconds a silent worker may take before it is killed and replaced (default 60)
+    GUNICORN_GRACEFUL_TIMEOUT
+                            seconds workers get to finish their requests on shutdown / reload (default 30)
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests, 0 = never (default 0)
+    GUNICORN_ACCESS_LOG     access log file, "-" for stdout (default: none)
+
+Extraction runs inline in the worker (EXTRACT_EXECUTOR=inline unless set),
+so the workers are the extraction processes and one per core keeps every
+core busy without a second pool behind them. With one thread per worker
+(sync workers) a request runs in the worker's main thread, where the
+SIGALRM pattern time budget can interrupt a runaway search; connections
+are closed after every response, so put a keep-alive proxy in front. With
+GUNICORN_THREADS > 1 the gthread worker keeps client connections alive,
+but extraction then runs off the main thread and the time budget is only
+checked between searches (see formats.TimeBudget).
+
+With preload the master imports app.py, and with it formats.py and every
+compiled pattern, once; forked workers share those pages copy-on-write.
+Each worker builds its own executor, cache connection and metrics after
+the fork (post_fork) and shuts its executor down when it exits. A worker
+then warms up in the background (self-test extraction, executor workers
+started); point the load balancer's readiness probe at GET /ready, which
+answers 503 until that is done, and its liveness probe at GET /health.
+
+Job state (POST /jobs) must be shared by the workers, or GET /jobs/<id>
+only finds a job on the worker that queued it. With more than one worker
+and no JOBS_PATH, the workers share a SQLite job store in the temporary
+directory, created for this server and removed when it exits; set
+JOBS_PATH to keep jobs across restarts.
+"""
+import glob
+import os
+import tempfile
+
+from executor import cpu_count
+
+os.environ.setdefault('EXTRACT_EXECUTOR', 'inline')
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 0)) or cpu_count()
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() not in ('', '0', 'false', 'no', 'off')
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+# Set before the app is loaded, so every worker's create_job_queue() sees it
+shared_jobs_path = os.path.join(tempfile.gettempdir(), f'invoice-jobs-{os.getpid()}.db')
+if workers > 1 and not os.environ.get('JOBS_PATH'):
+    os.environ['JOBS_PATH'] = shared_jobs_path
+
+
+def post_fork(server, worker):
+    """Build the worker's own executor, cache and metrics"""
+    import app
+    app.init_services()
+
+
+def worker_exit(server, worker):
+    """Finish the documents in flight before the worker goes away"""
+    import app
+    app.shutdown_services()
+
+
+def on_exit(server):
+    """Remove the job store created for this server"""
+    if os.environ.get('JOBS_PATH') == shared_jobs_path:
+        for path in glob.glob(glob.escape(shared_jobs_path) + '*'):
+            os.remove(path)
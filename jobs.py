@@ -0,0 +1,298 @@
+"""
+Asynchronous extraction jobs.
+
+POST /jobs answers with a job id straight away; a pool of job threads
+takes queued documents in submission order and runs them, and
+GET /jobs/<id> reports the job's status and, once it is done, its
+result. Clients may long-poll: get(job_id, wait) blocks until the job
+finishes or wait seconds pass.
+
+Job state lives in a JobStore: in memory (one process) or in a SQLite
+file (JOBS_PATH), which lets every worker process of a server answer for
+jobs queued by the others. The documents themselves only wait in the
+queue of the process that accepted them, so jobs still queued when a
+process stops are marked failed on a graceful shutdown and lost on a
+crash. Finished jobs are kept for JOBS_TTL seconds.
+
+Statuses: "queued" -> "running" -> "done" or "failed".
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from metrics import Histogram, counter, gauge, histogram
+
+FINISHED = ('done', 'failed')
+
+# Longest long-poll a client may ask for (seconds)
+MAX_WAIT = 30.0
+# How often a long-poll looks at the store for jobs finished by another process
+POLL_INTERVAL = 0.25
+
+
+class JobQueueFull(Exception):
+    """max_queued documents are already waiting; the caller should back off and retry"""
+
+
+def new_job(job_id, filename, now):
+    return {
+        'id': job_id,
+        'status': 'queued',
+        'filename': filename,
+        'submitted_at': now,
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'error': None,
+    }
+
+
+class MemoryJobStore:
+    """Thread-safe job table of one process"""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job_id, filename, now):
+        with self._lock:
+            self._jobs[job_id] = new_job(job_id, filename, now)
+            # Oldest submissions first; stop at the first one still wanted
+            while self._jobs:
+                job = next(iter(self._jobs.values()))
+                if job['finished_at'] is None or now - job['finished_at'] <= self.ttl:
+                    break
+                self._jobs.popitem(last=False)
+
+    def update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(changes)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def fail_queued(self, job_ids, now, error):
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job['status'] == 'queued':
+                    job.update(status='failed', finished_at=now, error=error)
+
+
+class SQLiteJobStore:
+    """Job table in a SQLite file that several processes can share"""
+
+    COLUMNS = ('id', 'status', 'filename', 'submitted_at', 'started_at', 'finished_at', 'result', 'error')
+
+    def __init__(self, path, ttl=3600):
+        self.path = str(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT,'
+                ' submitted_at REAL NOT NULL, started_at REAL, finished_at REAL,'
+                ' result TEXT, error TEXT)'
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)')
+
+    def add(self, job_id, filename, now):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO jobs (id, status, filename, submitted_at) VALUES (?, ?, ?, ?)',
+                (job_id, 'queued', filename, now)
+            )
+            self._connection.execute('DELETE FROM jobs WHERE finished_at < ?', (now - self.ttl,))
+
+    def update(self, job_id, **changes):
+        if 'result' in changes and changes['result'] is not None:
+            changes['result'] = json.dumps(changes['result'], ensure_ascii=False)
+        assignments = ', '.join(f'{column} = ?' for column in changes)
+        with self._lock, self._connection:
+            self._connection.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*changes.values(), job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT {", ".join(self.COLUMNS)} FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        if job['result'] is not None:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def fail_queued(self, job_ids, now, error):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ? AND status = 'queued'",
+                [(now, error, job_id) for job_id in job_ids]
+            )
+
+
+class JobQueue:
+    """
+    Bounded queue of documents in front of workers job threads; each
+    thread hands one document at a time to run(payload), whose return
+    value becomes the job's result and whose exception fails the job.
+    Threads start with the first submission.
+    """
+
+    def __init__(self, store, run, workers=1, max_queued=1000):
+        self.store = store
+        self.run = run
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._threads = []
+        self._queued = set()
+        self.running = 0
+        self.outcomes = {'done': 0, 'failed': 0}
+        self.wait_seconds = Histogram()
+        self.run_seconds = Histogram()
+
+    def submit(self, payload, filename=None):
+        """Queue a document and return its job id; raises JobQueueFull"""
+        with self._lock:
+            if len(self._queued) >= self.max_queued:
+                raise JobQueueFull(f'{self.max_queued} jobs already queued')
+            if not self._threads:
+                self._start()
+            job_id = uuid.uuid4().hex
+            submitted = time.time()
+            self.store.add(job_id, filename, submitted)
+            self._queued.add(job_id)
+        self._queue.put((job_id, submitted, payload))
+        return job_id
+
+    def _start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job_id, submitted, payload = item
+            with self._lock:
+                if job_id not in self._queued:
+                    continue  # failed by shutdown() meanwhile
+                self._queued.discard(job_id)
+                self.running += 1
+            started = time.time()
+            self.store.update(job_id, status='running', started_at=started)
+            try:
+                result = self.run(payload)
+            except Exception as e:
+                changes = {'status': 'failed', 'error': str(e) or type(e).__name__}
+            else:
+                changes = {'status': 'done', 'result': result}
+            finished = time.time()
+            self.store.update(job_id, finished_at=finished, **changes)
+            with self._finished:
+                self.running -= 1
+                self.outcomes[changes['status']] += 1
+                self.wait_seconds.observe(started - submitted)
+                self.run_seconds.observe(finished - started)
+                self._finished.notify_all()
+
+    def get(self, job_id, wait=0):
+        """
+        The job (a dict, see new_job), or None for an unknown id. With wait
+        (seconds, at most MAX_WAIT) an unfinished job is waited for; jobs of
+        other processes are noticed every POLL_INTERVAL.
+        """
+        deadline = time.monotonic() + min(wait, MAX_WAIT)
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED or remaining <= 0:
+                return job
+            with self._finished:
+                self._finished.wait(min(remaining, POLL_INTERVAL))
+
+    def depth(self):
+        """Documents waiting for a job thread"""
+        with self._lock:
+            return len(self._queued)
+
+    def stats(self):
+        """Queue depth, running and finished counts, and wait and run times of this process"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': len(self._queued),
+                'running': self.running,
+                'done': self.outcomes['done'],
+                'failed': self.outcomes['failed'],
+                'wait_seconds': summary(self.wait_seconds),
+                'run_seconds': summary(self.run_seconds),
+            }
+
+    def render(self, lines):
+        """Append the queue's Prometheus families to lines"""
+        with self._lock:
+            gauge(lines, 'invoice_job_queue_depth', 'Jobs waiting for a job thread', (), {(): len(self._queued)})
+            gauge(lines, 'invoice_jobs_running', 'Jobs being extracted', (), {(): self.running})
+            counter(lines, 'invoice_jobs_total', 'Finished jobs, by outcome',
+                    ('outcome',), {(outcome,): count for outcome, count in self.outcomes.items()})
+            histogram(lines, 'invoice_job_wait_seconds', 'Time a job spent queued', (), {(): self.wait_seconds})
+            histogram(lines, 'invoice_job_run_seconds', 'Time a job spent running', (), {(): self.run_seconds})
+
+    def shutdown(self):
+        """Fail the jobs still queued and let the job threads finish their current one"""
+        with self._lock:
+            queued, self._queued = self._queued, set()
+        if queued:
+            self.store.fail_queued(queued, time.time(), 'Server shut down before the job started')
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+def summary(observed):
+    """count, total and mean of a Histogram"""
+    return {
+        'count': observed.count,
+        'total': observed.total,
+        'mean': observed.total / observed.count if observed.count else None,
+    }
+
+
+def create_job_queue(run):
+    """
+    Build the job queue of this process around run(payload).
+    JOBS_WORKERS (job threads, default 1), JOBS_MAX_QUEUED (default 1000),
+    JOBS_PATH (SQLite file, default memory only) and JOBS_TTL (seconds a
+    finished job is kept, default 3600) tune it.
+    """
+    ttl = float(os.environ.get('JOBS_TTL', 3600))
+    path = os.environ.get('JOBS_PATH')
+    store = SQLiteJobStore(path, ttl) if path else MemoryJobStore(ttl)
+    return JobQueue(
+        store,
+        run,
+        workers=int(os.environ.get('JOBS_WORKERS', 1)),
+        max_queued=int(os.environ.get('JOBS_MAX_QUEUED', 1000))
+    )
@@ -0,0 +1,158 @@
+"""
+Prometheus-style metrics built from extraction profiles.
+
+When metrics are on, every document is extracted with profile=True (see
+formats.ExtractionProfile) and its profile is folded in here by the app
+process, whichever worker ran the extraction. render() produces the
+Prometheus text exposition format served on GET /metrics:
+
+    invoice_extractions_total{format}                      documents profiled
+    invoice_extraction_seconds{format}                     histogram per document
+    invoice_section_seconds{section}                       histogram per section
+    invoice_alternative_attempts_total{field,alternative,outcome}
+    invoice_alternative_seconds_total{field,alternative}
+    invoice_parser_attempts_total{parser,outcome}
+    invoice_parser_seconds{parser}                         histogram per parser run
+
+Alternatives are labelled by their position in the field's full cascade in
+formats.FIELD_PATTERNS; outcome is hit, miss, skipped (anchor absent) or
+timeout. Alternatives that are never hit are candidates for pruning, and hit
+counts per format show how to reorder the cascades.
+"""
+import os
+import threading
+from collections import defaultdict
+
+# Upper bounds (seconds) of the histogram buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one label set"""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+def format_labels(names, values):
+    """'{a="x",b="y"}' with Prometheus label escaping; '' without labels"""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    """
+    A sample value at full precision: integers as integers, floats by
+    repr() (shortest round-trip), never the 6 digits of :g that would
+    freeze a busy counter at 1.23457e+06
+    """
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class ExtractionMetrics:
+    """Thread-safe aggregate of extraction profiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.extractions = defaultdict(int)
+        self.extraction_seconds = defaultdict(Histogram)
+        self.section_seconds = defaultdict(Histogram)
+        self.alternative_attempts = defaultdict(int)
+        self.alternative_seconds = defaultdict(float)
+        self.parser_attempts = defaultdict(int)
+        self.parser_seconds = defaultdict(Histogram)
+
+    def observe(self, profile):
+        """Fold in one document's profile (the "Profile" entry of its result)"""
+        fmt = str(profile['format']) if profile['format'] is not None else 'unknown'
+        with self._lock:
+            self.extractions[fmt] += 1
+            self.extraction_seconds[fmt].observe(sum(profile['sections'].values()))
+            for section, seconds in profile['sections'].items():
+                self.section_seconds[section].observe(seconds)
+            for field, index, outcome, seconds in profile['alternatives']:
+                self.alternative_attempts[field, index, outcome] += 1
+                self.alternative_seconds[field, index] += seconds
+            for parser, outcome, seconds in profile['parsers']:
+                self.parser_attempts[parser, outcome] += 1
+                self.parser_seconds[parser,].observe(seconds)
+
+    def render(self):
+        """Prometheus text exposition of everything observed so far"""
+        lines = []
+        with self._lock:
+            counter(lines, 'invoice_extractions_total', 'Documents extracted with profiling',
+                    ('format',), {(fmt,): count for fmt, count in self.extractions.items()})
+            histogram(lines, 'invoice_extraction_seconds', 'Wall time of one extraction',
+                      ('format',), {(fmt,): h for fmt, h in self.extraction_seconds.items()})
+            histogram(lines, 'invoice_section_seconds', 'Wall time of one extraction section',
+                      ('section',), {(section,): h for section, h in self.section_seconds.items()})
+            counter(lines, 'invoice_alternative_attempts_total', 'Cascade alternatives tried, by outcome',
+                    ('field', 'alternative', 'outcome'), self.alternative_attempts)
+            counter(lines, 'invoice_alternative_seconds_total', 'Time spent searching with a cascade alternative',
+                    ('field', 'alternative'), self.alternative_seconds)
+            counter(lines, 'invoice_parser_attempts_total', 'Line-item parsers run, by outcome',
+                    ('parser', 'outcome'), self.parser_attempts)
+            histogram(lines, 'invoice_parser_seconds', 'Wall time of one line-item parser run',
+                      ('parser',), self.parser_seconds)
+        return '\n'.join(lines) + '\n'
+
+
+def counter(lines, name, help_text, label_names, values):
+    """Append a counter family; values maps label value tuples to numbers"""
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{format_labels(label_names, labels)} {format_value(value)}')
+
+
+def gauge(lines, name, help_text, label_names, values):
+    """Append a gauge family; values maps label value tuples to numbers"""
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} gauge')
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{format_labels(label_names, labels)} {format_value(value)}')
+
+
+def histogram(lines, name, help_text, label_names, values):
+    """Append a histogram family; values maps label value tuples to Histograms"""
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, observed in sorted(values.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, observed.counts):
+            cumulative += count
+            bucket_labels = format_labels(label_names + ('le',), labels + (f'{bound:g}',))
+            lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+        bucket_labels = format_labels(label_names + ('le',), labels + ('+Inf',))
+        lines.append(f'{name}_bucket{bucket_labels} {observed.count}')
+        lines.append(f'{name}_sum{format_labels(label_names, labels)} {format_value(observed.total)}')
+        lines.append(f'{name}_count{format_labels(label_names, labels)} {observed.count}')
+
+
+def create_metrics():
+    """Build the metrics aggregate when EXTRACT_METRICS=1, else return None"""
+    if os.environ.get('EXTRACT_METRICS', '0').lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    return ExtractionMetrics()
@@ -0,0 +1,135 @@
+"""
+Exact money and rate arithmetic for tax and totals computation.
+
+Amounts are decimal.Decimal from parsing to output, so sums such as
+103507.81999999999 never appear and computed totals agree with the printed
+ones. Computed amounts are rounded to the paisa, half up, as GST invoices
+round tax, and written with two decimals ("50409.00"). Computed rates are
+rounded to two decimals and written without trailing zeros ("18", "2.5").
+
+Column sums (column_total) read a whole column of line items at once. The
+usual plain two-decimal amounts are then summed with float at C speed,
+under an error bound that makes the sum rounded to the paisa exact
+(exact_float_sum); anything else is summed in Decimal.
+"""
+import math
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from operator import attrgetter
+
+ZERO = Decimal(0)
+PAISA = Decimal('0.01')
+HUNDRED = Decimal(100)
+TWO = Decimal(2)
+
+# exact_float_sum(): every digit maps to "0", so a third decimal shows up as ".000"
+DIGITS_AS_ZERO = str.maketrans('0123456789', '0000000000')
+# Error bound of exact_float_sum(): a tenth of a paisa is 2**53 * 0.001 units of 2**-53
+FLOAT_SUM_LIMIT = 2 ** 53 // 1000
+
+
+def parse_amount(value):
+    """Decimal of an amount string ("1,23,456.78", "18"), or None when empty or not a number"""
+    if not value:
+        return None
+    if ',' in value:
+        value = value.replace(',', '')
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def round_amount(amount):
+    """Amount rounded to the paisa, half up"""
+    return amount.quantize(PAISA, ROUND_HALF_UP)
+
+
+def format_amount(amount):
+    """Two-decimal string of an amount rounded to the paisa"""
+    # Quantized to two decimals, str() never switches to exponent notation
+    return str(round_amount(amount))
+
+
+def format_rate(rate):
+    """Rate rounded to two decimals, without trailing zeros ("18", "2.5")"""
+    return str(rate.quantize(PAISA, ROUND_HALF_UP)).rstrip('0').rstrip('.')
+
+
+def tax_on(taxable, rate):
+    """Tax at rate percent of taxable, rounded to the paisa"""
+    return round_amount(taxable * rate / HUNDRED)
+
+
+def rate_of(tax, taxable):
+    """Rate in percent that tax is of a (non-zero) taxable value"""
+    return tax * HUNDRED / taxable
+
+
+def split_gst(tax):
+    """
+    Split a GST amount into its (CGST, SGST) halves in whole paisa. The
+    halves always add up to the amount; an odd paisa goes to CGST.
+    """
+    tax = round_amount(tax)
+    cgst = round_amount(tax / TWO)
+    return cgst, tax - cgst
+
+
+def exact_float_sum(values):
+    """
+    Sum of a list of non-empty amount strings as a Decimal in whole paisa,
+    or None when a float sum cannot be proven exact for them.
+
+    The common case (plain amounts of ASCII digits with at most two
+    decimals) is summed with float(), at C speed. Each such amount is within
+    a relative 2**-53 of its float and each of the n additions adds at most
+    another relative 2**-53 of the total, so while (n + 1) * total stays
+    below FLOAT_SUM_LIMIT the sum is off by at most a tenth of a paisa and
+    rounding it to whole paisa gives the exact total. Longer columns use
+    math.fsum, which rounds only once: its bound is 2 * total.
+    """
+    joined = '\n'.join(values)
+    # float() also reads non-ASCII digits, which the checks below cannot see
+    if not joined.isascii():
+        return None
+    # A third decimal, a negative amount or exponent, or an underscore between
+    # digits would break the bound; anything else float() cannot read raises
+    digits = joined.translate(DIGITS_AS_ZERO)
+    if '.000' in digits or '-' in digits or '_' in digits:
+        return None
+    try:
+        floats = list(map(float, values))
+    except ValueError:
+        return None
+    total = sum(floats)
+    # nan and inf fail the comparisons too
+    if not total * (len(floats) + 1) < FLOAT_SUM_LIMIT:
+        total = math.fsum(floats)
+        if not total * 2 < FLOAT_SUM_LIMIT:
+            return None
+    return Decimal(round(total * 100)).scaleb(-2)
+
+
+def sum_amounts(values):
+    """Exact sum of amount strings; empty and unparseable values count as zero"""
+    values = list(filter(None, values))
+    if not values:
+        return ZERO
+    total = exact_float_sum(values)
+    if total is not None:
+        return total
+    total = ZERO
+    for value in values:
+        amount = parse_amount(value)
+        if amount is not None:
+            total += amount
+    return total
+
+
+def column_total(rows, field):
+    """
+    Exact sum of an amount column over line items (formats.LineItem
+    records); the column is read with attrgetter mapped at C level.
+    """
+    return sum_amounts(map(attrgetter(field), rows))
@@ -0,0 +1,172 @@
+"""
+Per-supplier extraction plans.
+
+Most invoices come from a few hundred suppliers, each sending the same
+layout every time, yet a full extraction walks every field's cascade of
+alternatives to rediscover which one matches. A plan records, for one
+supplier GSTIN, the layout's format, the position in FIELD_PATTERNS of
+the alternative that hit for every field looked up (None when nothing
+did) and the line-item parser that found the items.
+
+extract_invoice_data(text, plans=store) first looks the SupplierGstin up
+with the alternatives known plans use; when the GSTIN has a trusted plan
+the document is extracted by replaying it: format detection is skipped,
+each field searches only its recorded alternative and the recorded parser
+runs first. A recorded alternative that no longer matches falls back to
+the field's full cascade, for the layout the document is then
+fingerprinted as, and the plan learned from that document replaces the
+stored one.
+
+A field recorded empty is replayed as empty without searching it, which
+is where most of the saving comes from. To keep a supplier's occasional
+optional field (a PO number, an e-way bill) from going unnoticed, a plan
+is only trusted once PLANS_CONFIRM full extractions in a row produced it,
+and every PLANS_VERIFY_EVERY-th document of a supplier is extracted in
+full again and re-learned.
+
+Plans are keyed by the supplier GSTIN and EXTRACTOR_VERSION (see
+cache.py), so editing a pattern drops every plan learned with the old
+cascades. They live in memory per process and optionally in a SQLite
+file (PLANS_PATH) shared by the worker processes and kept across restarts.
+"""
+import json
+import os
+import threading
+from collections import Counter
+
+
+class PlanStore:
+    """Thread-safe map of supplier GSTIN to its learned plan"""
+
+    def __init__(self, path=None, confirm=2, verify_every=20, max_entries=10000):
+        self.confirm = max(1, confirm)
+        self.verify_every = verify_every
+        self.max_entries = max_entries
+        # gstin: {"plan": ..., "confirmations": n, "uses": n}
+        self._plans = {}
+        # SupplierGstin alternatives of the stored plans, most used first
+        self._gstin_alternatives = Counter()
+        self._lock = threading.Lock()
+        self._connection = None
+        self.replays = self.learned = self.fallbacks = 0
+        if path:
+            # Imported here: memory-only stores (and the CLI) do without them
+            import sqlite3
+            from cache import EXTRACTOR_VERSION
+            self.version = EXTRACTOR_VERSION
+            self._connection = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            with self._lock, self._connection:
+                self._connection.execute('PRAGMA journal_mode=WAL')
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS plans ('
+                    ' gstin TEXT NOT NULL, version TEXT NOT NULL, plan TEXT NOT NULL,'
+                    ' confirmations INTEGER NOT NULL, PRIMARY KEY (gstin, version))'
+                )
+                # Plans of older extractor versions can never be used again
+                self._connection.execute('DELETE FROM plans WHERE version != ?', (self.version,))
+                rows = self._connection.execute(
+                    'SELECT gstin, plan, confirmations FROM plans WHERE version = ? LIMIT ?',
+                    (self.version, max_entries)
+                ).fetchall()
+            for gstin, plan, confirmations in rows:
+                self._remember(gstin, json.loads(plan), confirmations)
+
+    def _remember(self, gstin, plan, confirmations):
+        previous = self._plans.get(gstin)
+        if previous is not None:
+            self._gstin_alternatives[previous['plan']['fields'].get('SupplierGstin')] -= 1
+        self._plans[gstin] = {'plan': plan, 'confirmations': confirmations, 'uses': 0}
+        self._gstin_alternatives[plan['fields'].get('SupplierGstin')] += 1
+
+    def gstin_alternatives(self):
+        """Positions in the SupplierGstin cascade that stored plans found the GSTIN with"""
+        with self._lock:
+            return [index for index, count in self._gstin_alternatives.most_common()
+                    if count > 0 and index is not None]
+
+    def get(self, gstin):
+        """
+        The plan to replay for gstin, or None when the document should be
+        extracted in full: no plan yet, not confirmed yet, or due for
+        verification.
+        """
+        with self._lock:
+            entry = self._plans.get(gstin)
+            if entry is None or entry['confirmations'] < self.confirm:
+                return None
+            entry['uses'] += 1
+            if self.verify_every and entry['uses'] % self.verify_every == 0:
+                return None
+            self.replays += 1
+            return entry['plan']
+
+    def learn(self, gstin, plan, replayed=False):
+        """
+        Record the plan a document of gstin was extracted with. The same
+        plan again confirms the stored one; a different one replaces it.
+        replayed: the document was extracted from the stored plan.
+        """
+        with self._lock:
+            entry = self._plans.get(gstin)
+            if entry is not None and entry['plan'] == plan:
+                if replayed or entry['confirmations'] >= self.confirm:
+                    return
+                confirmations = entry['confirmations'] + 1
+            else:
+                if replayed:
+                    self.fallbacks += 1
+                if entry is None and len(self._plans) >= self.max_entries:
+                    return
+                confirmations = 1
+            self.learned += 1
+            self._remember(gstin, plan, confirmations)
+            # Only changes reach the disk: a steady supplier costs no writes
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO plans (gstin, version, plan, confirmations) VALUES (?, ?, ?, ?)',
+                        (gstin, self.version, json.dumps(plan), confirmations)
+                    )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'suppliers': len(self._plans),
+                'trusted': sum(1 for entry in self._plans.values() if entry['confirmations'] >= self.confirm),
+                'replays': self.replays,
+                'learned': self.learned,
+                'fallbacks': self.fallbacks,
+            }
+
+
+def create_plan_store():
+    """
+    Build the plan store from the environment, or return None when plans
+    are off. EXTRACT_PLANS=1 turns them on; PLANS_PATH (SQLite file, default
+    memory only), PLANS_CONFIRM (identical full extractions before a plan is
+    trusted, default 2), PLANS_VERIFY_EVERY (every n-th document of a
+    supplier is extracted in full, 0 = never, default 20) and PLANS_SIZE
+    (suppliers, default 10000) tune it.
+    """
+    if os.environ.get('EXTRACT_PLANS', '0').lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    return PlanStore(
+        path=os.environ.get('PLANS_PATH') or None,
+        confirm=int(os.environ.get('PLANS_CONFIRM', 2)),
+        verify_every=int(os.environ.get('PLANS_VERIFY_EVERY', 20)),
+        max_entries=int(os.environ.get('PLANS_SIZE', 10000))
+    )
+
+
+_process_store = None
+_process_store_lock = threading.Lock()
+
+
+def process_plan_store():
+    """This process's plan store (create_plan_store(), built on first use)"""
+    global _process_store
+    if _process_store is None:
+        with _process_store_lock:
+            if _process_store is None:
+                _process_store = create_plan_store() or False
+    return _process_store or None
@@ -0,0 +1,67 @@
+"""
+JSON encoding of extraction results for the API and the CLI.
+
+orjson is used when it is installed; it encodes extraction results several
+times faster than the json module, which is the fallback. Both serializers
+produce the same documents: UTF-8 bytes with non-ASCII text left as is,
+keys in insertion order, compact unless pretty (two-space indent) output is
+asked for. ndjson_line() writes one record of a multi-document stream.
+
+JSON_SERIALIZER=json (or orjson) picks one explicitly.
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonSerializer:
+    """Standard library json"""
+
+    name = 'json'
+
+    def dumps(self, obj, pretty=False):
+        """obj as JSON bytes"""
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def ndjson_line(self, obj):
+        """obj as one compact NDJSON line, newline included"""
+        return self.dumps(obj) + b'\n'
+
+
+class OrjsonSerializer:
+    """orjson (optional dependency)"""
+
+    name = 'orjson'
+
+    def dumps(self, obj, pretty=False):
+        """obj as JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    def ndjson_line(self, obj):
+        """obj as one compact NDJSON line, newline included"""
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+
+SERIALIZERS = {
+    'json': JsonSerializer,
+    'orjson': OrjsonSerializer,
+}
+
+
+def create_serializer(kind=None):
+    """
+    Build a serializer. kind defaults to the JSON_SERIALIZER environment
+    variable ("orjson" or "json"), else orjson when it is installed.
+    """
+    kind = kind or os.environ.get('JSON_SERIALIZER') or ('orjson' if orjson is not None else 'json')
+    if kind not in SERIALIZERS:
+        raise ValueError(f'Unknown serializer {kind!r}; expected one of {", ".join(SERIALIZERS)}')
+    if kind == 'orjson' and orjson is None:
+        raise ValueError('JSON_SERIALIZER=orjson but orjson is not installed')
+    return SERIALIZERS[kind]()
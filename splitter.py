@@ -0,0 +1,192 @@
+"""
+Splitting of text files that hold several invoices back to back, as OCR
+batches are emitted, so each invoice is extracted on its own instead of
+all of them colliding in one result.
+
+split_invoices() finds the boundaries in one pass over the document's
+structural lines (SPLIT_MARKER_PATTERN): a new invoice starts where
+
+    a page break (form feed) ends      any page
+    a "TAX INVOICE" title repeats      within the current invoice
+    an IRN block repeats               within the current invoice
+    the supplier heading restarts      a heading an invoice started with, again,
+                                       or any heading after the current
+                                       invoice's title, IRN or a table
+
+An invoice's letterhead (supplier heading, address, a rule) comes before
+its title or IRN, so at a repeated title or IRN the boundary is moved back
+over as many headings and rules as the current invoice had in front of its
+own first one, or over as many non-blank lines in layouts without any.
+
+Pages of one invoice that repeat the letterhead or the title look like new
+invoices. extract_invoices() therefore looks up the invoice number and IRN
+of every segment first and folds two neighbouring segments together when
+either has neither (a continuation page, a stray header) or they share
+one, then extracts each folded invoice once.
+
+A batch mixing layouts is only split where the next invoice shows one of
+the markers above: an invoice that opens without a heading, right after
+one of another layout on the same page, stays attached to it.
+"""
+import heapq
+import re
+from collections import namedtuple
+
+Segment = namedtuple('Segment', ['start', 'end'])
+# The fields that tell the invoices of a batch apart (see identity())
+IDENTITY_FIELDS = ["InvoiceNumber", "IrnNo"]
+
+SPLIT_MARKER_PATTERN = re.compile(
+    r'^[ \t\f]*(?:'
+    r'(?P<title>[#*|> \t]*TAX[ \t]+INVOICE\b)'
+    r'|(?P<irn>[#*| \t]*IRN\b(?![ \t.]*(?:Date|Dt)\b))'
+    r'|(?P<heading>#{1,2}[ \t]+[^\n]*)'
+    r'|(?P<rule>(?:-{3,}|\*{3,}|_{3,})[ \t]*$)'
+    r'|(?P<table>\|?[ \t:]*-{3,}[ \t:]*\|)'
+    r')',
+    re.MULTILINE | re.IGNORECASE
+)
+
+
+def split_invoices(text):
+    """[Segment(start, end)] of the invoices in text, in order; a single segment when no boundary is found"""
+    starts = [0]
+    seen = {}            # title / irn: offset of its latest occurrence in the current invoice
+    leads = {}           # title / irn: (headings and rules, non-blank lines) the current invoice had before its first one
+    openers = []         # offsets of the headings and rules of the current invoice
+    letterheads = set()  # texts of the headings invoices have started with
+    tabled = False       # the current invoice has had a table (its line items)
+    # Page breaks are found by a literal scan: as an alternative of the
+    # line-anchored pattern they would slow every line down
+    pages = ((offset + 1, 'page', None) for offset in find_all(text, '\f'))
+    markers = ((match.start(), match.lastgroup, match) for match in SPLIT_MARKER_PATTERN.finditer(text))
+    for start, kind, match in heapq.merge(pages, markers, key=lambda event: event[0]):
+        if kind == 'page':
+            # A page break may always end an invoice; pages of one invoice
+            # are folded together again by extract_invoices()
+            if start > starts[-1] and text[start:].strip():
+                starts.append(start)
+                seen, leads, openers, tabled = {}, {}, [], False
+            continue
+        if kind in ('title', 'irn'):
+            if kind in seen:
+                # The next invoice's letterhead: the last lead headings and
+                # rules since this marker's previous occurrence or, in
+                # layouts without any, the last lead lines
+                since = [offset for offset in openers if offset > seen[kind]]
+                lead, lead_lines = leads[kind]
+                if lead and since:
+                    boundary = since[-min(lead, len(since))]
+                else:
+                    floor = text.find('\n', seen[kind]) + 1
+                    boundary = lines_before(text, start, lead_lines, floor)
+                starts.append(boundary)
+                openers = [offset for offset in since if offset >= boundary]
+                seen, leads = {kind: start}, {kind: (len(openers), count_lines(text, boundary, start))}
+                if heading_text(text, boundary) is not None:
+                    letterheads.add(heading_text(text, boundary))
+                tabled = False
+            else:
+                seen[kind] = start
+                leads[kind] = (len(openers), count_lines(text, starts[-1], start))
+            continue
+        if kind == 'table':
+            tabled = True
+            continue
+        if kind == 'heading':
+            title = match.group('heading').lstrip('#').strip().lower()
+            if (seen or tabled or title in letterheads) and start > starts[-1]:
+                # The table may have been a header block rather than the
+                # line items (Format 8): later headings stay candidates
+                # too, and extract_invoices() folds the pieces back
+                starts.append(start)
+                seen, leads, openers = {}, {}, []
+                letterheads.add(title)
+            elif not seen and not tabled:
+                letterheads.add(title)
+        openers.append(start)
+    # Blank stretches between two boundaries go with the next invoice, a
+    # blank tail with the last one: the segments always tile text
+    kept = [0]
+    for start in starts[1:]:
+        if text[kept[-1]:start].strip():
+            kept.append(start)
+        else:
+            kept[-1] = start if len(kept) > 1 else 0
+    if len(kept) > 1 and not text[kept[-1]:].strip():
+        kept.pop()
+    return [Segment(start, end) for start, end in zip(kept, kept[1:] + [len(text)])]
+
+
+def find_all(text, sub):
+    """Offsets of every occurrence of sub in text"""
+    offset = text.find(sub)
+    while offset != -1:
+        yield offset
+        offset = text.find(sub, offset + 1)
+
+
+def count_lines(text, start, end):
+    """Non-blank lines of text[start:end]"""
+    return sum(1 for line in text[start:end].split('\n') if line.strip())
+
+
+def lines_before(text, offset, count, floor):
+    """Start of the count-th non-blank line before the line starting at offset, not before floor"""
+    while count and offset > floor:
+        line_start = max(text.rfind('\n', floor, offset - 1) + 1, floor)
+        if text[line_start:offset].strip():
+            count -= 1
+        offset = line_start
+    return offset
+
+
+def heading_text(text, offset):
+    """Lower-cased text of the heading starting at offset, or None when the line there is no heading"""
+    match = SPLIT_MARKER_PATTERN.match(text, offset)
+    if match is None or match.lastgroup != 'heading':
+        return None
+    return match.group('heading').lstrip('#').strip().lower()
+
+
+def identity(data):
+    """(invoice number, IRN) of an extraction"""
+    header = data.get("HeaderItem", {})
+    return header.get("InvoiceNumber", ""), header.get("IrnNo", "")
+
+
+def continues(identity, previous):
+    """Whether a segment of identity and the one before it, of identity previous, are one invoice"""
+    if not any(identity) or not any(previous):
+        return True
+    return any(value and value == earlier for value, earlier in zip(identity, previous))
+
+
+def extract_invoices(text, extract_all, fields=None):
+    """
+    Split text and extract every invoice in it. extract_all(texts, fields)
+    extracts a list of texts (in parallel, as the caller sees fit) and
+    returns their data in order. Returns [{"start", "end", "data"}] with
+    the character offsets of every invoice in text.
+    """
+    segments = split_invoices(text)
+    if len(segments) == 1:
+        return [{"start": 0, "end": len(text), "data": extract_all([text], fields)[0]}]
+
+    # Continuation pages are told apart by their invoice number and IRN,
+    # looked up first so that every invoice is extracted once, after folding
+    numbers = [identity(data) for data in extract_all([text[start:end] for start, end in segments], IDENTITY_FIELDS)]
+    invoices = []
+    for segment, number in zip(segments, numbers):
+        if invoices and continues(number, invoices[-1]["number"]):
+            invoices[-1]["end"] = segment.end
+            if not any(invoices[-1]["number"]):
+                invoices[-1]["number"] = number
+        else:
+            invoices.append({"start": segment.start, "end": segment.end, "number": number})
+
+    results = extract_all([text[invoice["start"]:invoice["end"]] for invoice in invoices], fields)
+    for invoice, data in zip(invoices, results):
+        del invoice["number"]
+        invoice["data"] = data
+    return invoices
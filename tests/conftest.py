@@ -0,0 +1,38 @@
+"""
+Shared fixtures. The modules live at the repository root and the synthetic
+invoice corpus (Formats 1-10) in benchmarks/corpus.py.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(1, str(ROOT / 'benchmarks'))
+
+from corpus import build_corpus  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def corpus():
+    """{format number: invoice text} of every known layout, three line items each"""
+    return build_corpus(3)
+
+
+@pytest.fixture(scope='session')
+def api():
+    """The app module with its services built, extracting in the test process (no worker processes)"""
+    os.environ.setdefault('EXTRACT_EXECUTOR', 'inline')
+    os.environ.setdefault('JOBS_EXECUTOR', 'inline')
+    import app
+    with app.services_lock:
+        if app.executor is None:
+            app.init_services()
+    return app
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
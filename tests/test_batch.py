@@ -0,0 +1,85 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from formats import extract_invoice_data
+
+
+def upload(name, text):
+    return io.BytesIO(text.encode('utf-8')), name
+
+
+def test_multipart_batch(client, corpus):
+    response = client.post('/extract/batch', data={'files': [upload(f'{fmt}.txt', text) for fmt, text in corpus.items()]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == len(corpus) and body['failed'] == 0
+    assert [result['data'] for result in body['results']] == [extract_invoice_data(text) for text in corpus.values()]
+
+
+def test_bad_documents_are_reported_per_file(client, corpus):
+    response = client.post('/extract/batch', data={'files': [
+        upload('good.txt', corpus[1]),
+        (io.BytesIO(b'\xff\xfe not utf-8'), 'bad.txt'),
+        upload('notes.pdf', corpus[1]),
+    ]})
+    results = response.get_json()['results']
+    assert [result['success'] for result in results] == [True, False, False]
+    assert response.get_json()['failed'] == 2
+
+
+def test_zip_and_ndjson_bodies(client, corpus):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('a.txt', corpus[1])
+        zf.writestr('b.txt', corpus[2])
+    response = client.post('/extract/batch', data=archive.getvalue(), content_type='application/zip')
+    assert [result['filename'] for result in response.get_json()['results']] == ['a.txt', 'b.txt']
+
+    lines = '\n'.join(json.dumps({'filename': f'{fmt}.txt', 'text': corpus[fmt]}) for fmt in (3, 4))
+    response = client.post('/extract/batch', data=lines, content_type='application/x-ndjson')
+    assert [result['data'] for result in response.get_json()['results']] == [
+        extract_invoice_data(corpus[3]), extract_invoice_data(corpus[4])
+    ]
+
+
+def test_ndjson_response_streams_one_line_per_file(client, corpus):
+    response = client.post('/extract/batch', data={'files': [upload('a.txt', corpus[1]), upload('b.txt', corpus[5])]},
+                           headers={'Accept': 'application/x-ndjson'})
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert [line['filename'] for line in lines] == ['a.txt', 'b.txt']
+
+
+def test_batches_beyond_werkzeugs_default_part_limit(client):
+    files = [upload(f'{n}.txt', 'TAX INVOICE') for n in range(1200)]
+    response = client.post('/extract/batch', data={'files': files})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 1200
+
+
+@pytest.fixture
+def small_limits(api):
+    saved = {key: api.app.config[key] for key in ('BATCH_MAX_FILES', 'BATCH_MAX_FORM_PARTS', 'MAX_CONTENT_LENGTH')}
+    api.app.config.update(BATCH_MAX_FILES=5, BATCH_MAX_FORM_PARTS=8, MAX_CONTENT_LENGTH=1024)
+    yield
+    api.app.config.update(saved)
+
+
+def test_too_many_files(client, small_limits):
+    response = client.post('/extract/batch', data={'files': [upload(f'{n}.txt', 'x') for n in range(6)]})
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Too many files'
+
+
+def test_too_many_parts_is_not_reported_as_too_large(client, small_limits):
+    response = client.post('/extract/batch', data={'files': [upload(f'{n}.txt', 'x') for n in range(20)]})
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Too many parts'
+
+
+def test_oversized_upload(client, small_limits):
+    response = client.post('/extract', data={'file': upload('big.txt', 'x' * 4096)})
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'File too large', 'message': 'File size exceeds 1 KB limit'}
@@ -0,0 +1,45 @@
+import io
+import shutil
+
+import pytest
+
+import cache
+
+
+@pytest.mark.parametrize('module', ['formats', 'money', 'plans', 'cascade_order', 'splitter'])
+def test_editing_an_extraction_module_changes_the_version(module, tmp_path, monkeypatch):
+    imported = getattr(cache, module)
+    copy = tmp_path / f'{module}.py'
+    shutil.copy(imported.__file__, copy)
+    assert cache.extractor_version() == cache.EXTRACTOR_VERSION
+    with copy.open('a') as f:
+        f.write('\n# edited\n')
+    monkeypatch.setattr(imported, '__file__', str(copy))
+    assert cache.extractor_version() != cache.EXTRACTOR_VERSION
+
+
+def test_keys_follow_the_normalized_text():
+    assert cache.cache_key(cache.normalize_text('\ufeffa\r\nb')) == cache.cache_key('a\nb')
+    assert cache.cache_key('a\nb') != cache.cache_key('a\nc')
+
+
+@pytest.mark.parametrize('variant', [
+    lambda text: '\ufeff' + text,
+    lambda text: text.replace('\n', '\r\n'),
+    lambda text: '\ufeff' + text.replace('\n', '\r'),
+])
+def test_cache_on_and_off_extract_alike(api, client, corpus, monkeypatch, variant):
+    def extract(text):
+        response = client.post('/extract', data={'file': (io.BytesIO(text.encode('utf-8')), 'one.txt')})
+        assert response.status_code == 200
+        body = response.get_json()
+        return body['data'], body.get('cache')
+
+    text = variant(corpus[6])
+    monkeypatch.setattr(api, 'cache', None)
+    uncached, _ = extract(text)
+    monkeypatch.setattr(api, 'cache', cache.ResultCache())
+    assert extract(text) == (uncached, 'miss')
+    assert extract(text) == (uncached, 'hit')
+    # Resubmissions that only differ in BOM or line endings share the entry
+    assert extract(corpus[6]) == (uncached, 'hit')
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from cascade_order import CascadeOrder, base_cascades, create_cascade_order
+from formats import ALTERNATIVE_INDEX, FIELD_PATTERNS, extract_invoice_data
+
+FIELD = 'InvoiceNumber'
+
+
+def positions(order, fmt=None, field=FIELD):
+    return [ALTERNATIVE_INDEX[id(alternative)] for alternative in order.cascades(fmt)[field]]
+
+
+def observe(order, matched, times):
+    for _ in range(times):
+        order.observe(None, {FIELD: matched})
+
+
+def test_an_alternative_with_enough_evidence_moves_ahead():
+    order = CascadeOrder(min_evidence=3)
+    observe(order, {4: 'INV-1'}, 2)
+    assert positions(order)[:5] == [0, 1, 2, 3, 4]
+    observe(order, {4: 'INV-1'}, 1)
+    assert positions(order)[0] == 4
+    assert sorted(positions(order)) == list(range(len(FIELD_PATTERNS[FIELD])))
+
+
+def test_conflicting_alternatives_keep_their_original_order():
+    order = CascadeOrder(min_evidence=1)
+    observe(order, {4: 'INV-1'}, 5)
+    observe(order, {1: 'X', 4: 'INV-1'}, 1)
+    # 4 matched more often, but never ahead of 1, which it disagreed with once
+    assert positions(order)[:2] == [1, 4]
+
+
+def test_matches_are_halved_once_a_window_is_full():
+    order = CascadeOrder(min_evidence=3, window=4)
+    observe(order, {4: 'INV-1'}, 4)
+    assert order.as_dict()['samples'] == {'None': 2}
+    assert positions(order)[:5] == [0, 1, 2, 3, 4]
+
+
+def test_profiles_round_trip(tmp_path):
+    order = CascadeOrder(min_evidence=1)
+    observe(order, {1: 'X', 4: 'INV-1'}, 2)
+    observe(order, {5: 'INV-1'}, 3)
+    order.save(tmp_path / 'order.json')
+    profile = json.loads((tmp_path / 'order.json').read_text())
+    profile['formats']['None'][FIELD]['matches']['gone'] = 100
+    loaded = CascadeOrder(sample_every=0, min_evidence=1)
+    loaded.load(profile)
+    assert positions(loaded) == positions(order)
+    assert loaded.changed() == order.changed() != []
+
+
+def test_learned_orders_keep_every_result(corpus):
+    order = CascadeOrder(sample_every=1, min_evidence=1)
+    for _ in range(2):
+        for text in corpus.values():
+            extract_invoice_data(text, order=order)
+    static = CascadeOrder(sample_every=0, min_evidence=1)
+    static.load(order.as_dict())
+    assert static.changed()
+    for text in corpus.values():
+        assert extract_invoice_data(text, order=static) == extract_invoice_data(text)
+    for fmt, field, original, ordered in static.changed():
+        assert sorted(original) == sorted(ordered)
+        assert len(base_cascades(fmt)[field]) == len(ordered)
+
+
+def test_create_cascade_order(monkeypatch, tmp_path):
+    monkeypatch.delenv('CASCADE_ORDER', raising=False)
+    assert create_cascade_order() is None
+    monkeypatch.setenv('CASCADE_ORDER', 'sometimes')
+    with pytest.raises(ValueError):
+        create_cascade_order()
+
+    path = tmp_path / 'order.json'
+    learned = CascadeOrder(min_evidence=1)
+    observe(learned, {4: 'INV-1'}, 3)
+    learned.save(path)
+    monkeypatch.setenv('CASCADE_ORDER', 'static')
+    monkeypatch.setenv('CASCADE_ORDER_PATH', str(path))
+    monkeypatch.setenv('CASCADE_ORDER_MIN_EVIDENCE', '1')
+    order = create_cascade_order()
+    assert not order.sample()
+    assert positions(order)[0] == 4
@@ -0,0 +1,50 @@
+import io
+import shutil
+import sys
+
+import differential
+from differential import ROOT, SIBLING_MODULES, compare, diff_results, load_corpus, load_extractor, main
+
+
+def report(baseline, candidate):
+    """(differing documents, report text) of comparing two extractors on the corpus"""
+    out = io.StringIO()
+    differing, _ = compare(baseline, candidate, load_corpus('synthetic:3'), rounds=1, out=out)
+    return differing, out.getvalue()
+
+
+def test_the_tree_against_itself_has_no_differences():
+    baseline = load_extractor(str(ROOT / 'formats.py'), 'formats_baseline')
+    candidate = load_extractor(str(ROOT), 'formats_candidate')
+    differing, out = report(baseline, candidate)
+    assert differing == 0
+    assert '10 documents, 10 identical, 0 differing' in out
+    assert main([str(ROOT / 'formats.py'), 'synthetic:3', '--rounds', '1']) == 0
+
+
+def test_sibling_modules_come_from_the_candidate_directory(tmp_path):
+    for module in ('formats',) + SIBLING_MODULES:
+        shutil.copy(ROOT / f'{module}.py', tmp_path / f'{module}.py')
+    with (tmp_path / 'money.py').open('a') as f:
+        f.write('\n\ndef format_amount(amount):\n    return "edited"\n')
+    loaded = {module: sys.modules.get(module) for module in SIBLING_MODULES}
+
+    candidate = load_extractor(str(tmp_path), 'formats_candidate')
+    assert {module: sys.modules.get(module) for module in SIBLING_MODULES} == loaded
+
+    differing, out = report(load_extractor(str(ROOT), 'formats_baseline'), candidate)
+    assert differing == 10
+    assert "HeaderItem.TotalInvoiceAmount: '1416.00' -> 'edited'" in out
+    assert main([str(tmp_path), 'synthetic:3', '--rounds', '1']) == 1
+
+
+def test_diff_results_paths():
+    baseline = {"HeaderItem": {"InvoiceNumber": "A", "Total": "1"}, "LineItems": [{"Quantity": "2"}]}
+    candidate = {"HeaderItem": {"InvoiceNumber": "B", "Total": "1"}, "LineItems": [{"Quantity": "3"}, {}]}
+    assert diff_results(baseline, baseline) == []
+    assert diff_results(baseline, candidate) == [
+        ('HeaderItem.InvoiceNumber', 'A', 'B'),
+        ('LineItems', '1 items', '2 items'),
+        ('LineItems[0].Quantity', '2', '3'),
+    ]
+    assert differential.field_of('LineItems[3].Quantity') == 'LineItems[*].Quantity'
@@ -0,0 +1,79 @@
+import io
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from executor import ExecutorSaturated, ExtractionExecutor, InlineExecutor, ProcessExecutor
+from formats import extract_invoice_data
+
+
+class HeldExecutor(ExtractionExecutor):
+    """Documents stay in flight until their future is resolved by the test"""
+
+    def __init__(self, max_pending, fail=False):
+        super().__init__(max_pending)
+        self.fail = fail
+        self.futures = []
+
+    def _submit(self, text, kwargs):
+        if self.fail:
+            raise RuntimeError('cannot submit')
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def test_a_full_executor_raises_until_a_document_finishes():
+    executor = HeldExecutor(max_pending=2)
+    executor.submit('a')
+    executor.submit('b')
+    with pytest.raises(ExecutorSaturated):
+        executor.submit('c')
+    with pytest.raises(ExecutorSaturated):
+        executor.submit('c', block=True, timeout=0.05)
+    executor.futures[0].set_result({})
+    executor.submit('c')
+
+
+def test_slots_are_released_when_submission_or_extraction_fails(corpus):
+    executor = HeldExecutor(max_pending=1, fail=True)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            executor.submit('a')
+
+    executor = InlineExecutor(max_pending=1)
+    for _ in range(3):
+        assert isinstance(executor.submit(None).exception(), Exception)
+    assert executor.extract(corpus[1]) == extract_invoice_data(corpus[1])
+
+
+def test_saturation_is_answered_with_429(api, client, corpus, monkeypatch):
+    executor = HeldExecutor(max_pending=1)
+    executor.submit('held')
+    monkeypatch.setattr(api, 'executor', executor)
+    monkeypatch.setattr(api, 'cache', None)
+    response = client.post('/extract', data={'file': (io.BytesIO(corpus[1].encode('utf-8')), 'one.txt')})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_process_executor_extracts_and_recovers_from_a_dead_worker(corpus):
+    executor = ProcessExecutor(workers=1)
+    try:
+        assert executor.extract(corpus[4]) == extract_invoice_data(corpus[4])
+        for child in multiprocessing.active_children():
+            os.kill(child.pid, signal.SIGKILL)
+        # A document in flight when the pool breaks fails; the next gets a fresh pool
+        for _ in range(2):
+            try:
+                data = executor.extract(corpus[5])
+                break
+            except BrokenProcessPool:
+                continue
+        assert data == extract_invoice_data(corpus[5])
+    finally:
+        executor.shutdown()
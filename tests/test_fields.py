@@ -0,0 +1,56 @@
+import io
+
+import pytest
+
+import cache
+from formats import EXTRACTABLE_FIELDS, HEADER_FIELDS, extract_invoice_data, resolve_fields, select_fields
+
+FIELD_SETS = [
+    *([field] for field in sorted(EXTRACTABLE_FIELDS)),
+    ["LineItems", "InvoiceNumber"],
+    # Fields that read other fields' results, without them
+    ["TotalInvoiceAmount", "PlaceOfSupply", "ShipFromAddres"],
+    [],
+]
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_extracting_fields_gives_the_selected_full_result(corpus, fmt):
+    full = extract_invoice_data(corpus[fmt])
+    for fields in FIELD_SETS:
+        assert extract_invoice_data(corpus[fmt], fields=fields) == select_fields(full, fields), fields
+
+
+def test_resolve_fields():
+    assert resolve_fields(["InvoiceNumber"]) == {"InvoiceNumber"}
+    assert resolve_fields(["TotalTax"]) == {"TotalTax", "LineItems"}
+    assert resolve_fields(["PlaceOfSupply"]) == {"PlaceOfSupply", "CustomerGstin", "ShipToGstin"}
+    assert resolve_fields(list(HEADER_FIELDS)) == EXTRACTABLE_FIELDS
+    with pytest.raises(ValueError, match='NoSuchField'):
+        resolve_fields(["InvoiceNumber", "NoSuchField"])
+
+
+def post(client, text, fields):
+    return client.post('/extract', query_string={'fields': fields},
+                       data={'file': (io.BytesIO(text.encode('utf-8')), 'one.txt')})
+
+
+@pytest.mark.parametrize('fields', ['NoSuchField', 'InvoiceNumber,NoSuchField', 'HeaderItem'])
+def test_unknown_fields_are_a_400(client, corpus, fields):
+    response = post(client, corpus[1], fields)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid fields'
+
+
+@pytest.mark.parametrize('cached', [False, True])
+def test_line_items_only(api, client, corpus, monkeypatch, cached):
+    monkeypatch.setattr(api, 'cache', cache.ResultCache() if cached else None)
+    if cached:
+        # Partial results are not cached; a full one is, and is cut down on a hit
+        client.post('/extract', data={'file': (io.BytesIO(corpus[4].encode('utf-8')), 'one.txt')})
+    response = post(client, corpus[4], 'LineItems')
+    assert response.status_code == 200
+    assert response.get_json().get('cache') == ('hit' if cached else None)
+    data = response.get_json()['data']
+    assert data == {"HeaderItem": {}, "LineItems": extract_invoice_data(corpus[4])["LineItems"]}
+    assert len(data["LineItems"]) == 3
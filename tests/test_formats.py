@@ -0,0 +1,136 @@
+import pytest
+
+import formats
+from corpus import paginate
+from formats import FIELD_PATTERNS, FORMAT_CASCADES, detect_format, extract_invoice_data, find_table, parse_table
+
+
+def test_format_9_customer_pan_is_not_taken_from_the_supplier_block(corpus):
+    # "BILL TO .*? PAN No" used to run past the "---" rule into the Bill
+    # From block and return the supplier's PAN as the customer's
+    header = extract_invoice_data(corpus[9])["HeaderItem"]
+    assert header["SupplierPanNumber"] == "AAFCG5678H"
+    assert header["CustomerPanNumber"] == ""
+
+
+def test_spanning_fields_stop_at_a_rule():
+    text = "BILL TO\nAddress : 1 Main Road\n---\nPAN No: AAFCG5678H\n"
+    assert extract_invoice_data(text)["HeaderItem"]["CustomerPanNumber"] == ""
+    text = "BILL TO\nAddress : 1 Main Road\nPAN No: AACCH1234R\n"
+    assert extract_invoice_data(text)["HeaderItem"]["CustomerPanNumber"] == "AACCH1234R"
+
+
+def test_customer_pan_of_the_other_layouts(corpus):
+    pans = {fmt: extract_invoice_data(text)["HeaderItem"]["CustomerPanNumber"] for fmt, text in corpus.items()}
+    assert pans == {1: "", 2: "", 3: "", 4: "AAACU7890P", 5: "", 6: "", 7: "", 8: "AAACT2727Q", 9: "", 10: ""}
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_each_layout_is_fingerprinted_as_its_own_format(corpus, fmt):
+    assert detect_format(corpus[fmt]) == fmt
+    assert detect_format(paginate(corpus[fmt], 3)) == fmt
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_the_format_cascades_give_the_full_cascade_result(corpus, fmt, monkeypatch):
+    fingerprinted = extract_invoice_data(corpus[fmt])
+    monkeypatch.setattr(formats, 'detect_format', lambda text: None)
+    assert extract_invoice_data(corpus[fmt]) == fingerprinted
+
+
+def test_format_cascades_keep_the_original_order():
+    for cascades in FORMAT_CASCADES.values():
+        for field, alternatives in cascades.items():
+            positions = [FIELD_PATTERNS[field].index(alternative) for alternative in alternatives]
+            assert positions == sorted(positions)
+
+
+def test_unknown_and_ambiguous_layouts_run_every_cascade(corpus):
+    assert detect_format('Invoice\nTotal: 100\n') is None
+    assert detect_format('') is None
+    # One marker of Format 1 and one of Format 2
+    tied = '| S.No | Description | HSN/SAC |\n| No. Of Packages |\n'
+    assert detect_format(tied) is None
+
+    # Only Format 10's cascade knows this label
+    text = '| Invoice No | : PA2300912 |\n'
+    assert detect_format(text) is None
+    assert extract_invoice_data(text)["HeaderItem"]["InvoiceNumber"] == "PA2300912"
+    assert not any(alternative.pattern.search(text) for alternative in FORMAT_CASCADES[1]["InvoiceNumber"])
+
+
+# First row of each line item table in the corpus, keyed by the format whose
+# table pattern finds it (Format 8 is a numbered list, not a table)
+FIRST_ROWS = {
+    1: {'sr_no': '1', 'description': 'Widget type 1', 'hsn': '84713011', 'batch': 'B1', 'quantity': '2 NOS',
+        'rate': '100.00', 'discount': '0', 'taxable': '200.00', 'igst': '0.00', 'cgst': '18.00', 'sgst': '18.00',
+        'amount': '236.00'},
+    2: {'description': 'Steel Rod 1', 'uom': 'KGS', 'quantity': '10', 'rate': '60.00', 'amount': '600.00'},
+    3: {'sr_no': '1', 'description': 'Annual maintenance visit 1', 'hsn': '998719', 'amount': '5000.00'},
+    4: {'description': 'Brass Fittings 1', 'uom': 'KGS', 'quantity': '12', 'rate': '450.00', 'amount': '5400.00'},
+    5: {'sr_no': '1', 'description': 'Paracetamol 500mg pack 1', 'hsn': '30049099', 'batch': 'BT01',
+        'quantity': '10', 'uom': 'NOS', 'rate': '12.50', 'amount': '125.00', 'discount': '0', 'taxable': '125.00',
+        'cgst': '', 'sgst': '', 'igst': ''},
+    6: {'sr_no': '1', 'description': 'Sports Shoe model 1', 'hsn': '64041190', 'quantity': '2', 'rate': '850.00',
+        'taxable': '1700.00', 'cgst_rate': '6%', 'cgst': '102.00', 'sgst_rate': '6%', 'sgst': '102.00', 'igst': ''},
+    7: {'sr_no': '1', 'description': 'LED Panel 1', 'hsn': '940540', 'uom': 'Nos', 'quantity': '4',
+        'rate': '1250.00', 'amount': '5000.00'},
+    9: {'sr_no': '1', 'start': 'Conference hall booking 1 2023-01-02 10:00', 'end': '2023-01-02 18:00',
+        'quantity': '1', 'pax': '10', 'rate': '1500.00', 'amount': '1500.00'},
+    10: {'sr_no': '1', 'description': 'Mixer Grinder 1', 'hsn': '850940', 'quantity': '1', 'rate': '3,000.00',
+         'value': '3000.00', 'discount': '0.00', 'handling': '0.00', 'taxable': '3000.00', 'igst_rate': '18%',
+         'cgst_rate': '0%', 'sgst_rate': '0%', 'tax': '540.00'},
+}
+
+
+def change_table_body(fmt, text, change):
+    """text with change() applied to the body of format fmt's line item table"""
+    start, end = find_table(fmt, text).span(1)
+    return text[:start] + change(text[start:end]) + text[end:]
+
+
+def without_outer_pipes(body):
+    return '\n'.join(line.strip().strip('|') if line.strip().startswith('|') else line for line in body.split('\n'))
+
+
+@pytest.mark.parametrize('fmt', FIRST_ROWS)
+def test_each_table_layout_maps_its_cells(corpus, fmt):
+    # Footer rows ("| Total | 3540.00 |", "| GRAND TOTAL | ... |", "| TOTAL | ... |") are not rows
+    rows = parse_table(fmt, corpus[fmt])
+    assert len(rows) == 3
+    assert rows[0] == FIRST_ROWS[fmt]
+    assert parse_table(fmt, 'Invoice\nTotal: 100\n') is None
+
+
+@pytest.mark.parametrize('fmt', FIRST_ROWS)
+def test_crlf_and_missing_outer_pipes_give_the_same_rows(corpus, fmt):
+    rows = parse_table(fmt, corpus[fmt])
+    assert parse_table(fmt, corpus[fmt].replace('\n', '\r\n')) == rows
+    assert parse_table(fmt, change_table_body(fmt, corpus[fmt], without_outer_pipes)) == rows
+
+
+@pytest.mark.parametrize('fmt, cell, blank, count', [
+    # Cells a row may leave blank
+    (1, '| 2 | Widget', '|  | Widget', 3),
+    (2, '| KGS | 10 |', '|  | 10 |', 3),
+    (5, '| BT01 |', '|  |', 3),
+    (7, '| 940540 |', '|  |', 3),
+    # Cells it may not: the row is not a line item
+    (3, '| 998719 |', '|  |', 2),
+    (4, '| 450.00 |', '|  |', 2),
+    (6, '| 850.00 |', '|  |', 2),
+    (9, '| 1500.00 | 1500.00 |', '| 1500.00 |  |', 2),
+    (10, '| 3,000.00 |', '|  |', 2),
+])
+def test_blank_cells(corpus, fmt, cell, blank, count):
+    assert cell in corpus[fmt]
+    assert len(parse_table(fmt, corpus[fmt].replace(cell, blank, 1))) == count
+
+
+def test_format_1_keeps_rows_without_a_serial_number_and_skips_total_rows(corpus):
+    text = corpus[1].replace('| 2 | Widget', '|  | Widget')
+    text = text.replace('708.00 |\n', '708.00 |\n| | Total | | | | | | | | 1200.00 | 0.00 | 108.00 | 108.00 | 1416.00 |\n')
+    data = extract_invoice_data(text)
+    assert [item["Description"] for item in data["LineItems"]] == ['Widget type 1', 'Widget type 2', 'Widget type 3']
+    assert data["HeaderItem"]["TotalInvoiceAmount"] == "1416.00"
+    assert data == extract_invoice_data(corpus[1])
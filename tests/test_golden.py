@@ -0,0 +1,28 @@
+"""
+extract_invoice_data() on every corpus layout against checked-in results.
+
+tests/golden/format<N>.json is the output for build_corpus(3)[N]. After an
+intended change of results, rewrite them with
+
+    UPDATE_GOLDEN=1 python -m pytest tests/test_golden.py
+
+and review the diff.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from formats import extract_invoice_data
+
+GOLDEN = Path(__file__).resolve().parent / 'golden'
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_corpus_results_match_the_golden_files(corpus, fmt):
+    data = extract_invoice_data(corpus[fmt])
+    path = GOLDEN / f'format{fmt}.json'
+    if os.environ.get('UPDATE_GOLDEN'):
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    assert data == json.loads(path.read_text(encoding='utf-8'))
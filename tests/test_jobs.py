@@ -0,0 +1,73 @@
+import io
+import threading
+import time
+
+import pytest
+
+from formats import extract_invoice_data
+from jobs import JobQueue, JobQueueFull, MemoryJobStore, SQLiteJobStore
+
+
+def test_job_round_trip(api, client, corpus):
+    response = client.post('/jobs', data={'file': (io.BytesIO(corpus[2].encode('utf-8')), 'two.txt')})
+    assert response.status_code == 202
+    location = response.get_json()['location']
+    assert response.headers['Location'] == location
+
+    response = client.get(f'{location}?wait=10')
+    assert response.status_code == 200
+    job = response.get_json()
+    assert job['status'] == 'done' and job['filename'] == 'two.txt'
+    assert job['result']['data'] == extract_invoice_data(corpus[2])
+    assert api.job_executor is not None
+
+
+def test_job_pool_is_started_by_the_first_job(api, monkeypatch):
+    monkeypatch.setattr(api, 'job_executor', None)
+    api.warm_up_services()
+    assert api.job_executor is None
+    pool = api.job_pool()
+    assert api.job_pool() is pool
+
+
+def test_unknown_job(client):
+    response = client.get('/jobs/no-such-job')
+    assert response.status_code == 404
+
+
+def test_jobs_are_visible_to_every_process_sharing_the_store(tmp_path, corpus):
+    release = threading.Event()
+
+    def run(text):
+        release.wait(10)
+        return extract_invoice_data(text)
+
+    accepting = JobQueue(SQLiteJobStore(tmp_path / 'jobs.db'), run)
+    other = JobQueue(SQLiteJobStore(tmp_path / 'jobs.db'), run)
+    try:
+        job_id = accepting.submit(corpus[1], 'one.txt')
+        assert other.get(job_id)['status'] in ('queued', 'running')
+        release.set()
+        job = other.get(job_id, wait=10)
+        assert job['status'] == 'done'
+        assert job['result'] == extract_invoice_data(corpus[1])
+    finally:
+        release.set()
+        accepting.shutdown()
+        other.shutdown()
+
+
+def test_full_queue_and_shutdown_fail_queued_jobs():
+    release = threading.Event()
+    jobs = JobQueue(MemoryJobStore(), lambda payload: release.wait(10), max_queued=1)
+    running = jobs.submit('first')
+    while jobs.get(running)['status'] != 'running':
+        time.sleep(0.01)
+    queued = jobs.submit('second')
+    with pytest.raises(JobQueueFull):
+        jobs.submit('third')
+    # shutdown() fails the queued job at once, then waits for the running one
+    threading.Timer(0.2, release.set).start()
+    jobs.shutdown()
+    assert jobs.get(running)['status'] == 'done'
+    assert jobs.get(queued)['status'] == 'failed'
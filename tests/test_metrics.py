@@ -0,0 +1,58 @@
+import io
+
+from metrics import ExtractionMetrics, Histogram, counter, format_value, gauge, histogram
+
+
+def samples(lines):
+    """{series: value text} of the sample lines"""
+    return dict(line.rsplit(' ', 1) for line in lines if not line.startswith('#'))
+
+
+def test_values_are_printed_at_full_precision():
+    lines = []
+    counter(lines, 'c_total', 'c', ('k',), {('a',): 1234567, ('b',): 1234567.125})
+    gauge(lines, 'g', 'g', (), {(): 98765432})
+    observed = Histogram()
+    observed.observe(0.1)
+    observed.observe(1234567.000001)
+    histogram(lines, 'h', 'h', (), {(): observed})
+    values = samples(lines)
+    assert values['c_total{k="a"}'] == '1234567'
+    assert values['c_total{k="b"}'] == '1234567.125'
+    assert values['g'] == '98765432'
+    assert float(values['h_sum']) == 0.1 + 1234567.000001
+    # Bucket bounds keep their short labels
+    assert values['h_bucket{le="0.00025"}'] == '0'
+    assert values['h_bucket{le="0.1"}'] == '1'
+    assert values['h_bucket{le="+Inf"}'] == '2'
+
+
+def test_special_floats():
+    assert [format_value(value) for value in (float('inf'), float('-inf'), float('nan'), 0.5)] == [
+        '+Inf', '-Inf', 'NaN', '0.5'
+    ]
+
+
+def test_counters_past_a_million_keep_counting():
+    metrics = ExtractionMetrics()
+    profile = {'format': 1, 'sections': {'header': 0.001}, 'alternatives': [], 'parsers': []}
+    metrics.extractions['1'] = 1000000
+    metrics.observe(profile)
+    assert samples(metrics.render().splitlines())['invoice_extractions_total{format="1"}'] == '1000001'
+
+
+def test_metrics_endpoint(api, client, corpus, monkeypatch):
+    monkeypatch.setattr(api, 'cache', None)
+    assert client.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(api, 'metrics', ExtractionMetrics())
+    for fmt in (1, 2):
+        response = client.post('/extract', data={'file': (io.BytesIO(corpus[fmt].encode('utf-8')), f'{fmt}.txt')})
+        assert response.status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    values = samples(response.get_data(as_text=True).splitlines())
+    assert values['invoice_extractions_total{format="1"}'] == '1'
+    assert values['invoice_extractions_total{format="2"}'] == '1'
+    assert 'invoice_job_queue_depth' in values
@@ -0,0 +1,73 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from formats import LineItem
+from money import (
+    column_total, exact_float_sum, format_amount, format_rate, parse_amount, rate_of, split_gst, sum_amounts, tax_on
+)
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('1,23,456.78', Decimal('123456.78')),
+    ('18', Decimal('18')),
+    ('', None),
+    (None, None),
+    ('N/A', None),
+    ('NaN', None),
+    ('Infinity', None),
+])
+def test_parse_amount(text, amount):
+    assert parse_amount(text) == amount
+
+
+def test_rounding_and_formatting():
+    assert format_amount(Decimal('0.125')) == '0.13'
+    assert format_amount(Decimal('50409')) == '50409.00'
+    assert format_amount(Decimal('1E+7')) == '10000000.00'
+    assert format_rate(Decimal('18.00')) == '18'
+    assert format_rate(Decimal('2.50')) == '2.5'
+    assert format_rate(rate_of(Decimal('9'), Decimal('50'))) == '18'
+
+
+def test_tax_and_gst_halves():
+    assert tax_on(Decimal('1234.56'), Decimal('18')) == Decimal('222.22')
+    for tax in ('0.01', '0.03', '100.00', '222.21'):
+        cgst, sgst = split_gst(Decimal(tax))
+        assert cgst + sgst == Decimal(tax)
+        assert 0 <= cgst - sgst <= Decimal('0.01')
+
+
+def test_sums_are_exact():
+    # Summed as floats these give 103507.81999999999
+    values = ['19783.48', '83724.34']
+    assert sum(map(float, values)) == 103507.81999999999
+    assert str(sum_amounts(values)) == '103507.82'
+    assert str(sum_amounts(['0.10'] * 3)) == '0.30'
+
+
+def test_float_sums_agree_with_decimal():
+    rng = random.Random(14)
+    for size in (1, 10, 1000):
+        values = [f'{rng.randrange(10 ** rng.randrange(1, 10)) / 100:.2f}' for _ in range(size)]
+        assert exact_float_sum(values) == sum(map(Decimal, values))
+
+
+@pytest.mark.parametrize('values', [
+    ['1.005', '2.00'],        # a third decimal
+    ['-1.00', '2.00'],        # negative
+    ['1e-3', '2.00'],         # negative exponent
+    ['1_000.00'],             # underscore
+    ['१२.००'],                # non-ASCII digits
+    ['1,000.00'],             # grouping commas
+    ['9' * 20],               # past the exact range
+])
+def test_amounts_a_float_sum_cannot_vouch_for_are_summed_in_decimal(values):
+    assert exact_float_sum(values) is None
+    assert sum_amounts(values) == sum(filter(None, map(parse_amount, values)), Decimal(0))
+
+
+def test_column_total():
+    rows = [LineItem(TaxableValue=amount) for amount in ('100.10', '', 'n/a', '1,000.20')]
+    assert column_total(rows, 'TaxableValue') == Decimal('1100.30')
@@ -0,0 +1,70 @@
+import pytest
+
+from formats import extract_invoice_data
+from plans import PlanStore
+
+
+def supplier(text):
+    return extract_invoice_data(text)["HeaderItem"]["SupplierGstin"]
+
+
+def learn(store, texts, times=None):
+    for _ in range(times or store.confirm):
+        for text in texts:
+            extract_invoice_data(text, plans=store)
+
+
+def test_replayed_plans_give_the_full_result(corpus):
+    store = PlanStore(verify_every=0)
+    learn(store, corpus.values())
+    with_gstin = [text for text in corpus.values() if supplier(text)]
+    assert store.stats()['trusted'] == len({supplier(text) for text in with_gstin})
+    for text in corpus.values():
+        assert extract_invoice_data(text, plans=store) == extract_invoice_data(text)
+    assert store.stats()['replays'] == len(with_gstin)
+    assert store.stats()['fallbacks'] == 0
+
+
+def test_a_plan_is_trusted_after_confirm_identical_extractions(corpus):
+    store = PlanStore(confirm=3, verify_every=0)
+    gstin = supplier(corpus[1])
+    learn(store, [corpus[1]], times=2)
+    assert store.get(gstin) is None
+    learn(store, [corpus[1]], times=1)
+    assert store.get(gstin) is not None
+
+
+def test_every_nth_document_is_extracted_in_full(corpus):
+    store = PlanStore(verify_every=3)
+    gstin = supplier(corpus[1])
+    learn(store, [corpus[1]])
+    assert [store.get(gstin) is not None for _ in range(6)] == [True, True, False, True, True, False]
+
+
+# The supplier drops its PO number, or relabels its invoice number so
+# that the document no longer fingerprints as Format 1
+@pytest.mark.parametrize('old, new', [('PO No: PO4455\n', ''),
+                                      ('Invoice No: INV/2023/001', 'Our F.I. No. : INV/2023/001')])
+def test_a_recorded_alternative_that_misses_falls_back_and_relearns(corpus, old, new):
+    store = PlanStore(verify_every=0)
+    learn(store, [corpus[1]])
+    changed = corpus[1].replace(old, new)
+    assert changed != corpus[1]
+    assert extract_invoice_data(changed, plans=store) == extract_invoice_data(changed)
+    assert store.stats()['fallbacks'] == 1
+    # The plan learned from it replaces the old one once confirmed
+    learn(store, [changed])
+    assert extract_invoice_data(changed, plans=store) == extract_invoice_data(changed)
+    assert store.stats()['fallbacks'] == 1
+
+
+def test_plans_are_kept_in_the_sqlite_file(corpus, tmp_path, monkeypatch):
+    path = tmp_path / 'plans.db'
+    store = PlanStore(path, verify_every=0)
+    learn(store, [corpus[1]])
+    reopened = PlanStore(path, verify_every=0)
+    assert reopened.get(supplier(corpus[1])) == store.get(supplier(corpus[1]))
+
+    # Another extractor version drops them
+    monkeypatch.setattr('cache.EXTRACTOR_VERSION', 'edited')
+    assert PlanStore(path).stats()['suppliers'] == 0
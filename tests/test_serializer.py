@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import serializer
+from formats import extract_invoice_data
+from money import format_amount, format_rate, rate_of, tax_on
+from serializer import JsonSerializer, OrjsonSerializer, create_serializer
+
+needs_orjson = pytest.mark.skipif(serializer.orjson is None, reason='orjson is not installed')
+
+DOCUMENTS = {
+    'non-ASCII': {'Description': '₹ 1,234 — “Sports Shoe” café 😀', 'Place': 'मुंबई'},
+    'escapes': {'Text': 'tab\there\nquote " backslash \\ control \x01 \x7f  '},
+    'money': {
+        'Amount': format_amount(Decimal('123456.785')),
+        'Tax': format_amount(tax_on(Decimal('1700.00'), Decimal('6'))),
+        'Rate': format_rate(rate_of(Decimal('18.00'), Decimal('200.00'))),
+        'Zero': format_amount(Decimal('0')),
+    },
+    # Insertion order, not sorted
+    'key order': {'z': 1, 'a': [True, None, -2], 'm': {}, 'b': [], '': ''},
+}
+
+
+@pytest.fixture(params=['json', pytest.param('orjson', marks=needs_orjson)])
+def backend(request):
+    return create_serializer(request.param)
+
+
+def test_documents_round_trip_in_insertion_order(backend):
+    for document in DOCUMENTS.values():
+        for pretty in (False, True):
+            encoded = backend.dumps(document, pretty=pretty)
+            assert json.loads(encoded) == document
+            assert list(json.loads(encoded)) == list(document)
+        assert backend.ndjson_line(document).endswith(b'\n')
+        assert b'\n' not in backend.ndjson_line(document)[:-1]
+    # Non-ASCII text is left as is, not escaped
+    assert '₹'.encode('utf-8') in backend.dumps(DOCUMENTS['non-ASCII'])
+    assert backend.dumps(DOCUMENTS['money']) == (
+        b'{"Amount":"123456.79","Tax":"102.00","Rate":"9","Zero":"0.00"}'
+    )
+
+
+@needs_orjson
+@pytest.mark.parametrize('pretty', [False, True])
+def test_both_backends_give_the_same_bytes(corpus, pretty):
+    documents = [*DOCUMENTS.values(), *(extract_invoice_data(text) for text in corpus.values())]
+    for document in documents:
+        assert OrjsonSerializer().dumps(document, pretty=pretty) == JsonSerializer().dumps(document, pretty=pretty)
+        assert OrjsonSerializer().ndjson_line(document) == JsonSerializer().ndjson_line(document)
+
+
+def test_create_serializer(monkeypatch):
+    monkeypatch.setenv('JSON_SERIALIZER', 'json')
+    assert create_serializer().name == 'json'
+    with pytest.raises(ValueError, match='Unknown serializer'):
+        create_serializer('yaml')
+    monkeypatch.setattr(serializer, 'orjson', None)
+    monkeypatch.delenv('JSON_SERIALIZER')
+    assert create_serializer().name == 'json'
+    with pytest.raises(ValueError, match='not installed'):
+        create_serializer('orjson')
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+import formats
+
+
+def test_concurrent_first_requests_build_the_services_once(api, monkeypatch):
+    for name in ('cache', 'metrics', 'serializer', 'jobs', 'job_executor'):
+        monkeypatch.setattr(api, name, getattr(api, name))
+    monkeypatch.setattr(api, 'executor', None)
+    built = []
+    init_services = api.init_services
+
+    def counting_init():
+        built.append(threading.get_ident())
+        time.sleep(0.05)
+        init_services()
+
+    monkeypatch.setattr(api, 'init_services', counting_init)
+    start = threading.Barrier(8)
+
+    def first_request():
+        start.wait()
+        with api.app.test_request_context('/health'):
+            api.ensure_services()
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert api.executor is not None and api.jobs is not None
+
+
+@pytest.fixture
+def unready(api, monkeypatch):
+    """The app as a freshly started process: not warmed up yet"""
+    monkeypatch.setattr(api, 'ready', threading.Event())
+    monkeypatch.setattr(api, 'warm_up_seconds', None)
+    monkeypatch.setattr(api, 'warm_up_error', None)
+    return api
+
+
+def test_ready_only_once_the_warm_up_has_finished(unready, client, monkeypatch):
+    running, release = threading.Event(), threading.Event()
+    warm_up = unready.warm_up
+
+    def held_warm_up():
+        running.set()
+        release.wait(5)
+        return warm_up()
+
+    monkeypatch.setattr(unready, 'warm_up', held_warm_up)
+    thread = threading.Thread(target=unready.warm_up_services)
+    thread.start()
+    assert running.wait(5)
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'warming up'
+    assert response.headers['Retry-After'] == '1'
+
+    release.set()
+    thread.join(5)
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+    assert response.get_json()['warm_up_seconds'] > 0
+
+
+def test_a_failing_self_test_keeps_the_process_unready(unready, client, monkeypatch):
+    monkeypatch.setattr(formats, 'SELF_TEST_INVOICE', formats.SELF_TEST_INVOICE.replace('INV/2023/001', 'INV/2023/999'))
+    with pytest.raises(RuntimeError, match='Self-test extraction failed'):
+        formats.warm_up()
+    unready.warm_up_services()
+    assert not unready.ready.is_set()
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'failed'
+    assert 'Self-test extraction failed' in response.get_json()['message']
+    # Serving is not blocked: only the readiness probe reports the failure
+    assert client.get('/health').status_code == 200
@@ -0,0 +1,96 @@
+import itertools
+
+import pytest
+
+from corpus import paginate
+from formats import extract_invoice_data
+from splitter import Segment, extract_invoices, split_invoices
+
+
+def extract_all(texts, fields):
+    return [extract_invoice_data(text, fields=fields) for text in texts]
+
+
+def assert_split(text, invoices, separator_at, separator):
+    """invoices were found in text, joined by separator at offset separator_at"""
+    found = extract_invoices(text, extract_all)
+    assert len(found) == len(invoices)
+    assert found[0]["start"] == 0 and found[-1]["end"] == len(text)
+    for previous, following in zip(found, found[1:]):
+        assert previous["end"] == following["start"]
+    assert separator_at <= found[1]["start"] <= separator_at + len(separator)
+    assert [invoice["data"] for invoice in found] == [extract_invoice_data(invoice) for invoice in invoices]
+
+
+@pytest.mark.parametrize('first, second', list(itertools.permutations(range(1, 11), 2)))
+def test_every_pair_of_formats_across_a_page_break(corpus, first, second):
+    text = corpus[first] + '\n\f' + corpus[second]
+    assert_split(text, [corpus[first], corpus[second]], len(corpus[first]), '\n\f')
+
+
+@pytest.mark.parametrize('first, second', list(itertools.permutations(range(1, 11), 2)))
+def test_every_pair_of_formats_on_one_page(corpus, first, second):
+    if not corpus[second].startswith('#'):
+        pytest.skip('an invoice opening without a heading is only found after a page break')
+    text = corpus[first] + '\n' + corpus[second]
+    assert_split(text, [corpus[first], corpus[second]], len(corpus[first]), '\n')
+
+
+def test_heading_after_an_invoice_without_headings(corpus):
+    # Format 4 has a title and a table but no heading
+    text = corpus[4] + '\n' + corpus[3]
+    assert split_invoices(text) == [Segment(0, len(corpus[4]) + 1), Segment(len(corpus[4]) + 1, len(text))]
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_invoices_of_one_layout(corpus, fmt):
+    header = extract_invoice_data(corpus[fmt])["HeaderItem"]
+    invoices = []
+    for n in range(3):
+        invoice = corpus[fmt]
+        if header["InvoiceNumber"]:
+            invoice = invoice.replace(header["InvoiceNumber"], f'{header["InvoiceNumber"]}{n}')
+        if header["IrnNo"]:
+            invoice = invoice.replace(header["IrnNo"], f'{header["IrnNo"][:-1]}{n}')
+        invoices.append(invoice)
+    text = '\n'.join(invoices)
+    assert [invoice["data"] for invoice in extract_invoices(text, extract_all)] == extract_all(invoices, None)
+
+
+@pytest.mark.parametrize('fmt', range(1, 11))
+def test_pages_of_one_invoice_stay_together(corpus, fmt):
+    text = paginate(corpus[fmt], 3)
+    assert extract_invoices(text, extract_all) == [{"start": 0, "end": len(text), "data": extract_invoice_data(text)}]
+
+
+def test_fields_are_selected_after_folding(corpus):
+    text = corpus[1] + '\n\f' + corpus[2]
+    found = extract_invoices(text, extract_all, fields=["TotalInvoiceAmount"])
+    assert [invoice["data"] for invoice in found] == [
+        {"HeaderItem": {"TotalInvoiceAmount": extract_invoice_data(invoice)["HeaderItem"]["TotalInvoiceAmount"]}}
+        for invoice in (corpus[1], corpus[2])
+    ]
+
+
+def test_text_without_invoices():
+    assert split_invoices('') == [Segment(0, 0)]
+    assert split_invoices('\f\n\f') == [Segment(0, 3)]
+
+
+def test_every_invoice_is_extracted_once(corpus):
+    # Three pages of one invoice, then a second invoice
+    text = paginate(corpus[1], 3) + '\n\f' + corpus[2]
+    calls = []
+
+    def counting(texts, fields):
+        calls.append((len(texts), fields))
+        return extract_all(texts, fields)
+
+    found = extract_invoices(text, counting)
+    assert [invoice["data"] for invoice in found] == extract_all([paginate(corpus[1], 3), corpus[2]], None)
+    # The segments' invoice numbers and IRNs, then the folded invoices in full
+    assert calls == [(4, ["InvoiceNumber", "IrnNo"]), (2, None)]
+
+    calls.clear()
+    extract_invoices(corpus[3], counting)
+    assert calls == [(1, None)]
@@ -0,0 +1,104 @@
+import re
+import signal
+import threading
+import time
+
+import pytest
+
+import formats
+from formats import FIELD_PATTERNS, TimeBudget, extract_invoice_data
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, 'setitimer'), reason='needs SIGALRM')
+
+# Backtracks 2**n times on n "a"s without a match
+CATASTROPHIC = re.compile(r'(a+)+$')
+
+
+@pytest.fixture
+def slow_invoice_number(monkeypatch):
+    """
+    Make every InvoiceNumber alternative run a catastrophic search of
+    state['size'] "a"s first; state['finished'] counts those that ran to the end
+    """
+    slow = {id(alternative) for alternative in FIELD_PATTERNS["InvoiceNumber"]}
+    search_alternative = formats.search_alternative
+    state = {'size': 40, 'finished': 0}
+
+    def search(alternative, text, *args):
+        if id(alternative) in slow:
+            CATASTROPHIC.search('a' * state['size'] + 'b')
+            state['finished'] += 1
+        return search_alternative(alternative, text, *args)
+
+    monkeypatch.setattr(formats, 'search_alternative', search)
+    return state
+
+
+def test_a_runaway_search_is_interrupted_at_the_pattern_timeout():
+    start = time.monotonic()
+    with TimeBudget(pattern_timeout=0.1, document_timeout=None) as budget:
+        assert budget.run('Field', CATASTROPHIC.search, 'a' * 40 + 'b') is None
+        assert budget.run('Other', re.search, 'b', 'ab') is not None
+    assert time.monotonic() - start < 2
+    assert budget.timed_out == ['Field']
+
+
+def test_pattern_timeout_empties_the_field(corpus, slow_invoice_number):
+    data = extract_invoice_data(corpus[1], pattern_timeout=0.05, document_timeout=None)
+    assert data["TimedOutFields"] == ["InvoiceNumber"]
+    assert data["HeaderItem"]["InvoiceNumber"] == ""
+    assert slow_invoice_number['finished'] == 0
+    # Everything else is extracted as usual
+    slow_invoice_number['size'] = 0
+    expected = extract_invoice_data(corpus[1])
+    expected["HeaderItem"]["InvoiceNumber"] = ""
+    del data["TimedOutFields"]
+    assert data == expected
+
+
+def test_document_timeout_stops_the_extraction(corpus, slow_invoice_number):
+    start = time.monotonic()
+    data = extract_invoice_data(corpus[1], pattern_timeout=None, document_timeout=0.2)
+    assert time.monotonic() - start < 2
+    assert data["TimedOutFields"][0] == "InvoiceNumber"
+    assert "LineItems" in data["TimedOutFields"]
+
+
+def test_the_previous_handler_and_timer_are_restored():
+    fired = []
+
+    def handler(signum, frame):
+        fired.append(signum)
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.3)
+        with TimeBudget(pattern_timeout=0.05, document_timeout=1) as budget:
+            budget.run('Field', CATASTROPHIC.search, 'a' * 40 + 'b')
+        assert signal.getsignal(signal.SIGALRM) is handler
+        assert 0 < signal.getitimer(signal.ITIMER_REAL)[0] < 0.3
+        time.sleep(0.5)
+        assert fired == [signal.SIGALRM]
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def test_off_the_main_thread_only_the_checks_between_searches_apply(corpus, slow_invoice_number):
+    # Several tenths of a second per search: longer than both budgets, but it finishes
+    slow_invoice_number['size'] = 22
+    results = {}
+
+    def extract():
+        with TimeBudget(pattern_timeout=0.01, document_timeout=None) as budget:
+            results['alarm'] = budget.use_alarm
+        results['data'] = extract_invoice_data(corpus[1], pattern_timeout=0.01, document_timeout=0.1)
+
+    thread = threading.Thread(target=extract)
+    thread.start()
+    thread.join()
+    assert results['alarm'] is False
+    # The first slow search ran to the end, past both budgets; nothing ran after it
+    assert slow_invoice_number['finished'] == 1
+    timed_out = results['data']["TimedOutFields"]
+    assert timed_out[0] == "InvoiceNumber" and "LineItems" in timed_out
@@ -0,0 +1,96 @@
+import io
+import tempfile
+
+import pytest
+
+DOCUMENTS = {
+    'text': 'Invoice No: ₹ 1,234 — “quoted”\n'.encode('utf-8') * 3,
+    'empty': b'',
+    'invalid': b'Invoice \xff\xfe No',
+    'split character': b'a' * 99 + '₹'.encode('utf-8'),
+}
+
+
+def spooled(data, on_disk):
+    stream = tempfile.SpooledTemporaryFile(max_size=0 if on_disk else len(data) + 1)
+    stream.write(data)
+    if on_disk:
+        stream.rollover()
+    stream.seek(0)
+    return stream
+
+
+def expected(data):
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDecodeError
+
+
+@pytest.fixture
+def paths(api, monkeypatch):
+    """Names of the decoding paths read_upload() took"""
+    taken = []
+    mmap, decode_stream = api.mmap.mmap, api.decode_stream
+
+    class Mapped(mmap):
+        def __new__(cls, *args, **kwargs):
+            taken.append('mmap')
+            return mmap.__new__(cls, *args, **kwargs)
+
+    def chunked(stream):
+        taken.append('chunks')
+        return decode_stream(stream)
+
+    monkeypatch.setattr(api.mmap, 'mmap', Mapped)
+    monkeypatch.setattr(api, 'decode_stream', chunked)
+    return taken
+
+
+def decode(api, stream):
+    try:
+        return api.read_upload(stream)
+    except UnicodeDecodeError:
+        return UnicodeDecodeError
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+@pytest.mark.parametrize('kind, path', [
+    ('spooled to disk', ['mmap']),
+    ('spooled in memory', []),
+    ('bytes buffer', []),
+    ('other stream', ['chunks']),
+])
+def test_every_path_decodes_like_bytes_decode(api, paths, monkeypatch, name, kind, path):
+    data = DOCUMENTS[name]
+    if kind == 'spooled to disk':
+        stream = spooled(data, on_disk=True)
+        # An empty file cannot be mapped
+        path = path if data else ['chunks']
+    elif kind == 'spooled in memory':
+        stream = spooled(data, on_disk=False)
+    elif kind == 'bytes buffer':
+        stream = io.BytesIO(data)
+    else:
+        stream = io.BufferedReader(io.BytesIO(data))
+        # Chunks that cut multi-byte characters in two
+        monkeypatch.setattr(api, 'UPLOAD_CHUNK_SIZE', 10)
+    assert decode(api, stream) == expected(data)
+    assert paths == path
+
+
+@pytest.mark.parametrize('size, status', [(600 * 1024, 200), (100, 200), (0, 200)])
+def test_uploads_of_every_size(client, paths, size, status):
+    data = (b'Invoice No: INV-1\n' * (size // 18 + 1))[:size]
+    response = client.post('/extract', data={'file': (io.BytesIO(data), 'one.txt')})
+    assert response.status_code == status
+    # Werkzeug spools uploads over 500 KB to disk
+    assert paths == (['mmap'] if size > 500 * 1024 else [])
+
+
+@pytest.mark.parametrize('size', [600 * 1024, 100])
+def test_invalid_utf8_is_a_400(client, size):
+    data = b'\xff' + b'a' * size
+    response = client.post('/extract', data={'file': (io.BytesIO(data), 'one.txt')})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'File encoding error'
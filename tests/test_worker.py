@@ -0,0 +1,86 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from formats import extract_invoice_data
+from splitter import extract_invoices
+from worker import FRAMINGS, LENGTH_PREFIX, serve
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(requests, framing='ndjson', raw=b''):
+    """(exit status, responses) of a worker answering requests (dicts or raw bodies)"""
+    read_requests, frame = FRAMINGS[framing]
+    bodies = [request if isinstance(request, bytes) else json.dumps(request).encode('utf-8') for request in requests]
+    stdin = io.BytesIO(b''.join(frame(body) for body in bodies) + raw)
+    stdout = io.BytesIO()
+    status = serve(stdin, stdout, framing=framing)
+    stdout.seek(0)
+    return status, [json.loads(body) for body in read_requests(stdout)]
+
+
+@pytest.mark.parametrize('framing', ['ndjson', 'length'])
+def test_requests_are_answered_in_order_by_id(corpus, framing):
+    status, responses = run([{'id': fmt, 'text': text} for fmt, text in corpus.items()], framing)
+    assert status == 0
+    assert responses[0]['id'] is None and responses[0]['ready'] is True
+    assert responses[1:] == [{'id': fmt, 'data': extract_invoice_data(text)} for fmt, text in corpus.items()]
+
+
+def test_path_fields_and_split(corpus, tmp_path):
+    path = tmp_path / 'batch.txt'
+    path.write_text(corpus[1] + '\n\f' + corpus[2], encoding='utf-8')
+    status, responses = run([
+        {'id': 'a', 'path': str(path), 'fields': ['InvoiceNumber']},
+        {'id': 'b', 'path': str(path), 'split': True},
+    ])
+    text = path.read_text(encoding='utf-8')
+    assert responses[1] == {'id': 'a', 'data': extract_invoice_data(text, fields=['InvoiceNumber'])}
+    assert responses[2]['data'] == extract_invoices(
+        text, lambda texts, fields: [extract_invoice_data(t, fields=fields) for t in texts]
+    )
+
+
+def test_bad_requests_get_errors_and_the_worker_carries_on(corpus, tmp_path):
+    status, responses = run([
+        b'{not json',
+        b'[1, 2]',
+        {'id': 1},
+        {'id': 2, 'text': 42},
+        {'id': 3, 'path': str(tmp_path / 'missing.txt')},
+        {'id': 4, 'text': corpus[1], 'fields': 'InvoiceNumber'},
+        {'id': 5, 'text': corpus[1], 'fields': ['NoSuchField']},
+        {'id': 6, 'text': corpus[1]},
+    ])
+    assert status == 0
+    assert [response['id'] for response in responses[1:]] == [None, None, 1, 2, 3, 4, 5, 6]
+    assert all('error' in response for response in responses[1:-1])
+    assert responses[-1] == {'id': 6, 'data': extract_invoice_data(corpus[1])}
+
+
+def test_blank_ndjson_lines_are_skipped(corpus):
+    status, responses = run([], raw=b'\n  \n' + json.dumps({'id': 1, 'text': corpus[3]}).encode() + b'\n\n')
+    assert [response.get('id') for response in responses] == [None, 1]
+
+
+def test_stdin_closed_inside_a_message(corpus):
+    body = json.dumps({'id': 1, 'text': corpus[1]}).encode('utf-8')
+    status, responses = run([{'id': 0, 'text': corpus[2]}], 'length', raw=LENGTH_PREFIX.pack(len(body)) + body[:10])
+    assert status == 1
+    assert [response.get('id') for response in responses] == [None, 0]
+
+
+def test_command_line_worker(corpus):
+    finished = subprocess.run(
+        [sys.executable, str(ROOT / 'formats.py'), '--worker'],
+        input=json.dumps({'id': 'x', 'text': corpus[5]}).encode('utf-8') + b'\n',
+        capture_output=True, check=True, timeout=60
+    )
+    responses = [json.loads(line) for line in finished.stdout.splitlines()]
+    assert responses[0]['ready'] is True
+    assert responses[1] == {'id': 'x', 'data': extract_invoice_data(corpus[5])}
@@ -0,0 +1,176 @@
+"""
+Persistent worker mode: python c.py --worker
+
+For hosts that would otherwise start python c.py once per document and
+pay interpreter startup, imports and pattern compilation every time. The
+worker starts once, runs the warm-up self-test and then serves requests
+from stdin until it is closed, writing one response per request to
+stdout. Diagnostics go to stderr; stdout carries nothing but responses.
+
+Requests are JSON objects:
+
+    {"id": 7, "text": "...invoice text..."}
+    {"id": "a1", "path": "/data/in/5108975.txt", "fields": ["InvoiceNumber"], "split": true}
+
+    id       any JSON value, echoed in the response
+    text     the document, or
+    path     a UTF-8 text file to read it from
+    fields   optional, as extract_invoice_data(fields=...)
+    split    optional, the document may hold several invoices (splitter.py)
+
+Responses are {"id": ..., "data": ...} or {"id": ..., "error": "..."}; an
+unreadable request is answered with "id": null. Before the first one
+the worker writes {"id": null, "ready": true, "pid": ..., "warm_up_seconds":
+...}.
+
+Framing (--framing):
+
+    ndjson    one JSON object per line
+    length    every message is a 4-byte big-endian length followed by that
+              many bytes of UTF-8 JSON (DataOutputStream.writeInt framing)
+
+Requests are read while earlier ones are still being extracted: with
+--workers N > 1 up to 4N documents are in flight on a process pool and
+responses come back as they finish, not in request order, so hosts match
+them by id. With one worker (the default) documents are extracted in this
+process, one after the other, and answered in order.
+"""
+import json
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import wait
+from functools import partial
+
+from formats import resolve_fields, warm_up
+from serializer import create_serializer
+
+LENGTH_PREFIX = struct.Struct('>I')
+
+
+def read_ndjson(stream):
+    """Request bodies of an NDJSON stream; blank lines are skipped"""
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def read_length_prefixed(stream):
+    """Request bodies of a length-prefixed stream"""
+    while True:
+        prefix = stream.read(LENGTH_PREFIX.size)
+        if not prefix:
+            return
+        if len(prefix) < LENGTH_PREFIX.size:
+            raise EOFError('stdin closed inside a length prefix')
+        size, = LENGTH_PREFIX.unpack(prefix)
+        body = stream.read(size)
+        if len(body) < size:
+            raise EOFError(f'stdin closed after {len(body)} of {size} bytes')
+        yield body
+
+
+def frame_ndjson(body):
+    return body + b'\n'
+
+
+def frame_length_prefixed(body):
+    return LENGTH_PREFIX.pack(len(body)) + body
+
+
+# framing: (request reader, response framer)
+FRAMINGS = {
+    'ndjson': (read_ndjson, frame_ndjson),
+    'length': (read_length_prefixed, frame_length_prefixed),
+}
+
+
+def request_text(request):
+    """The document of a request: its "text", or the contents of its "path" """
+    if 'text' in request:
+        if not isinstance(request['text'], str):
+            raise ValueError('"text" must be a string')
+        return request['text']
+    if 'path' in request:
+        with open(request['path'], 'r', encoding='utf-8') as f:
+            return f.read()
+    raise ValueError('a request needs "text" or "path"')
+
+
+def serve(stdin, stdout, framing='ndjson', workers=1):
+    """
+    Answer the requests on stdin (binary) on stdout (binary) until stdin
+    is closed and every request is answered; returns the exit status.
+    """
+    from executor import create_executor
+
+    read_requests, frame = FRAMINGS[framing]
+    serializer = create_serializer()
+    write_lock = threading.Lock()
+    pending = set()
+    pending_lock = threading.Lock()
+
+    def send(message):
+        body = frame(serializer.dumps(message))
+        with write_lock:
+            stdout.write(body)
+            stdout.flush()
+
+    def finish(request_id, future):
+        with pending_lock:
+            pending.discard(future)
+        try:
+            message = {'id': request_id, 'data': future.result()}
+        except Exception as e:
+            message = {'id': request_id, 'error': f'Extraction failed: {e}'}
+        try:
+            send(message)
+        except (BrokenPipeError, ValueError):
+            # The host is gone; nothing left to answer
+            pass
+
+    executor = create_executor('inline' if workers == 1 else 'process', workers=workers)
+    try:
+        warm_up_seconds = warm_up()
+        executor.warm()
+        send({'id': None, 'ready': True, 'pid': os.getpid(), 'warm_up_seconds': round(warm_up_seconds, 6)})
+        for body in read_requests(stdin):
+            try:
+                request = json.loads(body)
+                if not isinstance(request, dict):
+                    raise ValueError('a request must be a JSON object')
+            except ValueError as e:
+                send({'id': None, 'error': f'Invalid request: {e}'})
+                continue
+            request_id = request.get('id')
+            try:
+                text = request_text(request)
+                fields = request.get('fields')
+                if fields is not None:
+                    if not isinstance(fields, list):
+                        raise ValueError('"fields" must be a list of field names')
+                    resolve_fields(fields)
+            except (OSError, UnicodeDecodeError, ValueError, TypeError) as e:
+                send({'id': request_id, 'error': str(e)})
+                continue
+            # Blocks while the executor is full: the host's writes back up
+            # instead of the worker queueing without limit
+            future = executor.submit(text, block=True, fields=fields, split=bool(request.get('split')))
+            with pending_lock:
+                pending.add(future)
+            future.add_done_callback(partial(finish, request_id))
+        with pending_lock:
+            unanswered = list(pending)
+        wait(unanswered)
+    except BrokenPipeError:
+        return 1
+    except EOFError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        with pending_lock:
+            unanswered = list(pending)
+        wait(unanswered)
+        return 1
+    finally:
+        executor.shutdown()
+    return 0